@@ -0,0 +1,5 @@
+import sys
+
+from relluna.cli import main
+
+sys.exit(main())
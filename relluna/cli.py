@@ -0,0 +1,136 @@
+"""
+CLI operacional do Relluna.
+
+Usage:
+    relluna reprocess --outdated page_evidence_v1 --from-stage apply_page_analysis
+    relluna reprocess --since 2025-01-01 --doc-type laudo_medico --workers 8 --max-writes-per-sec 100
+    python -m relluna reprocess --dry-run --outdated entities_canonical_v1
+    relluna reindex-vectors
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+
+def _add_reprocess_parser(subparsers) -> None:
+    from relluna.services.orchestration.reprocess import REPROCESS_STAGES
+
+    parser = subparsers.add_parser(
+        "reprocess",
+        help="Re-deriva sinais e read models de documentos já gravados.",
+    )
+    parser.add_argument("--from-stage", choices=REPROCESS_STAGES, default=None, help="Primeira etapa (inclusive).")
+    parser.add_argument("--to-stage", choices=REPROCESS_STAGES, default=None, help="Última etapa (inclusive).")
+    parser.add_argument(
+        "--outdated",
+        action="append",
+        default=[],
+        metavar="SINAL",
+        help="Seleciona documentos cujo sinal foi gerado por outra versão do motor (repetível).",
+    )
+    parser.add_argument("--since", default=None, help="layer0.ingestiontimestamp >= (ISO 8601).")
+    parser.add_argument("--until", default=None, help="layer0.ingestiontimestamp < (ISO 8601).")
+    parser.add_argument("--doc-type", action="append", default=[], help="layer3.tipo_documento (repetível).")
+    parser.add_argument("--midia", default=None, help="layer1.midia (documento, imagem, audio, video).")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None, help="Processos do pool (padrão: CPUs - 1).")
+    parser.add_argument("--max-writes-per-sec", type=float, default=200.0, help="Teto de escritas no Mongo; 0 desliga.")
+    parser.add_argument("--checkpoint", default=".reprocess_checkpoint.json", help="Arquivo de checkpoint para retomar.")
+    parser.add_argument("--limit", type=int, default=None, help="Processa no máximo N documentos.")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o filtro e quantos documentos casam.")
+    parser.set_defaults(handler=_run_reprocess)
+
+
+async def _reprocess(args: argparse.Namespace) -> int:
+    from relluna.infra import mongo_store
+    from relluna.infra.mongo.indexes import ensure_all_indexes
+    from relluna.services.orchestration.reprocess import (
+        ReprocessConfig,
+        Reprocessor,
+        build_query,
+        select_stages,
+    )
+
+    query = build_query(
+        outdated_signals=args.outdated,
+        since=args.since,
+        until=args.until,
+        doc_types=args.doc_type,
+        midia=args.midia,
+    )
+    stages = select_stages(args.from_stage, args.to_stage)
+
+    if args.dry_run:
+        coll = mongo_store.get_collection()
+        count = await coll.count_documents(query) if coll is not None else None
+        print(json.dumps({"query": query, "stages": list(stages), "matched": count}, ensure_ascii=False, indent=2, default=str))
+        return 0
+
+    config = ReprocessConfig(
+        stages=stages,
+        query=query,
+        batch_size=args.batch_size,
+        max_writes_per_sec=args.max_writes_per_sec,
+        checkpoint_path=Path(args.checkpoint) if args.checkpoint else None,
+        limit=args.limit,
+    )
+    if args.workers:
+        config.workers = args.workers
+
+    db = mongo_store.get_database()
+    if db is not None:
+        failed = await ensure_all_indexes(db)
+        if failed:
+            print(f"aviso: índices não criados: {', '.join(failed)}", file=sys.stderr)
+
+    checkpoint = await Reprocessor(config).run()
+    print(
+        f"processed={checkpoint.processed} failed={checkpoint.failed} "
+        f"conflicts={checkpoint.conflicts} watermark={checkpoint.watermark}"
+    )
+    return 1 if checkpoint.failed else 0
+
+
+def _run_reprocess(args: argparse.Namespace) -> int:
+    return asyncio.run(_reprocess(args))
+
+
+def _add_reindex_vectors_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "reindex-vectors",
+        help="Reconstrói o índice vetorial da busca semântica a partir dos read models.",
+    )
+    parser.set_defaults(handler=_run_reindex_vectors)
+
+
+async def _reindex_vectors(args: argparse.Namespace) -> int:
+    from relluna.infra import mongo_store
+    from relluna.services.read_model import semantic_search
+    from relluna.services.read_model.store import ReadModelStore
+
+    documents, units = await semantic_search.rebuild_index(ReadModelStore().iter_documents(), mongo_store.get)
+    print(f"documents={documents} units={units}")
+    return 0
+
+
+def _run_reindex_vectors(args: argparse.Namespace) -> int:
+    return asyncio.run(_reindex_vectors(args))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="relluna", description="Ferramentas operacionais do Relluna.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    _add_reprocess_parser(subparsers)
+    _add_reindex_vectors_parser(subparsers)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,12 @@ from pydantic import BaseModel, Field
 class Derivado(BaseModel):
     tipo: str
     uri: str
+    # Derivados por página (thumbnails/previews); vazios nos demais.
+    pagina: Optional[int] = None
+    variante: Optional[str] = None
+    largura: Optional[int] = None
+    altura: Optional[int] = None
+    mimetype: Optional[str] = None
 
 
 class StorageURI(BaseModel):
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 # Layers
 from .layer0 import Layer0Custodia
@@ -56,6 +56,11 @@ class DocumentMemory(BaseModel):
     layer5: Optional[Layer5Derivatives] = None
     layer6: Optional[Layer6Optimization] = None
 
+    # Estado de persistência (não serializado): snapshot dos digests por
+    # caminho e revisão otimista do último load/save. Ver dirty_tracking.
+    _persisted_digests: Optional[Dict[str, str]] = PrivateAttr(default=None)
+    _revision: Optional[int] = PrivateAttr(default=None)
+
 
 from .models_v0_2_0 import DocumentMemoryCanonical, DocumentMemory_v0_2_0  # noqa: E402
 
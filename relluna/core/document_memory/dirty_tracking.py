@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import bson
+
+# Dirty-tracking por snapshot: ao carregar/salvar, guardamos o digest de cada
+# caminho persistível (camadas e sinais da Layer2). No próximo save, só os
+# caminhos cujo digest mudou viram `$set`/`$unset`.
+#
+# No load, os digests saem do documento cru do Mongo (`stored_digests`),
+# antes da validação: o que foi gravado é o próprio `model_dump(mode="json")`,
+# então não é preciso serializar o modelo de novo só para ter a linha de
+# base. O hash é sobre `bson.encode` (em C), não `json.dumps`.
+
+_LAYER_PATHS = ("layer0", "layer1", "layer3", "layer4", "layer5", "layer6")
+_SIGNALS_PREFIX = "layer2.sinais_documentais."
+
+# Metadados de sinal comprimido at-rest (ver relluna.infra.signal_codec).
+SIGNAL_CODEC_FIELD = "valor_codec"
+
+
+@dataclass
+class PersistenceDelta:
+    set_fields: Dict[str, Any] = field(default_factory=dict)
+    unset_fields: List[str] = field(default_factory=list)
+    digests: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.set_fields and not self.unset_fields
+
+
+def _digest(payload: Any) -> str:
+    try:
+        raw = bson.encode({"v": payload})
+    except (bson.errors.InvalidDocument, OverflowError):
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def signal_digest(payload: Any) -> str:
+    """
+    Digest do sinal pelo conteúdo lógico de `valor`: a forma comprimida e a
+    decodificada do mesmo sinal produzem o mesmo digest.
+    """
+    if not isinstance(payload, dict):
+        return _digest(payload)
+    fields = {key: value for key, value in payload.items() if key not in {"valor", SIGNAL_CODEC_FIELD}}
+    codec = payload.get(SIGNAL_CODEC_FIELD)
+    if isinstance(codec, dict) and payload.get("valor") is None:
+        fields["valor_sha256"] = codec.get("sha256")
+    elif isinstance(payload.get("valor"), str):
+        fields["valor_sha256"] = hashlib.sha256(payload["valor"].encode("utf-8")).hexdigest()
+    else:
+        fields["valor"] = payload.get("valor")
+    return _digest(dict(sorted(fields.items())))
+
+
+def _path_digest(path: str, payload: Any) -> str:
+    if path.startswith(_SIGNALS_PREFIX):
+        return signal_digest(payload)
+    return _digest(payload)
+
+
+def _safe_signal_key(key: str) -> bool:
+    return bool(key) and "." not in key and not key.startswith("$")
+
+
+def persistable_payloads(dm: Any) -> Dict[str, Any]:
+    """
+    Serializa o DocumentMemory por caminho Mongo (`layer3`,
+    `layer2.sinais_documentais.<chave>`, ...). `None` indica campo ausente.
+    """
+    payloads: Dict[str, Any] = {"version": dm.version}
+
+    for path in _LAYER_PATHS:
+        layer = getattr(dm, path, None)
+        payloads[path] = layer.model_dump(mode="json") if layer is not None else None
+
+    layer2 = dm.layer2
+    if layer2 is None:
+        payloads["layer2"] = None
+        return payloads
+
+    payloads["layer2"] = layer2.model_dump(mode="json", exclude={"sinais_documentais"})
+    # dict.items: não dispara a decodificação preguiçosa de LazySignals.
+    for key, signal in dict.items(layer2.sinais_documentais or {}):
+        payloads[f"{_SIGNALS_PREFIX}{key}"] = signal.model_dump(mode="json")
+    return payloads
+
+
+def snapshot_digests(dm: Any) -> Dict[str, str]:
+    return {path: _path_digest(path, payload) for path, payload in persistable_payloads(dm).items()}
+
+
+def stored_digests(document: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Digests por caminho a partir do documento na forma gravada (cru do Mongo
+    ou o dump de um save completo), sem passar pelo modelo.
+    """
+    digests = {"version": _digest(document.get("version"))}
+    for path in _LAYER_PATHS:
+        digests[path] = _digest(document.get(path))
+
+    layer2 = document.get("layer2")
+    if not isinstance(layer2, dict):
+        digests["layer2"] = _digest(None)
+        return digests
+    digests["layer2"] = _digest({key: value for key, value in layer2.items() if key != "sinais_documentais"})
+    for key, payload in (layer2.get("sinais_documentais") or {}).items():
+        digests[f"{_SIGNALS_PREFIX}{key}"] = signal_digest(payload)
+    return digests
+
+
+def mark_persisted(dm: Any, *, revision: int, digests: Optional[Dict[str, str]] = None) -> None:
+    dm._persisted_digests = digests if digests is not None else snapshot_digests(dm)
+    dm._revision = revision
+
+
+def persisted_revision(dm: Any) -> Optional[int]:
+    return getattr(dm, "_revision", None)
+
+
+def _is_layer2_path(path: str) -> bool:
+    return path == "layer2" or path.startswith(_SIGNALS_PREFIX)
+
+
+def compute_delta(dm: Any) -> Optional[PersistenceDelta]:
+    """
+    Retorna o delta desde o último load/save ou `None` quando não há snapshot
+    (documento novo: o chamador deve gravar o documento inteiro).
+    """
+    previous = getattr(dm, "_persisted_digests", None)
+    if previous is None:
+        return None
+
+    payloads = persistable_payloads(dm)
+    digests = {path: _path_digest(path, payload) for path, payload in payloads.items()}
+    delta = PersistenceDelta(digests=digests)
+
+    for path, payload in payloads.items():
+        if _is_layer2_path(path) or previous.get(path) == digests[path]:
+            continue
+        if payload is None:
+            delta.unset_fields.append(path)
+        else:
+            delta.set_fields[path] = payload
+
+    layer2_changed = any(
+        previous.get(path) != digests.get(path)
+        for path in set(previous) | set(digests)
+        if _is_layer2_path(path)
+    )
+    if not layer2_changed:
+        return delta
+
+    if dm.layer2 is None:
+        delta.unset_fields.append("layer2")
+        return delta
+
+    signal_keys = list(dict.keys(dm.layer2.sinais_documentais or {}))
+    signal_keys.extend(path[len(_SIGNALS_PREFIX):] for path in previous if path.startswith(_SIGNALS_PREFIX))
+    previous_layer2_missing = previous.get("layer2") in {None, _digest(None)}
+    if previous_layer2_missing or not all(_safe_signal_key(key) for key in signal_keys):
+        # Sem objeto layer2 no banco (ou chaves inválidas como caminho Mongo):
+        # grava a camada inteira.
+        delta.set_fields["layer2"] = dm.layer2.model_dump(mode="json")
+        return delta
+
+    for path in digests:
+        if _is_layer2_path(path) and previous.get(path) != digests[path]:
+            delta.set_fields[path] = payloads[path] if path != "layer2" else None
+    if "layer2" in delta.set_fields:
+        # Campos escalares da Layer2: `$set` campo a campo preserva os sinais.
+        delta.set_fields.pop("layer2")
+        for name, value in payloads["layer2"].items():
+            delta.set_fields[f"layer2.{name}"] = value
+    for path in previous:
+        if path.startswith(_SIGNALS_PREFIX) and path not in digests:
+            delta.unset_fields.append(path)
+
+    return delta
@@ -111,6 +111,7 @@ class VersionEdge(BaseModel):
         "transcript_of",
         "ocr_payload_of",
         "derived_from",
+        "near_duplicate_of",
     ]
     method: Optional[str] = None
     details: Dict[str, Any] = Field(default_factory=dict)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Optional, List, Dict
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
 
 from relluna.core.document_memory.transcription import TranscriptionSegment
 from .types_basic import (
@@ -89,4 +89,12 @@ class Layer2Evidence(BaseModel):
     # O pipeline novo não deve escrever mais nesses campos.
     transcricao_literal: Optional[ProvenancedString] = None
     transcricao_segmentada: List[TranscriptionSegment] = Field(default_factory=list)
-    num_falantes: Optional[ProvenancedNumber] = None
\ No newline at end of file
+    num_falantes: Optional[ProvenancedNumber] = None
+    @field_serializer("sinais_documentais", mode="wrap")
+    def _serialize_sinais(self, value, handler):
+        # Sinais carregados comprimidos (LazySignals, relluna.infra.signal_codec)
+        # são decodificados antes do dump: o serializador lê o dict por baixo.
+        decode_all = getattr(value, "decode_all", None)
+        if callable(decode_all):
+            decode_all()
+        return handler(value)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import importlib
+import importlib.machinery
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+
+# -----------------------------
+# Import preguiçoso de engines pesadas
+# -----------------------------
+#
+# `fitz = lazy_import("fitz")` devolve um módulo que só executa o import de
+# verdade no primeiro acesso a atributo. O código continua escrevendo
+# `fitz.open(...)`, e o custo de importar a engine sai da inicialização da
+# API e das CLIs.
+#
+# Não usamos importlib.util.LazyLoader: no Python 3.11 ele troca a classe do
+# módulo antes de executá-lo, e outra thread (to_thread, pool de OCR) que
+# acesse o módulo nesse intervalo vê um módulo pela metade. Aqui a execução
+# acontece sob _LOCK e a classe só vira ModuleType no fim; quem chegar antes
+# espera o lock. Depois disso o acesso é o de um módulo comum, sem lock.
+
+# RLock: a thread que executa o módulo reentra ao acessar os atributos dele.
+_LOCK = threading.RLock()
+
+
+class _LazyModule(ModuleType):
+    def __getattribute__(self, attr: str):
+        with _LOCK:
+            if type(self) is _LazyModule:
+                self.__class__ = _LoadingModule
+                try:
+                    spec = ModuleType.__getattribute__(self, "__spec__")
+                    spec.loader.exec_module(self)
+                except BaseException:
+                    self.__class__ = _LazyModule
+                    raise
+                self.__class__ = ModuleType
+        return ModuleType.__getattribute__(self, attr)
+
+
+class _LoadingModule(ModuleType):
+    """Módulo em execução: outras threads esperam o fim do import."""
+
+    def __getattribute__(self, attr: str):
+        with _LOCK:
+            return ModuleType.__getattribute__(self, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if (
+        spec is None
+        or spec.loader is None
+        or not hasattr(spec.loader, "exec_module")
+        or isinstance(spec.loader, importlib.machinery.ExtensionFileLoader)
+    ):
+        # Sem spec (pacote ausente), loader sem exec_module ou extensão C (o
+        # objeto nasce já executado): import normal, com o mesmo erro de antes.
+        return importlib.import_module(name)
+
+    module = importlib.util.module_from_spec(spec)
+    module.__class__ = _LazyModule
+    sys.modules[name] = module
+
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
@@ -19,6 +19,9 @@ _BIRTH_DATE_MARKERS = (
 
 _DOCUMENT_DATE_RESOLVER = DocumentDateResolver()
 
+# Versão da normalização Layer4; incrementar ao mudar o resultado.
+_NORMALIZER_VERSION = "layer4_normalizer_v1"
+
 
 def _load_signal_json(dm: DocumentMemory, key: str) -> Any:
     if key in {"page_evidence_v1", "entities_canonical_v1", "timeline_seed_v2"}:
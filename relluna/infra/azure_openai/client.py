@@ -1,52 +1,324 @@
 from __future__ import annotations
 
+import asyncio
 import json
-import requests
-from typing import Any
+import os
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
 
+import httpx
+
+from relluna.infra import llm_cache_store, mongo_store
 from relluna.infra.secrets import get_secret
 
+# -----------------------------
+# Cliente assíncrono do Azure OpenAI
+# -----------------------------
+#
+# Um httpx.AsyncClient compartilhado (pool de conexões), semáforo limitando
+# chamadas simultâneas, backoff exponencial em 429/5xx respeitando
+# Retry-After e cache persistente das respostas (llm_cache_store).
+#
+# chat_json/embed_text continuam síncronos para código legado: rodam num
+# loop próprio em thread dedicada, com um cliente compartilhado (mesmo pool
+# e cache), então funcionam também quando chamados de dentro de um loop. Esse
+# cliente fala com o cache no Mongo por um cliente Motor próprio, criado no
+# loop da thread: o compartilhado (mongo_store) pertence ao loop da
+# aplicação. O pipeline assíncrono deve usar get_client().
+
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Segundos pedidos pelo servidor (retry-after-ms, Retry-After em segundos ou data HTTP)."""
+    millis = response.headers.get("retry-after-ms")
+    if millis:
+        try:
+            return max(float(millis) / 1000.0, 0.0)
+        except ValueError:
+            pass
+
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AzureOpenAIClient:
+    def __init__(
+        self,
+        *,
+        endpoint: Optional[str] = None,
+        api_key: Optional[str] = None,
+        api_version: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        use_cache: Optional[bool] = None,
+        cache_db: Any = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self._endpoint = endpoint
+        self._api_key = api_key
+        self._api_version = api_version
+        self.max_concurrency = max_concurrency or _env_int("RELLUNA_AOAI_MAX_CONCURRENCY", 8)
+        self.max_retries = max_retries if max_retries is not None else _env_int("RELLUNA_AOAI_MAX_RETRIES", 5)
+        self.timeout = timeout or _env_float("RELLUNA_AOAI_TIMEOUT", 60.0)
+        self.backoff_base = backoff_base if backoff_base is not None else _env_float("RELLUNA_AOAI_BACKOFF_BASE", 0.5)
+        self.backoff_max = backoff_max if backoff_max is not None else _env_float("RELLUNA_AOAI_BACKOFF_MAX", 30.0)
+        self.use_cache = llm_cache_store.enabled() if use_cache is None else use_cache
+        self._cache_db = cache_db
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.requests_sent = 0
+        self.cache_hits = 0
+
+    # -------------------------
+    # Configuração e pool
+    # -------------------------
+
+    @property
+    def endpoint(self) -> str:
+        return (self._endpoint or get_secret("AZURE_OPENAI_ENDPOINT")).rstrip("/")
+
+    @property
+    def api_version(self) -> str:
+        return self._api_version or get_secret("AZURE_OPENAI_API_VERSION", default="2024-05-01-preview")
+
+    def _headers(self) -> dict[str, str]:
+        return {"api-key": self._api_key or get_secret("AZURE_OPENAI_API_KEY"), "content-type": "application/json"}
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+        return self._http
+
+    def _limit(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "AzureOpenAIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    # -------------------------
+    # HTTP com retry
+    # -------------------------
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            requested = _retry_after(response)
+            if requested is not None:
+                return min(requested, self.backoff_max)
+        delay = self.backoff_base * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.backoff_max)
+
+    async def _post(self, url: str, payload: dict[str, Any]) -> dict[str, Any]:
+        headers = self._headers()
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            try:
+                async with self._limit():
+                    self.requests_sent += 1
+                    response = await self._client().post(url, headers=headers, json=payload)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def _cached(self, key: str, kind: str, deployment: str, call) -> Any:
+        if self.use_cache:
+            cached = await llm_cache_store.get(key, db=self._cache_db)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+        result = await call()
+        if self.use_cache:
+            await llm_cache_store.put(key, kind=kind, deployment=deployment, response=result, db=self._cache_db)
+        return result
+
+    # -------------------------
+    # Operações
+    # -------------------------
+
+    async def chat_json(
+        self,
+        *,
+        system: str,
+        user_json: dict[str, Any],
+        json_schema: dict[str, Any],
+        deployment: Optional[str] = None,
+    ) -> dict[str, Any]:
+        deployment = deployment or get_secret("AZURE_OPENAI_CHAT_DEPLOYMENT")
+        url = f"{self.endpoint}/openai/deployments/{deployment}/chat/completions?api-version={self.api_version}"
+        payload = {
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": json.dumps(user_json, ensure_ascii=False)},
+            ],
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+        }
+
+        async def call() -> dict[str, Any]:
+            data = await self._post(url, payload)
+            out = json.loads(data["choices"][0]["message"]["content"])
+            # Validação leve: garantir chaves obrigatórias (schema estrito pode ser validado depois)
+            for k in json_schema.get("required", []):
+                if k not in out:
+                    raise ValueError(f"LLM output missing required key: {k}")
+            return out
+
+        key = llm_cache_store.cache_key("chat_json", deployment, system, user_json, json_schema)
+        return await self._cached(key, "chat_json", deployment, call)
+
+    async def embed_text(self, text: str, *, deployment: Optional[str] = None) -> list[float]:
+        deployment = deployment or get_secret("AZURE_OPENAI_EMBED_DEPLOYMENT")
+        url = f"{self.endpoint}/openai/deployments/{deployment}/embeddings?api-version={self.api_version}"
+
+        async def call() -> list[float]:
+            data = await self._post(url, {"input": text})
+            return data["data"][0]["embedding"]
+
+        key = llm_cache_store.cache_key("embed_text", deployment, text)
+        return await self._cached(key, "embed_text", deployment, call)
+
+    async def embed_texts(
+        self,
+        texts: list[str],
+        *,
+        deployment: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> list[list[float]]:
+        """
+        Embeddings em lote: só os textos ausentes do cache vão à API, em
+        requisições de até `batch_size` entradas (mesma chave de embed_text).
+        """
+        deployment = deployment or get_secret("AZURE_OPENAI_EMBED_DEPLOYMENT")
+        url = f"{self.endpoint}/openai/deployments/{deployment}/embeddings?api-version={self.api_version}"
+        batch_size = batch_size or _env_int("RELLUNA_EMBED_BATCH_SIZE", 64)
+
+        keys = [llm_cache_store.cache_key("embed_text", deployment, text) for text in texts]
+        vectors: list[Optional[list[float]]] = [None] * len(texts)
+        missing: dict[str, list[int]] = {}
+        for position, (key, text) in enumerate(zip(keys, texts)):
+            cached = await llm_cache_store.get(key, db=self._cache_db) if self.use_cache else None
+            if cached is not None:
+                self.cache_hits += 1
+                vectors[position] = cached
+            else:
+                missing.setdefault(text, []).append(position)
+
+        pending = list(missing)
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start : start + batch_size]
+            data = await self._post(url, {"input": chunk})
+            for item in sorted(data["data"], key=lambda entry: entry.get("index", 0)):
+                text = chunk[item.get("index", 0)]
+                for position in missing[text]:
+                    vectors[position] = item["embedding"]
+                if self.use_cache:
+                    await llm_cache_store.put(
+                        keys[missing[text][0]],
+                        kind="embed_text",
+                        deployment=deployment,
+                        response=item["embedding"],
+                        db=self._cache_db,
+                    )
+        return vectors  # type: ignore[return-value]
+
+
+_CLIENT: Optional[AzureOpenAIClient] = None
+
+
+def get_client() -> AzureOpenAIClient:
+    """Cliente compartilhado do processo (pool e semáforo únicos)."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = AzureOpenAIClient()
+    return _CLIENT
+
+
+async def close_client() -> None:
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+_SYNC_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SYNC_CLIENT: Optional[AzureOpenAIClient] = None
+_SYNC_LOCK = threading.Lock()
+
+
+def _sync_loop() -> asyncio.AbstractEventLoop:
+    global _SYNC_LOOP
+    with _SYNC_LOCK:
+        if _SYNC_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="relluna-aoai-sync", daemon=True).start()
+            _SYNC_LOOP = loop
+    return _SYNC_LOOP
+
+
+async def _sync_call(method: str, **kwargs: Any) -> Any:
+    # Roda sempre no loop da thread dedicada: o cliente fica preso a ele.
+    global _SYNC_CLIENT
+    if _SYNC_CLIENT is None:
+        _SYNC_CLIENT = AzureOpenAIClient(cache_db=mongo_store.open_database())
+    return await getattr(_SYNC_CLIENT, method)(**kwargs)
+
+
+def _run_sync(method: str, **kwargs: Any) -> Any:
+    return asyncio.run_coroutine_threadsafe(_sync_call(method, **kwargs), _sync_loop()).result()
+
+
 def chat_json(*, system: str, user_json: dict[str, Any], json_schema: dict[str, Any]) -> dict[str, Any]:
-    endpoint = get_secret("AZURE_OPENAI_ENDPOINT").rstrip("/")
-    key = get_secret("AZURE_OPENAI_API_KEY")
-    deployment = get_secret("AZURE_OPENAI_CHAT_DEPLOYMENT")
-    api_version = get_secret("AZURE_OPENAI_API_VERSION", default="2024-05-01-preview")
-
-    url = f"{endpoint}/openai/deployments/{deployment}/chat/completions?api-version={api_version}"
-    headers = {"api-key": key, "content-type": "application/json"}
-
-    payload = {
-        "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": json.dumps(user_json, ensure_ascii=False)},
-        ],
-        "temperature": 0,
-        "response_format": {"type": "json_object"},
-    }
-
-    r = requests.post(url, headers=headers, json=payload, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    content = data["choices"][0]["message"]["content"]
-    out = json.loads(content)
-
-    # Validação leve: garantir chaves obrigatórias (schema estrito pode ser validado depois)
-    for k in json_schema.get("required", []):
-        if k not in out:
-            raise ValueError(f"LLM output missing required key: {k}")
-    return out
+    return _run_sync("chat_json", system=system, user_json=user_json, json_schema=json_schema)
+
 
 def embed_text(text: str) -> list[float]:
-    endpoint = get_secret("AZURE_OPENAI_ENDPOINT").rstrip("/")
-    key = get_secret("AZURE_OPENAI_API_KEY")
-    deployment = get_secret("AZURE_OPENAI_EMBED_DEPLOYMENT")
-    api_version = get_secret("AZURE_OPENAI_API_VERSION", default="2024-05-01-preview")
-
-    url = f"{endpoint}/openai/deployments/{deployment}/embeddings?api-version={api_version}"
-    headers = {"api-key": key, "content-type": "application/json"}
-    payload = {"input": text}
-
-    r = requests.post(url, headers=headers, json=payload, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    return data["data"][0]["embedding"]
+    return _run_sync("embed_text", text=text)
@@ -1,8 +1,13 @@
 from .client import BlobSettings, get_blob_service
 from .artefact_store import AzureBlobArtefactStore
+from . import artefact_resolver
+from .async_store import close_async_blob_store, get_async_blob_store
 
 __all__ = [
     "BlobSettings",
     "get_blob_service",
     "AzureBlobArtefactStore",
+    "get_async_blob_store",
+    "close_async_blob_store",
+    "artefact_resolver",
 ]
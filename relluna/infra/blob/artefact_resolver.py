@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from relluna.infra.blob.async_store import block_size, get_async_blob_store, max_concurrency
+
+# -----------------------------
+# Resolução de artefatos (disco local -> cache LRU -> blob)
+# -----------------------------
+#
+# Os estágios pedem o caminho do artefato aqui em vez de usar
+# `Path(artefato.uri)` direto. Ordem de resolução:
+#   1. o arquivo em `uri` existe neste pod (upload recebido aqui);
+#   2. o cache em disco endereçado por sha256 já tem o conteúdo;
+#   3. download do blob em faixas (ranged GET) para um `.part`, com
+#      verificação do sha256 contra `hash_sha256` antes de entrar no cache.
+# Downloads concorrentes do mesmo artefato no processo compartilham uma
+# única tarefa. O cache é limitado por RELLUNA_ARTEFACT_CACHE_MAX_BYTES e
+# despeja os menos usados (mtime é atualizado a cada acerto); artefatos
+# fixados com `pinned(...)` (durante o pipeline do documento) não saem.
+#
+# Estágios que rodam em thread (asyncio.to_thread) e caem num miss buscam o
+# artefato no loop principal (run_coroutine_threadsafe), onde vivem o blob
+# store assíncrono e os downloads em andamento, em vez de abrir outro loop.
+
+
+class ArtefactIntegrityError(RuntimeError):
+    pass
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("RELLUNA_ARTEFACT_CACHE_DIR", ".artefact_cache"))
+
+
+def cache_max_bytes() -> int:
+    return int(os.getenv("RELLUNA_ARTEFACT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    downloads: int = 0
+    evictions: int = 0
+
+
+class ArtefactDiskCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._pins: Dict[Path, int] = {}
+
+    def path_for(self, sha256: str, suffix: str = "") -> Path:
+        return self.root / sha256[:2] / f"{sha256}{suffix}"
+
+    def get(self, sha256: str, suffix: str = "") -> Optional[Path]:
+        path = self.path_for(sha256, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return path
+
+    def partial_path(self, sha256: str) -> Path:
+        directory = self.root / sha256[:2]
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f".{sha256}.{uuid.uuid4().hex}.part"
+
+    def commit(self, partial: Path, sha256: str, suffix: str = "") -> Path:
+        path = self.path_for(sha256, suffix)
+        os.replace(partial, path)
+        self.evict(keep=path)
+        return path
+
+    def pin(self, path: Path) -> None:
+        with self._lock:
+            self._pins[path] = self._pins.get(path, 0) + 1
+
+    def unpin(self, path: Path) -> None:
+        with self._lock:
+            count = self._pins.get(path, 0) - 1
+            if count > 0:
+                self._pins[path] = count
+            else:
+                self._pins.pop(path, None)
+
+    def evict(self, *, keep: Optional[Path] = None) -> int:
+        """Remove os arquivos menos usados (e não fixados) até caber em `max_bytes`."""
+        with self._lock:
+            entries = []
+            total = 0
+            for path in self.root.glob("*/*"):
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            removed = 0
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                if (keep is not None and path == keep) or path in self._pins:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self.stats.evictions += removed
+            return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.stats = CacheStats()
+
+
+_CACHE: Optional[ArtefactDiskCache] = None
+_INFLIGHT: Dict[str, asyncio.Future] = {}
+# Loop do pipeline (visto em ensure_local/pinned): destino dos misses vindos de threads.
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_artefact_cache() -> ArtefactDiskCache:
+    global _CACHE
+    if _CACHE is None or _CACHE.root != cache_dir():
+        _CACHE = ArtefactDiskCache(cache_dir(), cache_max_bytes())
+    _CACHE.max_bytes = cache_max_bytes()
+    return _CACHE
+
+
+def clear() -> None:
+    global _CACHE
+    if _CACHE is not None:
+        _CACHE.clear()
+    _CACHE = None
+    _INFLIGHT.clear()
+
+
+def _remember_loop() -> None:
+    global _LOOP
+    try:
+        _LOOP = asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+
+
+def _blob_path(artefato: Any) -> Optional[str]:
+    metadata = getattr(artefato, "metadados_nativos", None) or {}
+    blob = metadata.get("blob_storage") or {}
+    return blob.get("blob_path") if isinstance(blob, dict) else None
+
+
+def _suffix(artefato: Any) -> str:
+    return Path(str(getattr(artefato, "uri", "") or "")).suffix.lower()
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_path(artefato: Any) -> Optional[Path]:
+    """Caminho local sem tocar na rede: `uri` deste pod ou entrada do cache."""
+    uri = getattr(artefato, "uri", None)
+    if uri and Path(uri).exists():
+        return Path(uri)
+    sha256 = getattr(artefato, "hash_sha256", None)
+    if sha256:
+        return get_artefact_cache().get(sha256, _suffix(artefato))
+    return None
+
+
+async def _download(store, blob_path: str, partial: Path) -> None:
+    size = await store.blob_size(blob_path)
+    with open(partial, "wb") as handle:
+        handle.truncate(size)
+
+    step = block_size()
+    semaphore = asyncio.Semaphore(max_concurrency())
+
+    def write_block(offset: int, content: bytes) -> None:
+        with open(partial, "r+b") as handle:
+            handle.seek(offset)
+            handle.write(content)
+
+    async def fetch(offset: int) -> None:
+        async with semaphore:
+            content = await store.download_range(blob_path, offset, min(step, size - offset))
+            await asyncio.to_thread(write_block, offset, content)
+
+    await asyncio.gather(*(fetch(offset) for offset in range(0, size, step)))
+
+
+async def _fetch(artefato: Any, sha256: str, blob_path: str) -> Path:
+    store = get_async_blob_store()
+    if store is None:
+        raise RuntimeError("artefato fora deste pod e nenhum blob store configurado")
+
+    cache = get_artefact_cache()
+    partial = cache.partial_path(sha256)
+    try:
+        await _download(store, blob_path, partial)
+        actual = await asyncio.to_thread(_sha256_file, partial)
+        if actual != sha256:
+            raise ArtefactIntegrityError(f"sha256 divergente para {blob_path}: esperado {sha256}, obtido {actual}")
+        cache.stats.downloads += 1
+        return cache.commit(partial, sha256, _suffix(artefato))
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+@contextmanager
+def pinned(artefatos: Iterable[Any]) -> Iterator[None]:
+    """
+    Fixa as entradas de cache dos artefatos (mesmo antes do download) até o
+    fim do bloco: o despejo LRU não as remove no meio do pipeline.
+    """
+    _remember_loop()
+    cache = get_artefact_cache()
+    paths: List[Path] = [
+        cache.path_for(artefato.hash_sha256, _suffix(artefato))
+        for artefato in artefatos or []
+        if getattr(artefato, "hash_sha256", None)
+    ]
+    for path in paths:
+        cache.pin(path)
+    try:
+        yield
+    finally:
+        for path in paths:
+            cache.unpin(path)
+
+
+async def ensure_local(artefato: Any) -> Optional[Path]:
+    """
+    Garante uma cópia local do artefato e devolve o caminho; None quando não
+    há arquivo local nem blob de onde buscar.
+    """
+    _remember_loop()
+    path = cached_path(artefato)
+    if path is not None:
+        return path
+
+    sha256 = getattr(artefato, "hash_sha256", None)
+    blob_path = _blob_path(artefato)
+    if not sha256 or not blob_path:
+        return None
+
+    task = _INFLIGHT.get(sha256)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(artefato, sha256, blob_path))
+        _INFLIGHT[sha256] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(sha256, None))
+    return await asyncio.shield(task)
+
+
+def resolve_artefact_path(artefato: Any) -> Optional[Path]:
+    """
+    Versão síncrona para os estágios. Dentro de um event loop só consulta
+    disco e cache (o pipeline já chamou `ensure_local`); fora dele busca no
+    blob: numa thread de trabalho, pelo loop principal ainda em execução;
+    sem loop nenhum, com asyncio.run. Sem cópia local, devolve `Path(uri)`
+    para que as checagens de `exists()` dos estágios sigam valendo.
+    """
+    if artefato is None:
+        return None
+    path = cached_path(artefato)
+    if path is not None:
+        return path
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        if _blob_path(artefato):
+            loop = _LOOP
+            if loop is not None and loop.is_running():
+                path = asyncio.run_coroutine_threadsafe(ensure_local(artefato), loop).result()
+            else:
+                path = asyncio.run(ensure_local(artefato))
+        if path is not None:
+            return path
+
+    uri = getattr(artefato, "uri", None)
+    return Path(uri) if uri is not None else None
+
+
+def primary_artefact(dm: Any) -> Any:
+    artefatos = getattr(getattr(dm, "layer1", None), "artefatos", None) or []
+    if not artefatos:
+        return None
+    return next((item for item in artefatos if getattr(item, "tipo", None) == "original"), artefatos[0])
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from relluna.infra.secrets import get_secret
+
+# -----------------------------
+# Cliente de blob assíncrono, único por processo
+# -----------------------------
+#
+# RELLUNA_BLOB_BACKEND escolhe o backend:
+#   azure  azure.storage.blob.aio (extra `blob-async`, precisa de aiohttp);
+#          serve também para o Azurite via connection string;
+#   local  diretório em RELLUNA_BLOB_LOCAL_ROOT, para dev e teste de carga
+#          offline.
+# Sem a variável, usa azure quando há connection string.
+#
+# Uploads e downloads vão em blocos de RELLUNA_BLOB_BLOCK_SIZE bytes com
+# até RELLUNA_BLOB_MAX_CONCURRENCY blocos em paralelo. O container é
+# criado/verificado uma única vez por processo.
+
+
+def block_size() -> int:
+    return max(64 * 1024, int(os.getenv("RELLUNA_BLOB_BLOCK_SIZE", str(4 * 1024 * 1024))))
+
+
+def max_concurrency() -> int:
+    return max(1, int(os.getenv("RELLUNA_BLOB_MAX_CONCURRENCY", "4")))
+
+
+def _container_name() -> str:
+    return (
+        get_secret("AZURE_BLOB_CONTAINER", default="")
+        or get_secret("AZURE_CONTAINER_RAW", default="")
+        or "memories"
+    )
+
+
+def _connection_string() -> str:
+    return (
+        get_secret("AZURE_STORAGE_CONNECTION_STRING", default="")
+        or get_secret("AZURE_BLOB_CONNECTION_STRING", default="")
+    )
+
+
+@dataclass
+class TransferStats:
+    uploads: int = 0
+    downloads: int = 0
+    blocks: int = 0
+    container_checks: int = 0
+
+
+class AzureAsyncBlobStore:
+    backend = "azure"
+
+    def __init__(self, connection_string: str, container_name: str) -> None:
+        try:
+            from azure.storage.blob.aio import BlobServiceClient
+
+            self._service = BlobServiceClient.from_connection_string(
+                connection_string,
+                max_block_size=block_size(),
+                max_single_put_size=block_size(),
+                max_chunk_get_size=block_size(),
+                max_single_get_size=block_size(),
+            )
+        except ImportError as exc:
+            # O transporte assíncrono do SDK depende do aiohttp.
+            raise RuntimeError("azure.storage.blob.aio requer o extra `blob-async` (aiohttp)") from exc
+
+        self.container_name = container_name
+        self.stats = TransferStats()
+        self._container = self._service.get_container_client(container_name)
+        self._container_ready = False
+        self._container_lock = asyncio.Lock()
+
+    async def _ensure_container(self) -> None:
+        if self._container_ready:
+            return
+        async with self._container_lock:
+            if self._container_ready:
+                return
+            from azure.core.exceptions import ResourceExistsError
+
+            self.stats.container_checks += 1
+            try:
+                await self._container.create_container()
+            except ResourceExistsError:
+                pass
+            self._container_ready = True
+
+    def url_for(self, blob_path: str) -> str:
+        return self._container.get_blob_client(blob_path).url
+
+    async def upload_file(self, local_path: Path, blob_path: str) -> str:
+        await self._ensure_container()
+        blob = self._container.get_blob_client(blob_path)
+        size = Path(local_path).stat().st_size
+        with open(local_path, "rb") as handle:
+            await blob.upload_blob(handle, length=size, overwrite=True, max_concurrency=max_concurrency())
+        self.stats.uploads += 1
+        self.stats.blocks += max(1, -(-size // block_size()))
+        return blob.url
+
+    async def upload_bytes(self, content: bytes, blob_path: str) -> str:
+        await self._ensure_container()
+        blob = self._container.get_blob_client(blob_path)
+        await blob.upload_blob(content, overwrite=True, max_concurrency=max_concurrency())
+        self.stats.uploads += 1
+        return blob.url
+
+    async def download_to_file(self, blob_path: str, dest: Path) -> int:
+        blob = self._container.get_blob_client(blob_path)
+        downloader = await blob.download_blob(max_concurrency=max_concurrency())
+        with open(dest, "wb") as handle:
+            written = await downloader.readinto(handle)
+        self.stats.downloads += 1
+        return written
+
+    async def download_bytes(self, blob_path: str) -> bytes:
+        blob = self._container.get_blob_client(blob_path)
+        downloader = await blob.download_blob(max_concurrency=max_concurrency())
+        self.stats.downloads += 1
+        return await downloader.readall()
+
+    async def blob_size(self, blob_path: str) -> int:
+        properties = await self._container.get_blob_client(blob_path).get_blob_properties()
+        return int(properties.size)
+
+    async def download_range(self, blob_path: str, offset: int, length: int) -> bytes:
+        blob = self._container.get_blob_client(blob_path)
+        downloader = await blob.download_blob(offset=offset, length=length)
+        return await downloader.readall()
+
+    async def delete(self, blob_path: str) -> None:
+        await self._container.get_blob_client(blob_path).delete_blob(delete_snapshots="include")
+
+    async def close(self) -> None:
+        await self._service.close()
+
+
+class LocalAsyncBlobStore:
+    """Stand-in em disco com a mesma semântica de blocos paralelos."""
+
+    backend = "local"
+
+    def __init__(self, root: Path, container_name: str) -> None:
+        self.root = Path(root)
+        self.container_name = container_name
+        self.stats = TransferStats()
+        self._container_ready = False
+
+    def _ensure_container(self) -> Path:
+        directory = self.root / self.container_name
+        if not self._container_ready:
+            self.stats.container_checks += 1
+            directory.mkdir(parents=True, exist_ok=True)
+            self._container_ready = True
+        return directory
+
+    def _path(self, blob_path: str) -> Path:
+        return self._ensure_container() / blob_path
+
+    def url_for(self, blob_path: str) -> str:
+        return (self.root / self.container_name / blob_path).resolve().as_uri()
+
+    async def _copy_blocks(self, source: Path, dest: Path) -> int:
+        size = source.stat().st_size
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        partial = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.part")
+        with open(partial, "wb") as handle:
+            handle.truncate(size)
+
+        step = block_size()
+        semaphore = asyncio.Semaphore(max_concurrency())
+
+        def copy_block(offset: int) -> None:
+            with open(source, "rb") as src, open(partial, "r+b") as dst:
+                src.seek(offset)
+                dst.seek(offset)
+                dst.write(src.read(step))
+
+        async def run(offset: int) -> None:
+            async with semaphore:
+                await asyncio.to_thread(copy_block, offset)
+
+        offsets = range(0, size, step)
+        try:
+            await asyncio.gather(*(run(offset) for offset in offsets))
+            os.replace(partial, dest)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        blocks = max(1, len(offsets))
+        self.stats.blocks += blocks
+        return size
+
+    async def upload_file(self, local_path: Path, blob_path: str) -> str:
+        await self._copy_blocks(Path(local_path), self._path(blob_path))
+        self.stats.uploads += 1
+        return self.url_for(blob_path)
+
+    async def upload_bytes(self, content: bytes, blob_path: str) -> str:
+        dest = self._path(blob_path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(dest.write_bytes, content)
+        self.stats.uploads += 1
+        return self.url_for(blob_path)
+
+    async def download_to_file(self, blob_path: str, dest: Path) -> int:
+        written = await self._copy_blocks(self._path(blob_path), Path(dest))
+        self.stats.downloads += 1
+        return written
+
+    async def download_bytes(self, blob_path: str) -> bytes:
+        self.stats.downloads += 1
+        return await asyncio.to_thread(self._path(blob_path).read_bytes)
+
+    async def blob_size(self, blob_path: str) -> int:
+        return self._path(blob_path).stat().st_size
+
+    async def download_range(self, blob_path: str, offset: int, length: int) -> bytes:
+        def read() -> bytes:
+            with open(self._path(blob_path), "rb") as handle:
+                handle.seek(offset)
+                return handle.read(length)
+
+        return await asyncio.to_thread(read)
+
+    async def delete(self, blob_path: str) -> None:
+        self._path(blob_path).unlink(missing_ok=True)
+
+    async def close(self) -> None:
+        return None
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root / self.container_name, ignore_errors=True)
+        self._container_ready = False
+
+
+_STORE = None
+
+
+def configured_backend() -> Optional[str]:
+    backend = os.getenv("RELLUNA_BLOB_BACKEND", "").strip().lower()
+    if backend:
+        return backend if backend in {"azure", "local"} else None
+    return "azure" if _connection_string() else None
+
+
+def get_async_blob_store():
+    """Store do processo, ou None quando nenhum backend está configurado."""
+    global _STORE
+    if _STORE is not None:
+        return _STORE
+    backend = configured_backend()
+    if backend == "local":
+        root = Path(os.getenv("RELLUNA_BLOB_LOCAL_ROOT", ".blobs"))
+        _STORE = LocalAsyncBlobStore(root, _container_name())
+    elif backend == "azure" and _connection_string():
+        _STORE = AzureAsyncBlobStore(_connection_string(), _container_name())
+    return _STORE
+
+
+async def close_async_blob_store() -> None:
+    global _STORE
+    store, _STORE = _STORE, None
+    if store is not None:
+        await store.close()
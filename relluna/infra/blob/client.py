@@ -1,8 +1,13 @@
-from azure.storage.blob import BlobServiceClient
+from __future__ import annotations
+
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from relluna.infra.secrets import get_secret
 
+if TYPE_CHECKING:
+    from azure.storage.blob import BlobServiceClient
+
 
 @dataclass
 class BlobSettings:
@@ -34,6 +39,8 @@ def get_blob_settings() -> BlobSettings:
 
 
 def get_blob_service() -> BlobServiceClient:
+    from azure.storage.blob import BlobServiceClient
+
     settings = get_blob_settings()
     return BlobServiceClient.from_connection_string(
         settings.connection_string
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import unicodedata
+from typing import Callable, Dict, List, Optional, Protocol
+
+from relluna.core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# -----------------------------
+# Embedders plugáveis
+# -----------------------------
+#
+# `azure`: deployment de embeddings do Azure OpenAI, em lote e com cache por
+# hash do texto (llm_cache_store). `hashing`: vetor determinístico local
+# (tokens + trigramas), para testes e execução offline. A escolha vem de
+# RELLUNA_EMBEDDER; sem deployment configurado o padrão é `hashing`.
+
+
+class Embedder(Protocol):
+    name: str
+    dim: Optional[int]
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Matriz (len(texts), dim) float32 com linhas L2-normalizadas."""
+        ...
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _features(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    words = _WORD_RE.findall(text)
+    grams = [f"#{w[i:i + 3]}" for w in words for i in range(max(len(w) - 2, 1))]
+    return words + grams
+
+
+class HashingEmbedder:
+    """Feature hashing de palavras e trigramas; sem rede, determinístico."""
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature in _features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vec
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return normalize_rows(np.stack([self._vector(text) for text in texts]))
+
+
+class AzureEmbedder:
+    def __init__(self, deployment: Optional[str] = None) -> None:
+        from relluna.infra.secrets import get_secret
+
+        self.deployment = deployment or get_secret("AZURE_OPENAI_EMBED_DEPLOYMENT")
+        self.name = f"azure-{self.deployment}"
+        self.dim: Optional[int] = None
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        from relluna.infra.azure_openai.client import get_client
+
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        vectors = await get_client().embed_texts(texts, deployment=self.deployment)
+        matrix = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        self.dim = matrix.shape[1]
+        return matrix
+
+
+EMBEDDERS: Dict[str, Callable[[], Embedder]] = {
+    "hashing": HashingEmbedder,
+    "azure": AzureEmbedder,
+}
+
+_ACTIVE: Optional[Embedder] = None
+
+
+def configured_embedder_name() -> str:
+    name = os.getenv("RELLUNA_EMBEDDER", "").strip().lower()
+    if name:
+        return name
+    return "azure" if os.getenv("AZURE_OPENAI_EMBED_DEPLOYMENT") else "hashing"
+
+
+def get_embedder() -> Embedder:
+    global _ACTIVE
+    if _ACTIVE is None:
+        name = configured_embedder_name()
+        if name not in EMBEDDERS:
+            raise ValueError(f"Embedder desconhecido: {name}")
+        _ACTIVE = EMBEDDERS[name]()
+    return _ACTIVE
+
+
+def set_embedder(embedder: Optional[Embedder]) -> None:
+    """Substitui o embedder do processo (None volta à configuração do ambiente)."""
+    global _ACTIVE
+    _ACTIVE = embedder
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Optional
+
+from relluna.infra import mongo_store
+
+# -----------------------------
+# Registro de jobs de exportação
+# -----------------------------
+#
+# Um documento por job na coleção `export_jobs`: documentos do caso,
+# formato, hash de conteúdo (chave do arquivo cacheado) e status.
+
+COLLECTION_NAME = "export_jobs"
+
+_MEMORY: Dict[str, Dict[str, Any]] = {}
+
+
+def get_collection():
+    db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+async def save(record: Dict[str, Any]) -> None:
+    coll = get_collection()
+    if coll is None:
+        _MEMORY[record["job_id"]] = copy.deepcopy(record)
+        return
+    await coll.replace_one({"job_id": record["job_id"]}, record, upsert=True)
+
+
+async def get(job_id: str) -> Optional[Dict[str, Any]]:
+    coll = get_collection()
+    if coll is None:
+        record = _MEMORY.get(job_id)
+        return copy.deepcopy(record) if record else None
+    return await coll.find_one({"job_id": job_id}, {"_id": 0})
+
+
+async def update(job_id: str, **fields: Any) -> None:
+    coll = get_collection()
+    if coll is None:
+        record = _MEMORY.get(job_id)
+        if record is not None:
+            record.update(copy.deepcopy(fields))
+        return
+    await coll.update_one({"job_id": job_id}, {"$set": fields})
+
+
+def clear() -> None:
+    _MEMORY.clear()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Optional
+
+from relluna.infra import mongo_store
+
+# -----------------------------
+# Registro de lotes de ingestão
+# -----------------------------
+#
+# Um documento por lote na coleção `ingest_batches`: caso associado e
+# status por arquivo (ingestão, dedup e processamento em background).
+
+COLLECTION_NAME = "ingest_batches"
+
+_MEMORY: Dict[str, Dict[str, Any]] = {}
+
+
+def get_collection():
+    db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+async def save(record: Dict[str, Any]) -> None:
+    coll = get_collection()
+    if coll is None:
+        _MEMORY[record["batch_id"]] = copy.deepcopy(record)
+        return
+    await coll.replace_one({"batch_id": record["batch_id"]}, record, upsert=True)
+
+
+async def get(batch_id: str) -> Optional[Dict[str, Any]]:
+    coll = get_collection()
+    if coll is None:
+        record = _MEMORY.get(batch_id)
+        return copy.deepcopy(record) if record else None
+    return await coll.find_one({"batch_id": batch_id}, {"_id": 0})
+
+
+async def update_item(batch_id: str, index: int, **fields: Any) -> None:
+    coll = get_collection()
+    if coll is None:
+        record = _MEMORY.get(batch_id)
+        if record is None:
+            return
+        for item in record["items"]:
+            if item["index"] == index:
+                item.update(fields)
+        return
+    await coll.update_one(
+        {"batch_id": batch_id, "items.index": index},
+        {"$set": {f"items.$.{key}": value for key, value in fields.items()}},
+    )
+
+
+async def documentids_for_case(case_id: str) -> List[str]:
+    """Documentos ingeridos (ou deduplicados) pelos lotes do caso, sem repetição."""
+    coll = get_collection()
+    if coll is None:
+        records = [copy.deepcopy(r) for r in _MEMORY.values() if r.get("case_id") == case_id]
+    else:
+        cursor = coll.find({"case_id": case_id}, {"_id": 0, "items.documentid": 1, "created_at": 1}).sort("created_at", 1)
+        records = [doc async for doc in cursor]
+    ids = [item.get("documentid") for record in records for item in record.get("items") or []]
+    return list(dict.fromkeys(documentid for documentid in ids if documentid))
+
+
+def clear() -> None:
+    _MEMORY.clear()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from relluna.infra import mongo_store
+
+# -----------------------------
+# Cache de respostas do Azure OpenAI
+# -----------------------------
+#
+# Uma entrada por chamada determinística (temperature=0) na coleção
+# `llm_cache`, chaveada pelo hash de (tipo, deployment, system, payload,
+# schema). Inferência repetida sobre evidência inalterada não chega à API.
+# As entradas expiram (índice TTL em `created_at`) depois de
+# RELLUNA_LLM_CACHE_TTL_HOURS.
+#
+# get/put aceitam `db` para quem roda fora do loop da aplicação e precisa de
+# um cliente Motor próprio (mongo_store.open_database()).
+
+COLLECTION_NAME = "llm_cache"
+
+_MEMORY: Dict[str, Dict[str, Any]] = {}
+
+
+def enabled() -> bool:
+    return os.getenv("RELLUNA_LLM_CACHE", "1").strip().lower() not in {"0", "false", "off", "no"}
+
+
+def ttl_seconds() -> int:
+    return max(int(float(os.getenv("RELLUNA_LLM_CACHE_TTL_HOURS", str(24 * 30))) * 3600), 0)
+
+
+def get_collection(db=None):
+    if db is None:
+        db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+def cache_key(kind: str, deployment: str, *parts: Any) -> str:
+    canonical = json.dumps([kind, deployment, *parts], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def get(key: str, *, db=None) -> Optional[Any]:
+    coll = get_collection(db)
+    if coll is None:
+        record = _MEMORY.get(key)
+    else:
+        record = await coll.find_one({"_id": key})
+    return record["response"] if record else None
+
+
+async def put(key: str, *, kind: str, deployment: str, response: Any, db=None) -> None:
+    record = {
+        "_id": key,
+        "kind": kind,
+        "deployment": deployment,
+        "response": response,
+        "created_at": datetime.now(timezone.utc),
+    }
+    coll = get_collection(db)
+    if coll is None:
+        _MEMORY[key] = record
+        return
+    await coll.replace_one({"_id": key}, record, upsert=True)
+
+
+def clear() -> None:
+    _MEMORY.clear()
@@ -1,10 +1,11 @@
 # relluna/infra/mongo/__init__.py
 
 from .client import MongoSettings, get_db
-from .indexes import ensure_indexes
+from .indexes import ensure_all_indexes, ensure_indexes
 
 __all__ = [
     "MongoSettings",
     "get_db",
+    "ensure_all_indexes",
     "ensure_indexes",
 ]
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from typing import List
+
+# Todos os builders rodam no startup da API e no `relluna reprocess`
+# (`ensure_all_indexes`); `create_index` é idempotente.
 
 
 # Índices principais da coleção de DocumentMemory
 
 async def ensure_indexes(db):
-    col = db["document_memories"]
+    col = db["document_memory"]
 
     await col.create_index(
         "layer0.documentid",
@@ -19,11 +23,33 @@ async def ensure_indexes(db):
     )
 
 
+# Índices do log append-only de eventos de página
+
+async def ensure_processing_event_log_indexes(db):
+    col = db["processing_event_log"]
+
+    await col.create_index(
+        [("documentid", 1), ("seq", 1)],
+        name="idx_documentid_seq",
+    )
+
+    await col.create_index(
+        [("documentid", 1), ("etapa", 1), ("page_index", 1)],
+        name="idx_documentid_etapa_page",
+    )
+
+
 # Índices do Read Model
 
 async def ensure_read_model_indexes(db):
     col = db["read_model_documents"]
 
+    # upsert por documento e carga dos candidatos da busca semântica ($in)
+    await col.create_index(
+        [("document_id", 1)],
+        name="idx_document_id",
+    )
+
     await col.create_index(
         [("search_text", "text")],
         name="idx_search_text",
@@ -43,3 +69,141 @@ async def ensure_read_model_indexes(db):
         [("tipo_evento", 1)],
         name="idx_tipo_evento",
     )
+
+
+# Índices do índice de pessoas (chaves de bloqueio)
+
+async def ensure_person_index_indexes(db):
+    col = db["person_index"]
+
+    await col.create_index(
+        [("blocks", 1), ("role", 1)],
+        name="idx_blocks_role",
+    )
+
+    await col.create_index(
+        [("documentid", 1)],
+        name="idx_documentid",
+    )
+
+
+# Índices dos registros de página
+
+async def ensure_document_pages_indexes(db):
+    col = db["document_pages"]
+
+    await col.create_index(
+        [("documentid", 1), ("page", 1)],
+        unique=True,
+        name="uniq_documentid_page",
+    )
+
+    await col.create_index(
+        [("taxonomy", 1), ("documentid", 1)],
+        name="idx_taxonomy",
+    )
+
+    await col.create_index(
+        [("subdoc_id", 1)],
+        name="idx_subdoc_id",
+    )
+
+    await col.create_index(
+        [("anchor_labels", 1)],
+        name="idx_anchor_labels",
+    )
+
+
+# Índices do memo de etapas (expira por `expires_at`)
+
+async def ensure_stage_memo_indexes(db):
+    col = db["stage_memo"]
+
+    await col.create_index(
+        [("expires_at", 1)],
+        expireAfterSeconds=0,
+        name="ttl_expires_at",
+    )
+
+    await col.create_index(
+        [("documentid", 1)],
+        name="idx_documentid",
+    )
+
+
+
+# Índice de quase-duplicatas: `find_similar` busca por `bands` ($in, multikey)
+
+async def ensure_near_duplicate_indexes(db):
+    col = db["near_duplicate_index"]
+
+    await col.create_index(
+        [("bands", 1), ("kind", 1)],
+        name="idx_bands_kind",
+    )
+
+
+# Cache de respostas do LLM (lido por `_id`; expira por `created_at`)
+
+async def ensure_llm_cache_indexes(db):
+    from relluna.infra.llm_cache_store import ttl_seconds
+
+    col = db["llm_cache"]
+
+    await col.create_index(
+        [("created_at", 1)],
+        expireAfterSeconds=ttl_seconds(),
+        name="ttl_created_at",
+    )
+
+
+# Jobs de exportação e lotes de ingestão
+
+async def ensure_export_job_indexes(db):
+    col = db["export_jobs"]
+
+    await col.create_index(
+        [("job_id", 1)],
+        unique=True,
+        name="uniq_job_id",
+    )
+
+
+async def ensure_ingest_batch_indexes(db):
+    col = db["ingest_batches"]
+
+    await col.create_index(
+        [("batch_id", 1)],
+        unique=True,
+        name="uniq_batch_id",
+    )
+
+    await col.create_index(
+        [("case_id", 1), ("created_at", 1)],
+        name="idx_case_id_created_at",
+    )
+
+
+INDEX_BUILDERS = (
+    ensure_indexes,
+    ensure_processing_event_log_indexes,
+    ensure_read_model_indexes,
+    ensure_person_index_indexes,
+    ensure_document_pages_indexes,
+    ensure_stage_memo_indexes,
+    ensure_near_duplicate_indexes,
+    ensure_llm_cache_indexes,
+    ensure_export_job_indexes,
+    ensure_ingest_batch_indexes,
+)
+
+
+async def ensure_all_indexes(db) -> List[str]:
+    """Roda todos os builders; devolve os nomes dos que falharam (sem interromper os demais)."""
+    failed: List[str] = []
+    for builder in INDEX_BUILDERS:
+        try:
+            await builder(db)
+        except Exception:
+            failed.append(builder.__name__)
+    return failed
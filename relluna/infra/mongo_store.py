@@ -1,8 +1,33 @@
-from typing import Optional
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
 
+import bson
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne, UpdateOne
 from relluna.core.document_memory import DocumentMemory
+from relluna.core.document_memory.dirty_tracking import (
+    compute_delta,
+    mark_persisted,
+    persisted_revision,
+    stored_digests,
+)
 from relluna.infra.secrets import get_secret
+from relluna.infra.signal_codec import (
+    attach_lazy_signals,
+    encode_signal_payload,
+    encode_signals_in_layer2,
+    fetch_offloaded_payloads,
+    iter_offload_candidates,
+    offload_encoded_payloads,
+    prepare_loaded_layer2,
+)
+
+# Campo de concorrência otimista gravado na raiz do documento Mongo.
+REVISION_FIELD = "revision"
+# Marca de quem gravou a revisão num `bulk_write` (detecção de conflito).
+WRITE_TOKEN_FIELD = "revision_token"
 
 # -----------------------------
 # In-memory fallback
@@ -24,28 +49,51 @@ def get_mongo_client():
         return None
 
     if _client is None:
-        uri = (
-            get_secret("MONGO_URI", default="")
-            or get_secret("MONGODB_URI", default="")
-        )
-        _client = AsyncIOMotorClient(uri)
+        _client = AsyncIOMotorClient(_mongo_uri())
     return _client
 
 
+def _mongo_uri() -> str:
+    return get_secret("MONGO_URI", default="") or get_secret("MONGODB_URI", default="")
+
+
+def _database_name() -> str:
+    return (
+        get_secret("MONGO_DB", default="")
+        or get_secret("MONGO_DB_NAME", default="")
+        or get_secret("MONGODB_DB", default="")
+        or "relluna"
+    )
+
+
+def open_database():
+    """
+    Banco num cliente Motor novo, fora do cache do módulo. Para código que
+    roda em outro event loop (p.ex. a thread do cliente síncrono do Azure
+    OpenAI): o cliente compartilhado fica preso ao loop da aplicação.
+    """
+    if not _mongo_enabled():
+        return None
+    return AsyncIOMotorClient(_mongo_uri())[_database_name()]
+
+
+def reset_client() -> None:
+    """
+    Esquece o cliente Motor sem fechá-lo. Para processos filhos após fork:
+    o cliente herdado pertence ao loop (e aos sockets) do processo pai.
+    """
+    global _client, _db
+    _client = None
+    _db = None
+
+
 def get_database():
     global _db
     if not _mongo_enabled():
         return None
 
     if _db is None:
-        client = get_mongo_client()
-        db_name = (
-            get_secret("MONGO_DB", default="")
-            or get_secret("MONGO_DB_NAME", default="")
-            or get_secret("MONGODB_DB", default="")
-            or "relluna"
-        )
-        _db = client[db_name]
+        _db = get_mongo_client()[_database_name()]
     return _db
 
 
@@ -56,34 +104,333 @@ def get_collection():
     return db["document_memory"]
 
 
+# -----------------------------
+# Persistência incremental
+# -----------------------------
+
+class ConcurrentModificationError(RuntimeError):
+    """Outro worker gravou o documento depois do último load/save."""
+
+
+@dataclass
+class SaveOperation:
+    documentid: str
+    kind: str  # "full" | "delta" | "noop"
+    expected_revision: Optional[int]
+    new_revision: int
+    document: Optional[Dict[str, Any]] = None
+    update: Optional[Dict[str, Any]] = None
+    digests: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def paths(self) -> List[str]:
+        if self.update is None:
+            return []
+        return sorted(
+            [key for key in self.update.get("$set", {}) if key != REVISION_FIELD]
+            + list(self.update.get("$unset", {}))
+        )
+
+    @property
+    def bytes_written(self) -> int:
+        payload = self.document if self.kind == "full" else self.update
+        if not payload:
+            return 0
+        return len(bson.encode(payload))
+
+
+_SAVE_STATS: deque = deque(maxlen=1000)
+_SIGNALS_PREFIX = "layer2.sinais_documentais."
+
+
+def _encode_set_fields(set_fields: Dict[str, Any]) -> Dict[str, Any]:
+    encoded: Dict[str, Any] = {}
+    for path, value in set_fields.items():
+        if path.startswith(_SIGNALS_PREFIX):
+            value = encode_signal_payload(path[len(_SIGNALS_PREFIX):], value)
+        elif path == "layer2":
+            value = encode_signals_in_layer2(value)
+        encoded[path] = value
+    return encoded
+
+
+def _iter_encoded_metas(op: "SaveOperation"):
+    if op.kind == "full" and op.document:
+        for _, meta in iter_offload_candidates(op.document.get("layer2")):
+            yield meta
+        return
+    for path, value in ((op.update or {}).get("$set") or {}).items():
+        if path == "layer2":
+            for _, meta in iter_offload_candidates(value):
+                yield meta
+        elif path.startswith(_SIGNALS_PREFIX) and isinstance(value, dict):
+            meta = value.get("valor_codec")
+            if isinstance(meta, dict):
+                yield meta
+
+
+def build_save_operation(dm: DocumentMemory) -> SaveOperation:
+    documentid = dm.layer0.documentid
+    revision = persisted_revision(dm)
+    delta = compute_delta(dm) if revision is not None else None
+
+    if delta is None:
+        data = dm.model_dump(mode="json")
+        encode_signals_in_layer2(data.get("layer2"))
+        new_revision = (revision or 0) + 1
+        data[REVISION_FIELD] = new_revision
+        return SaveOperation(
+            documentid=documentid,
+            kind="full",
+            expected_revision=revision,
+            new_revision=new_revision,
+            document=data,
+            digests=stored_digests(data),
+        )
+
+    if delta.is_empty:
+        return SaveOperation(
+            documentid=documentid,
+            kind="noop",
+            expected_revision=revision,
+            new_revision=revision,
+            digests=delta.digests,
+        )
+
+    update: Dict[str, Any] = {"$set": {**_encode_set_fields(delta.set_fields), REVISION_FIELD: revision + 1}}
+    if delta.unset_fields:
+        update["$unset"] = {path: "" for path in delta.unset_fields}
+    return SaveOperation(
+        documentid=documentid,
+        kind="delta",
+        expected_revision=revision,
+        new_revision=revision + 1,
+        update=update,
+        digests=delta.digests,
+    )
+
+
+def _revision_filter(documentid: str, revision: int) -> Dict[str, Any]:
+    if revision == 0:
+        # Documentos legados, gravados antes do campo de revisão.
+        return {"layer0.documentid": documentid, REVISION_FIELD: {"$in": [None, 0]}}
+    return {"layer0.documentid": documentid, REVISION_FIELD: revision}
+
+
+async def save_document(coll, dm: DocumentMemory) -> SaveOperation:
+    op = build_save_operation(dm)
+    if op.kind != "noop":
+        await offload_encoded_payloads(coll, _iter_encoded_metas(op))
+
+    if op.kind == "full":
+        if op.expected_revision is None:
+            await coll.replace_one({"layer0.documentid": op.documentid}, op.document, upsert=True)
+        else:
+            result = await coll.replace_one(_revision_filter(op.documentid, op.expected_revision), op.document)
+            if result.matched_count == 0:
+                raise ConcurrentModificationError(op.documentid)
+    elif op.kind == "delta":
+        result = await coll.update_one(_revision_filter(op.documentid, op.expected_revision), op.update)
+        if result.matched_count == 0:
+            raise ConcurrentModificationError(op.documentid)
+
+    mark_persisted(dm, revision=op.new_revision, digests=op.digests)
+    _record_save_stats(op)
+    return op
+
+
+async def hydrate_raw_document(coll, data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """Documento cru do Mongo -> (dict pronto para validação, revisão)."""
+    data.pop("_id", None)
+    data.pop(WRITE_TOKEN_FIELD, None)
+    revision = int(data.pop(REVISION_FIELD, 0) or 0)
+    if data.get("layer2"):
+        await fetch_offloaded_payloads(coll, data["layer2"])
+        prepare_loaded_layer2(data["layer2"])
+    return data, revision
+
+
+def document_from_raw(data: Dict[str, Any], revision: int) -> DocumentMemory:
+    # Linha de base antes da validação: o modelo compartilha contêineres
+    # aninhados (campos Dict[str, Any]) com `data`.
+    digests = stored_digests(data)
+    dm = DocumentMemory.model_validate(data)
+    attach_lazy_signals(dm)
+    mark_persisted(dm, revision=revision, digests=digests)
+    return dm
+
+
+async def load_document(coll, documentid: str) -> Optional[DocumentMemory]:
+    data = await coll.find_one({"layer0.documentid": documentid})
+    if not data:
+        return None
+    data, revision = await hydrate_raw_document(coll, data)
+    return document_from_raw(data, revision)
+
+
+def _bulk_request(op: SaveOperation, token: str):
+    if op.kind == "full":
+        document = {**op.document, WRITE_TOKEN_FIELD: token}
+        if op.expected_revision is None:
+            return ReplaceOne({"layer0.documentid": op.documentid}, document, upsert=True)
+        return ReplaceOne(_revision_filter(op.documentid, op.expected_revision), document)
+    update = {**op.update, "$set": {**op.update["$set"], WRITE_TOKEN_FIELD: token}}
+    return UpdateOne(_revision_filter(op.documentid, op.expected_revision), update)
+
+
+def _record_save_stats(op: SaveOperation) -> None:
+    _SAVE_STATS.append(
+        {
+            "documentid": op.documentid,
+            "kind": op.kind,
+            "revision": op.new_revision,
+            "bytes_written": op.bytes_written,
+            "paths": op.paths,
+        }
+    )
+
+
+async def _conflicting_ids(coll, tokens: Dict[str, str]) -> List[str]:
+    """
+    `bulk_write` só devolve contagens: quem não ficou com o token da própria
+    operação não casou com a revisão esperada (outro writer chegou antes,
+    ainda que na mesma revisão).
+    """
+    cursor = coll.find(
+        {"layer0.documentid": {"$in": list(tokens)}},
+        {"layer0.documentid": 1, WRITE_TOKEN_FIELD: 1, "_id": 0},
+    )
+    current = {doc["layer0"]["documentid"]: doc.get(WRITE_TOKEN_FIELD) async for doc in cursor}
+    return [documentid for documentid, token in tokens.items() if current.get(documentid) != token]
+
+
+async def bulk_save_operations(coll, ops: List[SaveOperation]) -> List[str]:
+    """
+    Grava operações já montadas (ex.: por workers de reprocessamento) num
+    único `bulk_write` não ordenado. Retorna os documentids que não casaram
+    com a revisão esperada (alterados por outro writer no meio do caminho);
+    só as demais entram nas estatísticas de gravação.
+    """
+    pending = [op for op in ops if op.kind != "noop"]
+    if not pending:
+        return []
+    for op in pending:
+        await offload_encoded_payloads(coll, _iter_encoded_metas(op))
+    tokens = {op.documentid: uuid4().hex for op in pending}
+    result = await coll.bulk_write([_bulk_request(op, tokens[op.documentid]) for op in pending], ordered=False)
+    written = int(result.matched_count or 0) + int(getattr(result, "upserted_count", 0) or 0)
+    conflicts = await _conflicting_ids(coll, tokens) if written < len(pending) else []
+    for op in pending:
+        if op.documentid not in conflicts:
+            _record_save_stats(op)
+    return conflicts
+
+
+def get_save_stats(documentid: Optional[str] = None) -> List[Dict[str, Any]]:
+    return [item for item in _SAVE_STATS if documentid is None or item["documentid"] == documentid]
+
+
+def reset_save_stats() -> None:
+    _SAVE_STATS.clear()
+
+
 # -----------------------------
 # Interface pública
 # -----------------------------
 
 async def save(dm: DocumentMemory):
+    # Import tardio: processing_event_store depende deste módulo.
+    from relluna.infra import processing_event_store
+
     if not _mongo_enabled():
         _MEMORY_STORE[dm.layer0.documentid] = dm
+        await processing_event_store.flush(dm.layer0.documentid)
         return
 
-    coll = get_collection()
-    data = dm.model_dump(mode="json")
-    await coll.replace_one(
-        {"layer0.documentid": dm.layer0.documentid},
-        data,
-        upsert=True,
+    await save_document(get_collection(), dm)
+    await processing_event_store.flush(dm.layer0.documentid)
+
+
+async def save_many(dms: List[DocumentMemory]) -> None:
+    """
+    Grava vários documentos novos num único `bulk_write` (ex.: /ingest/batch).
+    Os que conflitaram continuam com a revisão antiga em memória e geram
+    ConcurrentModificationError depois que os demais foram marcados.
+    """
+    from relluna.infra import processing_event_store
+
+    if not _mongo_enabled():
+        for dm in dms:
+            await save(dm)
+        return
+
+    ops = [build_save_operation(dm) for dm in dms]
+    conflicts = set(await bulk_save_operations(get_collection(), ops))
+    for dm, op in zip(dms, ops):
+        if op.documentid in conflicts:
+            processing_event_store.pop_pending(op.documentid)
+            continue
+        mark_persisted(dm, revision=op.new_revision, digests=op.digests)
+        await processing_event_store.flush(dm.layer0.documentid)
+    if conflicts:
+        raise ConcurrentModificationError(", ".join(sorted(conflicts)))
+
+
+async def find_documentids_by_fingerprints(digests: List[str]) -> Dict[str, str]:
+    """contentfingerprint -> documentid dos já ingeridos, numa única consulta `$in`."""
+    wanted = sorted(set(digests))
+    if not wanted:
+        return {}
+
+    if not _mongo_enabled():
+        found: Dict[str, str] = {}
+        for dm in _MEMORY_STORE.values():
+            layer0 = getattr(dm, "layer0", None)
+            if layer0 is not None and layer0.contentfingerprint in wanted:
+                found.setdefault(layer0.contentfingerprint, layer0.documentid)
+        return found
+
+    cursor = get_collection().find(
+        {"layer0.contentfingerprint": {"$in": wanted}},
+        {"layer0.documentid": 1, "layer0.contentfingerprint": 1, "_id": 0},
     )
+    found = {}
+    async for doc in cursor:
+        layer0 = doc.get("layer0") or {}
+        if layer0.get("contentfingerprint") and layer0.get("documentid"):
+            found.setdefault(layer0["contentfingerprint"], layer0["documentid"])
+    return found
+
+
+async def document_revisions(coll, documentids: List[str]) -> Dict[str, int]:
+    """documentid -> revisão gravada, numa consulta projetada (sem carregar as camadas)."""
+    wanted = sorted(set(documentids))
+    if not wanted:
+        return {}
+    cursor = coll.find(
+        {"layer0.documentid": {"$in": wanted}},
+        {"layer0.documentid": 1, REVISION_FIELD: 1, "_id": 0},
+    )
+    found: Dict[str, int] = {}
+    async for doc in cursor:
+        documentid = (doc.get("layer0") or {}).get("documentid")
+        if documentid:
+            found[documentid] = int(doc.get(REVISION_FIELD) or 0)
+    return found
+
+
+async def get_revisions(documentids: List[str]) -> Optional[Dict[str, int]]:
+    """Revisões gravadas; None sem Mongo (o fallback em memória não versiona)."""
+    if not _mongo_enabled():
+        return None
+    return await document_revisions(get_collection(), documentids)
 
 
 async def get(documentid: str) -> Optional[DocumentMemory]:
     if not _mongo_enabled():
         return _MEMORY_STORE.get(documentid)
 
-    coll = get_collection()
-    data = await coll.find_one({"layer0.documentid": documentid})
-    if not data:
-        return None
-    data.pop("_id", None)
-    return DocumentMemory.model_validate(data)
+    return await load_document(get_collection(), documentid)
 
 
 async def exists(documentid: str) -> bool:
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from relluna.infra import mongo_store
+
+# -----------------------------
+# Índice de quase-duplicatas
+# -----------------------------
+#
+# Uma entrada por documento na coleção `near_duplicate_index` com o
+# fingerprint de similaridade (64 bits, hex) e suas bandas de 8 bits.
+# Dois fingerprints a até 7 bits de distância compartilham ao menos uma
+# banda (pigeonhole), então a busca é um `$in` nas bandas seguido da
+# distância de Hamming exata nos candidatos.
+
+COLLECTION_NAME = "near_duplicate_index"
+
+BANDS = 8
+BAND_BITS = 64 // BANDS
+
+_MEMORY: Dict[str, Dict[str, Any]] = {}
+
+
+def get_collection():
+    db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+def bands(kind: str, value: int) -> List[str]:
+    mask = (1 << BAND_BITS) - 1
+    return [f"{kind}:{i}:{(value >> (i * BAND_BITS)) & mask:02x}" for i in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+async def put(documentid: str, *, kind: str, value: int, media_type: Optional[str] = None) -> None:
+    record = {
+        "_id": str(documentid),
+        "documentid": str(documentid),
+        "kind": kind,
+        "value": f"{value:016x}",
+        "bands": bands(kind, value),
+        "media_type": media_type,
+        "updated_at": datetime.now(timezone.utc),
+    }
+    coll = get_collection()
+    if coll is None:
+        _MEMORY[record["_id"]] = record
+        return
+    await coll.replace_one({"_id": record["_id"]}, record, upsert=True)
+
+
+async def find_similar(
+    *,
+    kind: str,
+    value: int,
+    max_distance: int,
+    exclude: Optional[str] = None,
+    limit: int = 5,
+) -> List[Tuple[str, int]]:
+    """(documentid, distância) dos mais próximos, em ordem crescente de distância."""
+    wanted = set(bands(kind, value))
+    coll = get_collection()
+    if coll is None:
+        candidates = [r for r in _MEMORY.values() if wanted.intersection(r["bands"])]
+    else:
+        cursor = coll.find({"bands": {"$in": sorted(wanted)}}, {"documentid": 1, "kind": 1, "value": 1, "_id": 0})
+        candidates = [doc async for doc in cursor]
+
+    found: List[Tuple[str, int]] = []
+    for record in candidates:
+        if record["kind"] != kind or record["documentid"] == exclude:
+            continue
+        distance = hamming(value, int(record["value"], 16))
+        if distance <= max_distance:
+            found.append((record["documentid"], distance))
+    found.sort(key=lambda item: (item[1], item[0]))
+    return found[:limit]
+
+
+async def delete(documentid: str) -> None:
+    coll = get_collection()
+    if coll is None:
+        _MEMORY.pop(str(documentid), None)
+        return
+    await coll.delete_one({"_id": str(documentid)})
+
+
+def clear() -> None:
+    _MEMORY.clear()
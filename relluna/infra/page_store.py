@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
+
+from pymongo import ReplaceOne
+
+from relluna.infra import mongo_store
+
+# -----------------------------
+# Registros de página
+# -----------------------------
+#
+# Uma entrada por (documento, página) na coleção `document_pages`, com o
+# resumo da página (taxonomia, subdocumento, rótulos de âncora, estratégia)
+# e os blocos completos de `page_evidence_v1`, `ocr_pages_v1` e
+# `page_unit_v1` daquela página. Quem precisa da página 137 lê um registro
+# em vez de decodificar os sinais inteiros do DocumentMemory. Reindexar um
+# documento regrava cada página por upsert e só depois remove as páginas
+# que deixaram de existir: um leitor concorrente nunca vê o documento sem
+# páginas.
+
+COLLECTION_NAME = "document_pages"
+
+# Campos sempre devolvidos; os blocos completos só quando pedidos.
+SUMMARY_FIELDS = (
+    "documentid",
+    "page",
+    "subdoc_id",
+    "taxonomy",
+    "taxonomy_confidence",
+    "strategy",
+    "ocr_status",
+    "anchor_labels",
+    "anchor_count",
+    "text_chars",
+)
+DETAIL_FIELDS = ("evidence", "ocr", "unit")
+
+_WRITE_CHUNK = 500
+
+_MEMORY: Dict[str, Dict[str, Any]] = {}
+
+
+def get_collection():
+    db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+def record_id(documentid: str, page: int) -> str:
+    return f"{documentid}:{int(page):05d}"
+
+
+def _project(record: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    keep = set(SUMMARY_FIELDS).union(fields)
+    return {key: value for key, value in record.items() if key in keep}
+
+
+async def replace_document(documentid: str, records: Iterable[Dict[str, Any]]) -> int:
+    now = datetime.now(timezone.utc)
+    prepared = []
+    for record in records:
+        item = {**record, "documentid": str(documentid), "updated_at": now}
+        item["_id"] = record_id(str(documentid), item["page"])
+        prepared.append(item)
+
+    coll = get_collection()
+    if coll is None:
+        for key in [key for key, item in _MEMORY.items() if item["documentid"] == str(documentid)]:
+            del _MEMORY[key]
+        _MEMORY.update({item["_id"]: item for item in prepared})
+        return len(prepared)
+
+    for start in range(0, len(prepared), _WRITE_CHUNK):
+        chunk = prepared[start : start + _WRITE_CHUNK]
+        await coll.bulk_write([ReplaceOne({"_id": item["_id"]}, item, upsert=True) for item in chunk], ordered=False)
+    await coll.delete_many({"documentid": str(documentid), "page": {"$nin": [item["page"] for item in prepared]}})
+    return len(prepared)
+
+
+async def count_pages(documentid: str) -> int:
+    coll = get_collection()
+    if coll is None:
+        return sum(1 for item in _MEMORY.values() if item["documentid"] == str(documentid))
+    return int(await coll.count_documents({"documentid": str(documentid)}))
+
+
+async def iter_pages(
+    documentid: str,
+    *,
+    start: int = 1,
+    end: Optional[int] = None,
+    fields: Sequence[str] = (),
+    limit: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Páginas `start..end` (inclusive) em ordem, só com os campos pedidos."""
+    coll = get_collection()
+    if coll is None:
+        selected = sorted(
+            (
+                item
+                for item in _MEMORY.values()
+                if item["documentid"] == str(documentid)
+                and item["page"] >= start
+                and (end is None or item["page"] <= end)
+            ),
+            key=lambda item: item["page"],
+        )
+        for item in selected[:limit] if limit else selected:
+            yield _project(item, fields)
+        return
+
+    page_filter: Dict[str, Any] = {"$gte": int(start)}
+    if end is not None:
+        page_filter["$lte"] = int(end)
+    projection = {"_id": 0, **{key: 1 for key in (*SUMMARY_FIELDS, *fields)}}
+    cursor = coll.find({"documentid": str(documentid), "page": page_filter}, projection).sort("page", 1)
+    if limit:
+        cursor = cursor.limit(int(limit))
+    async for doc in cursor:
+        yield doc
+
+
+async def find_pages(
+    *,
+    taxonomy: Optional[str] = None,
+    subdoc_id: Optional[str] = None,
+    anchor_label: Optional[str] = None,
+    documentid: Optional[str] = None,
+    limit: int = 200,
+) -> List[Dict[str, Any]]:
+    """Resumos de página pelos campos indexados (sem os blocos completos)."""
+    query: Dict[str, Any] = {}
+    if documentid is not None:
+        query["documentid"] = str(documentid)
+    if taxonomy is not None:
+        query["taxonomy"] = taxonomy
+    if subdoc_id is not None:
+        query["subdoc_id"] = subdoc_id
+
+    coll = get_collection()
+    if coll is None:
+        found = [
+            _project(item, ())
+            for item in _MEMORY.values()
+            if all(item.get(key) == value for key, value in query.items())
+            and (anchor_label is None or anchor_label in (item.get("anchor_labels") or []))
+        ]
+        return sorted(found, key=lambda item: (item["documentid"], item["page"]))[:limit]
+
+    if anchor_label is not None:
+        query["anchor_labels"] = anchor_label
+    projection = {"_id": 0, **{key: 1 for key in SUMMARY_FIELDS}}
+    cursor = coll.find(query, projection).sort([("documentid", 1), ("page", 1)]).limit(int(limit))
+    return [doc async for doc in cursor]
+
+
+async def delete_document(documentid: str) -> None:
+    await replace_document(documentid, [])
+
+
+def clear() -> None:
+    _MEMORY.clear()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from relluna.infra import mongo_store
+
+# -----------------------------
+# Índice de pessoas por chave de bloqueio
+# -----------------------------
+#
+# Uma entrada por (documento, papel, subdocumento) na coleção `person_index`
+# com o nome, CPF/nascimento quando conhecidos e as chaves de bloqueio de
+# relluna.services.entities.person_blocking. Reindexar um documento troca
+# todas as suas entradas.
+#
+# A busca consulta cada chave separadamente: blocos de nome maiores que
+# `max_block` (sobrenomes muito comuns) são descartados, como em
+# candidate_pairs, enquanto CPF e nascimento entram sempre. Os candidatos são
+# ordenados (chaves de identificador em comum, depois chaves em comum) antes
+# do `limit`, para que um bloco grande não empurre os bons para fora.
+
+COLLECTION_NAME = "person_index"
+
+IDENTIFIER_BLOCK_PREFIXES = ("cpf:", "dob:")
+
+_MEMORY: Dict[str, Dict[str, Any]] = {}
+
+
+def get_collection():
+    db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+def _entry_id(documentid: str, entry: Dict[str, Any]) -> str:
+    return f"{documentid}:{entry.get('role')}:{entry.get('subdoc_id') or '__document__'}"
+
+
+async def replace_document(documentid: str, entries: Iterable[Dict[str, Any]]) -> int:
+    now = datetime.now(timezone.utc)
+    records = []
+    for entry in entries:
+        record = {**entry, "documentid": str(documentid), "updated_at": now}
+        record["_id"] = _entry_id(str(documentid), record)
+        records.append(record)
+
+    coll = get_collection()
+    if coll is None:
+        for key in [key for key, record in _MEMORY.items() if record["documentid"] == str(documentid)]:
+            del _MEMORY[key]
+        _MEMORY.update({record["_id"]: record for record in records})
+        return len(records)
+
+    await coll.delete_many({"documentid": str(documentid)})
+    if records:
+        await coll.insert_many(records)
+    return len(records)
+
+
+def _is_identifier(block: str) -> bool:
+    return block.startswith(IDENTIFIER_BLOCK_PREFIXES)
+
+
+async def _block_members(
+    block: str,
+    *,
+    role: Optional[str],
+    exclude_documentid: Optional[str],
+    cap: Optional[int],
+) -> List[Dict[str, Any]]:
+    """Entradas do bloco; [] quando passa de `cap` (bloco pouco discriminante)."""
+    coll = get_collection()
+    if coll is None:
+        members = [
+            record
+            for record in _MEMORY.values()
+            if block in (record.get("blocks") or [])
+            and (role is None or record.get("role") == role)
+            and record["documentid"] != exclude_documentid
+        ]
+    else:
+        query: Dict[str, Any] = {"blocks": block}
+        if role is not None:
+            query["role"] = role
+        if exclude_documentid is not None:
+            query["documentid"] = {"$ne": exclude_documentid}
+        cursor = coll.find(query)
+        if cap is not None:
+            cursor = cursor.limit(int(cap) + 1)
+        members = [doc async for doc in cursor]
+    if cap is not None and len(members) > cap:
+        return []
+    return members
+
+
+async def find_by_blocks(
+    blocks: Iterable[str],
+    *,
+    role: Optional[str] = None,
+    exclude_documentid: Optional[str] = None,
+    limit: int = 1000,
+    max_block: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    wanted = sorted(set(blocks))
+    if not wanted:
+        return []
+    per_block = await asyncio.gather(
+        *(
+            _block_members(
+                block,
+                role=role,
+                exclude_documentid=exclude_documentid,
+                cap=None if _is_identifier(block) else max_block,
+            )
+            for block in wanted
+        )
+    )
+
+    found: Dict[str, Dict[str, Any]] = {}
+    shared: Dict[str, List[int]] = {}
+    for block, members in zip(wanted, per_block):
+        for record in members:
+            found.setdefault(record["_id"], record)
+            counts = shared.setdefault(record["_id"], [0, 0])
+            counts[0 if _is_identifier(block) else 1] += 1
+    ranked = sorted(found, key=lambda key: (-shared[key][0], -shared[key][1], key))
+    return [found[key] for key in ranked[: int(limit)]]
+
+
+async def entries_for_document(documentid: str) -> List[Dict[str, Any]]:
+    coll = get_collection()
+    if coll is None:
+        return sorted(
+            (record for record in _MEMORY.values() if record["documentid"] == str(documentid)),
+            key=lambda record: record["_id"],
+        )
+    cursor = coll.find({"documentid": str(documentid)}).sort("_id", 1)
+    return [doc async for doc in cursor]
+
+
+async def delete_document(documentid: str) -> None:
+    await replace_document(documentid, [])
+
+
+def clear() -> None:
+    _MEMORY.clear()
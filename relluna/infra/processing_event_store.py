@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from relluna.infra import mongo_store
+
+# -----------------------------
+# Log append-only de eventos de página
+# -----------------------------
+#
+# Eventos por página (normalização, OCR, análise) ficam fora do
+# DocumentMemory: são acumulados em memória durante o pipeline e gravados
+# em lote na coleção `processing_event_log` quando o documento é salvo.
+# Quem falha antes de salvar descarta os pendentes (`pop_pending`).
+#
+# A ordem do log é o `seq`, reservado em bloco no contador do documento
+# (`processing_event_seq`, `$inc` atômico no servidor) a cada flush: dois
+# workers gravando o mesmo documento não intercalam nem repetem posições.
+
+COLLECTION_NAME = "processing_event_log"
+SEQ_COLLECTION_NAME = "processing_event_seq"
+BULK_BATCH_SIZE = 500
+
+_PENDING: Dict[str, List[Dict[str, Any]]] = {}
+_MEMORY_LOG: Dict[str, List[Dict[str, Any]]] = {}
+
+
+def get_collection():
+    db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+def buffer_events(documentid: str, records: List[Dict[str, Any]]) -> None:
+    if not records:
+        return
+    pending = _PENDING.setdefault(str(documentid), [])
+    for record in records:
+        pending.append({**record, "documentid": str(documentid)})
+
+
+def pending_events(documentid: str) -> List[Dict[str, Any]]:
+    return list(_PENDING.get(str(documentid), []))
+
+
+def pop_pending(documentid: str) -> List[Dict[str, Any]]:
+    """Remove e devolve os eventos pendentes (ex.: para gravar em outro processo)."""
+    return _PENDING.pop(str(documentid), [])
+
+
+async def _reserve_seq(documentid: str, count: int) -> int:
+    """Primeiro `seq` de um bloco de `count` posições no log do documento."""
+    db = mongo_store.get_database()
+    if db is None:
+        return len(_MEMORY_LOG.get(documentid, []))
+    counter = await db[SEQ_COLLECTION_NAME].find_one_and_update(
+        {"_id": documentid},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return int(counter["seq"]) - count
+
+
+async def flush(documentid: str) -> int:
+    documentid = str(documentid)
+    records = _PENDING.pop(documentid, [])
+    if not records:
+        return 0
+
+    first = await _reserve_seq(documentid, len(records))
+    records = [{**record, "seq": first + offset} for offset, record in enumerate(records)]
+
+    coll = get_collection()
+    if coll is None:
+        _MEMORY_LOG.setdefault(documentid, []).extend(records)
+        return len(records)
+
+    for start in range(0, len(records), BULK_BATCH_SIZE):
+        await coll.insert_many(records[start : start + BULK_BATCH_SIZE], ordered=False)
+    return len(records)
+
+
+def _matches(record: Dict[str, Any], etapa: Optional[str], page_index: Optional[int], status: Optional[str]) -> bool:
+    if etapa and record.get("etapa") != etapa:
+        return False
+    if page_index is not None and record.get("page_index") != page_index:
+        return False
+    if status and record.get("status") != status:
+        return False
+    return True
+
+
+async def list_events(
+    documentid: str,
+    *,
+    etapa: Optional[str] = None,
+    page_index: Optional[int] = None,
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    skip: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Fatia `skip`/`limit` do fluxo de eventos de página do documento, em
+    ordem de `seq`; os ainda pendentes de gravação entram no fim.
+    """
+    skip = max(0, int(skip or 0))
+    coll = get_collection()
+    if coll is None:
+        matching = [record for record in _MEMORY_LOG.get(str(documentid), []) if _matches(record, etapa, page_index, status)]
+        stored_total = len(matching)
+        stored = matching[skip:] if limit is None else matching[skip : skip + limit]
+    else:
+        query: Dict[str, Any] = {"documentid": str(documentid)}
+        if etapa:
+            query["etapa"] = etapa
+        if page_index is not None:
+            query["page_index"] = page_index
+        if status:
+            query["status"] = status
+        cursor = coll.find(query, {"_id": 0}).sort("seq", 1).skip(skip)
+        if limit is not None:
+            cursor = cursor.limit(int(limit))
+        stored = [doc async for doc in cursor]
+        stored_total = None
+
+    if limit is not None and len(stored) >= limit:
+        return stored
+    pending = [record for record in pending_events(documentid) if _matches(record, etapa, page_index, status)]
+    if not pending:
+        return stored
+
+    # A cauda pendente começa onde o log gravado termina.
+    if stored or not skip:
+        pending_skip = 0
+    else:
+        if stored_total is None:
+            stored_total = await coll.count_documents(query)
+        pending_skip = max(0, skip - stored_total)
+    tail = pending[pending_skip:]
+    if limit is not None:
+        tail = tail[: limit - len(stored)]
+    return stored + tail
+
+
+def clear() -> None:
+    _PENDING.clear()
+    _MEMORY_LOG.clear()
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import os
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from relluna.core.document_memory.dirty_tracking import SIGNAL_CODEC_FIELD
+from relluna.core.document_memory.types_basic import ProvenancedString
+
+try:
+    # Opcional: pip install ".[codec]"
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+# -----------------------------
+# Codec at-rest para sinais grandes da Layer2
+# -----------------------------
+#
+# No Mongo, sinais volumosos (spans, páginas) são gravados comprimidos:
+#
+#   {"valor": null, ..., "valor_codec": {"codec", "sha256", "raw_bytes",
+#                                         "encoded_bytes", "data" | "gridfs_id"}}
+#
+# Em memória, `data` fica em base64 (JSON-safe) e a descompressão só acontece
+# no primeiro acesso ao sinal via `LazySignals`.
+#
+# Ligado por padrão: zstd (gzip sem o extra `codec`) acima de
+# RELLUNA_SIGNAL_CODEC_MIN_BYTES, e GridFS para payloads comprimidos acima de
+# RELLUNA_SIGNAL_OFFLOAD_MIN_BYTES. As listas de páginas também viram
+# registros em `document_pages` (page_store); a cópia da Layer2 é a
+# comprimida. RELLUNA_SIGNAL_CODEC=none desliga.
+
+CODEC_FIELD = SIGNAL_CODEC_FIELD
+GRIDFS_BUCKET = "signal_payloads"
+
+COMPRESSIBLE_SIGNALS = frozenset(
+    {
+        "layout_spans_v1",
+        "page_evidence_v1",
+        "ocr_pages_v1",
+        "normalized_pages_v1",
+        "page_unit_v1",
+    }
+)
+
+
+class SignalIntegrityError(ValueError):
+    """O conteúdo descomprimido não bate com o sha256 gravado."""
+
+
+def configured_codec() -> Optional[str]:
+    codec = os.getenv("RELLUNA_SIGNAL_CODEC", "zstd").strip().lower()
+    if codec in {"", "none", "off", "0"}:
+        return None
+    if codec == "zstd" and zstandard is None:
+        return "gzip"
+    if codec not in {"zstd", "gzip"}:
+        return None
+    return codec
+
+
+def min_encoded_bytes() -> int:
+    return int(os.getenv("RELLUNA_SIGNAL_CODEC_MIN_BYTES", "16384"))
+
+
+def offload_min_bytes() -> int:
+    """Acima deste tamanho (comprimido) o payload vai para GridFS; 0 desliga."""
+    return int(os.getenv("RELLUNA_SIGNAL_OFFLOAD_MIN_BYTES", str(1024 * 1024)))
+
+
+def _compress(codec: str, raw: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(raw)
+    return gzip.compress(raw, compresslevel=6, mtime=0)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Sinal comprimido com zstd, mas o pacote zstandard não está instalado.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Codec de sinal desconhecido: {codec}")
+
+
+def encode_bytes(raw: bytes, *, codec: Optional[str] = None) -> Dict[str, Any]:
+    """Payload arbitrário comprimido, no mesmo formato de `valor_codec` (sempre comprime)."""
+    codec = codec or configured_codec() or "gzip"
+    data = _compress(codec, raw)
+    return {
+        "codec": codec,
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "raw_bytes": len(raw),
+        "encoded_bytes": len(data),
+        "data": data,
+    }
+
+
+def decode_bytes(meta: Dict[str, Any]) -> bytes:
+    data = meta.get("data")
+    raw = _decompress(str(meta.get("codec")), base64.b64decode(data) if isinstance(data, str) else bytes(data))
+    if hashlib.sha256(raw).hexdigest() != meta.get("sha256"):
+        raise SignalIntegrityError(f"sha256 divergente no payload comprimido ({meta.get('sha256')}).")
+    return raw
+
+
+def is_encoded(payload: Dict[str, Any]) -> bool:
+    return isinstance(payload, dict) and isinstance(payload.get(CODEC_FIELD), dict)
+
+
+def encode_signal_payload(key: str, payload: Dict[str, Any], *, codec: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Recebe o dump JSON de um ProvenancedString e devolve a forma gravada no
+    Mongo (`data` como bytes). Sinais pequenos ou fora da lista passam intactos.
+    """
+    if not isinstance(payload, dict):
+        return payload
+
+    if is_encoded(payload):
+        meta = dict(payload[CODEC_FIELD])
+        if isinstance(meta.get("data"), str):
+            meta["data"] = base64.b64decode(meta["data"])
+        return {**payload, CODEC_FIELD: meta}
+
+    codec = codec or configured_codec()
+    valor = payload.get("valor")
+    if codec is None or key not in COMPRESSIBLE_SIGNALS or not isinstance(valor, str):
+        return payload
+
+    raw = valor.encode("utf-8")
+    if len(raw) < min_encoded_bytes():
+        return payload
+
+    data = _compress(codec, raw)
+    return {
+        **payload,
+        "valor": None,
+        CODEC_FIELD: {
+            "codec": codec,
+            "sha256": hashlib.sha256(raw).hexdigest(),
+            "raw_bytes": len(raw),
+            "encoded_bytes": len(data),
+            "data": data,
+        },
+    }
+
+
+def encode_signals_in_layer2(layer2: Optional[Dict[str, Any]], *, codec: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    if not isinstance(layer2, dict) or not isinstance(layer2.get("sinais_documentais"), dict):
+        return layer2
+    layer2["sinais_documentais"] = {
+        key: encode_signal_payload(key, payload, codec=codec)
+        for key, payload in layer2["sinais_documentais"].items()
+    }
+    return layer2
+
+
+def prepare_loaded_layer2(layer2: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Converte `data` binário do Mongo para base64 antes do model_validate."""
+    if not isinstance(layer2, dict) or not isinstance(layer2.get("sinais_documentais"), dict):
+        return layer2
+    for payload in layer2["sinais_documentais"].values():
+        if is_encoded(payload) and isinstance(payload[CODEC_FIELD].get("data"), (bytes, bytearray)):
+            payload[CODEC_FIELD]["data"] = base64.b64encode(bytes(payload[CODEC_FIELD]["data"])).decode("ascii")
+    return layer2
+
+
+def iter_offload_candidates(layer2: Optional[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    if not isinstance(layer2, dict) or not isinstance(layer2.get("sinais_documentais"), dict):
+        return
+    for key, payload in layer2["sinais_documentais"].items():
+        if is_encoded(payload):
+            yield key, payload[CODEC_FIELD]
+
+
+def _gridfs_bucket(db):
+    # GridFS no mesmo database da coleção de DocumentMemory.
+    from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+    return AsyncIOMotorGridFSBucket(db, bucket_name=GRIDFS_BUCKET)
+
+
+async def offload_encoded_payloads(coll, metas: Iterator[Dict[str, Any]]) -> int:
+    """Move para GridFS os payloads comprimidos acima de `offload_min_bytes()`."""
+    threshold = offload_min_bytes()
+    if threshold <= 0:
+        return 0
+
+    bucket = None
+    offloaded = 0
+    for meta in metas:
+        data = meta.get("data")
+        if not isinstance(data, (bytes, bytearray)) or len(data) < threshold:
+            continue
+        bucket = bucket or _gridfs_bucket(coll.database)
+        file_id = await bucket.upload_from_stream(
+            f"signal-{meta.get('sha256')}",
+            bytes(data),
+            metadata={"codec": meta.get("codec"), "sha256": meta.get("sha256")},
+        )
+        meta.pop("data", None)
+        meta["gridfs_id"] = str(file_id)
+        offloaded += 1
+    return offloaded
+
+
+async def fetch_offloaded_payloads(coll, layer2: Optional[Dict[str, Any]]) -> None:
+    from bson import ObjectId
+
+    bucket = None
+    for _, meta in iter_offload_candidates(layer2):
+        if meta.get("data") is not None or not meta.get("gridfs_id"):
+            continue
+        bucket = bucket or _gridfs_bucket(coll.database)
+        stream = await bucket.open_download_stream(ObjectId(meta["gridfs_id"]))
+        meta["data"] = await stream.read()
+
+
+def decode_signal(signal: ProvenancedString) -> ProvenancedString:
+    extra = signal.model_extra or {}
+    meta = extra.get(CODEC_FIELD)
+    if not isinstance(meta, dict) or signal.valor is not None:
+        return signal
+
+    data = meta.get("data")
+    if data is None:
+        raise RuntimeError(f"Payload do sinal não carregado (gridfs_id={meta.get('gridfs_id')}).")
+    raw = _decompress(str(meta.get("codec")), base64.b64decode(data) if isinstance(data, str) else bytes(data))
+    if hashlib.sha256(raw).hexdigest() != meta.get("sha256"):
+        raise SignalIntegrityError(f"sha256 divergente no sinal comprimido ({meta.get('sha256')}).")
+
+    fields = signal.model_dump(mode="python")
+    fields.pop(CODEC_FIELD, None)
+    fields["valor"] = raw.decode("utf-8")
+    return ProvenancedString.model_validate(fields)
+
+
+def raw_size(signal: Any) -> int:
+    """Tamanho do `valor` do sinal sem descomprimir (`raw_bytes` se comprimido)."""
+    valor = getattr(signal, "valor", None)
+    if isinstance(valor, str):
+        return len(valor)
+    meta = (getattr(signal, "model_extra", None) or {}).get(CODEC_FIELD)
+    if isinstance(meta, dict):
+        return int(meta.get("raw_bytes") or 0)
+    return 0
+
+
+class LazySignals(dict):
+    """
+    `sinais_documentais` carregado do Mongo: entradas comprimidas são
+    decodificadas (e substituídas) no primeiro acesso.
+
+    Acesso por chave, `get`, `items`, `values`, `pop`, `dict(x)`/`{**x}`
+    (via `__iter__` + `__getitem__`) e `model_dump` da Layer2 (serializador
+    do campo) veem o sinal decodificado. Só `dict.__getitem__`/`dict.items`
+    explícitos leem a forma comprimida, como faz o dirty-tracking.
+    """
+
+    def _decoded(self, key: Any) -> Any:
+        value = dict.__getitem__(self, key)
+        if isinstance(value, ProvenancedString) and value.valor is None and CODEC_FIELD in (value.model_extra or {}):
+            value = decode_signal(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._decoded(key)
+
+    def __iter__(self):
+        # Sobrescrever __iter__ tira dict(x)/{**x} do caminho rápido do
+        # CPython, que copiaria os valores crus sem passar por __getitem__.
+        return iter(list(dict.keys(self)))
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if not dict.__contains__(self, key):
+            return default
+        return self._decoded(key)
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if dict.__contains__(self, key):
+            value = self._decoded(key)
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def values(self):  # type: ignore[override]
+        return [self._decoded(key) for key in list(dict.keys(self))]
+
+    def items(self):  # type: ignore[override]
+        return [(key, self._decoded(key)) for key in list(dict.keys(self))]
+
+    def copy(self) -> "LazySignals":
+        return LazySignals(dict.items(self))
+
+    def decode_all(self) -> None:
+        for key in list(dict.keys(self)):
+            self._decoded(key)
+
+
+def attach_lazy_signals(dm: Any) -> Any:
+    layer2 = getattr(dm, "layer2", None)
+    if layer2 is not None and not isinstance(layer2.sinais_documentais, LazySignals):
+        layer2.sinais_documentais = LazySignals(layer2.sinais_documentais or {})
+    return dm
+
+
+def decode_all_signals(dm: Any) -> Any:
+    layer2 = getattr(dm, "layer2", None)
+    if layer2 is not None and isinstance(layer2.sinais_documentais, LazySignals):
+        layer2.sinais_documentais.decode_all()
+    return dm
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from relluna.infra import mongo_store
+from relluna.infra.signal_codec import decode_bytes, encode_bytes
+
+# -----------------------------
+# Memo de etapas do pipeline
+# -----------------------------
+#
+# Uma entrada por (documento, etapa) na coleção `stage_memo`, com a chave
+# da última execução (digest das entradas + versão do motor), o digest de
+# cada saída declarada e as saídas em JSON comprimido (codec dos sinais,
+# gzip se nenhum estiver configurado). Ver
+# relluna.services.orchestration.stages.
+#
+# As entradas expiram (índice TTL em `expires_at`) depois de
+# RELLUNA_STAGE_MEMO_TTL_HOURS: o memo serve para reexecuções próximas de
+# /extract e /infer_context, não como segunda cópia do documento. Lotes e
+# reprocessamento em massa rodam sem memo (`suppressed`).
+
+COLLECTION_NAME = "stage_memo"
+
+_MEMORY: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_SUPPRESSED: ContextVar[bool] = ContextVar("relluna_stage_memo_suppressed", default=False)
+
+
+def enabled() -> bool:
+    if _SUPPRESSED.get():
+        return False
+    return os.getenv("RELLUNA_STAGE_MEMO", "1").strip().lower() not in {"0", "false", "off", "no"}
+
+
+@contextmanager
+def suppressed() -> Iterator[None]:
+    """Desliga o memo no contexto atual (lotes, reprocessamento)."""
+    token = _SUPPRESSED.set(True)
+    try:
+        yield
+    finally:
+        _SUPPRESSED.reset(token)
+
+
+def max_output_bytes() -> int:
+    """Saídas comprimidas maiores que isso não são memoizadas (limite de documento do Mongo)."""
+    return int(os.getenv("RELLUNA_STAGE_MEMO_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+def ttl_hours() -> float:
+    return max(float(os.getenv("RELLUNA_STAGE_MEMO_TTL_HOURS", "72")), 0.0)
+
+
+def get_collection():
+    db = mongo_store.get_database()
+    if db is None:
+        return None
+    return db[COLLECTION_NAME]
+
+
+def _memo_id(documentid: str, stage: str) -> str:
+    return f"{documentid}:{stage}"
+
+
+def _expired(record: Dict[str, Any]) -> bool:
+    expires_at = record.get("expires_at")
+    return expires_at is not None and expires_at <= datetime.now(timezone.utc)
+
+
+async def get(documentid: str, stage: str) -> Optional[Dict[str, Any]]:
+    coll = get_collection()
+    if coll is None:
+        record = _MEMORY.get((str(documentid), stage))
+    else:
+        record = await coll.find_one({"_id": _memo_id(documentid, stage)})
+    # O TTL do Mongo remove em background: o prazo também vale na leitura.
+    if record is None or _expired(record):
+        return None
+    return record
+
+
+def load_outputs_payload(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Saídas memoizadas em JSON (descomprimidas)."""
+    return json.loads(decode_bytes(record["outputs_codec"]).decode("utf-8"))
+
+
+async def put(
+    documentid: str,
+    stage: str,
+    *,
+    keys: Tuple[str, ...],
+    version: str,
+    outputs: Dict[str, Any],
+    output_digests: Dict[str, str],
+) -> bool:
+    """
+    Grava o memo da etapa. `keys` são as chaves aceitas na próxima execução
+    (entrada original e, para etapas idempotentes, o estado logo após rodar).
+    """
+    raw = json.dumps(outputs, ensure_ascii=False, default=str).encode("utf-8")
+    encoded = encode_bytes(raw)
+    if encoded["encoded_bytes"] > max_output_bytes():
+        return False
+
+    now = datetime.now(timezone.utc)
+    record = {
+        "_id": _memo_id(documentid, stage),
+        "documentid": str(documentid),
+        "stage": stage,
+        "keys": list(keys),
+        "version": version,
+        "output_digests": dict(output_digests),
+        "outputs_codec": encoded,
+        "updated_at": now,
+        "expires_at": now + timedelta(hours=ttl_hours()),
+    }
+    coll = get_collection()
+    if coll is None:
+        _MEMORY[(str(documentid), stage)] = record
+        return True
+    await coll.replace_one({"_id": record["_id"]}, record, upsert=True)
+    return True
+
+
+async def invalidate(documentid: str) -> int:
+    coll = get_collection()
+    if coll is None:
+        keys = [key for key in _MEMORY if key[0] == str(documentid)]
+        for key in keys:
+            del _MEMORY[key]
+        return len(keys)
+    result = await coll.delete_many({"documentid": str(documentid)})
+    return int(getattr(result, "deleted_count", 0) or 0)
+
+
+def clear() -> None:
+    _MEMORY.clear()
@@ -0,0 +1,582 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from relluna.core.lazy import lazy_import
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads do processo.
+    fcntl = None  # type: ignore[assignment]
+
+np = lazy_import("numpy")
+
+# -----------------------------
+# Índice vetorial local
+# -----------------------------
+#
+# Vetores L2-normalizados (similaridade = produto interno).
+#
+# - BruteForceIndex: matriz em memória, busca exata; para tenants pequenos.
+# - IVFIndex: ANN em disco (k-means + listas invertidas sobre um memmap);
+#   só as listas mais próximas da consulta (`nprobe`) são varridas.
+#
+# VectorIndex escolhe o backend: começa em força bruta e, com diretório
+# configurado, migra para IVF ao passar de RELLUNA_VECTOR_ANN_THRESHOLD.
+# Inclusão e remoção são incrementais nos dois.
+#
+# No disco, VectorIndex guarda um snapshot do backend por geração e um log
+# append-only (`deltas.{geração}.log`) com as inclusões e remoções feitas
+# depois dele: cada mutação acrescenta uma linha, nada é regravado. A cada
+# RELLUNA_VECTOR_LOG_MAX_OPS linhas (ou na migração para IVF) o log é
+# compactado num snapshot novo, em diretório novo; snapshots nunca são
+# reescritos no lugar, então memmaps abertos por outros processos continuam
+# válidos. Escritores (threads e processos) se serializam por flock em
+# `.lock` e, antes de gravar, aplicam o que os outros acrescentaram ao log.
+# Os métodos fazem I/O síncrono: código assíncrono chama via to_thread.
+
+Hit = Tuple[str, float]
+
+
+def ann_threshold() -> int:
+    return int(os.getenv("RELLUNA_VECTOR_ANN_THRESHOLD", "5000"))
+
+
+def log_max_ops() -> int:
+    return max(int(os.getenv("RELLUNA_VECTOR_LOG_MAX_OPS", "1000")), 1)
+
+
+def _top_k(ids: Sequence[str], scores: np.ndarray, k: int) -> List[Hit]:
+    if not len(scores) or k <= 0:
+        return []
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(ids[i], float(scores[i])) for i in top]
+
+
+class BruteForceIndex:
+    kind = "brute_force"
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Capacidade dobra ao encher: incluir não copia a matriz toda.
+        self._buffer = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, vid: object) -> bool:
+        return vid in self._rows
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        start = len(self._ids)
+        fresh_ids: List[str] = []
+        fresh_rows: List[np.ndarray] = []
+        for vid, vec in zip(ids, vectors):
+            row = self._rows.get(vid)
+            if row is None:
+                self._rows[vid] = start + len(fresh_ids)
+                fresh_ids.append(vid)
+                fresh_rows.append(vec)
+            elif row >= start:
+                fresh_rows[row - start] = vec
+            else:
+                self._buffer[row] = vec
+        if not fresh_ids:
+            return
+        end = start + len(fresh_ids)
+        if end > len(self._buffer):
+            grown = np.zeros((max(end, 2 * len(self._buffer), 64), self.dim), dtype=np.float32)
+            grown[:start] = self._buffer[:start]
+            self._buffer = grown
+        self._buffer[start:end] = np.asarray(fresh_rows, dtype=np.float32)
+        self._ids.extend(fresh_ids)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        removed = 0
+        for vid in ids:
+            row = self._rows.pop(vid, None)
+            if row is None:
+                continue
+            last = len(self._ids) - 1
+            if row != last:
+                moved = self._ids[last]
+                self._ids[row] = moved
+                self._buffer[row] = self._buffer[last]
+                self._rows[moved] = row
+            self._ids.pop()
+            removed += 1
+        return removed
+
+    def search(self, query: np.ndarray, k: int) -> List[Hit]:
+        if not self._ids:
+            return []
+        return _top_k(self._ids, self.matrix() @ query.astype(np.float32), k)
+
+    def matrix(self) -> np.ndarray:
+        return self._buffer[: len(self._ids)]
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "vectors.npy", self.matrix())
+        (directory / "ids.json").write_text(json.dumps(self._ids), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Path, dim: int) -> "BruteForceIndex":
+        index = cls(dim)
+        ids_path = directory / "ids.json"
+        if ids_path.exists():
+            index._ids = json.loads(ids_path.read_text(encoding="utf-8"))
+            index._buffer = np.load(directory / "vectors.npy").astype(np.float32)
+            index._rows = {vid: row for row, vid in enumerate(index._ids)}
+        return index
+
+
+def _kmeans(matrix: np.ndarray, k: int, *, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """k-means esférico (vetores normalizados); amostra até 50k linhas."""
+    rng = np.random.default_rng(seed)
+    sample = matrix if len(matrix) <= 50_000 else matrix[rng.choice(len(matrix), 50_000, replace=False)]
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(k):
+            members = sample[assign == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+    return centroids.astype(np.float32)
+
+
+def _replace_file(path: Path, write) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fh:
+        write(fh)
+    os.replace(tmp, path)
+
+
+class IVFIndex:
+    """
+    Arquivos no diretório (imutáveis; `save` troca por os.replace):
+      meta.json      dim, linhas e id por linha (null = removida)
+      centroids.npy  centróides do k-means
+      assign.npy     lista invertida de cada linha
+      vectors.f32    memmap somente leitura (linhas x dim)
+
+    Linhas incluídas depois do snapshot ficam em memória até o próximo save.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, directory: Path, dim: int, *, nprobe: Optional[int] = None) -> None:
+        self.directory = directory
+        self.dim = dim
+        self.nprobe = nprobe or int(os.getenv("RELLUNA_VECTOR_NPROBE", "8"))
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        self._row_ids: List[Optional[str]] = meta["row_ids"]
+        self._base = len(self._row_ids)
+        capacity = meta.get("capacity", self._base)
+        self.centroids = np.load(directory / "centroids.npy")
+        self._assign: List[int] = np.load(directory / "assign.npy")[: self._base].tolist()
+        self._vectors = (
+            np.memmap(directory / "vectors.f32", dtype=np.float32, mode="r", shape=(capacity, dim))
+            if capacity
+            else np.zeros((0, dim), dtype=np.float32)
+        )
+        self._tail: List[np.ndarray] = []
+        self._rows: Dict[str, int] = {vid: row for row, vid in enumerate(self._row_ids) if vid is not None}
+        self._lists: Dict[int, List[int]] = {}
+        for row, vid in enumerate(self._row_ids):
+            if vid is not None:
+                self._lists.setdefault(self._assign[row], []).append(row)
+
+    @classmethod
+    def build(
+        cls,
+        directory: Path,
+        ids: Sequence[str],
+        matrix: np.ndarray,
+        *,
+        nlist: Optional[int] = None,
+        centroids: Optional[np.ndarray] = None,
+    ) -> "IVFIndex":
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        dim = matrix.shape[1]
+        if centroids is None:
+            nlist = nlist or max(1, min(int(np.sqrt(len(ids))), 1024))
+            nlist = min(nlist, max(len(ids), 1))
+            centroids = _kmeans(matrix, nlist) if len(ids) else np.zeros((1, dim), dtype=np.float32)
+        assign = np.argmax(matrix @ centroids.T, axis=1).astype(np.int32) if len(ids) else np.zeros(0, dtype=np.int32)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        _replace_file(directory / "vectors.f32", matrix.tofile)
+        _replace_file(directory / "centroids.npy", lambda fh: np.save(fh, centroids))
+        _replace_file(directory / "assign.npy", lambda fh: np.save(fh, assign))
+        meta = json.dumps({"dim": dim, "capacity": len(ids), "row_ids": list(ids)}).encode("utf-8")
+        _replace_file(directory / "meta.json", lambda fh: fh.write(meta))
+        return cls(directory, dim)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, vid: object) -> bool:
+        return vid in self._rows
+
+    def ids(self) -> List[str]:
+        return list(self._rows)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        self.delete([vid for vid in ids if vid in self._rows])
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        lists = np.argmax(vectors @ self.centroids.T, axis=1)
+        for offset, vid in enumerate(ids):
+            row = len(self._row_ids)
+            self._row_ids.append(vid)
+            self._rows[vid] = row
+            self._assign.append(int(lists[offset]))
+            self._tail.append(vectors[offset])
+            self._lists.setdefault(int(lists[offset]), []).append(row)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        removed = 0
+        for vid in ids:
+            row = self._rows.pop(vid, None)
+            if row is None:
+                continue
+            self._row_ids[row] = None
+            self._lists[self._assign[row]].remove(row)
+            removed += 1
+        return removed
+
+    def _gather(self, rows: List[int]) -> Tuple[List[int], np.ndarray]:
+        """Vetores das linhas (snapshot no memmap, cauda em memória), na ordem devolvida."""
+        base = [row for row in rows if row < self._base]
+        tail = [row for row in rows if row >= self._base]
+        parts = []
+        if base:
+            parts.append(np.asarray(self._vectors[np.asarray(base, dtype=np.int64)]))
+        if tail:
+            parts.append(np.stack([self._tail[row - self._base] for row in tail]))
+        matrix = np.concatenate(parts) if parts else np.zeros((0, self.dim), np.float32)
+        return base + tail, matrix
+
+    def search(self, query: np.ndarray, k: int) -> List[Hit]:
+        if not self._rows:
+            return []
+        query = query.astype(np.float32)
+        probe = np.argsort(-(self.centroids @ query))[: self.nprobe]
+        rows = [row for c in probe for row in self._lists.get(int(c), [])]
+        if not rows:
+            return []
+        rows, matrix = self._gather(rows)
+        return _top_k([self._row_ids[row] for row in rows], matrix @ query, k)
+
+    def tombstone_ratio(self) -> float:
+        return 1.0 - len(self._rows) / len(self._row_ids) if self._row_ids else 0.0
+
+    def matrix(self) -> np.ndarray:
+        return self._gather(list(self._rows.values()))[1]
+
+    def save(self, directory: Optional[Path] = None) -> None:
+        """
+        Snapshot só com as linhas vivas (snapshot anterior + cauda). Reusa os
+        centróides, salvo com muitas remoções, quando o k-means é refeito.
+        """
+        rows, matrix = self._gather(list(self._rows.values()))
+        ids = [self._row_ids[row] for row in rows]
+        centroids = None if self.tombstone_ratio() > 0.25 else self.centroids
+        rebuilt = IVFIndex.build(Path(directory) if directory else self.directory, ids, matrix, centroids=centroids)
+        self.__dict__.update(rebuilt.__dict__)
+
+
+def _group(vid: str) -> Optional[str]:
+    """`page:{doc}:{n}` -> `page:{doc}:`: delete_prefix do documento não varre o índice."""
+    kind, sep, rest = vid.partition(":")
+    doc, sep2, _ = rest.partition(":")
+    return f"{kind}:{doc}:" if sep and sep2 else None
+
+
+class VectorIndex:
+    """Fachada: um índice por espaço de embedding (nome do embedder + dim)."""
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = Path(directory) if directory else None
+        self.embedder: Optional[str] = None
+        self.backend = None
+        self.generation = 0
+        self._groups: Dict[str, Set[str]] = {}
+        self._log_offset = 0
+        self._log_ops = 0
+        self._state_stamp: Optional[Tuple[int, int]] = None
+        self._mutex = threading.RLock()
+        if self.directory is not None:
+            with self._locked():
+                self._load()
+
+    # -------------------------
+    # Arquivos e locks
+    # -------------------------
+
+    def _state_path(self) -> Path:
+        return self.directory / "index.json"
+
+    def _log_path(self) -> Path:
+        return self.directory / f"deltas.{self.generation}.log"
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self._state_path().stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._mutex:
+            if self.directory is None or fcntl is None:
+                yield
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with (self.directory / ".lock").open("a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._locked():
+            if self.directory is not None:
+                self._catch_up()
+            yield
+            if self.directory is not None and (self._log_ops >= log_max_ops() or self._promotion_due()):
+                self._compact()
+
+    # -------------------------
+    # Snapshot + log
+    # -------------------------
+
+    def _load(self) -> None:
+        self.backend = None
+        self.embedder = None
+        self._groups = {}
+        self._state_stamp = self._stamp()
+        state_path = self._state_path()
+        state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        self.generation = state.get("generation", 0)
+        kind = state.get("kind")
+        # Estados antigos (sem geração) guardavam o snapshot em `{kind}/`.
+        snapshot = self.directory / state.get("snapshot", kind or "")
+        if kind == IVFIndex.kind:
+            self.backend = IVFIndex(snapshot, state["dim"])
+        elif kind == BruteForceIndex.kind:
+            self.backend = BruteForceIndex.load(snapshot, state["dim"])
+        if self.backend is not None:
+            self.embedder = state["embedder"]
+            for vid in self.backend.ids():
+                self._group_add(vid)
+        self._log_offset = 0
+        self._log_ops = 0
+        self._replay()
+
+    def _replay(self) -> None:
+        path = self._log_path()
+        if not path.exists():
+            return
+        with path.open("rb") as fh:
+            fh.seek(self._log_offset)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # linha ainda sendo gravada
+                self._log_offset += len(line)
+                self._log_ops += 1
+                self._apply(json.loads(line))
+
+    def _catch_up(self) -> None:
+        """Aplica o que outros processos gravaram; snapshot novo força recarga."""
+        if self._stamp() != self._state_stamp:
+            self._load()
+        else:
+            self._replay()
+
+    def _refresh(self) -> None:
+        if self.directory is None:
+            return
+        try:
+            size = self._log_path().stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size != self._log_offset or self._stamp() != self._state_stamp:
+            with self._locked():
+                self._catch_up()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self.directory is None:
+            return
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with self._log_path().open("ab") as fh:
+            fh.write(line)
+        self._log_offset += len(line)
+        self._log_ops += 1
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        if record["op"] == "add":
+            raw = base64.b64decode(record["vectors"])
+            vectors = np.frombuffer(raw, dtype=np.float32).reshape(len(record["ids"]), record["dim"])
+            self._apply_add(record["ids"], vectors, record["embedder"])
+        elif record["op"] == "delete":
+            self._apply_delete(record["ids"])
+
+    def _apply_add(self, ids: List[str], vectors: np.ndarray, embedder: str) -> None:
+        if self.backend is not None and (self.embedder != embedder or self.backend.dim != vectors.shape[1]):
+            # Outro espaço vetorial: vetores antigos não são comparáveis.
+            self.backend = None
+            self._groups = {}
+        if self.backend is None:
+            self.backend = BruteForceIndex(vectors.shape[1])
+            self.embedder = embedder
+        self.backend.add(ids, vectors)
+        for vid in ids:
+            self._group_add(vid)
+
+    def _apply_delete(self, ids: Iterable[str]) -> int:
+        if self.backend is None:
+            return 0
+        ids = list(ids)
+        for vid in ids:
+            group = _group(vid)
+            members = self._groups.get(group) if group else None
+            if members is not None:
+                members.discard(vid)
+                if not members:
+                    del self._groups[group]
+        return self.backend.delete(ids)
+
+    def _group_add(self, vid: str) -> None:
+        group = _group(vid)
+        if group:
+            self._groups.setdefault(group, set()).add(vid)
+
+    def _promotion_due(self) -> bool:
+        return (
+            self.directory is not None
+            and isinstance(self.backend, BruteForceIndex)
+            and len(self.backend) >= ann_threshold()
+        )
+
+    def _compact(self) -> None:
+        """Snapshot novo (geração + 1), estado trocado por os.replace e log vazio."""
+        previous = json.loads(self._state_path().read_text(encoding="utf-8")) if self._state_path().exists() else {}
+        previous_log = self._log_path()
+        generation = self.generation + 1
+        state: Dict[str, Any] = {"embedder": None, "kind": None, "dim": None, "generation": generation}
+        if self.backend is not None:
+            if self._promotion_due():
+                kind = IVFIndex.kind
+                self.backend = IVFIndex.build(
+                    self.directory / f"{kind}.{generation}", self.backend.ids(), self.backend.matrix()
+                )
+            else:
+                kind = self.backend.kind
+                self.backend.save(self.directory / f"{kind}.{generation}")
+            state.update(embedder=self.embedder, kind=kind, dim=self.backend.dim, snapshot=f"{kind}.{generation}")
+
+        payload = json.dumps(state).encode("utf-8")
+        _replace_file(self._state_path(), lambda fh: fh.write(payload))
+        self.generation = generation
+        self._state_stamp = self._stamp()
+        self._log_offset = 0
+        self._log_ops = 0
+
+        previous_kind = previous.get("kind")
+        if previous_kind:
+            shutil.rmtree(self.directory / previous.get("snapshot", previous_kind), ignore_errors=True)
+        previous_log.unlink(missing_ok=True)
+
+    # -------------------------
+    # API
+    # -------------------------
+
+    def __len__(self) -> int:
+        return len(self.backend) if self.backend is not None else 0
+
+    @property
+    def kind(self) -> Optional[str]:
+        return self.backend.kind if self.backend is not None else None
+
+    def reset(self) -> None:
+        """Esvazia o índice (no disco, um snapshot vazio); usado antes de reconstruir."""
+        with self._writing():
+            self.backend = None
+            self.embedder = None
+            self._groups = {}
+            if self.directory is not None:
+                self._compact()
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, *, embedder: str) -> None:
+        if not len(ids):
+            return
+        ids = list(ids)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._writing():
+            self._apply_add(ids, vectors, embedder)
+            self._append(
+                {
+                    "op": "add",
+                    "embedder": embedder,
+                    "dim": int(vectors.shape[1]),
+                    "ids": ids,
+                    "vectors": base64.b64encode(vectors.tobytes()).decode("ascii"),
+                }
+            )
+
+    def _delete_logged(self, ids: Iterable[str]) -> int:
+        present = [vid for vid in ids if self.backend is not None and vid in self.backend]
+        if not present:
+            return 0
+        removed = self._apply_delete(present)
+        self._append({"op": "delete", "ids": present})
+        return removed
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._writing():
+            return self._delete_logged(ids)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._writing():
+            if _group(prefix) == prefix:
+                ids = list(self._groups.get(prefix, ()))
+            elif self.backend is not None:
+                ids = [vid for vid in self.backend.ids() if vid.startswith(prefix)]
+            else:
+                ids = []
+            return self._delete_logged(ids)
+
+    def search(self, query: np.ndarray, k: int, *, embedder: str) -> List[Hit]:
+        self._refresh()
+        with self._mutex:
+            if self.backend is None or self.embedder != embedder:
+                return []
+            return self.backend.search(np.asarray(query, dtype=np.float32).reshape(-1), k)
+
+    def save(self) -> None:
+        """Compacta o log num snapshot agora."""
+        if self.directory is None:
+            return
+        with self._writing():
+            self._compact()
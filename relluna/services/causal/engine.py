@@ -17,6 +17,11 @@ from relluna.services.causal.anti_nexo import apply_anti_nexo
 from relluna.services.causal.types import CausalLink
 from relluna.services.evidence.signals import load_critical_signal_json
 
+# Versão das regras/heurísticas do motor; incrementar ao mudar o resultado.
+_ENGINE_VERSION = "kausal_engine_v1"
+# `fonte` gravado em causal_link_v1.
+FONTE = "relluna.services.causal.engine"
+
 
 def infer_causal_links(dm: DocumentMemory) -> List[CausalLink]:
     """
@@ -157,7 +162,7 @@ def persist_causal_links_to_layer2(dm: DocumentMemory, links: List[CausalLink])
 
     dm.layer2.sinais_documentais["causal_link_v1"] = ProvenancedString(
         valor=links_json,
-        fonte="relluna.services.causal.engine",
+        fonte=FONTE,
         confianca=0.95,
     )
 
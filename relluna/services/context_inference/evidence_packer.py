@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.infra import signal_codec
+from relluna.services.evidence.signals import load_critical_signal_json
+
+# -----------------------------
+# Empacotamento de evidências da Layer2 para o LLM
+# -----------------------------
+#
+# Em vez de `dm.layer2.model_dump()` inteiro (spans, páginas OCR, ...), a
+# Layer2 é quebrada em unidades com lastro (`path`) e prioridade; as mais
+# relevantes entram até o orçamento de tokens. Todo `path` empacotado
+# existe na Layer2, então os lastro_paths devolvidos podem ser validados
+# contra `PackedEvidence.paths`.
+
+PACKER_VERSION = "evidence_packer_v1"
+
+_SIGNAL_PATH = "layer2.sinais_documentais.{}"
+
+# Campos técnicos pequenos: sempre cabem e situam o documento.
+_FIELDS = (
+    "num_paginas",
+    "largura_px",
+    "altura_px",
+    "duracao_segundos",
+    "taxa_amostragem_hz",
+    "data_exif",
+    "gps_exif",
+    "pdf_metadata",
+    "media_metadata",
+    "qualidade_sinal",
+)
+
+# Sinais já consolidados, enviados inteiros.
+_WHOLE_SIGNALS = {
+    "entities_canonical_v1": 95.0,
+    "legal_canonical_fields_v1": 90.0,
+    "structured_contract_v1": 85.0,
+}
+
+# Sinais em lista, enviados em blocos.
+_LIST_SIGNALS = {
+    "timeline_seed_v2": 68.0,
+    "hard_entities_v2": 65.0,
+}
+_LIST_CHUNK = 20
+
+_CRITICAL_SIGNALS = {"page_evidence_v1", "entities_canonical_v1", "timeline_seed_v2"}
+
+
+def token_budget() -> int:
+    return int(os.getenv("RELLUNA_LLM_EVIDENCE_TOKENS", "6000"))
+
+
+def page_excerpt_chars() -> int:
+    return int(os.getenv("RELLUNA_LLM_PAGE_EXCERPT_CHARS", "1200"))
+
+
+def estimate_tokens(value: Any) -> int:
+    """Estimativa barata (~4 caracteres por token em JSON pt-BR)."""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    return max(1, math.ceil(len(text) / 4))
+
+
+@dataclass
+class EvidenceUnit:
+    path: str
+    kind: str
+    priority: float
+    content: Any
+    page: Optional[int] = None
+    order: int = 0
+    tokens: int = 0
+
+    def as_prompt(self) -> Dict[str, Any]:
+        item: Dict[str, Any] = {"lastro_path": self.path, "tipo": self.kind}
+        if self.page is not None:
+            item["page"] = self.page
+        item["conteudo"] = self.content
+        return item
+
+
+@dataclass
+class PackedEvidence:
+    evidencias: List[Dict[str, Any]]
+    paths: List[str]
+    budget: int
+    original_tokens: int
+    packed_tokens: int
+    included: int
+    dropped: int
+    dropped_kinds: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ratio(self) -> float:
+        return round(self.packed_tokens / self.original_tokens, 4) if self.original_tokens else 1.0
+
+    def event_details(self) -> Dict[str, Any]:
+        return {
+            "packer_version": PACKER_VERSION,
+            "budget_tokens": self.budget,
+            "original_tokens": self.original_tokens,
+            "packed_tokens": self.packed_tokens,
+            "packed_ratio": self.ratio,
+            "units_included": self.included,
+            "units_dropped": self.dropped,
+            "dropped_kinds": self.dropped_kinds or None,
+        }
+
+
+def _signal_json(dm: DocumentMemory, key: str) -> Any:
+    if key in _CRITICAL_SIGNALS:
+        return load_critical_signal_json(dm, key)
+    sig = dm.layer2.sinais_documentais.get(key)
+    if not sig or not getattr(sig, "valor", None):
+        return None
+    try:
+        return json.loads(sig.valor)
+    except Exception:
+        return None
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    return value
+
+
+def _strongest_first(items: List[dict]) -> List[dict]:
+    return sorted(items, key=lambda item: -(item.get("confidence") or 0.0))
+
+
+def _page_units(dm: DocumentMemory) -> Iterator[EvidenceUnit]:
+    pages = _signal_json(dm, "page_evidence_v1") or []
+    path = _SIGNAL_PATH.format("page_evidence_v1")
+    excerpt = page_excerpt_chars()
+    for page in pages if isinstance(pages, list) else []:
+        if not isinstance(page, dict):
+            continue
+        page_no = page.get("page")
+        if page.get("anchors"):
+            yield EvidenceUnit(path, "anchors", 80.0, _strongest_first(page["anchors"]), page=page_no)
+        if page.get("signal_zones"):
+            yield EvidenceUnit(path, "signal_zones", 75.0, page["signal_zones"], page=page_no)
+        if page.get("date_candidates"):
+            yield EvidenceUnit(path, "date_candidates", 70.0, page["date_candidates"], page=page_no)
+        if page.get("page_taxonomy"):
+            yield EvidenceUnit(path, "page_taxonomy", 60.0, page["page_taxonomy"], page=page_no)
+        text = (page.get("page_text") or "").strip()
+        if text and excerpt > 0:
+            yield EvidenceUnit(path, "page_text", 20.0, text[:excerpt], page=page_no)
+
+
+def _ocr_units(dm: DocumentMemory) -> Iterator[EvidenceUnit]:
+    ocr = getattr(dm.layer2, "texto_ocr_literal", None)
+    text = (getattr(ocr, "valor", None) or "").strip()
+    size = max(page_excerpt_chars(), 1)
+    for index, start in enumerate(range(0, len(text), size)):
+        # Início do texto vale mais que o fim (cabeçalho, identificação).
+        yield EvidenceUnit("layer2.texto_ocr_literal", "ocr_text", 15.0 - index * 0.01, text[start : start + size])
+
+
+def collect_units(dm: DocumentMemory) -> List[EvidenceUnit]:
+    l2 = dm.layer2
+    units: List[EvidenceUnit] = []
+    if l2 is None:
+        return units
+
+    for name in _FIELDS:
+        value = getattr(l2, name, None)
+        if value is not None:
+            units.append(EvidenceUnit(f"layer2.{name}", "field", 100.0, _dump(value)))
+
+    if l2.entidades_visuais_objetivas:
+        units.append(
+            EvidenceUnit("layer2.entidades_visuais_objetivas", "visual_entities", 60.0, _dump(l2.entidades_visuais_objetivas))
+        )
+
+    for key, priority in _WHOLE_SIGNALS.items():
+        payload = _signal_json(dm, key)
+        if payload:
+            units.append(EvidenceUnit(_SIGNAL_PATH.format(key), key, priority, payload))
+
+    for key, priority in _LIST_SIGNALS.items():
+        payload = _signal_json(dm, key)
+        if not isinstance(payload, list):
+            continue
+        for start in range(0, len(payload), _LIST_CHUNK):
+            units.append(EvidenceUnit(_SIGNAL_PATH.format(key), key, priority, payload[start : start + _LIST_CHUNK]))
+
+    page_units = list(_page_units(dm))
+    units.extend(page_units)
+    if not page_units:
+        units.extend(_ocr_units(dm))
+
+    for order, unit in enumerate(units):
+        unit.order = order
+        unit.tokens = estimate_tokens(unit.as_prompt())
+    return units
+
+
+def original_tokens(dm: DocumentMemory) -> int:
+    """
+    Tamanho da Layer2 que iria inteira ao modelo, sem re-serializá-la: soma
+    do `valor` de cada sinal (`raw_bytes` se comprimido, sem descomprimir),
+    do OCR e dos campos técnicos/entidades visuais.
+    """
+    l2 = dm.layer2
+    if l2 is None:
+        return 0
+    # dict.values: lê a forma crua, sem disparar a decodificação de LazySignals.
+    chars = sum(signal_codec.raw_size(signal) for signal in dict.values(l2.sinais_documentais or {}))
+    for ocr in (l2.texto_ocr_literal, l2.ocr_texto):
+        chars += len(getattr(ocr, "valor", None) or "")
+    for name in _FIELDS:
+        value = getattr(l2, name, None)
+        if value is not None:
+            chars += len(json.dumps(_dump(value), ensure_ascii=False, default=str))
+    if l2.entidades_visuais_objetivas:
+        chars += len(json.dumps(_dump(l2.entidades_visuais_objetivas), ensure_ascii=False, default=str))
+    return max(1, math.ceil(chars / 4))
+
+
+def pack_layer2_evidence(dm: DocumentMemory, *, budget: Optional[int] = None) -> PackedEvidence:
+    """
+    Preenche o orçamento por prioridade (empates: ordem de página). Unidades
+    que não cabem são puladas, mas menores de prioridade inferior ainda
+    podem entrar. A saída volta à ordem original para leitura do modelo.
+    """
+    budget = token_budget() if budget is None else budget
+    units = collect_units(dm)
+
+    remaining = budget
+    chosen: List[EvidenceUnit] = []
+    dropped_kinds: Dict[str, int] = {}
+    for unit in sorted(units, key=lambda u: (-u.priority, u.order)):
+        if unit.tokens <= remaining:
+            chosen.append(unit)
+            remaining -= unit.tokens
+        else:
+            dropped_kinds[unit.kind] = dropped_kinds.get(unit.kind, 0) + 1
+
+    chosen.sort(key=lambda u: u.order)
+    return PackedEvidence(
+        evidencias=[unit.as_prompt() for unit in chosen],
+        paths=sorted({unit.path for unit in chosen}),
+        budget=budget,
+        original_tokens=original_tokens(dm),
+        packed_tokens=budget - remaining,
+        included=len(chosen),
+        dropped=len(units) - len(chosen),
+        dropped_kinds=dropped_kinds,
+    )
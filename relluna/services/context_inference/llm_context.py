@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import os
 from typing import Any
 
-from relluna.core.document_memory import (
-    DocumentMemory,
-    Layer3Evidence,
-    SemanticEntity,
-    TemporalReference,
-)
+from relluna.core.document_memory import DocumentMemory, Layer3Evidence
+from relluna.core.document_memory.layer3 import SemanticEntity, TemporalReference
 from relluna.core.document_memory.types_basic import EvidenceRef, InferenceMeta, InferredDatetime, InferredString
-from relluna.infra.azure_openai.client import chat_json
+from relluna.infra.azure_openai.client import chat_json, get_client
+from relluna.services.context_inference.evidence_packer import (
+    PACKER_VERSION,
+    PackedEvidence,
+    pack_layer2_evidence,
+)
+from relluna.services.observability.processing_events import append_processing_event
 
 _SOURCE = "azure_openai"
 _METHOD = "llm.json_schema"
@@ -19,14 +22,13 @@ _METHOD = "llm.json_schema"
 def _evidence_ref(path: str) -> EvidenceRef:
     return EvidenceRef(path=path)
 
-def infer_layer3_from_layer2(dm: DocumentMemory) -> Layer3Evidence:
-    l2 = dm.layer2.model_dump()
-
-    # input mínimo e auditável
+def _llm_request(dm: DocumentMemory, packed: PackedEvidence) -> tuple[str, dict[str, Any], dict[str, Any]]:
+    # input mínimo e auditável: só as evidências empacotadas dentro do orçamento
     evidence = {
         "media": str(dm.layer1.midia),
         "origin": str(dm.layer1.origem),
-        "layer2": l2,
+        "layer2": packed.evidencias,
+        "lastro_paths_validos": packed.paths,
     }
 
     schema = {
@@ -70,7 +72,7 @@ def infer_layer3_from_layer2(dm: DocumentMemory) -> Layer3Evidence:
         "Você é um motor de inferência rastreável da Relluna.\n"
         "Regras:\n"
         "1) Não invente fatos. Se não houver evidência, retorne null/[].\n"
-        "2) Toda inferência deve citar lastro_paths apontando para campos da layer2.\n"
+        "2) Toda inferência deve citar lastro_paths copiados de evidence.lastro_paths_validos.\n"
         "3) Saída DEVE respeitar o JSON schema fornecido.\n"
     )
 
@@ -80,22 +82,96 @@ def infer_layer3_from_layer2(dm: DocumentMemory) -> Layer3Evidence:
         "output_json_schema": schema,
     }
 
+    return system, user, schema
+
+
+def _offline_output(e: RuntimeError) -> dict[str, Any]:
+    # Fallback controlado quando não há chave Azure em ambiente de teste/desenv.
+    msg = str(e)
+    if "Missing env var: AZURE_OPENAI_API_KEY" in msg:
+        return {
+            "tipo_documento": None,
+            "temporalidades": [],
+            "entidades": [],
+            "regras_aplicadas": ["llm_offline_missing_api_key"],
+        }
+    # Qualquer outro erro de runtime continua sendo fatal (problema real de infra).
+    raise e
+
+
+def _valid_lastro(path: str, allowed: list[str]) -> bool:
+    return any(path == base or path.startswith((base + ".", base + "[")) for base in allowed)
+
+
+def _drop_invalid_lastro(out: dict[str, Any], allowed: list[str]) -> int:
+    """Remove lastro_paths que não apontam para evidência empacotada."""
+    dropped = 0
+    for item in list(out.get("temporalidades", [])) + list(out.get("entidades", [])):
+        paths = item.get("lastro_paths", [])
+        kept = [p for p in paths if _valid_lastro(p, allowed)]
+        dropped += len(paths) - len(kept)
+        item["lastro_paths"] = kept
+    return dropped
+
+
+def _finish(dm: DocumentMemory, packed: PackedEvidence, out: dict[str, Any]) -> Layer3Evidence:
+    invalid = _drop_invalid_lastro(out, packed.paths)
+    append_processing_event(
+        dm,
+        etapa="llm_evidence_packing",
+        engine=f"context_inference.{PACKER_VERSION}",
+        status="warning" if invalid else "success",
+        detalhes={**packed.event_details(), "invalid_lastro_paths": invalid},
+        warning_code="llm_invalid_lastro_paths" if invalid else None,
+    )
+    return _layer3_from_output(out)
+
+
+def infer_layer3_from_layer2(dm: DocumentMemory) -> Layer3Evidence:
+    packed = pack_layer2_evidence(dm)
+    system, user, schema = _llm_request(dm, packed)
     try:
         out: dict[str, Any] = chat_json(system=system, user_json=user, json_schema=schema)
     except RuntimeError as e:
-        # Fallback controlado quando não há chave Azure em ambiente de teste/desenv.
-        msg = str(e)
-        if "Missing env var: AZURE_OPENAI_API_KEY" in msg:
-            out = {
-                "tipo_documento": None,
-                "temporalidades": [],
-                "entidades": [],
-                "regras_aplicadas": ["llm_offline_missing_api_key"],
-            }
-        else:
-            # Qualquer outro erro de runtime continua sendo fatal (problema real de infra).
-            raise
+        out = _offline_output(e)
+    return _finish(dm, packed, out)
+
 
+async def ainfer_layer3_from_layer2(dm: DocumentMemory) -> Layer3Evidence:
+    """Mesma inferência pelo cliente assíncrono compartilhado (pool, limite e cache)."""
+    packed = pack_layer2_evidence(dm)
+    system, user, schema = _llm_request(dm, packed)
+    try:
+        out: dict[str, Any] = await get_client().chat_json(system=system, user_json=user, json_schema=schema)
+    except RuntimeError as e:
+        out = _offline_output(e)
+    return _finish(dm, packed, out)
+
+
+def enabled() -> bool:
+    """Etapa `infer_layer3_llm` do pipeline (desligada por padrão)."""
+    return os.getenv("RELLUNA_LLM_CONTEXT", "0").strip().lower() in {"1", "true", "on", "yes"}
+
+
+async def apply_llm_context(dm: DocumentMemory) -> DocumentMemory:
+    """
+    Complementa a Layer3 das regras com a inferência do LLM: só preenche o
+    que as regras deixaram vazio, nunca sobrescreve.
+    """
+    inferred = await ainfer_layer3_from_layer2(dm)
+    l3 = dm.layer3 if dm.layer3 is not None else Layer3Evidence()
+    if l3.tipo_documento is None:
+        l3.tipo_documento = inferred.tipo_documento
+    if not l3.temporalidades_inferidas:
+        l3.temporalidades_inferidas = inferred.temporalidades_inferidas
+    if not l3.entidades_semanticas:
+        l3.entidades_semanticas = inferred.entidades_semanticas
+    l3.regras_aplicadas = list(dict.fromkeys([*l3.regras_aplicadas, *inferred.regras_aplicadas]))
+    dm.layer3 = l3
+    return dm
+
+
+def _layer3_from_output(out: dict[str, Any]) -> Layer3Evidence:
     meta = InferenceMeta(engine=_SOURCE, method=_METHOD)
 
     l3 = Layer3Evidence()
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.core.lazy import lazy_import
+from relluna.infra.blob.artefact_resolver import ensure_local, primary_artefact
+from relluna.services.derivatives.page_previews import load_derivative, normalized_pages, store_derivative
+from relluna.services.page_extraction.page_normalizer import _apply_pdf_rotation
+
+fitz = lazy_import("fitz")
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
+
+# -----------------------------
+# Recortes de evidência (bbox -> imagem)
+# -----------------------------
+#
+# Âncoras de `page_evidence_v1`, citações de eventos probatórios e itens de
+# revisão trazem página + bbox. Em vez de carregar a página inteira, a UI
+# pede só a região: o PDF é renderizado com `clip`, no DPI pedido, e a
+# página nunca é rasterizada por inteiro.
+#
+# O bbox segue o espaço de coordenadas de onde veio:
+#   - páginas OCR (presentes em `normalized_pages_v1`): pixels da imagem
+#     normalizada, já com as rotações do normalizador;
+#   - páginas nativas: pontos do PDF, na página sem rotação (PyMuPDF).
+# O recorte sai na mesma orientação dos previews de página.
+#
+# Cache em dois níveis, chaveado por (fingerprint, página, bbox, dpi, ...):
+# LRU em memória (RELLUNA_EVIDENCE_CROP_CACHE_SIZE entradas) e o storage
+# de derivados (blob ou RELLUNA_DERIVATIVES_DIR), compartilhado entre pods.
+
+MIMETYPE = "image/png"
+DEFAULT_DPI = 150
+MIN_DPI = 36
+MAX_DPI = 300
+DEFAULT_PADDING = 6.0
+MAX_BATCH_CROPS = 200
+
+_HIGHLIGHT_FILL = (255, 221, 0, 70)
+_HIGHLIGHT_OUTLINE = (230, 120, 0, 255)
+
+
+def crop_cache_size() -> int:
+    return max(0, int(os.getenv("RELLUNA_EVIDENCE_CROP_CACHE_SIZE", "256")))
+
+
+def clamp_dpi(dpi: Optional[int]) -> int:
+    return min(MAX_DPI, max(MIN_DPI, int(dpi or DEFAULT_DPI)))
+
+
+def parse_bbox(raw: Any) -> Optional[Tuple[float, float, float, float]]:
+    """Aceita "x0,y0,x1,y1" ou lista de 4 números; None se inválido/vazio."""
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    if not isinstance(raw, (list, tuple)) or len(raw) != 4:
+        return None
+    try:
+        x0, y0, x1, y1 = (float(value) for value in raw)
+    except (TypeError, ValueError):
+        return None
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+
+@dataclass(frozen=True)
+class CropRequest:
+    page: int
+    bbox: Tuple[float, float, float, float]
+    dpi: int = DEFAULT_DPI
+    padding: float = DEFAULT_PADDING
+    highlight: bool = True
+
+    def cache_key(self, fingerprint: str) -> str:
+        bbox = ",".join(f"{value:.1f}" for value in self.bbox)
+        raw = f"{fingerprint}|{self.page}|{bbox}|{self.dpi}|{self.padding:.1f}|{int(self.highlight)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def crop_blob_path(fingerprint: str, key: str) -> str:
+    return f"derivatives/crops/{fingerprint}/{key}.png"
+
+
+# ---- espaço de coordenadas ----
+
+
+@dataclass(frozen=True)
+class PageSpace:
+    """Como o bbox de uma página se relaciona com o PDF."""
+
+    ocr_width: Optional[int] = None
+    ocr_height: Optional[int] = None
+    rotation_applied: int = 0
+    source_pdf_rotation: int = 0
+
+    @property
+    def is_ocr(self) -> bool:
+        return bool(self.ocr_width and self.ocr_height)
+
+
+def page_spaces(dm: DocumentMemory) -> Dict[int, PageSpace]:
+    out: Dict[int, PageSpace] = {}
+    for item in normalized_pages(dm):
+        page = int(item.get("page") or 0)
+        if page:
+            out[page] = PageSpace(
+                ocr_width=int(item.get("width") or 0) or None,
+                ocr_height=int(item.get("height") or 0) or None,
+                rotation_applied=int(item.get("rotation_applied") or 0) % 360,
+                source_pdf_rotation=int(item.get("source_pdf_rotation") or 0) % 360,
+            )
+    return out
+
+
+def _unrotate_box(
+    box: Tuple[float, float, float, float], size_after: Tuple[float, float], angle: int
+) -> Tuple[Tuple[float, float, float, float], Tuple[float, float]]:
+    """
+    Desfaz `Image.rotate(angle, expand=True)` (anti-horário) sobre um box.
+    Devolve o box e o tamanho da imagem antes da rotação.
+    """
+    width_after, height_after = size_after
+    if angle == 90:
+        width, height = height_after, width_after
+        points = [(width - y, x) for x, y in ((box[0], box[1]), (box[2], box[3]))]
+    elif angle == 180:
+        width, height = width_after, height_after
+        points = [(width - x, height - y) for x, y in ((box[0], box[1]), (box[2], box[3]))]
+    elif angle == 270:
+        width, height = height_after, width_after
+        points = [(y, height - x) for x, y in ((box[0], box[1]), (box[2], box[3]))]
+    else:
+        return box, size_after
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    return (min(xs), min(ys), max(xs), max(ys)), (width, height)
+
+
+def _page_rect_for(page: Any, bbox: Tuple[float, float, float, float], space: PageSpace) -> Any:
+    """Bbox no espaço da página exibida (rotacionada), que é o espaço do `clip`."""
+    if not space.is_ocr:
+        return fitz.Rect(bbox) * page.rotation_matrix
+
+    # Imagem normalizada = render da página exibida, girado por
+    # `_apply_pdf_rotation` e depois por `rotation_applied`: desfaz em ordem
+    # inversa e escala pixels -> pontos.
+    box, size = _unrotate_box(bbox, (space.ocr_width, space.ocr_height), space.rotation_applied)
+    box, size = _unrotate_box(box, size, (360 - space.source_pdf_rotation) % 360)
+    scale_x = page.rect.width / max(size[0], 1.0)
+    scale_y = page.rect.height / max(size[1], 1.0)
+    return fitz.Rect(box[0] * scale_x, box[1] * scale_y, box[2] * scale_x, box[3] * scale_y)
+
+
+# ---- render ----
+
+
+def _render_crop(doc: Any, request: CropRequest, space: PageSpace) -> Optional[bytes]:
+    if not 0 < request.page <= len(doc):
+        return None
+    page = doc.load_page(request.page - 1)
+    target = _page_rect_for(page, request.bbox, space)
+    clip = fitz.Rect(
+        target.x0 - request.padding,
+        target.y0 - request.padding,
+        target.x1 + request.padding,
+        target.y1 + request.padding,
+    ) & page.rect
+    if clip.is_empty:
+        return None
+
+    zoom = request.dpi / 72.0
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+    image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    if request.highlight:
+        overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+        box = [
+            (target.x0 - clip.x0) * zoom,
+            (target.y0 - clip.y0) * zoom,
+            (target.x1 - clip.x0) * zoom,
+            (target.y1 - clip.y0) * zoom,
+        ]
+        ImageDraw.Draw(overlay).rectangle(box, fill=_HIGHLIGHT_FILL, outline=_HIGHLIGHT_OUTLINE, width=2)
+        image = Image.alpha_composite(image.convert("RGBA"), overlay).convert("RGB")
+
+    # Mesma orientação dos previews de página.
+    image = _apply_pdf_rotation(image, int(page.rotation or 0))
+    if space.rotation_applied:
+        image = image.rotate(space.rotation_applied, expand=True)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+def render_crops(
+    pdf_path: Path, requests: Sequence[CropRequest], spaces: Dict[int, PageSpace]
+) -> List[Optional[bytes]]:
+    """Renderiza vários recortes abrindo o PDF uma única vez."""
+    with fitz.open(str(pdf_path)) as doc:
+        return [_render_crop(doc, request, spaces.get(request.page, PageSpace())) for request in requests]
+
+
+# ---- cache ----
+
+_MEMORY: "OrderedDict[str, bytes]" = OrderedDict()
+_LOCK = Lock()
+
+
+def _memory_get(key: str) -> Optional[bytes]:
+    with _LOCK:
+        content = _MEMORY.get(key)
+        if content is not None:
+            _MEMORY.move_to_end(key)
+        return content
+
+
+def _memory_put(key: str, content: bytes) -> None:
+    limit = crop_cache_size()
+    if not limit:
+        return
+    with _LOCK:
+        _MEMORY[key] = content
+        _MEMORY.move_to_end(key)
+        while len(_MEMORY) > limit:
+            _MEMORY.popitem(last=False)
+
+
+def clear() -> None:
+    with _LOCK:
+        _MEMORY.clear()
+
+
+async def get_or_render_crops(dm: DocumentMemory, requests: Sequence[CropRequest]) -> List[Optional[bytes]]:
+    """
+    PNG de cada recorte pedido, na mesma ordem; None para página inexistente,
+    bbox fora da página ou documento sem PDF. Só os que faltam no cache são
+    renderizados, todos numa única abertura do PDF.
+    """
+    fingerprint = dm.layer0.contentfingerprint
+    keys = [request.cache_key(fingerprint) for request in requests]
+    out: List[Optional[bytes]] = [_memory_get(key) for key in keys]
+
+    for index, key in enumerate(keys):
+        if out[index] is None:
+            stored = await load_derivative(crop_blob_path(fingerprint, key))
+            if stored is not None:
+                _memory_put(key, stored)
+                out[index] = stored
+
+    missing = [index for index, content in enumerate(out) if content is None]
+    if not missing:
+        return out
+
+    artefact = primary_artefact(dm)
+    path = await ensure_local(artefact) if artefact is not None else None
+    if path is None or not path.exists() or path.suffix.lower() != ".pdf":
+        return out
+
+    rendered = await asyncio.to_thread(render_crops, path, [requests[index] for index in missing], page_spaces(dm))
+    for index, content in zip(missing, rendered):
+        if content is None:
+            continue
+        await store_derivative(crop_blob_path(fingerprint, keys[index]), content)
+        _memory_put(keys[index], content)
+        out[index] = content
+    return out
+
+
+# ---- citações da timeline ----
+
+
+def timeline_crop_targets(timeline: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Pares (página, bbox) citados pela timeline pública, sem repetição e na
+    ordem da timeline; cada alvo lista os eventos que o citam.
+    """
+    targets: "OrderedDict[Tuple[int, Tuple[float, ...]], Dict[str, Any]]" = OrderedDict()
+    for event in timeline:
+        citations = list(event.get("citations") or []) or [event.get("evidence_navigation") or {}]
+        for citation in citations:
+            bbox = parse_bbox(citation.get("bbox"))
+            page = citation.get("page")
+            if bbox is None or not isinstance(page, int) or page < 1:
+                continue
+            target = targets.setdefault(
+                (page, tuple(round(value, 1) for value in bbox)),
+                {"page": page, "bbox": list(bbox), "snippet": citation.get("snippet"), "event_ids": []},
+            )
+            event_id = event.get("event_id")
+            if event_id and event_id not in target["event_ids"]:
+                target["event_ids"].append(event_id)
+    return list(targets.values())
@@ -664,9 +664,9 @@ def apply_layer5(dm: DocumentMemory) -> DocumentMemory:
     elif not isinstance(dm.layer5, Layer5Derivatives):
         dm.layer5 = Layer5Derivatives()
 
-    # Derivados binários (thumbnail, frame, waveform, preview) ainda não são
-    # gerados; as listas ficam vazias até existir geração real, em vez de
-    # registrar URIs placeholder como se fossem artefatos persistidos.
+    # Derivados binários só entram com arquivo gravado de verdade: thumbnails
+    # e previews de página vêm de `page_previews.apply_page_previews`, que
+    # roda logo depois; frame e waveform ainda não são gerados.
     dm.layer5.imagens_derivadas = []
     dm.layer5.videos_derivados = []
     dm.layer5.audios_derivados = []
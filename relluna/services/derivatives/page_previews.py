@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+from relluna.core.contracts.document_memory_contract import Derivado, Layer5Derivatives, StorageURI
+from relluna.core.document_memory import DocumentMemory
+from relluna.core.lazy import lazy_import
+from relluna.infra.blob.artefact_resolver import ensure_local, primary_artefact
+from relluna.infra.blob.async_store import get_async_blob_store
+from relluna.services.observability import append_processing_event
+from relluna.services.page_extraction.page_normalizer import _apply_pdf_rotation, _render_page_to_pil
+
+fitz = lazy_import("fitz")
+Image = lazy_import("PIL.Image")
+
+# -----------------------------
+# Thumbnails e previews de página (WebP)
+# -----------------------------
+#
+# O normalizador já rasteriza as páginas OCR (100 dpi, rotação aplicada).
+# Depois da Layer5, `apply_page_previews` reaproveita esses renders para
+# gravar WebP em cada variante que cabe na resolução do render; variantes
+# maiores e páginas nativas (que não passam pelo normalizador) são
+# renderizadas do PDF sob demanda, em `get_or_render_preview`.
+#
+# Os arquivos vão para o blob store do processo (RELLUNA_BLOB_BACKEND) ou,
+# sem backend, para RELLUNA_DERIVATIVES_DIR, sempre no mesmo caminho
+# lógico: derivatives/{documentid}/pages/{página}/{variante}.webp.
+
+FONTE = "services.derivatives.page_previews_v1"
+MIMETYPE = "image/webp"
+
+PreviewSize = Literal["thumb", "small", "medium", "large"]
+
+# Largura máxima (px) de cada variante.
+PREVIEW_SIZES: Dict[str, int] = {"thumb": 200, "small": 480, "medium": 800, "large": 1600}
+THUMBNAIL_SIZE = "thumb"
+
+
+def webp_quality() -> int:
+    return min(100, max(1, int(os.getenv("RELLUNA_PREVIEW_WEBP_QUALITY", "80"))))
+
+
+def derivatives_dir() -> Path:
+    return Path(os.getenv("RELLUNA_DERIVATIVES_DIR", ".derivatives"))
+
+
+def preview_blob_path(documentid: str, page: int, size: str) -> str:
+    return f"derivatives/{documentid}/pages/{int(page):04d}/{size}.webp"
+
+
+@dataclass
+class PagePreview:
+    size: str
+    content: bytes
+    width: int
+    height: int
+
+
+# ---- codificação / render ----
+
+
+def encode_webp(image: Any, size: str) -> PagePreview:
+    variant = image.copy()
+    if variant.mode not in {"RGB", "L"}:
+        variant = variant.convert("RGB")
+    max_width = PREVIEW_SIZES[size]
+    # thumbnail não amplia: só limita a largura, mantendo a proporção.
+    variant.thumbnail((max_width, max_width * 10))
+    buffer = io.BytesIO()
+    variant.save(buffer, format="WEBP", quality=webp_quality(), method=4)
+    return PagePreview(size=size, content=buffer.getvalue(), width=variant.width, height=variant.height)
+
+
+def render_pdf_page(pdf_path: Path, page: int, size: str, *, rotation_applied: int = 0) -> Any:
+    """Render do PDF na largura da variante, com as mesmas rotações do normalizador."""
+    with fitz.open(str(pdf_path)) as doc:
+        if not 0 < page <= len(doc):
+            raise IndexError(page)
+        pdf_page = doc.load_page(page - 1)
+        pdf_rotation = int(pdf_page.rotation or 0)
+        points = pdf_page.rect.height if pdf_rotation in {90, 270} else pdf_page.rect.width
+        dpi = max(36, 72.0 * PREVIEW_SIZES[size] / max(points, 1.0))
+        image = _apply_pdf_rotation(_render_page_to_pil(doc, page - 1, dpi=int(round(dpi))), pdf_rotation)
+    if rotation_applied:
+        image = image.rotate(rotation_applied, expand=True)
+    return image
+
+
+# ---- armazenamento ----
+
+
+async def store_derivative(blob_path: str, content: bytes) -> StorageURI:
+    store = get_async_blob_store()
+    if store is not None:
+        return StorageURI(kind="blob", uri=await store.upload_bytes(content, blob_path))
+    target = derivatives_dir() / blob_path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    await asyncio.to_thread(target.write_bytes, content)
+    return StorageURI(kind="filesystem", uri=target.resolve().as_uri())
+
+
+async def load_derivative(blob_path: str) -> Optional[bytes]:
+    store = get_async_blob_store()
+    if store is not None:
+        try:
+            return await store.download_bytes(blob_path)
+        except Exception:
+            return None
+    target = derivatives_dir() / blob_path
+    return await asyncio.to_thread(target.read_bytes) if target.exists() else None
+
+
+async def load_preview(documentid: str, page: int, size: str) -> Optional[bytes]:
+    return await load_derivative(preview_blob_path(documentid, page, size))
+
+
+# ---- geração na pipeline ----
+
+
+def normalized_pages(dm: DocumentMemory) -> List[Dict[str, Any]]:
+    if dm.layer2 is None:
+        return []
+    sig = dm.layer2.sinais_documentais.get("normalized_pages_v1")
+    if not sig or not getattr(sig, "valor", None):
+        return []
+    try:
+        data = json.loads(sig.valor)
+    except Exception:
+        return []
+    return [item for item in data if isinstance(item, dict)] if isinstance(data, list) else []
+
+
+def _rotation_applied(dm: DocumentMemory, page: int) -> int:
+    for item in normalized_pages(dm):
+        if int(item.get("page") or 0) == page:
+            return int(item.get("rotation_applied") or 0)
+    return 0
+
+
+def _encode_from_render(image_path: str) -> List[PagePreview]:
+    with Image.open(image_path) as image:
+        image.load()
+        return [
+            encode_webp(image, size)
+            for size, width in PREVIEW_SIZES.items()
+            if width <= image.width or size == THUMBNAIL_SIZE
+        ]
+
+
+async def apply_page_previews(dm: DocumentMemory) -> DocumentMemory:
+    """
+    Variantes WebP das páginas já renderizadas pelo normalizador, gravadas
+    no storage e registradas na Layer5 (thumbnails em `imagens_derivadas`,
+    previews em `documentos_derivados`).
+    """
+    if dm.layer0 is None or dm.layer5 is None:
+        return dm
+    if not isinstance(dm.layer5, Layer5Derivatives):
+        dm.layer5 = Layer5Derivatives.model_validate(dm.layer5)
+
+    documentid = dm.layer0.documentid
+    thumbnails: List[Derivado] = []
+    previews: List[Derivado] = []
+    storage: List[StorageURI] = []
+
+    for item in normalized_pages(dm):
+        page = int(item.get("page") or 0)
+        image_path = item.get("image_path")
+        if not page or not image_path or not Path(image_path).exists():
+            # Render temporário já descartado: a página cai no caminho sob demanda.
+            continue
+        try:
+            variants = await asyncio.to_thread(_encode_from_render, image_path)
+            stored_variants = [
+                (variant, await store_derivative(preview_blob_path(documentid, page, variant.size), variant.content))
+                for variant in variants
+            ]
+        except Exception as exc:
+            # Preview é acessório: a página fica para o render sob demanda.
+            append_processing_event(
+                dm,
+                etapa="page_preview",
+                engine=FONTE,
+                status="warning",
+                detalhes={"error_type": exc.__class__.__name__, "message": str(exc)},
+                page_index=page,
+                warning_code="page_preview_failed",
+            )
+            continue
+        for variant, stored in stored_variants:
+            derivado = Derivado(
+                tipo="page_thumbnail_webp" if variant.size == THUMBNAIL_SIZE else "page_preview_webp",
+                uri=stored.uri,
+                pagina=page,
+                variante=variant.size,
+                largura=variant.width,
+                altura=variant.height,
+                mimetype=MIMETYPE,
+            )
+            (thumbnails if variant.size == THUMBNAIL_SIZE else previews).append(derivado)
+            storage.append(stored)
+
+    dm.layer5.imagens_derivadas = [d for d in dm.layer5.imagens_derivadas if d.tipo != "page_thumbnail_webp"] + thumbnails
+    dm.layer5.documentos_derivados = [d for d in dm.layer5.documentos_derivados if d.tipo != "page_preview_webp"] + previews
+    known = {uri.uri for uri in dm.layer5.storage_uris}
+    dm.layer5.storage_uris.extend(uri for uri in storage if uri.uri not in known)
+    return dm
+
+
+# ---- leitura com render sob demanda ----
+
+
+async def get_or_render_preview(dm: DocumentMemory, page: int, size: str) -> Optional[bytes]:
+    """
+    WebP da variante pedida; sem arquivo gravado (página nativa, variante
+    maior que o render ou render descartado), renderiza do PDF e grava.
+    None quando o documento não tem PDF ou a página não existe.
+    """
+    documentid = dm.layer0.documentid
+    cached = await load_preview(documentid, page, size)
+    if cached is not None:
+        return cached
+
+    artefact = primary_artefact(dm)
+    if artefact is None:
+        return None
+    path = await ensure_local(artefact)
+    if path is None or not path.exists() or path.suffix.lower() != ".pdf":
+        return None
+
+    rotation = _rotation_applied(dm, page)
+
+    def render() -> Optional[PagePreview]:
+        try:
+            image = render_pdf_page(path, page, size, rotation_applied=rotation)
+        except IndexError:
+            return None
+        return encode_webp(image, size)
+
+    variant = await asyncio.to_thread(render)
+    if variant is None:
+        return None
+    await store_derivative(preview_blob_path(documentid, page, size), variant.content)
+    return variant.content
@@ -10,9 +10,7 @@ import shutil
 import subprocess
 import wave
 
-from PIL import Image, ExifTags
-from pypdf import PdfReader
-
+from relluna.core.lazy import lazy_import
 from relluna.services.ocr import make_layer2_ocr_field
 
 from relluna.core.document_memory import (
@@ -28,6 +26,11 @@ from relluna.services.deterministic_extractors.base import extract_base
 from relluna.services.deterministic_extractors.pdf_layout import extract_pdf_layout_spans
 from relluna.services.deterministic_extractors.entities_hard_v2 import extract_hard_entities_v2
 from relluna.services.deterministic_extractors.structured_block import extract_structured_contract_block
+from relluna.infra.blob.artefact_resolver import resolve_artefact_path
+
+Image = lazy_import("PIL.Image")
+ExifTags = lazy_import("PIL.ExifTags")
+pypdf = lazy_import("pypdf")
 
 FONTE = "deterministic_extractors.basic"
 
@@ -317,7 +320,7 @@ def extract_basic(dm: DocumentMemory) -> DocumentMemory:
         return dm
 
     artefato = dm.layer1.artefatos[0]
-    path = Path(artefato.uri)
+    path = resolve_artefact_path(artefato)
     layer2 = dm.layer2
 
     # ─── IMAGEM ────────────────────────────────────────────────────────────────
@@ -366,7 +369,7 @@ def extract_basic(dm: DocumentMemory) -> DocumentMemory:
         num: float | None = None
         if path.exists():
             try:
-                reader = PdfReader(str(path))
+                reader = pypdf.PdfReader(str(path))
                 num = float(len(reader.pages))
             except Exception:
                 num = None
@@ -9,19 +9,17 @@ from typing import Any, Dict, List, Optional, Tuple
 from relluna.core.document_memory import DocumentMemory
 from relluna.core.document_memory.types_basic import ProvenancedString
 from relluna.services.evidence.signals import load_critical_signal_json
+from relluna.services.page_extraction.text_scanner import SCAN_PATTERNS, scan_text
 
 FONTE = "deterministic_extractors.entities_hard_v2"
 
-_RE_CPF = re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b|\b\d{11}\b")
-_RE_CNPJ = re.compile(r"\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b")
-_RE_DATE_NUMERIC = re.compile(r"\b(\d{2})/(\d{2})/(\d{4})\b")
-_RE_DATE_TEXTUAL = re.compile(
-    r"\b(\d{1,2})\s+de\s+([A-Za-zçÇãÃáàâéêíóôõú]+)\s+de\s+(\d{4})\b",
-    re.IGNORECASE,
-)
-_RE_MONEY = re.compile(r"R\$\s*([\d\.\,]+)")
-_RE_CID = re.compile(r"\b([A-TV-Z][0-9]{2}(?:\.[0-9A-Z]{1,2})?)\b")
-_RE_CRM = re.compile(r"\bCRM(?:\s*[-:/]?\s*[A-Z]{0,2})?\s*[-:]?\s*(\d{4,8})\b", re.IGNORECASE)
+_RE_CPF = SCAN_PATTERNS["cpf_any"]
+_RE_CNPJ = SCAN_PATTERNS["cnpj"]
+_RE_DATE_NUMERIC = SCAN_PATTERNS["date_numeric"]
+_RE_DATE_TEXTUAL = SCAN_PATTERNS["date_textual"]
+_RE_MONEY = SCAN_PATTERNS["money"]
+_RE_CID = SCAN_PATTERNS["cid"]
+_RE_CRM = SCAN_PATTERNS["crm"]
 _RE_AFASTAMENTO_DIAS = re.compile(
     r"(?:afastad[oa].{0,50}?por\s+|repouso\s+de\s+)(\d{1,3})\s*dias",
     re.IGNORECASE | re.DOTALL,
@@ -180,6 +178,7 @@ def extract_hard_entities_v2(dm: DocumentMemory) -> DocumentMemory:
         return dm
 
     text = dm.layer2.texto_ocr_literal.valor or ""
+    scan = scan_text(text)
     page_evidence = _load_signal_json(dm, "page_evidence_v1") or []
     results: List[Dict[str, Any]] = []
 
@@ -196,7 +195,7 @@ def extract_hard_entities_v2(dm: DocumentMemory) -> DocumentMemory:
         provider["type"] = "provider_name"
         _append_unique(results, provider, ["type", "value"])
 
-    for raw in _RE_CPF.findall(text):
+    for raw in scan.findall("cpf_any"):
         digits = re.sub(r"\D", "", raw)
         if not _validate_cpf(digits):
             continue
@@ -210,7 +209,7 @@ def extract_hard_entities_v2(dm: DocumentMemory) -> DocumentMemory:
             "confidence": confidence or 0.95,
         }, ["type", "value"])
 
-    for raw in _RE_CNPJ.findall(text):
+    for raw in scan.findall("cnpj"):
         if not _validate_cnpj(raw):
             continue
         page, bbox, snippet, confidence = _find_anchor_for_value(page_evidence, "cnpj", raw)
@@ -223,21 +222,21 @@ def extract_hard_entities_v2(dm: DocumentMemory) -> DocumentMemory:
             "confidence": confidence or 0.95,
         }, ["type", "value"])
 
-    for m in _RE_CRM.finditer(text):
-        crm = m.group(1)
+    for m in scan.matches("crm"):
+        crm = m.groups[0]
         page, bbox, snippet, confidence = _find_anchor_for_value(page_evidence, "crm", crm)
         _append_unique(results, {
             "type": "crm",
             "value": crm,
             "page": page,
             "bbox": bbox,
-            "snippet": snippet or m.group(0),
+            "snippet": snippet or m.text,
             "confidence": confidence or 0.92,
         }, ["type", "value"])
 
-    for m in _RE_CID.finditer(text):
-        cid = m.group(1)
-        if not _cid_context_ok(text, m.start(), m.end()):
+    for m in scan.matches("cid"):
+        cid = m.groups[0]
+        if not _cid_context_ok(text, m.start, m.end):
             continue
         page, bbox, snippet, confidence = _find_anchor_for_value(page_evidence, "cid", cid)
         _append_unique(results, {
@@ -249,7 +248,7 @@ def extract_hard_entities_v2(dm: DocumentMemory) -> DocumentMemory:
             "confidence": confidence or 0.95,
         }, ["type", "value"])
 
-    for match in _RE_MONEY.findall(text):
+    for match in scan.findall("money"):
         value_float = float(match.replace(".", "").replace(",", "."))
         _append_unique(results, {
             "type": "valor_monetario",
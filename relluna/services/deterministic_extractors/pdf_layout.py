@@ -3,10 +3,12 @@ from __future__ import annotations
 import json
 from typing import Any, Dict, List
 
-import fitz  # PyMuPDF
-
 from relluna.core.document_memory import DocumentMemory
 from relluna.core.document_memory.types_basic import ProvenancedString
+from relluna.core.lazy import lazy_import
+from relluna.infra.blob.artefact_resolver import resolve_artefact_path
+
+fitz = lazy_import("fitz")  # PyMuPDF
 
 
 def _prov_json(payload: Any, fonte: str, metodo: str) -> ProvenancedString:
@@ -37,7 +39,7 @@ def extract_pdf_layout_spans(dm: DocumentMemory, max_pages: int = 300) -> Docume
         return dm
 
     try:
-        doc = fitz.open(artef.uri)
+        doc = fitz.open(str(resolve_artefact_path(artef)))
     except Exception:
         return dm
 
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from pathlib import Path
 from typing import Dict, Any
-from PIL import Image
 
 from relluna.core.document_memory import DocumentMemory, MediaType
+from relluna.core.lazy import lazy_import
+from relluna.infra.blob.artefact_resolver import resolve_artefact_path
 
 
+Image = lazy_import("PIL.Image")
+
 FONTE = "deterministic_extractors.plus"
 
 
@@ -15,7 +17,7 @@ async def extract_plus(dm: DocumentMemory) -> DocumentMemory:
         return dm
 
     artefato = dm.layer1.artefatos[0]
-    path = Path(artefato.uri)
+    path = resolve_artefact_path(artefato)
 
     if dm.layer2 is None:
         return dm
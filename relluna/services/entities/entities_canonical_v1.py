@@ -3,13 +3,15 @@ from __future__ import annotations
 import json
 import re
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from relluna.core.document_memory import DocumentMemory
 from relluna.core.document_memory.types_basic import ProvenancedString
+from relluna.services.evidence.layout_span_store import LayoutSpanStore
 from relluna.services.evidence.signals import dump_critical_signal_json, load_critical_signal_json
 from relluna.services.entities.document_date_resolver import DocumentDateResolver
 from relluna.services.entities.people_resolver import PeopleResolver
+from relluna.services.entities.person_blocking import candidate_pairs
 from relluna.services.legal.legal_canonical_fields_v1 import apply_legal_canonical_fields_v1
 
 FONTE = "services.entities.entities_canonical_v1"
@@ -231,15 +233,13 @@ def _has_strong_patient_context(snippet: Optional[str]) -> bool:
     return bool(re.search(r"\b(?:paciente|nome\s+paciente|nome)\s*:", text, re.IGNORECASE))
 
 
-def _find_span_by_snippet(layout_spans: List[Dict[str, Any]], needle: str) -> Optional[Dict[str, Any]]:
+def _find_span_by_snippet(
+    layout_spans: Union[List[Dict[str, Any]], LayoutSpanStore],
+    needle: str,
+) -> Optional[Dict[str, Any]]:
     if not needle:
         return None
-    needle_norm = _normalize_spaces(needle) or ""
-    for span in layout_spans or []:
-        text = _normalize_spaces(span.get("text"))
-        if text and needle_norm in text:
-            return span
-    return None
+    return LayoutSpanStore.from_spans(layout_spans).find_first_containing(needle)
 
 
 def _score_zone_priority(zone_name: Optional[str]) -> int:
@@ -1099,15 +1099,10 @@ def _quality_report(payload: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def _layout_spans_for_pages(
-    layout_spans: List[Dict[str, Any]],
+    layout_spans: Union[List[Dict[str, Any]], LayoutSpanStore],
     page_numbers: List[int],
-) -> List[Dict[str, Any]]:
-    page_set = {int(page) for page in page_numbers}
-    return [
-        span
-        for span in layout_spans or []
-        if isinstance(span, dict) and int(span.get("page") or 0) in page_set
-    ]
+) -> LayoutSpanStore:
+    return LayoutSpanStore.from_spans(layout_spans).for_pages(page_numbers)
 
 
 def _normalize_relation_name(value: Optional[str]) -> Optional[str]:
@@ -1417,6 +1412,38 @@ def _relation_edge(
     }
 
 
+def _relation_candidate_pairs(subdocument_units: List[Dict[str, Any]]) -> Set[Tuple[int, int]]:
+    """
+    Pares que podem gerar aresta: mesmo paciente, mesmo prestador ou mesmo
+    tipo+data (bloqueio por chave exata), mais os pares com alguma unidade
+    incompleta, que sempre recebem ao menos a aresta `unknown`.
+    """
+    keys_by_unit: List[List[str]] = []
+    incomplete: List[int] = []
+    for index, unit in enumerate(subdocument_units):
+        patient = _normalize_relation_name(((unit.get("patient") or {}).get("name")))
+        provider = _normalize_relation_name(((unit.get("provider") or {}).get("name")))
+        document_date = ((unit.get("document_date") or {}).get("date_iso"))
+        document_type = unit.get("document_type")
+        keys = []
+        if patient:
+            keys.append(f"patient:{patient}")
+        if provider:
+            keys.append(f"provider:{provider}")
+        if document_type and document_date:
+            keys.append(f"type_date:{document_type}:{document_date}")
+        keys_by_unit.append(keys)
+        if not (patient and provider and document_date):
+            incomplete.append(index)
+
+    pairs = candidate_pairs(keys_by_unit)
+    for index in incomplete:
+        for other in range(len(subdocument_units)):
+            if other != index:
+                pairs.add((min(index, other), max(index, other)))
+    return pairs
+
+
 def _build_document_relation_graph_v1(subdocument_units: List[Dict[str, Any]]) -> Dict[str, Any]:
     nodes = [
         {
@@ -1433,133 +1460,132 @@ def _build_document_relation_graph_v1(subdocument_units: List[Dict[str, Any]]) -
     ]
 
     edges: List[Dict[str, Any]] = []
-    for index, left in enumerate(subdocument_units):
-        for right in subdocument_units[index + 1 :]:
-            left_patient = _normalize_relation_name(((left.get("patient") or {}).get("name")))
-            right_patient = _normalize_relation_name(((right.get("patient") or {}).get("name")))
-            left_provider = _normalize_relation_name(((left.get("provider") or {}).get("name")))
-            right_provider = _normalize_relation_name(((right.get("provider") or {}).get("name")))
-            left_date = ((left.get("document_date") or {}).get("date_iso"))
-            right_date = ((right.get("document_date") or {}).get("date_iso"))
-            left_dt = _parse_iso_date(left_date)
-            right_dt = _parse_iso_date(right_date)
-            left_type = left.get("document_type")
-            right_type = right.get("document_type")
-            left_cids = {item.get("code") for item in ((left.get("clinical") or {}).get("cids") or []) if isinstance(item, dict) and item.get("code")}
-            right_cids = {item.get("code") for item in ((right.get("clinical") or {}).get("cids") or []) if isinstance(item, dict) and item.get("code")}
-            pair_refs = (left.get("evidence_refs") or [])[:2] + (right.get("evidence_refs") or [])[:2]
-
-            if left_patient and right_patient and left_patient == right_patient:
-                edges.append(
-                    _relation_edge(
-                        "same_patient",
-                        left["subdoc_id"],
-                        right["subdoc_id"],
-                        confidence=0.97,
-                        reasons=["patient_name_match"],
-                        evidence_refs=pair_refs,
-                    )
+    for left_index, right_index in sorted(_relation_candidate_pairs(subdocument_units)):
+        left = subdocument_units[left_index]
+        right = subdocument_units[right_index]
+        pair_edge_start = len(edges)
+        left_patient = _normalize_relation_name(((left.get("patient") or {}).get("name")))
+        right_patient = _normalize_relation_name(((right.get("patient") or {}).get("name")))
+        left_provider = _normalize_relation_name(((left.get("provider") or {}).get("name")))
+        right_provider = _normalize_relation_name(((right.get("provider") or {}).get("name")))
+        left_date = ((left.get("document_date") or {}).get("date_iso"))
+        right_date = ((right.get("document_date") or {}).get("date_iso"))
+        left_dt = _parse_iso_date(left_date)
+        right_dt = _parse_iso_date(right_date)
+        left_type = left.get("document_type")
+        right_type = right.get("document_type")
+        left_cids = {item.get("code") for item in ((left.get("clinical") or {}).get("cids") or []) if isinstance(item, dict) and item.get("code")}
+        right_cids = {item.get("code") for item in ((right.get("clinical") or {}).get("cids") or []) if isinstance(item, dict) and item.get("code")}
+        pair_refs = (left.get("evidence_refs") or [])[:2] + (right.get("evidence_refs") or [])[:2]
+
+        if left_patient and right_patient and left_patient == right_patient:
+            edges.append(
+                _relation_edge(
+                    "same_patient",
+                    left["subdoc_id"],
+                    right["subdoc_id"],
+                    confidence=0.97,
+                    reasons=["patient_name_match"],
+                    evidence_refs=pair_refs,
                 )
+            )
+
+        if left_provider and right_provider and left_provider == right_provider:
+            edges.append(
+                _relation_edge(
+                    "same_provider",
+                    left["subdoc_id"],
+                    right["subdoc_id"],
+                    confidence=0.95,
+                    reasons=["provider_name_match"],
+                    evidence_refs=pair_refs,
+                )
+            )
 
-            if left_provider and right_provider and left_provider == right_provider:
+        if left_patient and right_patient and left_patient == right_patient:
+            same_episode = False
+            reasons: List[str] = []
+            if left_dt and right_dt and abs((left_dt - right_dt).days) <= 30:
+                same_episode = True
+                reasons.append("document_dates_within_30_days")
+            if left_cids and right_cids and left_cids.intersection(right_cids):
+                same_episode = True
+                reasons.append("cid_overlap")
+            if same_episode:
                 edges.append(
                     _relation_edge(
-                        "same_provider",
+                        "same_episode",
                         left["subdoc_id"],
                         right["subdoc_id"],
-                        confidence=0.95,
-                        reasons=["provider_name_match"],
+                        confidence=0.9,
+                        reasons=reasons,
                         evidence_refs=pair_refs,
                     )
                 )
 
-            if left_patient and right_patient and left_patient == right_patient:
-                same_episode = False
-                reasons: List[str] = []
-                if left_dt and right_dt and abs((left_dt - right_dt).days) <= 30:
-                    same_episode = True
-                    reasons.append("document_dates_within_30_days")
-                if left_cids and right_cids and left_cids.intersection(right_cids):
-                    same_episode = True
-                    reasons.append("cid_overlap")
-                if same_episode:
-                    edges.append(
-                        _relation_edge(
-                            "same_episode",
-                            left["subdoc_id"],
-                            right["subdoc_id"],
-                            confidence=0.9,
-                            reasons=reasons,
-                            evidence_refs=pair_refs,
-                        )
-                    )
+        if (
+            left_patient
+            and right_patient
+            and left_patient == right_patient
+            and left_provider
+            and right_provider
+            and left_provider == right_provider
+            and left_type
+            and left_type == right_type
+            and left_date
+            and left_date == right_date
+        ):
+            edges.append(
+                _relation_edge(
+                    "same_document_continuation",
+                    left["subdoc_id"],
+                    right["subdoc_id"],
+                    confidence=0.94,
+                    reasons=["same_patient_provider_type_and_date"],
+                    evidence_refs=pair_refs,
+                )
+            )
 
-            if (
-                left_patient
-                and right_patient
-                and left_patient == right_patient
-                and left_provider
-                and right_provider
-                and left_provider == right_provider
-                and left_type
-                and left_type == right_type
-                and left_date
-                and left_date == right_date
-            ):
-                edges.append(
-                    _relation_edge(
-                        "same_document_continuation",
-                        left["subdoc_id"],
-                        right["subdoc_id"],
-                        confidence=0.94,
-                        reasons=["same_patient_provider_type_and_date"],
-                        evidence_refs=pair_refs,
-                    )
+        if (
+            left_patient
+            and right_patient
+            and left_patient != right_patient
+            and (
+                (left_provider and right_provider and left_provider == right_provider)
+                or (left_type and right_type and left_type == right_type and left_date and left_date == right_date)
+            )
+        ):
+            edges.append(
+                _relation_edge(
+                    "conflict",
+                    left["subdoc_id"],
+                    right["subdoc_id"],
+                    confidence=0.98,
+                    reasons=["patient_mismatch_under_shared_context"],
+                    evidence_refs=pair_refs,
                 )
+            )
 
+        if len(edges) == pair_edge_start:
             if (
-                left_patient
-                and right_patient
-                and left_patient != right_patient
-                and (
-                    (left_provider and right_provider and left_provider == right_provider)
-                    or (left_type and right_type and left_type == right_type and left_date and left_date == right_date)
-                )
+                not left_patient
+                or not right_patient
+                or not left_provider
+                or not right_provider
+                or not left_date
+                or not right_date
             ):
                 edges.append(
                     _relation_edge(
-                        "conflict",
+                        "unknown",
                         left["subdoc_id"],
                         right["subdoc_id"],
-                        confidence=0.98,
-                        reasons=["patient_mismatch_under_shared_context"],
+                        confidence=0.35,
+                        reasons=["insufficient_shared_evidence"],
                         evidence_refs=pair_refs,
                     )
                 )
 
-            if not any(
-                edge["source_subdoc_id"] == left["subdoc_id"] and edge["target_subdoc_id"] == right["subdoc_id"]
-                for edge in edges
-            ):
-                if (
-                    not left_patient
-                    or not right_patient
-                    or not left_provider
-                    or not right_provider
-                    or not left_date
-                    or not right_date
-                ):
-                    edges.append(
-                        _relation_edge(
-                            "unknown",
-                            left["subdoc_id"],
-                            right["subdoc_id"],
-                            confidence=0.35,
-                            reasons=["insufficient_shared_evidence"],
-                            evidence_refs=pair_refs,
-                        )
-                    )
-
     relation_counts: Dict[str, int] = {}
     for edge in edges:
         relation_counts[edge["relation_type"]] = relation_counts.get(edge["relation_type"], 0) + 1
@@ -1627,7 +1653,7 @@ def apply_entities_canonical_v1(dm: DocumentMemory) -> DocumentMemory:
         return dm
 
     page_items = _all_page_evidence(dm)
-    layout_spans = _load_signal_json(dm, "layout_spans_v1") or []
+    layout_spans = LayoutSpanStore.from_spans(_load_signal_json(dm, "layout_spans_v1") or [])
     subdocuments_signal = _load_signal_json(dm, "subdocuments_v1") or []
     text = _safe_text(dm)
     payload = _build_canonical_from_page_items(
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# -----------------------------
+# Chaves de bloqueio de pessoas
+# -----------------------------
+#
+# Em vez de comparar todos os pares de nomes, cada pessoa recebe um punhado
+# de chaves de bloqueio; só pares que compartilham alguma chave viram
+# candidatos à comparação fina:
+#   sn:{sobrenome}:{inicial}  cada sobrenome dobrado + inicial do prenome
+#   ph:{fonético}             código fonético de prenome + último sobrenome
+#   cpf:{11 dígitos}          CPF, quando presente
+#   dob:{AAAA-MM-DD}          data de nascimento, quando presente
+
+_PARTICLES = {"da", "das", "de", "do", "dos", "e", "d"}
+_TITLES = {"dr", "dra", "sr", "sra", "prof", "profa"}
+
+SAME_PERSON_THRESHOLD = 0.9
+
+
+def max_block_size() -> int:
+    """Blocos maiores que isso (sobrenomes muito comuns) não geram pares."""
+    return int(os.getenv("RELLUNA_PERSON_BLOCK_MAX", "500"))
+
+
+def fold_text(value: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKD", str(value or "").lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^a-z\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def name_tokens(value: Optional[str]) -> List[str]:
+    tokens = fold_text(value).split()
+    while tokens and tokens[0] in _TITLES:
+        tokens = tokens[1:]
+    return [token for token in tokens if token not in _PARTICLES and len(token) > 1]
+
+
+_PHONETIC_RULES: Tuple[Tuple[str, str], ...] = (
+    (r"ph", "f"),
+    (r"lh", "l"),
+    (r"nh", "n"),
+    (r"ch|sh", "x"),
+    (r"qu|q", "k"),
+    (r"gu(?=[ei])", "g"),
+    (r"c(?=[eiy])", "s"),
+    (r"c", "k"),
+    (r"g(?=[ei])", "j"),
+    (r"z", "s"),
+    (r"w", "v"),
+    (r"y", "i"),
+    (r"h", ""),
+    (r"n(?=[bp])|m$", "n"),
+)
+
+
+def phonetic_code(token: str) -> str:
+    """Código fonético simplificado para português (grafias de cartório)."""
+    word = fold_text(token).replace(" ", "")
+    if not word:
+        return ""
+    for pattern, replacement in _PHONETIC_RULES:
+        word = re.sub(pattern, replacement, word)
+    if not word:
+        return ""
+    head, tail = word[0], re.sub(r"[aeiou]", "", word[1:])
+    code = head + tail
+    return re.sub(r"(.)\1+", r"\1", code)
+
+
+def normalize_cpf(value: Optional[str]) -> Optional[str]:
+    digits = re.sub(r"\D", "", str(value or ""))
+    return digits if len(digits) == 11 else None
+
+
+def normalize_birth_date(value: Optional[str]) -> Optional[str]:
+    raw = str(value or "").strip()
+    match = re.fullmatch(r"(\d{4})-(\d{2})-(\d{2})", raw)
+    if match:
+        return raw
+    match = re.fullmatch(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})", raw)
+    if match:
+        return f"{match.group(3)}-{int(match.group(2)):02d}-{int(match.group(1)):02d}"
+    return None
+
+
+def person_blocking_keys(
+    name: Optional[str],
+    *,
+    cpf: Optional[str] = None,
+    birth_date: Optional[str] = None,
+) -> List[str]:
+    keys: List[str] = []
+    tokens = name_tokens(name)
+    if len(tokens) >= 2:
+        initial = tokens[0][0]
+        keys.extend(f"sn:{surname}:{initial}" for surname in tokens[1:])
+        keys.append(f"ph:{phonetic_code(tokens[0])}+{phonetic_code(tokens[-1])}")
+    cpf_digits = normalize_cpf(cpf)
+    if cpf_digits:
+        keys.append(f"cpf:{cpf_digits}")
+    dob = normalize_birth_date(birth_date)
+    if dob:
+        keys.append(f"dob:{dob}")
+    return list(dict.fromkeys(keys))
+
+
+def candidate_pairs(
+    keys_by_item: Sequence[Iterable[str]],
+    *,
+    max_block: Optional[int] = None,
+) -> Set[Tuple[int, int]]:
+    """
+    Pares (i, j), i < j, de itens que compartilham ao menos uma chave.
+    Com `max_block`, blocos maiores que o limite são ignorados.
+    """
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for index, keys in enumerate(keys_by_item):
+        for key in set(keys):
+            blocks[key].append(index)
+
+    pairs: Set[Tuple[int, int]] = set()
+    for members in blocks.values():
+        if len(members) < 2 or (max_block is not None and len(members) > max_block):
+            continue
+        for position, left in enumerate(members):
+            for right in members[position + 1 :]:
+                pairs.add((left, right) if left < right else (right, left))
+    return pairs
+
+
+def person_match_score(
+    left_name: Optional[str],
+    right_name: Optional[str],
+    *,
+    left_cpf: Optional[str] = None,
+    right_cpf: Optional[str] = None,
+    left_birth_date: Optional[str] = None,
+    right_birth_date: Optional[str] = None,
+) -> Tuple[float, List[str]]:
+    """Comparação fina de um par candidato: (score, razões)."""
+    left_doc, right_doc = normalize_cpf(left_cpf), normalize_cpf(right_cpf)
+    if left_doc and right_doc:
+        return (1.0, ["cpf_match"]) if left_doc == right_doc else (0.0, ["cpf_mismatch"])
+
+    left_dob, right_dob = normalize_birth_date(left_birth_date), normalize_birth_date(right_birth_date)
+    if left_dob and right_dob and left_dob != right_dob:
+        return 0.0, ["birth_date_mismatch"]
+
+    left_tokens, right_tokens = name_tokens(left_name), name_tokens(right_name)
+    if not left_tokens or not right_tokens:
+        return 0.0, []
+
+    reasons: List[str] = []
+    if left_tokens == right_tokens:
+        score, reasons = 0.97, ["name_match"]
+    elif (
+        left_tokens[0] == right_tokens[0]
+        and left_tokens[-1] == right_tokens[-1]
+        and (set(left_tokens) <= set(right_tokens) or set(right_tokens) <= set(left_tokens))
+    ):
+        score, reasons = 0.92, ["name_subset_match"]
+    elif [phonetic_code(t) for t in left_tokens] == [phonetic_code(t) for t in right_tokens]:
+        score, reasons = 0.9, ["phonetic_name_match"]
+    else:
+        overlap = len(set(left_tokens) & set(right_tokens)) / float(len(set(left_tokens) | set(right_tokens)))
+        score, reasons = round(0.8 * overlap, 3), ["name_token_overlap"]
+
+    if left_dob and left_dob == right_dob:
+        score = min(1.0, score + 0.05)
+        reasons.append("birth_date_match")
+    return score, reasons
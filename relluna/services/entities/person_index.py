@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.infra import person_index_store
+from relluna.services.entities.person_blocking import (
+    SAME_PERSON_THRESHOLD,
+    candidate_pairs,
+    fold_text,
+    max_block_size,
+    normalize_birth_date,
+    normalize_cpf,
+    person_blocking_keys,
+    person_match_score,
+)
+from relluna.services.evidence.signals import load_critical_signal_json
+
+# -----------------------------
+# Resolução de pessoas entre documentos
+# -----------------------------
+#
+# A projeção do read model grava no `person_index` as pessoas canônicas do
+# documento (paciente, mãe e prestador, por documento e por subdocumento)
+# com suas chaves de bloqueio. "Todos os documentos deste paciente" vira
+# uma busca pelas chaves seguida da comparação fina só dos candidatos.
+
+_RE_BIRTH = re.compile(r"(?i)(?:data\s+de\s+)?nascimento[:;\s]+(\d{2}/\d{2}/\d{4})")
+_ROLES = ("patient", "mother", "provider")
+
+
+def enabled() -> bool:
+    return os.getenv("RELLUNA_PERSON_INDEX", "1").strip().lower() not in {"0", "false", "off", "no"}
+
+
+def _unique(values: Sequence[Optional[str]]) -> Optional[str]:
+    distinct = {value for value in values if value}
+    return distinct.pop() if len(distinct) == 1 else None
+
+
+def _page_identifiers(page_items: List[Dict[str, Any]], pages: Optional[Sequence[int]]) -> Dict[str, Optional[str]]:
+    """CPF e nascimento só quando há um único valor nas páginas consideradas."""
+    wanted = set(pages or [])
+    selected = [item for item in page_items if not wanted or item.get("page") in wanted]
+    cpfs = [
+        normalize_cpf(cpf)
+        for item in selected
+        for cpf in ((item.get("administrative_entities") or {}).get("cpf") or [])
+    ]
+    births = [
+        normalize_birth_date(match)
+        for item in selected
+        for match in _RE_BIRTH.findall(str(item.get("page_text") or ""))
+    ]
+    return {"cpf": _unique(cpfs), "birth_date": _unique(births)}
+
+
+def _entry(role: str, person: Any, *, subdoc_id: Optional[str], pages: List[int], ids: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+    name = (person or {}).get("name") if isinstance(person, dict) else None
+    if not name:
+        return None
+    # Identificadores da página descrevem o paciente, não o prestador ou a mãe.
+    cpf = ids["cpf"] if role == "patient" else None
+    birth_date = ids["birth_date"] if role == "patient" else None
+    blocks = person_blocking_keys(name, cpf=cpf, birth_date=birth_date)
+    if not blocks:
+        return None
+    return {
+        "role": role,
+        "subdoc_id": subdoc_id,
+        "name": name,
+        "folded_name": fold_text(name),
+        "cpf": cpf,
+        "birth_date": birth_date,
+        "pages": pages,
+        "blocks": blocks,
+    }
+
+
+def person_entries(dm: DocumentMemory) -> List[Dict[str, Any]]:
+    canonical = load_critical_signal_json(dm, "entities_canonical_v1") or {}
+    if not isinstance(canonical, dict):
+        return []
+    page_items = [item for item in (load_critical_signal_json(dm, "page_evidence_v1") or []) if isinstance(item, dict)]
+
+    entries: List[Dict[str, Any]] = []
+    document_ids = _page_identifiers(page_items, None)
+    for role in _ROLES:
+        entry = _entry(role, canonical.get(role), subdoc_id=None, pages=[], ids=document_ids)
+        if entry:
+            entries.append(entry)
+
+    for subdoc in canonical.get("subdocuments") or []:
+        if not isinstance(subdoc, dict) or not subdoc.get("subdoc_id"):
+            continue
+        pages = [int(page) for page in subdoc.get("pages") or []]
+        ids = _page_identifiers(page_items, pages)
+        for role in _ROLES:
+            entry = _entry(role, subdoc.get(role), subdoc_id=subdoc["subdoc_id"], pages=pages, ids=ids)
+            if entry:
+                entries.append(entry)
+    return entries
+
+
+async def index_document(dm: DocumentMemory) -> int:
+    return await person_index_store.replace_document(dm.layer0.documentid, person_entries(dm))
+
+
+def _score(entry: Dict[str, Any], name: Optional[str], cpf: Optional[str], birth_date: Optional[str]):
+    return person_match_score(
+        name,
+        entry.get("name"),
+        left_cpf=cpf,
+        right_cpf=entry.get("cpf"),
+        left_birth_date=birth_date,
+        right_birth_date=entry.get("birth_date"),
+    )
+
+
+async def find_person_documents(
+    name: Optional[str] = None,
+    *,
+    cpf: Optional[str] = None,
+    birth_date: Optional[str] = None,
+    role: Optional[str] = "patient",
+    exclude_documentid: Optional[str] = None,
+    threshold: float = SAME_PERSON_THRESHOLD,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """Documentos em que a pessoa aparece, do melhor match para o pior."""
+    blocks = person_blocking_keys(name, cpf=cpf, birth_date=birth_date)
+    candidates = await person_index_store.find_by_blocks(
+        blocks, role=role, exclude_documentid=exclude_documentid, max_block=max_block_size()
+    )
+
+    best: Dict[str, Dict[str, Any]] = {}
+    for entry in candidates:
+        score, reasons = _score(entry, name, cpf, birth_date)
+        if score < threshold:
+            continue
+        current = best.get(entry["documentid"])
+        if current is None or score > current["score"]:
+            best[entry["documentid"]] = {
+                "documentid": entry["documentid"],
+                "score": round(score, 3),
+                "reasons": reasons,
+                "role": entry.get("role"),
+                "name": entry.get("name"),
+                "subdoc_id": entry.get("subdoc_id"),
+                "pages": entry.get("pages") or [],
+            }
+    return sorted(best.values(), key=lambda hit: (-hit["score"], hit["documentid"]))[: max(1, int(limit))]
+
+
+async def same_patient_documents(documentid: str, *, limit: int = 50) -> List[Dict[str, Any]]:
+    entries = [e for e in await person_index_store.entries_for_document(documentid) if e.get("role") == "patient"]
+    merged: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        hits = await find_person_documents(
+            entry.get("name"),
+            cpf=entry.get("cpf"),
+            birth_date=entry.get("birth_date"),
+            exclude_documentid=documentid,
+            limit=limit,
+        )
+        for hit in hits:
+            if hit["documentid"] not in merged or hit["score"] > merged[hit["documentid"]]["score"]:
+                merged[hit["documentid"]] = {**hit, "matched_subdoc_id": entry.get("subdoc_id")}
+    return sorted(merged.values(), key=lambda hit: (-hit["score"], hit["documentid"]))[: max(1, int(limit))]
+
+
+def cluster_people(entries: Sequence[Dict[str, Any]], *, threshold: float = SAME_PERSON_THRESHOLD) -> List[List[int]]:
+    """
+    Agrupa entradas da mesma pessoa (union-find) comparando só os pares que
+    compartilham chave de bloqueio. Devolve grupos de índices de `entries`.
+    """
+    parent = list(range(len(entries)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    pairs = candidate_pairs([entry.get("blocks") or [] for entry in entries], max_block=max_block_size())
+    for left, right in sorted(pairs):
+        score, _ = _score(entries[right], entries[left].get("name"), entries[left].get("cpf"), entries[left].get("birth_date"))
+        if score >= threshold:
+            parent[find(right)] = find(left)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(entries)):
+        groups.setdefault(find(index), []).append(index)
+    return sorted(groups.values(), key=lambda group: group[0])
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import re
+import sys
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from relluna.core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# -----------------------------
+# Tabela colunar de layout_spans_v1
+# -----------------------------
+#
+# `layout_spans_v1` continua sendo gravado como lista JSON de
+# {"page", "text", "bbox"}. Para ancoragem, a lista vira colunas:
+#
+#   pages   int64[n]       (-1 = página ausente/inválida)
+#   bboxes  float64[n, 4]  (NaN = bbox ausente/inválido)
+#   text_id int32[n]       -> pool de textos internados
+#
+# Texto normalizado, minúsculo e tokens (len >= 2) são calculados uma vez por
+# texto distinto. Índices invertidos token -> spans, pool de busca por
+# substring e grade espacial são montados sob demanda, por página.
+
+GRID_CELL_SIZE = 64.0
+MIN_BEST_MATCH_SCORE = 8.0
+
+_CORE_KEYS = ("page", "text", "bbox")
+_ABSENT = object()
+_RE_SPACES = re.compile(r"\s+")
+_POOL_SEPARATOR = "\n"
+
+
+def normalize_span_text(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    cleaned = _RE_SPACES.sub(" ", str(value)).strip()
+    return cleaned or None
+
+
+def _tokens(low: str) -> frozenset:
+    return frozenset(t for t in low.strip().split() if len(t) >= 2)
+
+
+def _token_overlap(sa: frozenset, sb: frozenset) -> float:
+    if not sa or not sb:
+        return 0.0
+    return len(sa & sb) / max(1, min(len(sa), len(sb)))
+
+
+class _TextPool:
+    """Textos internados e suas formas derivadas, compartilhados entre recortes."""
+
+    def __init__(self) -> None:
+        self.raw: List[str] = []
+        self.norm: List[Optional[str]] = []
+        self.low: List[Optional[str]] = []
+        self.tokens: List[frozenset] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, text: str) -> int:
+        text_id = self._ids.get(text)
+        if text_id is None:
+            text_id = len(self.raw)
+            self._ids[text] = text_id
+            norm = normalize_span_text(text)
+            low = norm.lower() if norm else None
+            self.raw.append(sys.intern(text))
+            self.norm.append(norm)
+            self.low.append(low)
+            self.tokens.append(_tokens(low) if low else frozenset())
+        return text_id
+
+
+class _ScopeIndex:
+    """Índices de um recorte (uma página ou o documento inteiro)."""
+
+    def __init__(self, store: "LayoutSpanStore", rows: np.ndarray) -> None:
+        pool = store._pool
+        self.rows = rows
+        self.postings: Dict[str, List[int]] = {}
+        starts: List[int] = []
+        row_of_start: List[int] = []
+        case_parts: List[str] = []
+        low_parts: List[str] = []
+        offset = 0
+
+        for row in rows.tolist():
+            text_id = int(store._text_ids[row])
+            norm = pool.norm[text_id]
+            if not norm:
+                continue
+            for token in pool.tokens[text_id]:
+                self.postings.setdefault(token, []).append(row)
+            starts.append(offset)
+            row_of_start.append(row)
+            case_parts.append(norm)
+            low_parts.append(pool.low[text_id])
+            offset += len(norm) + len(_POOL_SEPARATOR)
+
+        # `str.lower()` pode mudar o comprimento em alguns caracteres Unicode;
+        # nesse caso as posições do pool minúsculo são recalculadas à parte.
+        self.case_pool = _POOL_SEPARATOR.join(case_parts)
+        self.low_pool = _POOL_SEPARATOR.join(low_parts)
+        self.starts = starts
+        self.row_of_start = row_of_start
+        if len(self.low_pool) == len(self.case_pool):
+            self.low_starts = starts
+        else:
+            self.low_starts = []
+            offset = 0
+            for part in low_parts:
+                self.low_starts.append(offset)
+                offset += len(part) + len(_POOL_SEPARATOR)
+
+    @staticmethod
+    def _row_at(starts: List[int], rows: List[int], pos: int) -> int:
+        return rows[bisect_right(starts, pos) - 1]
+
+    def first_containing(self, needle: str) -> Optional[int]:
+        pos = self.case_pool.find(needle)
+        if pos < 0:
+            return None
+        return self._row_at(self.starts, self.row_of_start, pos)
+
+    def rows_containing_low(self, needle_low: str) -> List[int]:
+        found: List[int] = []
+        pos = self.low_pool.find(needle_low)
+        while pos >= 0:
+            slot = bisect_right(self.low_starts, pos) - 1
+            found.append(self.row_of_start[slot])
+            if slot + 1 >= len(self.low_starts):
+                break
+            pos = self.low_pool.find(needle_low, self.low_starts[slot + 1])
+        return found
+
+
+def _coerce_page(value: Any) -> int:
+    if value is _ABSENT or value is None:
+        return -1
+    try:
+        page = int(value)
+    except (TypeError, ValueError):
+        return -1
+    return page if page >= 0 else -1
+
+
+class LayoutSpanStore:
+    """
+    Visão colunar e indexada de `layout_spans_v1`.
+
+    Iterar o store devolve os spans como dicts (mesma forma do JSON), então ele
+    pode ser passado onde a lista era esperada. `to_records()` reconstrói a
+    lista para exportação.
+    """
+
+    def __init__(
+        self,
+        pages: np.ndarray,
+        bboxes: np.ndarray,
+        text_ids: np.ndarray,
+        pool: _TextPool,
+        extras: Optional[Dict[int, Dict[str, Any]]] = None,
+    ) -> None:
+        self._pages = pages
+        self._bboxes = bboxes
+        self._text_ids = text_ids
+        self._pool = pool
+        self._extras = extras or {}
+        self._scopes: Dict[Optional[int], _ScopeIndex] = {}
+        self._grids: Dict[int, Dict[Tuple[int, int], List[int]]] = {}
+        self._page_rows: Optional[Dict[int, np.ndarray]] = None
+
+    # ---------- construção ----------
+
+    @classmethod
+    def from_spans(cls, spans: Optional[Iterable[Any]]) -> "LayoutSpanStore":
+        if isinstance(spans, LayoutSpanStore):
+            return spans
+
+        pool = _TextPool()
+        pages: List[int] = []
+        bboxes: List[Tuple[float, float, float, float]] = []
+        text_ids: List[int] = []
+        extras: Dict[int, Dict[str, Any]] = {}
+        nan_bbox = (float("nan"),) * 4
+
+        for span in spans or []:
+            if not isinstance(span, dict):
+                continue
+            row = len(pages)
+            extra = {k: v for k, v in span.items() if k not in _CORE_KEYS}
+
+            page = span.get("page", _ABSENT)
+            if type(page) is int and page >= 0:
+                pages.append(page)
+            else:
+                # Página em outro tipo ("3", 3.0): indexada pelo inteiro, como
+                # o filtro por página antigo; o valor original volta no span.
+                pages.append(_coerce_page(page))
+                extra["page"] = page
+
+            text = span.get("text", _ABSENT)
+            if isinstance(text, str):
+                text_ids.append(pool.intern(text))
+            else:
+                text_ids.append(pool.intern("" if text is None or text is _ABSENT else str(text)))
+                extra["text"] = text
+
+            bbox = span.get("bbox", _ABSENT)
+            if isinstance(bbox, list) and len(bbox) == 4 and all(type(v) is float for v in bbox):
+                bboxes.append((bbox[0], bbox[1], bbox[2], bbox[3]))
+            else:
+                bboxes.append(nan_bbox)
+                extra["bbox"] = bbox
+
+            if extra:
+                extras[row] = extra
+
+        return cls(
+            pages=np.asarray(pages, dtype=np.int64),
+            bboxes=np.asarray(bboxes, dtype=np.float64).reshape(len(pages), 4),
+            text_ids=np.asarray(text_ids, dtype=np.int32),
+            pool=pool,
+            extras=extras,
+        )
+
+    def for_pages(self, page_numbers: Sequence[int]) -> "LayoutSpanStore":
+        page_rows = self._rows_by_page()
+        chunks = [page_rows[int(page)] for page in sorted({int(p) for p in page_numbers}) if int(page) in page_rows]
+        rows = np.sort(np.concatenate(chunks)) if chunks else np.empty(0, dtype=np.int64)
+        extras = {
+            new_row: self._extras[old_row]
+            for new_row, old_row in enumerate(rows.tolist())
+            if old_row in self._extras
+        }
+        return LayoutSpanStore(
+            pages=self._pages[rows],
+            bboxes=self._bboxes[rows],
+            text_ids=self._text_ids[rows],
+            pool=self._pool,
+            extras=extras,
+        )
+
+    # ---------- acesso ----------
+
+    def __len__(self) -> int:
+        return int(self._pages.shape[0])
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self.span(row)
+
+    def span(self, row: int) -> Dict[str, Any]:
+        page = int(self._pages[row])
+        record: Dict[str, Any] = {
+            "page": page,
+            "text": self._pool.raw[int(self._text_ids[row])],
+            "bbox": self._bboxes[row].tolist(),
+        }
+        extra = self._extras.get(row)
+        if extra:
+            record.update(extra)
+            for key in _CORE_KEYS:
+                if record.get(key) is _ABSENT:
+                    del record[key]
+        return record
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    @property
+    def page_numbers(self) -> List[int]:
+        return sorted(page for page in self._rows_by_page() if page >= 0)
+
+    def _rows_by_page(self) -> Dict[int, np.ndarray]:
+        if self._page_rows is None:
+            order = np.argsort(self._pages, kind="stable")
+            sorted_pages = self._pages[order]
+            boundaries = np.flatnonzero(np.diff(sorted_pages)) + 1
+            self._page_rows = {
+                int(sorted_pages[chunk[0]]): order[chunk[0] : chunk[-1] + 1]
+                for chunk in np.split(np.arange(len(order)), boundaries)
+                if len(chunk)
+            }
+        return self._page_rows
+
+    def _scope(self, page: Optional[int]) -> _ScopeIndex:
+        scope = self._scopes.get(page)
+        if scope is None:
+            if page is None:
+                rows = np.arange(len(self), dtype=np.int64)
+            else:
+                rows = self._rows_by_page().get(int(page), np.empty(0, dtype=np.int64))
+            scope = _ScopeIndex(self, rows)
+            self._scopes[page] = scope
+        return scope
+
+    # ---------- ancoragem textual ----------
+
+    def find_first_containing(self, needle: str, *, page: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Primeiro span (na ordem original) cujo texto normalizado contém `needle`."""
+        needle_norm = normalize_span_text(needle) or ""
+        scope = self._scope(page)
+        if not needle_norm:
+            row = scope.row_of_start[0] if scope.row_of_start else None
+        else:
+            row = scope.first_containing(needle_norm)
+        return self.span(row) if row is not None else None
+
+    def best_match(self, value: Optional[str], *, page: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Melhor span para um valor extraído: igualdade (+20), substring (+10) e
+        sobreposição de tokens (x10); exige score >= 8. Só spans que
+        compartilham token ou contêm o valor são avaliados.
+        """
+        target = normalize_span_text(value)
+        if not target:
+            return None
+
+        target_low = target.lower()
+        target_tokens = _tokens(target_low)
+        scope = self._scope(page)
+        pool = self._pool
+
+        candidates = set(scope.rows_containing_low(target_low))
+        for token in target_tokens:
+            candidates.update(scope.postings.get(token, ()))
+
+        best_row: Optional[int] = None
+        best_score = -1.0
+        for row in sorted(candidates):
+            text_id = int(self._text_ids[row])
+            sp_low = pool.low[text_id]
+            score = 0.0
+            if target_low == sp_low:
+                score += 20.0
+            if target_low in sp_low:
+                score += 10.0
+            score += _token_overlap(target_tokens, pool.tokens[text_id]) * 10.0
+            if score > best_score:
+                best_score = score
+                best_row = row
+
+        if best_row is None or best_score < MIN_BEST_MATCH_SCORE:
+            return None
+        return self.span(best_row)
+
+    # ---------- índice espacial ----------
+
+    def _grid(self, page: int) -> Dict[Tuple[int, int], List[int]]:
+        grid = self._grids.get(page)
+        if grid is None:
+            grid = {}
+            rows = self._rows_by_page().get(int(page), np.empty(0, dtype=np.int64))
+            boxes = self._bboxes[rows]
+            valid = ~np.isnan(boxes).any(axis=1)
+            cells = np.floor(boxes[valid] / GRID_CELL_SIZE).astype(np.int64)
+            for row, (cx0, cy0, cx1, cy1) in zip(rows[valid].tolist(), cells.tolist()):
+                for cx in range(min(cx0, cx1), max(cx0, cx1) + 1):
+                    for cy in range(min(cy0, cy1), max(cy0, cy1) + 1):
+                        grid.setdefault((cx, cy), []).append(row)
+            self._grids[page] = grid
+        return grid
+
+    def spans_in_bbox(self, page: int, bbox: Sequence[float]) -> List[Dict[str, Any]]:
+        """Spans da página cujo bbox intersecta `bbox` (x0, y0, x1, y1), na ordem original."""
+        x0, y0, x1, y1 = (float(v) for v in bbox)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        grid = self._grid(int(page))
+        cx0, cy0 = int(np.floor(x0 / GRID_CELL_SIZE)), int(np.floor(y0 / GRID_CELL_SIZE))
+        cx1, cy1 = int(np.floor(x1 / GRID_CELL_SIZE)), int(np.floor(y1 / GRID_CELL_SIZE))
+
+        candidates = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                candidates.update(grid.get((cx, cy), ()))
+        if not candidates:
+            return []
+
+        rows = np.asarray(sorted(candidates), dtype=np.int64)
+        boxes = self._bboxes[rows]
+        sx0 = np.minimum(boxes[:, 0], boxes[:, 2])
+        sx1 = np.maximum(boxes[:, 0], boxes[:, 2])
+        sy0 = np.minimum(boxes[:, 1], boxes[:, 3])
+        sy1 = np.maximum(boxes[:, 1], boxes[:, 3])
+        hit = (sx0 <= x1) & (sx1 >= x0) & (sy0 <= y1) & (sy1 >= y0)
+        return [self.span(row) for row in rows[hit].tolist()]
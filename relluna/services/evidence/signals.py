@@ -101,6 +101,14 @@ _ADAPTERS: Dict[str, TypeAdapter[Any]] = {
 }
 
 
+_ITEM_ADAPTERS: Dict[str, TypeAdapter[Any]] = {
+    "page_evidence_v1": TypeAdapter(PageEvidenceItemV1),
+    "page_unit_v1": TypeAdapter(PageUnitV1Item),
+    "subdocument_unit_v1": TypeAdapter(SubdocumentUnitV1Item),
+    "timeline_seed_v2": TypeAdapter(TimelineSeedV2Item),
+}
+
+
 def _warning_payload(key: str, code: str, message: str, details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     return {
         "code": code,
@@ -169,6 +177,42 @@ def validate_critical_signal_payload(
     return payload
 
 
+def validate_critical_signal_item(key: str, index: int, item: Any) -> List[Dict[str, Any]]:
+    """
+    Valida um item de sinal-lista isoladamente (processamento em janelas).
+    Devolve os erros com o índice do item na frente do `loc`, como na
+    validação da lista inteira.
+    """
+    adapter = _ITEM_ADAPTERS.get(key)
+    if adapter is None:
+        return []
+    try:
+        adapter.validate_python(item)
+    except ValidationError as exc:
+        return [{**error, "loc": (index, *error.get("loc", ()))} for error in exc.errors()]
+    return []
+
+
+def report_critical_signal_errors(
+    key: str,
+    errors: List[Dict[str, Any]],
+    *,
+    dm: Optional[DocumentMemory] = None,
+    operation: str = "write",
+) -> None:
+    if not errors:
+        return
+    _append_validation_warning(
+        dm,
+        _warning_payload(
+            key,
+            "critical_signal_schema_validation_failed",
+            "Sinal crítico não aderiu completamente ao schema; usando fallback compatível.",
+            {"operation": operation, "error_count": len(errors), "first_error": errors[0]},
+        ),
+    )
+
+
 def dump_critical_signal_json(key: str, payload: Any, *, dm: Optional[DocumentMemory] = None) -> str:
     validated = validate_critical_signal_payload(key, payload, dm=dm, operation="write")
     return json.dumps(validated, ensure_ascii=False, default=str)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 from relluna.core.document_memory import DocumentMemory
 from relluna.services.derivatives.layer5 import apply_layer5
@@ -128,31 +128,96 @@ def build_dossier_payload(dm: DocumentMemory) -> Dict[str, Any]:
     }
 
 
-def export_dossier(case_or_dm, output_path: str = "dossier.pdf") -> Dict[str, Any]:
-    try:
-        from reportlab.pdfgen import canvas
-    except ModuleNotFoundError as exc:
-        raise RuntimeError("export_dossier requer reportlab instalado para renderização PDF.") from exc
+# -----------------------------
+# Saída incremental (NDJSON / PDF)
+# -----------------------------
+#
+# Para casos com centenas de documentos, o dossiê não é montado inteiro:
+# cada documento vira uma sequência de registros (documento, eventos com
+# suas citações, itens de revisão) que os writers consomem um a um.
+
+DOSSIER_RECORDS_VERSION = "dossier_records_v1"
+
+
+def dossier_records(dm: DocumentMemory) -> Iterator[Dict[str, Any]]:
+    dossier = build_dossier_payload(dm)
+    document_id = dossier["document"]["document_id"]
+    yield {
+        "type": "document",
+        "document_id": document_id,
+        "document": dossier["document"],
+        "entities": dossier["entities"],
+        "summary": dossier["summary"],
+        "warnings": dossier["warnings"],
+    }
+    for event in dossier["timeline"]:
+        yield {"type": "event", "document_id": document_id, **event}
+    for item in dossier["review_items"]:
+        yield {"type": "review_item", "document_id": document_id, "item": item}
+
+
+class DossierPdfWriter:
+    """
+    Desenha registros de `dossier_records` conforme chegam: cabeçalho por
+    documento, cada evento seguido das suas citações, quebra de página
+    quando a coluna acaba. Requer reportlab.
+    """
+
+    _TOP = 800
+    _BOTTOM = 60
+    _LINE_CHARS = 120
+
+    def __init__(self, target) -> None:
+        try:
+            from reportlab.pdfgen import canvas
+        except ModuleNotFoundError as exc:
+            raise RuntimeError("Exportação PDF requer reportlab instalado (pip install \".[export]\").") from exc
+        self._canvas = canvas.Canvas(target if not isinstance(target, Path) else str(target))
+        self._y = self._TOP
+        self.pages = 1
+
+    def _line(self, text: str, *, indent: int = 0, step: int = 18) -> None:
+        if self._y < self._BOTTOM:
+            self._canvas.showPage()
+            self.pages += 1
+            self._y = self._TOP
+        self._canvas.drawString(40 + indent, self._y, text[: self._LINE_CHARS])
+        self._y -= step
+
+    def title(self, text: str) -> None:
+        self._line(text, step=22)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        kind = record.get("type")
+        if kind == "document":
+            document = record.get("document") or {}
+            self._line(f"Dossie auditavel: {document.get('document_id', '-')}", step=22)
+            self._line(f"Fingerprint: {document.get('content_fingerprint', '-')}", step=22)
+        elif kind == "event":
+            self._line(
+                f"{record.get('date', '-')} - {record.get('title', record.get('event_type', 'Evento'))} "
+                f"[{record.get('assertion_level', '-')}]"
+            )
+            for citation in record.get("citations") or []:
+                snippet = " ".join(str(citation.get("snippet") or "").split())
+                self._line(f"p. {citation.get('page', '-')}: {snippet}", indent=18, step=14)
+        elif kind == "review_item":
+            item = record.get("item") or {}
+            self._line(f"Revisar {item.get('field', '-')}: {item.get('value', '-')} ({item.get('reason', '-')})", indent=18, step=14)
+
+    def close(self) -> None:
+        self._canvas.save()
+
 
+def export_dossier(case_or_dm, output_path: str = "dossier.pdf") -> Dict[str, Any]:
     dossier = build_dossier_payload(case_or_dm) if isinstance(case_or_dm, DocumentMemory) else dict(case_or_dm)
     path = Path(output_path)
 
-    c = canvas.Canvas(str(path))
-    y = 800
-    c.drawString(40, y, f"Dossie auditavel: {dossier.get('document', {}).get('document_id', '-')}")
-    y -= 22
-    c.drawString(40, y, f"Fingerprint: {dossier.get('document', {}).get('content_fingerprint', '-')}")
-    y -= 22
-
+    writer = DossierPdfWriter(path)
+    writer.write({"type": "document", "document": dossier.get("document", {})})
     for event in dossier.get("timeline", []):
-        line = f"{event.get('date', '-')} - {event.get('title', event.get('event_type', 'Evento'))} [{event.get('assertion_level', '-')}]"
-        c.drawString(40, y, line[:120])
-        y -= 18
-        if y < 60:
-            c.showPage()
-            y = 800
-
-    c.save()
+        writer.write({"type": "event", **event})
+    writer.close()
 
     return {
         "output_path": str(path),
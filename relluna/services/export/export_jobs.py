@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from time import perf_counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Literal, Optional, Sequence
+from uuid import uuid4
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.core.document_memory.dirty_tracking import snapshot_digests
+from relluna.infra import export_job_store, mongo_store
+from relluna.services.export.dossier_builder import (
+    DOSSIER_RECORDS_VERSION,
+    DossierPdfWriter,
+    build_dossier_payload,
+    dossier_records,
+)
+from relluna.services.observability import elapsed_ms, metrics
+
+# -----------------------------
+# Exportação de dossiê de caso em background
+# -----------------------------
+#
+# POST /exports registra um job (documentos explícitos ou os lotes de um
+# `case_id`) e o executa num slot bulk do PipelineScheduler. O job:
+#   1. calcula o hash de conteúdo do caso: `case_id`, formato e a revisão
+#      gravada de cada documento, numa consulta projetada (sem Mongo, o
+#      digest das camadas de cada documento carregado);
+#   2. se RELLUNA_EXPORT_DIR já tem o arquivo desse hash, termina como
+#      `cached`;
+#   3. senão grava NDJSON / JSON / PDF documento a documento, num `.part`
+#      renomeado no final.
+# Arquivos sem uso há mais de RELLUNA_EXPORT_TTL_HOURS são removidos ao fim
+# de cada job (um acerto de cache renova o arquivo). O download lê o
+# arquivo em blocos (transferência chunked).
+
+ExportFormat = Literal["ndjson", "json", "pdf"]
+EXPORT_FORMATS = ("ndjson", "json", "pdf")
+
+# Incrementar quando mudar o conteúdo exportado: invalida os arquivos cacheados.
+EXPORT_SCHEMA = "dossier_export_v1"
+
+MIMETYPES = {"ndjson": "application/x-ndjson", "json": "application/json", "pdf": "application/pdf"}
+
+metrics.describe("relluna_export_jobs_total", "Jobs de exportação de dossiê concluídos, por formato e resultado")
+metrics.describe("relluna_export_duration_ms", "Duração dos jobs de exportação de dossiê")
+
+DocumentLoader = Callable[[str], Awaitable[Optional[Any]]]
+RevisionLookup = Callable[[List[str]], Awaitable[Optional[Dict[str, int]]]]
+
+
+def export_dir() -> Path:
+    return Path(os.getenv("RELLUNA_EXPORT_DIR", ".exports"))
+
+
+def download_chunk_bytes() -> int:
+    return max(int(os.getenv("RELLUNA_EXPORT_CHUNK_BYTES", str(256 * 1024))), 4096)
+
+
+def export_path(content_hash: str, fmt: str) -> Path:
+    return export_dir() / f"{content_hash}.{fmt}"
+
+
+def export_ttl_hours() -> float:
+    return max(float(os.getenv("RELLUNA_EXPORT_TTL_HOURS", "72")), 0.0)
+
+
+def evict_stale_exports(now: Optional[float] = None) -> int:
+    """Remove exportações (e `.part` órfãos) sem uso há mais do que o TTL."""
+    root = export_dir()
+    if not root.is_dir():
+        return 0
+    cutoff = (now if now is not None else time.time()) - export_ttl_hours() * 3600
+    removed = 0
+    for path in root.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+# ---- hash de conteúdo ----
+
+
+def document_content_digest(dm: DocumentMemory) -> str:
+    """Digest do que entra no dossiê: camadas 1-5 e a identidade da Layer0."""
+    digests = {path: digest for path, digest in snapshot_digests(dm).items() if path != "layer0"}
+    layer0 = dm.layer0
+    digests["layer0"] = json.dumps(
+        [
+            layer0.documentid,
+            layer0.contentfingerprint,
+            layer0.original_filename,
+            layer0.mimetype,
+            layer0.ingestiontimestamp.isoformat() if layer0.ingestiontimestamp else None,
+        ]
+    )
+    raw = json.dumps(digests, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def _default_loader(documentid: str) -> Optional[DocumentMemory]:
+    data = await mongo_store.get(documentid)
+    if data is None:
+        return None
+    return DocumentMemory.model_validate(data) if isinstance(data, dict) else data
+
+
+async def _default_revisions(documentids: List[str]) -> Optional[Dict[str, int]]:
+    return await mongo_store.get_revisions(documentids)
+
+
+async def _iter_documents(documentids: Sequence[str], load: DocumentLoader) -> AsyncIterator[tuple]:
+    for documentid in documentids:
+        yield documentid, await load(documentid)
+
+
+async def _document_stamps(
+    documentids: Sequence[str], load: DocumentLoader, revisions: RevisionLookup
+) -> Dict[str, str]:
+    """documentid -> marca de conteúdo; documentos ausentes ficam de fora."""
+    stored = await revisions(list(documentids))
+    if stored is not None:
+        return {documentid: f"rev:{revision}" for documentid, revision in stored.items()}
+    stamps: Dict[str, str] = {}
+    async for documentid, dm in _iter_documents(documentids, load):
+        if dm is not None:
+            stamps[documentid] = await asyncio.to_thread(document_content_digest, dm)
+    return stamps
+
+
+async def case_content_hash(
+    documentids: Sequence[str],
+    fmt: str,
+    *,
+    case_id: Optional[str] = None,
+    load: DocumentLoader = _default_loader,
+    revisions: RevisionLookup = _default_revisions,
+) -> str:
+    # O case_id entra no JSON e no título do PDF: faz parte do conteúdo.
+    header = json.dumps([EXPORT_SCHEMA, DOSSIER_RECORDS_VERSION, fmt, case_id], ensure_ascii=False)
+    hasher = hashlib.sha256(header.encode("utf-8"))
+    stamps = await _document_stamps(documentids, load, revisions)
+    for documentid in documentids:
+        hasher.update(f"|{documentid}:{stamps.get(documentid, 'missing')}".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+# ---- writers (um documento por vez) ----
+
+
+class _NdjsonWriter:
+    def __init__(self, path: Path) -> None:
+        self._fh = path.open("w", encoding="utf-8")
+
+    def write_document(self, dm: DocumentMemory) -> int:
+        count = 0
+        for record in dossier_records(dm):
+            self._fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            count += 1
+        return count
+
+    def write_missing(self, documentid: str) -> None:
+        self._fh.write(json.dumps({"type": "missing_document", "document_id": documentid}) + "\n")
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class _JsonWriter:
+    def __init__(self, path: Path, *, case_id: Optional[str]) -> None:
+        self._fh = path.open("w", encoding="utf-8")
+        self._fh.write(
+            '{"version": %s, "case_id": %s, "documents": ['
+            % (json.dumps(EXPORT_SCHEMA), json.dumps(case_id, ensure_ascii=False))
+        )
+        self._first = True
+        self._missing: List[str] = []
+
+    def write_document(self, dm: DocumentMemory) -> int:
+        payload = build_dossier_payload(dm)
+        self._fh.write(("" if self._first else ", ") + json.dumps(payload, ensure_ascii=False, default=str))
+        self._first = False
+        return 1 + len(payload.get("timeline") or []) + len(payload.get("review_items") or [])
+
+    def write_missing(self, documentid: str) -> None:
+        self._missing.append(documentid)
+
+    def close(self) -> None:
+        self._fh.write('], "missing_documents": %s}' % json.dumps(self._missing))
+        self._fh.close()
+
+
+class _PdfWriter:
+    def __init__(self, path: Path, *, case_id: Optional[str]) -> None:
+        self._writer = DossierPdfWriter(path)
+        if case_id:
+            self._writer.title(f"Caso: {case_id}")
+
+    def write_document(self, dm: DocumentMemory) -> int:
+        count = 0
+        for record in dossier_records(dm):
+            self._writer.write(record)
+            count += 1
+        return count
+
+    def write_missing(self, documentid: str) -> None:
+        self._writer.title(f"Documento não encontrado: {documentid}")
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _open_writer(fmt: str, path: Path, *, case_id: Optional[str]):
+    if fmt == "ndjson":
+        return _NdjsonWriter(path)
+    if fmt == "json":
+        return _JsonWriter(path, case_id=case_id)
+    return _PdfWriter(path, case_id=case_id)
+
+
+async def write_export(
+    documentids: Sequence[str],
+    fmt: str,
+    target: Path,
+    *,
+    case_id: Optional[str] = None,
+    load: DocumentLoader = _default_loader,
+) -> Dict[str, Any]:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f"{target.name}.{uuid4().hex}.part")
+    writer = await asyncio.to_thread(_open_writer, fmt, partial, case_id=case_id)
+    stats: Dict[str, Any] = {"documents": 0, "records": 0, "missing_documents": []}
+    try:
+        async for documentid, dm in _iter_documents(documentids, load):
+            if dm is None:
+                stats["missing_documents"].append(documentid)
+                await asyncio.to_thread(writer.write_missing, documentid)
+                continue
+            # Montagem do dossiê + escrita fora do event loop.
+            stats["records"] += await asyncio.to_thread(writer.write_document, dm)
+            stats["documents"] += 1
+        await asyncio.to_thread(writer.close)
+        os.replace(partial, target)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    stats["size_bytes"] = target.stat().st_size
+    return stats
+
+
+def iter_file_chunks(path: Path, chunk_bytes: Optional[int] = None) -> Iterator[bytes]:
+    size = chunk_bytes or download_chunk_bytes()
+    with path.open("rb") as fh:
+        while True:
+            chunk = fh.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+
+# ---- jobs ----
+
+
+async def create_job(documentids: Sequence[str], fmt: str, *, case_id: Optional[str] = None) -> Dict[str, Any]:
+    record = {
+        "job_id": str(uuid4()),
+        "case_id": case_id,
+        "format": fmt,
+        "documentids": list(dict.fromkeys(documentids)),
+        "status": "queued",
+        "content_hash": None,
+        "cached": False,
+        "error": None,
+    }
+    await export_job_store.save(record)
+    return record
+
+
+async def run_job(
+    job_id: str,
+    *,
+    load: DocumentLoader = _default_loader,
+    revisions: RevisionLookup = _default_revisions,
+) -> Dict[str, Any]:
+    record = await export_job_store.get(job_id)
+    if record is None:
+        raise KeyError(job_id)
+    fmt = record["format"]
+    started = perf_counter()
+    await export_job_store.update(job_id, status="running")
+    try:
+        content_hash = await case_content_hash(
+            record["documentids"], fmt, case_id=record.get("case_id"), load=load, revisions=revisions
+        )
+        target = export_path(content_hash, fmt)
+        fields: Dict[str, Any] = {"content_hash": content_hash}
+        if target.exists():
+            os.utime(target)
+            fields.update(status="done", cached=True, size_bytes=target.stat().st_size)
+        else:
+            stats = await write_export(record["documentids"], fmt, target, case_id=record.get("case_id"), load=load)
+            fields.update(status="done", cached=False, **stats)
+        await asyncio.to_thread(evict_stale_exports)
+    except Exception as exc:
+        metrics.inc_counter("relluna_export_jobs_total", format=fmt, result="failed")
+        await export_job_store.update(job_id, status="failed", error=f"{exc.__class__.__name__}: {exc}")
+        raise
+    fields["duration_ms"] = elapsed_ms(started)
+    metrics.inc_counter("relluna_export_jobs_total", format=fmt, result="cached" if fields["cached"] else "done")
+    metrics.observe("relluna_export_duration_ms", fields["duration_ms"], format=fmt)
+    await export_job_store.update(job_id, **fields)
+    return {**record, **fields}
@@ -9,7 +9,8 @@ Delegando para:
 """
 
 from relluna.services.context_inference.llm_context import (
+    ainfer_layer3_from_layer2,
     infer_layer3_from_layer2,
 )
 
-__all__ = ["infer_layer3_from_layer2"]
+__all__ = ["ainfer_layer3_from_layer2", "infer_layer3_from_layer2"]
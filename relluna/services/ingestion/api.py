@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from functools import partial
 from hashlib import sha256
 from pathlib import Path
 from typing import List, Optional, Callable, Awaitable
 from uuid import uuid4
 import json
 import os
+import shutil
 import traceback
+import zipfile
+from collections import Counter
 from time import perf_counter
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, Header, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from relluna.core.contracts.mappers import to_contract
 from relluna.core.document_memory import (
@@ -21,24 +29,55 @@ from relluna.core.document_memory import (
     MediaType,
     OriginType,
 )
-from relluna.core.document_memory.layer0 import CustodyEvent, IntegrityProof, ProcessingEvent
+from relluna.core.document_memory.layer0 import CustodyEvent, IntegrityProof, ProcessingEvent, VersionEdge
 from relluna.core.document_memory.layer1 import ArtefatoTipo
 from relluna.core.document_memory.layer4_canonical import Layer4SemanticNormalization
-from relluna.infra.blob import AzureBlobArtefactStore
-from relluna.infra import mongo_store
-from relluna.infra.azureblobbackend import AzureBlobBackend
+from relluna.infra.blob import artefact_resolver, close_async_blob_store, get_async_blob_store
+from relluna.infra.blob.paths import artefact_blob_path
+from relluna.infra import (
+    export_job_store,
+    ingest_batch_store,
+    mongo_store,
+    near_duplicate_store,
+    page_store,
+    processing_event_store,
+    stage_memo_store,
+)
 from relluna.infra.mongo.client import get_db
+from relluna.infra.mongo.indexes import ensure_all_indexes
+from relluna.infra.signal_codec import decode_all_signals
 from relluna.services.causal.engine import infer_causal_links, persist_causal_links_to_layer2
 from relluna.services.content_safety.nsfw import check_image_nsfw
 from relluna.services.context_inference.basic import infer_layer3
+from relluna.services.context_inference import llm_context
 from relluna.services.correlation.layer4 import apply_layer4
+from relluna.services.derivatives import evidence_crops, page_previews
 from relluna.services.derivatives.layer5 import apply_layer5
 from relluna.services.deterministic_extractors.basic import extract_basic
 from relluna.services.deterministic_extractors.timeline_seed_v2 import seed_timeline_v2
 from relluna.services.entities.entities_canonical_v1 import apply_entities_canonical_v1
+from relluna.services.export import export_jobs
 from relluna.services.forensics.layer6 import generate_factual_narrative
+from relluna.services.ingestion.batch import (
+    BatchBudget,
+    StagedMember,
+    copy_hashing,
+    is_zip_upload,
+    max_batch_bytes,
+    promote,
+    stage_stream,
+    stage_zip,
+)
 from relluna.services.legal.legal_pipeline import apply_legal_extraction
-from relluna.services.observability import append_processing_event, elapsed_ms, sanitize_processing_details
+from relluna.services.observability import append_processing_event, elapsed_ms, metrics, sanitize_processing_details
+from relluna.services.observability.health import get_health_monitor
+from relluna.services.orchestration.admission import (
+    AdmissionRejected,
+    PriorityClass,
+    get_pipeline_scheduler,
+    resolve_priority,
+)
+from relluna.services.orchestration.deadline import deadline_scope, default_deadline_seconds, deferred_fill_enabled
 from relluna.services.orchestration.decision import (
     ProcessingDecision,
     build_escalation_details,
@@ -46,13 +85,29 @@ from relluna.services.orchestration.decision import (
     decide_processing_mode,
     needs_escalation_after_extract,
 )
+from relluna.services.orchestration import near_duplicate
+from relluna.services.orchestration.stages import (
+    STAGE_SPECS,
+    StageLedger,
+    dump_outputs,
+    load_outputs,
+    memo_key,
+    output_digests,
+    restore_paths,
+    stage_input_digest,
+    stage_version,
+)
 from relluna.services.orchestration.preflight import (
     PreflightSignals,
     collect_preflight_signals,
 )
 from relluna.services.page_extraction.page_pipeline import apply_page_analysis
-from relluna.services.pdf_decomposition.decompose_pdf import decompose_pdf_into_subdocuments
-from relluna.services.read_model import documents_router
+from relluna.services.pdf_decomposition.decompose_pdf import (
+    decompose_pdf_into_subdocuments,
+    fill_deferred_pages,
+    has_deferred_pages,
+)
+from relluna.services.read_model import documents_router, page_index
 from relluna.services.read_model.endpoints import router as read_model_router
 from relluna.services.read_model.case_builder import build_document_case_read_model
 from relluna.services.read_model.projector import persist_document_read_model
@@ -67,7 +122,16 @@ def utcnow() -> datetime:
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 UPLOAD_DIR = BASE_DIR / ".uploads"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _upload_dir() -> Path:
+    # RELLUNA_UPLOAD_DIR é lido a cada chamada (vale mesmo se definido depois
+    # do import). Criado no primeiro upload, não no import: CLIs e workers
+    # que só importam a app não precisam do diretório.
+    upload_dir = Path(os.getenv("RELLUNA_UPLOAD_DIR") or UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    return upload_dir
+
 
 API_VERSION = "v0.2.0"
 DOCUMENT_MEMORY_VERSION = "v0.2.0"
@@ -76,7 +140,32 @@ _LOCAL_FILE_STORAGE_KIND = "local_file"
 
 USE_ADAPTIVE_PIPELINE = True
 
-app = FastAPI(title="Relluna API", version=API_VERSION)
+metrics.describe("relluna_mongo_index_failures_total", "Builders de índice do Mongo que falharam no startup")
+
+
+async def _ensure_mongo_indexes() -> None:
+    # TTL do memo, índices de página, bandas de quase-duplicata etc. só
+    # existem se criados aqui; falha não impede a API de subir.
+    db = mongo_store.get_database()
+    if db is None:
+        return
+    for builder in await ensure_all_indexes(db):
+        metrics.inc_counter("relluna_mongo_index_failures_total", builder=builder)
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    await _ensure_mongo_indexes()
+    monitor = get_health_monitor()
+    monitor.start()
+    try:
+        yield
+    finally:
+        await monitor.stop()
+        await close_async_blob_store()
+
+
+app = FastAPI(title="Relluna API", version=API_VERSION, lifespan=_lifespan)
 app.include_router(read_model_router)
 app.include_router(test_ui_router)
 app.include_router(documents_router)
@@ -86,6 +175,9 @@ class ServiceStatus(BaseModel):
     name: str
     status: str
     detail: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    age_seconds: Optional[float] = None
+    latency_ms: Optional[float] = None
 
 
 class HealthResponse(BaseModel):
@@ -96,52 +188,53 @@ class HealthResponse(BaseModel):
 
 @app.get("/health", response_model=HealthResponse)
 async def health() -> HealthResponse:
+    """Último resultado dos probes de fundo, sem tocar em Mongo/Blob."""
+    monitor = get_health_monitor()
+    await monitor.ensure_fresh()
+    now = utcnow()
     services: List[ServiceStatus] = [ServiceStatus(name="api", status="ok")]
-
-    mongo_status = "ok"
-    mongo_detail: Optional[str] = None
-    try:
-        db = get_db()
-        db.command("ping")
-    except Exception as exc:
-        mongo_status = "error"
-        mongo_detail = str(exc)
-
-    services.append(ServiceStatus(name="mongo", status=mongo_status, detail=mongo_detail))
-
-    blob_backend = AzureBlobBackend()
-    if not blob_backend.is_configured:
+    for result in monitor.snapshot():
         services.append(
             ServiceStatus(
-                name="blob",
-                status="degraded",
-                detail=(
-                    "Blob backend not configured "
-                    "(AZURE_STORAGE_CONNECTION_STRING or AZURE_BLOB_CONNECTION_STRING)"
-                ),
+                name=result.name,
+                status=result.status,
+                detail=result.detail,
+                checked_at=result.checked_at if result.status != "unknown" else None,
+                age_seconds=result.age_seconds(now) if result.status != "unknown" else None,
+                latency_ms=result.latency_ms if result.status != "unknown" else None,
             )
         )
-    else:
-        if blob_backend.ping():
-            services.append(ServiceStatus(name="blob", status="ok"))
-        else:
-            services.append(
-                ServiceStatus(
-                    name="blob",
-                    status="error",
-                    detail="Azure Blob unreachable",
-                )
-            )
 
     overall_status = "ok"
     if any(s.status == "error" for s in services):
         overall_status = "error"
-    elif any(s.status == "degraded" for s in services):
+    elif any(s.status in {"degraded", "unknown"} for s in services):
         overall_status = "degraded"
 
     return HealthResponse(status=overall_status, version=API_VERSION, services=services)
 
 
+@app.get("/health/live")
+async def health_live() -> dict:
+    return {"status": "ok", "version": API_VERSION}
+
+
+@app.get("/health/ready")
+async def health_ready() -> JSONResponse:
+    monitor = get_health_monitor()
+    await monitor.ensure_fresh()
+    ready, reasons = monitor.ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "reasons": reasons},
+    )
+
+
+@app.get("/metrics")
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 async def _find_existing_by_fingerprint(digest: str):
     try:
         db = get_db()
@@ -162,8 +255,11 @@ async def _find_existing_by_fingerprint(digest: str):
 def _detect_media_type(file: UploadFile, media_type: Optional[MediaType]) -> MediaType:
     if media_type:
         return media_type
+    return _media_type_from_content_type(file.content_type)
+
 
-    ctype = file.content_type or ""
+def _media_type_from_content_type(content_type: Optional[str]) -> MediaType:
+    ctype = content_type or ""
     if ctype.startswith("image/"):
         return MediaType.imagem
     if ctype.startswith("video/"):
@@ -206,20 +302,20 @@ def _blob_metadata_from_dm(dm: DocumentMemory) -> Optional[dict]:
     return blob_data if isinstance(blob_data, dict) else None
 
 
-def _maybe_upload_original_to_blob(local_path: Path, artefact_id: str) -> Optional[dict]:
+async def _maybe_upload_original_to_blob(local_path: Path, artefact_id: str) -> Optional[dict]:
     if not _env_flag("RELLUNA_ENABLE_REMOTE_BLOB_INGEST", "0"):
         return None
 
-    backend = AzureBlobBackend()
-    if not backend.is_configured:
+    store = get_async_blob_store()
+    if store is None:
         return None
 
-    store = AzureBlobArtefactStore()
-    blob_path = store.upload(local_path, artefact_id)
+    blob_path = artefact_blob_path(artefact_id)
+    blob_uri = await store.upload_file(local_path, blob_path)
     return {
         "container": store.container_name,
         "blob_path": blob_path,
-        "blob_uri": store.blob_url_for(artefact_id),
+        "blob_uri": blob_uri,
         "uploaded_at": utcnow().isoformat(),
     }
 
@@ -301,33 +397,129 @@ def _http_stage_error(documentid: str, pipeline: str, stage: str, exc: Exception
     )
 
 
-async def _run_stage(dm: DocumentMemory, stage: str, engine: str, fn: Callable[[], Awaitable[DocumentMemory] | DocumentMemory]) -> DocumentMemory:
+async def _run_stage(
+    dm: DocumentMemory,
+    stage: str,
+    engine: str,
+    fn: Callable[[], Awaitable[DocumentMemory] | DocumentMemory],
+    *,
+    ledger: Optional[StageLedger] = None,
+    reuse_from: Optional[StageLedger] = None,
+) -> DocumentMemory:
     started = perf_counter()
+    if reuse_from is not None:
+        record = reuse_from.reusable(dm, stage)
+        if record is not None:
+            # Entradas iguais às da passada anterior: restaura as saídas dela.
+            restore_paths(dm, record.outputs)
+            if ledger is not None:
+                ledger.records[stage] = record
+                ledger.reused.append(stage)
+            _append_processing_event(
+                dm,
+                etapa=stage,
+                engine=engine,
+                detalhes={
+                    "duration_ms": elapsed_ms(started),
+                    "reused": True,
+                    "reused_from": reuse_from.mode,
+                },
+            )
+            return dm
+
+    version = stage_version(stage) if stage_memo_store.enabled() else None
+    documentid = dm.layer0.documentid if dm.layer0 else None
+    use_memo = version is not None and bool(documentid)
+    input_digest = stage_input_digest(dm, stage) if (ledger is not None or use_memo) else None
+
+    if use_memo and input_digest is not None and await _restore_stage_memo(dm, stage, version, input_digest):
+        # Mesmas entradas e mesma versão do motor: saídas da execução anterior.
+        if ledger is not None:
+            ledger.record(dm, stage, input_digest)
+        _finish_stage(dm, stage, engine, elapsed_ms(started), memoized=True, engine_version=version)
+        return dm
+
     try:
-        result = fn()
+        # Etapas síncronas (OCR, extração, decomposição) rodam numa thread para
+        # não travar o loop; etapas async só criam a corrotina lá e são
+        # aguardadas aqui.
+        result = await asyncio.to_thread(fn)
         if hasattr(result, "__await__"):
             dm = await result
         else:
             dm = result
         duration = elapsed_ms(started)
+        if ledger is not None:
+            ledger.record(dm, stage, input_digest)
+        if use_memo and input_digest is not None and not _partial_stage_output(dm, stage):
+            await _store_stage_memo(dm, stage, version, input_digest)
+        _finish_stage(dm, stage, engine, duration)
+        return dm
+    except Exception as exc:
+        _record_stage_error(dm, stage, exc, engine, duration_ms=elapsed_ms(started))
+        raise
+
+
+def _finish_stage(
+    dm: DocumentMemory,
+    stage: str,
+    engine: str,
+    duration: float,
+    *,
+    memoized: bool = False,
+    engine_version: Optional[str] = None,
+) -> None:
+    detalhes: dict = {"duration_ms": duration}
+    if memoized:
+        detalhes.update({"memoized": True, "engine_version": engine_version})
+    _append_processing_event(dm, etapa=stage, engine=engine, detalhes=detalhes)
+    for warning in _collect_stage_warnings(dm, stage):
         _append_processing_event(
             dm,
             etapa=stage,
             engine=engine,
-            detalhes={"duration_ms": duration},
+            status="warning",
+            detalhes={**warning, "duration_ms": duration},
         )
-        for warning in _collect_stage_warnings(dm, stage):
-            _append_processing_event(
-                dm,
-                etapa=stage,
-                engine=engine,
-                status="warning",
-                detalhes={**warning, "duration_ms": duration},
-            )
-        return dm
-    except Exception as exc:
-        _record_stage_error(dm, stage, exc, engine, duration_ms=elapsed_ms(started))
-        raise
+
+
+def _partial_stage_output(dm: DocumentMemory, stage: str) -> bool:
+    # Decomposição cortada pelo prazo não vira memo: a próxima execução com
+    # as mesmas entradas precisa processar as páginas adiadas.
+    return stage == "decompose_pdf_into_subdocuments" and has_deferred_pages(dm)
+
+
+async def _restore_stage_memo(dm: DocumentMemory, stage: str, version: str, input_digest: str) -> bool:
+    try:
+        record = await stage_memo_store.get(dm.layer0.documentid, stage)
+        if not record or record.get("version") != version:
+            return False
+        if memo_key(stage, version, input_digest) not in (record.get("keys") or []):
+            return False
+        if record.get("output_digests") != output_digests(dm, stage):
+            # Saídas já presentes no documento dispensam descomprimir o payload.
+            restore_paths(dm, load_outputs(dm, stage_memo_store.load_outputs_payload(record)))
+        return True
+    except Exception:
+        # Memo é otimização: falha de leitura/validação cai na execução normal.
+        return False
+
+
+async def _store_stage_memo(dm: DocumentMemory, stage: str, version: str, input_digest: str) -> None:
+    keys = [memo_key(stage, version, input_digest)]
+    if STAGE_SPECS[stage].idempotent:
+        keys.append(memo_key(stage, version, stage_input_digest(dm, stage)))
+    try:
+        await stage_memo_store.put(
+            dm.layer0.documentid,
+            stage,
+            keys=tuple(dict.fromkeys(keys)),
+            version=version,
+            outputs=dump_outputs(dm, stage),
+            output_digests=output_digests(dm, stage),
+        )
+    except Exception:
+        pass
 
 
 def _collect_preflight_signals(dm: DocumentMemory) -> PreflightSignals:
@@ -348,11 +540,12 @@ def _needs_escalation_after_extract(dm: DocumentMemory) -> bool:
     return needs_escalation_after_extract(dm)
 
 
-async def _run_fast_pipeline(dm: DocumentMemory) -> DocumentMemory:
-    dm = await _run_stage(dm, "extract_basic", "deterministic_extractors.basic", lambda: extract_basic(dm))
-    dm = await _run_stage(dm, "apply_page_analysis", "services.page_extraction.page_pipeline", lambda: apply_page_analysis(dm))
-    dm = await _run_stage(dm, "apply_legal_extraction", "services.legal.legal_pipeline", lambda: apply_legal_extraction(dm))
-    dm = await _run_stage(dm, "apply_entities_canonical_v1", "services.entities.entities_canonical_v1", lambda: apply_entities_canonical_v1(dm))
+async def _run_fast_pipeline(dm: DocumentMemory, *, ledger: Optional[StageLedger] = None) -> DocumentMemory:
+    run_stage = partial(_run_stage, ledger=ledger)
+    dm = await run_stage(dm, "extract_basic", "deterministic_extractors.basic", lambda: extract_basic(dm))
+    dm = await run_stage(dm, "apply_page_analysis", "services.page_extraction.page_pipeline", lambda: apply_page_analysis(dm))
+    dm = await run_stage(dm, "apply_legal_extraction", "services.legal.legal_pipeline", lambda: apply_legal_extraction(dm))
+    dm = await run_stage(dm, "apply_entities_canonical_v1", "services.entities.entities_canonical_v1", lambda: apply_entities_canonical_v1(dm))
 
     if dm.layer0:
         dm.layer0.juridicalreadinesslevel = max(dm.layer0.juridicalreadinesslevel or 0, 1)
@@ -360,15 +553,29 @@ async def _run_fast_pipeline(dm: DocumentMemory) -> DocumentMemory:
     return dm
 
 
-async def _run_standard_pipeline(dm: DocumentMemory) -> DocumentMemory:
-    dm = await _run_stage(dm, "extract_basic", "deterministic_extractors.basic", lambda: extract_basic(dm))
-    dm = await _run_stage(dm, "decompose_pdf_into_subdocuments", "services.pdf_decomposition.decompose_pdf_v1", lambda: decompose_pdf_into_subdocuments(dm))
-    dm = await _run_stage(dm, "apply_page_analysis", "services.page_extraction.page_pipeline", lambda: apply_page_analysis(dm))
-    dm = await _run_stage(dm, "apply_legal_extraction", "services.legal.legal_pipeline", lambda: apply_legal_extraction(dm))
-    dm = await _run_stage(dm, "apply_entities_canonical_v1", "services.entities.entities_canonical_v1", lambda: apply_entities_canonical_v1(dm))
+async def _run_standard_pipeline(dm: DocumentMemory, *, reuse_from: Optional[StageLedger] = None) -> DocumentMemory:
+    """
+    Com `reuse_from` (escalada a partir do fast path), etapas cujas entradas
+    declaradas não mudaram restauram as saídas da passada anterior.
+    """
+    ledger = StageLedger(mode="standard") if reuse_from is not None else None
+    run_stage = partial(_run_stage, ledger=ledger, reuse_from=reuse_from)
+    dm = await run_stage(dm, "extract_basic", "deterministic_extractors.basic", lambda: extract_basic(dm))
+    dm = await run_stage(dm, "decompose_pdf_into_subdocuments", "services.pdf_decomposition.decompose_pdf_v1", lambda: decompose_pdf_into_subdocuments(dm))
+    dm = await run_stage(dm, "apply_page_analysis", "services.page_extraction.page_pipeline", lambda: apply_page_analysis(dm))
+    dm = await run_stage(dm, "apply_legal_extraction", "services.legal.legal_pipeline", lambda: apply_legal_extraction(dm))
+    dm = await run_stage(dm, "apply_entities_canonical_v1", "services.entities.entities_canonical_v1", lambda: apply_entities_canonical_v1(dm))
 
     if _should_run_transcription(dm):
-        dm = await _run_stage(dm, "apply_transcription_contextual", "services.transcription.asr", lambda: apply_transcription_to_layer2(dm))
+        dm = await run_stage(dm, "apply_transcription_contextual", "services.transcription.asr", lambda: apply_transcription_to_layer2(dm))
+
+    if ledger is not None:
+        _append_processing_event(
+            dm,
+            etapa="processing_escalation_reuse",
+            engine="services.orchestration.stages_v1",
+            detalhes={**ledger.summary(), "reused_from": reuse_from.mode},
+        )
 
     if dm.layer0:
         dm.layer0.juridicalreadinesslevel = max(dm.layer0.juridicalreadinesslevel or 0, 1)
@@ -392,7 +599,161 @@ async def _run_forensic_pipeline(dm: DocumentMemory) -> DocumentMemory:
     return dm
 
 
-async def _run_extract_pipeline(dm: DocumentMemory) -> DocumentMemory:
+async def _find_near_duplicate(dm: DocumentMemory, fingerprint) -> Optional[tuple]:
+    try:
+        matches = await near_duplicate_store.find_similar(
+            kind=fingerprint.kind,
+            value=fingerprint.value,
+            max_distance=near_duplicate.max_distance(fingerprint.kind),
+            exclude=dm.layer0.documentid,
+            limit=1,
+        )
+    except Exception:
+        return None
+    return matches[0] if matches else None
+
+
+async def _reuse_near_duplicate_layer2(dm: DocumentMemory, prior_id: str) -> bool:
+    prior = await mongo_store.get(prior_id)
+    if prior is None:
+        return False
+    prior = DocumentMemory.model_validate(prior) if isinstance(prior, dict) else prior.model_copy(deep=True)
+    decode_all_signals(prior)
+    layer2 = near_duplicate.reusable_layer2(prior, dm)
+    if layer2 is None:
+        return False
+
+    dm.layer2 = layer2
+    _append_processing_event(
+        dm,
+        etapa="processing_near_duplicate_reuse",
+        engine=near_duplicate.ENGINE,
+        detalhes={"reused_from": prior_id, "signals": sorted(layer2.sinais_documentais)},
+    )
+    if dm.layer0:
+        dm.layer0.juridicalreadinesslevel = max(dm.layer0.juridicalreadinesslevel or 0, 1)
+    return True
+
+
+async def _ensure_artefact_local(dm: DocumentMemory) -> None:
+    """
+    Em worker sem o upload original no disco, traz o artefato do blob para o
+    cache local antes dos estágios (que resolvem o caminho sem rede).
+    """
+    artefact = dm.layer1.artefatos[0] if dm.layer1 is not None and dm.layer1.artefatos else None
+    if artefact is None or artefact_resolver.cached_path(artefact) is not None:
+        return
+    started = perf_counter()
+    try:
+        path = await artefact_resolver.ensure_local(artefact)
+    except Exception as exc:
+        _append_processing_event(
+            dm,
+            etapa="artefact_fetch",
+            engine="infra.blob.artefact_resolver",
+            status="warning",
+            detalhes={"error_type": exc.__class__.__name__, "message": str(exc)},
+        )
+        return
+    if path is not None:
+        _append_processing_event(
+            dm,
+            etapa="artefact_fetch",
+            engine="infra.blob.artefact_resolver",
+            detalhes={"blob_path": _blob_metadata_from_dm(dm)["blob_path"], "duration_ms": elapsed_ms(started)},
+        )
+
+
+async def _run_extract_pipeline(
+    dm: DocumentMemory,
+    *,
+    reuse_near_duplicate: Optional[bool] = None,
+    deadline_seconds: Optional[float] = None,
+) -> DocumentMemory:
+    """
+    `deadline_seconds` (ou RELLUNA_DOCUMENT_DEADLINE_SECONDS) limita o tempo
+    de render/OCR do documento; páginas que não couberem ficam em
+    `deferred_pages_v1` para `_maybe_schedule_deferred_fill`.
+    """
+    budget = deadline_seconds if deadline_seconds is not None else default_deadline_seconds()
+    artefatos = dm.layer1.artefatos if dm.layer1 is not None else []
+    # Artefatos fixados no cache local até o fim da extração (sem despejo LRU).
+    with deadline_scope(budget), artefact_resolver.pinned(artefatos):
+        return await _run_extract_with_near_duplicate(dm, reuse_near_duplicate=reuse_near_duplicate)
+
+
+async def _run_extract_with_near_duplicate(
+    dm: DocumentMemory, *, reuse_near_duplicate: Optional[bool] = None
+) -> DocumentMemory:
+    """
+    Antes da extração, procura quase-duplicatas já processadas pelo
+    fingerprint de similaridade: o documento é marcado e ligado ao anterior
+    por uma aresta `near_duplicate_of`; com reuso autorizado pelo operador
+    (parâmetro ou RELLUNA_NEAR_DUPLICATE_REUSE) a Layer2 do anterior é
+    copiada e a extração é pulada.
+    """
+    await _ensure_artefact_local(dm)
+    # Render da primeira página / leitura do texto nativo: fora do loop.
+    fingerprint = await asyncio.to_thread(near_duplicate.compute_fingerprint, dm) if near_duplicate.enabled() else None
+    if fingerprint is None:
+        return await _run_extract_by_mode(dm)
+
+    match = await _find_near_duplicate(dm, fingerprint)
+    reused = False
+    if match is not None:
+        prior_id, distance = match
+        # Reprocessar o mesmo documento não repete o aviso nem a aresta.
+        already_linked = any(
+            edge.relation == "near_duplicate_of"
+            and edge.from_artifact_id == prior_id
+            and edge.to_artifact_id == dm.layer0.documentid
+            for edge in dm.layer0.versiongraph
+        )
+        if not already_linked:
+            _append_processing_event(
+                dm,
+                etapa="processing_near_duplicate",
+                engine=near_duplicate.ENGINE,
+                status="warning",
+                detalhes={
+                    "similar_to": prior_id,
+                    "distance": distance,
+                    "kind": fingerprint.kind,
+                    "fingerprint": fingerprint.hex,
+                },
+            )
+            dm.layer0.versiongraph.append(
+                VersionEdge(
+                    from_artifact_id=prior_id,
+                    to_artifact_id=dm.layer0.documentid,
+                    relation="near_duplicate_of",
+                    method=fingerprint.kind,
+                    details={"distance": distance},
+                )
+            )
+        allow_reuse = near_duplicate.reuse_enabled() if reuse_near_duplicate is None else reuse_near_duplicate
+        if allow_reuse:
+            try:
+                reused = await _reuse_near_duplicate_layer2(dm, prior_id)
+            except Exception:
+                reused = False
+
+    if not reused:
+        dm = await _run_extract_by_mode(dm)
+
+    try:
+        await near_duplicate_store.put(
+            dm.layer0.documentid,
+            kind=fingerprint.kind,
+            value=fingerprint.value,
+            media_type=getattr(getattr(dm.layer1, "midia", None), "value", None),
+        )
+    except Exception:
+        pass
+    return dm
+
+
+async def _run_extract_by_mode(dm: DocumentMemory) -> DocumentMemory:
     if not USE_ADAPTIVE_PIPELINE:
         return await _run_standard_pipeline(dm)
 
@@ -407,7 +768,8 @@ async def _run_extract_pipeline(dm: DocumentMemory) -> DocumentMemory:
     )
 
     if decision.mode == "fast":
-        dm = await _run_fast_pipeline(dm)
+        fast_ledger = StageLedger(mode="fast")
+        dm = await _run_fast_pipeline(dm, ledger=fast_ledger)
 
         if _needs_escalation_after_extract(dm):
             _append_processing_event(
@@ -417,7 +779,7 @@ async def _run_extract_pipeline(dm: DocumentMemory) -> DocumentMemory:
                 status="warning",
                 detalhes=build_escalation_details(from_mode="fast", to_mode="standard"),
             )
-            dm = await _run_standard_pipeline(dm)
+            dm = await _run_standard_pipeline(dm, reuse_from=fast_ledger)
 
         return dm
 
@@ -433,6 +795,8 @@ async def _run_infer_pipeline(dm: DocumentMemory) -> DocumentMemory:
 
     dm = await _run_stage(dm, "timeline_seed_v2", "deterministic_extractors.timeline_seed_v2", lambda: seed_timeline_v2(dm))
     dm = await _run_stage(dm, "infer_layer3", "taxonomy_rules", lambda: infer_layer3(dm))
+    if llm_context.enabled():
+        dm = await _run_stage(dm, "infer_layer3_llm", "azure_openai", lambda: llm_context.apply_llm_context(dm))
 
     # Motor de Kausal: gera hipóteses de nexo causal entre eventos
     dm = await _run_stage(
@@ -446,6 +810,7 @@ async def _run_infer_pipeline(dm: DocumentMemory) -> DocumentMemory:
     if dm.layer4 is None:
         dm.layer4 = Layer4SemanticNormalization()
     dm = await _run_stage(dm, "apply_layer5", "services.derivatives.layer5", lambda: apply_layer5(dm))
+    dm = await _run_stage(dm, "apply_page_previews", page_previews.FONTE, lambda: page_previews.apply_page_previews(dm))
     await _run_stage(dm, "persist_read_model", "services.read_model.projector", lambda: persist_document_read_model(dm))
 
     if dm.layer0:
@@ -455,12 +820,28 @@ async def _run_infer_pipeline(dm: DocumentMemory) -> DocumentMemory:
     return dm
 
 
+def _admit(priority: PriorityClass) -> None:
+    """Controle de admissão: fila ou OCR do nó acima do limite viram 429."""
+    try:
+        get_pipeline_scheduler().admit(priority)
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=429,
+            detail={"error": "admission_rejected", "priority": exc.priority, "reason": exc.reason},
+            headers={"Retry-After": str(exc.retry_after_seconds)},
+        )
+
+
 @app.post("/ingest")
 async def ingest(
     file: UploadFile = File(...),
     media_type: Optional[MediaType] = Form(None),
     origin: Optional[OriginType] = Form(None),
+    priority: PriorityClass = Form("standard"),
+    x_relluna_review_token: Optional[str] = Header(None),
 ):
+    priority = resolve_priority(priority, x_relluna_review_token)
+    _admit(priority)
     if not file.filename:
         raise HTTPException(status_code=400, detail="Arquivo sem nome")
 
@@ -493,22 +874,48 @@ async def ingest(
         }
 
     filename = f"{digest}_{file.filename}"
-    target_path = UPLOAD_DIR / filename
+    target_path = _upload_dir() / filename
     target_path.write_bytes(content)
 
-    midia = _detect_media_type(file, media_type)
-    origem = origin or OriginType.digital_nativo
-    documentid = str(uuid4())
+    dm = _build_ingested_dm(
+        documentid=str(uuid4()),
+        digest=digest,
+        target_path=target_path,
+        filename=file.filename,
+        content_type=file.content_type,
+        size_bytes=len(content),
+        midia=_detect_media_type(file, media_type),
+        origem=origin or OriginType.digital_nativo,
+    )
+    blob_metadata = await _attach_original_blob(dm, target_path)
+    _attach_nsfw_check(dm, target_path)
+
+    await mongo_store.save(dm)
 
+    return _ingest_response(dm, digest, target_path, blob_metadata)
+
+
+def _build_ingested_dm(
+    *,
+    documentid: str,
+    digest: str,
+    target_path: Path,
+    filename: str,
+    content_type: Optional[str],
+    size_bytes: int,
+    midia: MediaType,
+    origem: OriginType,
+    custody_details: Optional[dict] = None,
+) -> DocumentMemory:
     layer0 = Layer0(
         documentid=documentid,
         contentfingerprint=digest,
         fingerprint_algorithm="sha256",
         ingestiontimestamp=utcnow(),
         ingestionagent="api",
-        original_filename=file.filename,
-        mimetype=file.content_type,
-        size_bytes=len(content),
+        original_filename=filename,
+        mimetype=content_type,
+        size_bytes=size_bytes,
         authenticitystate="preservado_com_hash_local",
         integrityproofs=[IntegrityProof.local_sha256(digest)],
         juridicalreadinesslevel=0,
@@ -520,9 +927,10 @@ async def ingest(
                 origem_uri=None,
                 destino_uri=str(target_path),
                 detalhes={
-                    "filename": file.filename,
-                    "mimetype": file.content_type,
-                    "size_bytes": len(content),
+                    "filename": filename,
+                    "mimetype": content_type,
+                    "size_bytes": size_bytes,
+                    **(custody_details or {}),
                 },
             )
         ],
@@ -547,19 +955,22 @@ async def ingest(
                 id=documentid,
                 tipo=ArtefatoTipo.original,
                 uri=str(target_path),
-                nome=file.filename,
-                mimetype=file.content_type,
-                tamanho_bytes=len(content),
+                nome=filename,
+                mimetype=content_type,
+                tamanho_bytes=size_bytes,
                 hash_sha256=digest,
             )
         ],
     )
 
-    dm = DocumentMemory(version=DOCUMENT_MEMORY_VERSION, layer0=layer0, layer1=layer1)
+    return DocumentMemory(version=DOCUMENT_MEMORY_VERSION, layer0=layer0, layer1=layer1)
 
+
+async def _attach_original_blob(dm: DocumentMemory, target_path: Path) -> Optional[dict]:
+    documentid = dm.layer0.documentid
     blob_metadata = None
     try:
-        blob_metadata = _maybe_upload_original_to_blob(target_path, documentid)
+        blob_metadata = await _maybe_upload_original_to_blob(target_path, documentid)
     except Exception as exc:
         dm.layer0.processingevents.append(
             ProcessingEvent(
@@ -598,20 +1009,25 @@ async def ingest(
                 },
             )
         )
+    return blob_metadata
 
-    if midia == MediaType.imagem:
-        try:
-            nsfw_result = check_image_nsfw(target_path, threshold=0.7)
-            if nsfw_result:
-                layer1.artefatos[0].metadados_nativos = layer1.artefatos[0].metadados_nativos or {}
-                layer1.artefatos[0].metadados_nativos["nsfw"] = nsfw_result.to_dict()
-        except Exception:
-            pass
 
-    await mongo_store.save(dm)
+def _attach_nsfw_check(dm: DocumentMemory, target_path: Path) -> None:
+    if dm.layer1.midia != MediaType.imagem:
+        return
+    try:
+        nsfw_result = check_image_nsfw(target_path, threshold=0.7)
+        if nsfw_result:
+            artefact = dm.layer1.artefatos[0]
+            artefact.metadados_nativos = artefact.metadados_nativos or {}
+            artefact.metadados_nativos["nsfw"] = nsfw_result.to_dict()
+    except Exception:
+        pass
+
 
+def _ingest_response(dm: DocumentMemory, digest: str, target_path: Path, blob_metadata: Optional[dict]) -> dict:
     return {
-        "documentid": layer0.documentid,
+        "documentid": dm.layer0.documentid,
         "blob_uri": (blob_metadata or {}).get("blob_uri"),
         "artifact_uri": str(target_path),
         "local_file_uri": str(target_path),
@@ -623,13 +1039,382 @@ async def ingest(
     }
 
 
+_DEFERRED_TASKS: set = set()
+
+
+def _maybe_schedule_deferred_fill(dm: DocumentMemory) -> None:
+    """Agenda o preenchimento das páginas adiadas, já fora do prazo da requisição."""
+    if not deferred_fill_enabled() or not has_deferred_pages(dm) or not dm.layer0:
+        return
+    task = asyncio.create_task(_fill_deferred_pages_job(dm.layer0.documentid))
+    _DEFERRED_TASKS.add(task)
+    task.add_done_callback(_DEFERRED_TASKS.discard)
+
+
+async def _index_pages(dm: DocumentMemory) -> None:
+    """Registros de página acompanham a extração (a inferência reindexa na projeção)."""
+    if not page_index.enabled():
+        return
+    try:
+        await page_index.index_document(dm)
+    except Exception:
+        pass
+
+
+async def _fill_deferred_pages_job(documentid: str) -> None:
+    dm_dict = await mongo_store.get(documentid)
+    if dm_dict is None:
+        return
+    dm = DocumentMemory.model_validate(dm_dict) if isinstance(dm_dict, dict) else dm_dict
+    if not has_deferred_pages(dm):
+        return
+    had_inference = dm.layer3 is not None
+    try:
+        async with get_pipeline_scheduler().slot("bulk"):
+            dm = await _fill_deferred_pages(dm, had_inference=had_inference)
+    except Exception as exc:
+        _record_stage_error(dm, "fill_deferred_pages", exc, "api.deferred_fill")
+    try:
+        await mongo_store.save(dm)
+    finally:
+        processing_event_store.pop_pending(documentid)
+    if not had_inference:
+        await _index_pages(dm)
+
+
+async def _fill_deferred_pages(dm: DocumentMemory, *, had_inference: bool) -> DocumentMemory:
+    dm = await _run_stage(dm, "fill_deferred_pages", "services.pdf_decomposition.decompose_pdf_v1", lambda: fill_deferred_pages(dm))
+    dm = await _run_stage(dm, "apply_page_analysis", "services.page_extraction.page_pipeline", lambda: apply_page_analysis(dm))
+    dm = await _run_stage(dm, "apply_legal_extraction", "services.legal.legal_pipeline", lambda: apply_legal_extraction(dm))
+    dm = await _run_stage(dm, "apply_entities_canonical_v1", "services.entities.entities_canonical_v1", lambda: apply_entities_canonical_v1(dm))
+    if had_inference:
+        dm = await _run_infer_pipeline(dm)
+    return dm
+
+
+_BATCH_TASKS: set = set()
+
+
+def _batch_concurrency() -> int:
+    return max(int(os.getenv("RELLUNA_BATCH_CONCURRENCY", "4")), 1)
+
+
+async def _stage_batch_uploads(uploads: List[UploadFile], staging_dir: Path) -> List[StagedMember]:
+    budget = BatchBudget()
+    members: List[StagedMember] = []
+    for upload in uploads:
+        if not is_zip_upload(upload.filename, upload.content_type):
+            members.append(
+                await asyncio.to_thread(
+                    stage_stream,
+                    upload.file,
+                    index=len(members),
+                    filename=upload.filename or "",
+                    content_type=upload.content_type,
+                    staging_dir=staging_dir,
+                    budget=budget,
+                )
+            )
+            continue
+
+        zip_path = staging_dir / f"archive-{len(members):05d}.zip"
+        try:
+            await asyncio.to_thread(copy_hashing, upload.file, zip_path, max_batch_bytes())
+            members.extend(
+                await asyncio.to_thread(
+                    stage_zip,
+                    zip_path,
+                    archive_name=upload.filename or "archive.zip",
+                    start_index=len(members),
+                    staging_dir=staging_dir,
+                    budget=budget,
+                )
+            )
+        except (zipfile.BadZipFile, ValueError) as exc:
+            members.append(
+                StagedMember(
+                    index=len(members),
+                    filename=upload.filename or "",
+                    content_type=upload.content_type,
+                    source="zip",
+                    error=f"ZIP inválido: {exc}",
+                )
+            )
+        finally:
+            zip_path.unlink(missing_ok=True)
+    return members
+
+
+def _batch_counts(items: List[dict]) -> dict:
+    return dict(Counter(item["status"] for item in items))
+
+
+async def _finalize_batch_document(
+    dm: DocumentMemory, target_path: Path, limit: asyncio.Semaphore
+) -> Optional[dict]:
+    async with limit:
+        blob_metadata = await _attach_original_blob(dm, target_path)
+        await asyncio.to_thread(_attach_nsfw_check, dm, target_path)
+    return blob_metadata
+
+
+async def _discard_unsaved_batch_documents(new_documents: List[tuple]) -> None:
+    """Lote que falhou: remove arquivo promovido (e blob) de quem não chegou ao Mongo."""
+    if not new_documents:
+        return
+    try:
+        saved = set(
+            (
+                await mongo_store.find_documentids_by_fingerprints(
+                    [dm.layer0.contentfingerprint for _, dm, _ in new_documents]
+                )
+            ).values()
+        )
+    except Exception:
+        # Sem confirmar o que foi gravado, arquivo órfão é melhor que documento sem original.
+        return
+    store = get_async_blob_store()
+    for _, dm, target_path in new_documents:
+        if dm.layer0.documentid in saved:
+            continue
+        target_path.unlink(missing_ok=True)
+        blob_metadata = (dm.layer1.artefatos[0].metadados_nativos or {}).get("blob_storage")
+        if blob_metadata and store is not None:
+            try:
+                await store.delete(blob_metadata["blob_path"])
+            except Exception:
+                pass
+
+
+async def _process_batch_member(batch_id: str, index: int, documentid: str, priority: PriorityClass = "bulk") -> None:
+    # Lote é uma passada por documento: memo de etapa não seria reaproveitado.
+    with stage_memo_store.suppressed():
+        async with get_pipeline_scheduler().slot(priority):
+            await ingest_batch_store.update_item(batch_id, index, status="processing")
+            dm_dict = await mongo_store.get(documentid)
+            dm = DocumentMemory.model_validate(dm_dict) if isinstance(dm_dict, dict) else dm_dict
+            try:
+                dm = await _run_extract_pipeline(dm)
+                dm = await _run_infer_pipeline(dm)
+                await mongo_store.save(dm)
+                _maybe_schedule_deferred_fill(dm)
+                await ingest_batch_store.update_item(batch_id, index, status="processed")
+            except Exception as exc:
+                _record_stage_error(dm, "process_document", exc, "api.ingest_batch")
+                await mongo_store.save(dm)
+                await ingest_batch_store.update_item(batch_id, index, status="failed", error=_ocr_error_message(exc))
+            finally:
+                processing_event_store.pop_pending(documentid)
+
+
+@app.post("/ingest/batch")
+async def ingest_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    case_id: Optional[str] = Form(None),
+    origin: Optional[OriginType] = Form(None),
+    process: bool = Form(False),
+    priority: PriorityClass = Form("bulk"),
+    x_relluna_review_token: Optional[str] = Header(None),
+):
+    """
+    Ingestão de vários arquivos e/ou de um ZIP: staging em disco com hash
+    incremental, dedup numa única consulta `$in`, gravação em lote e,
+    com `process=true`, processamento em background nos slots do
+    PipelineScheduler, na classe `priority` (bulk por padrão).
+    """
+    priority = resolve_priority(priority, x_relluna_review_token)
+    if process:
+        _admit(priority)
+    uploads = [upload for upload in (files or []) if upload is not None]
+    if archive is not None:
+        uploads.append(archive)
+    if not uploads:
+        raise HTTPException(status_code=400, detail="Nenhum arquivo enviado")
+
+    batch_id = str(uuid4())
+    origem = origin or OriginType.digital_nativo
+    custody_details = {key: value for key, value in {"batch_id": batch_id, "case_id": case_id}.items() if value}
+    staging_dir = _upload_dir() / ".staging" / batch_id
+    staging_dir.mkdir(parents=True, exist_ok=True)
+
+    items: List[dict] = []
+    new_documents: List[tuple] = []
+    try:
+        members = await _stage_batch_uploads(uploads, staging_dir)
+        existing = await mongo_store.find_documentids_by_fingerprints(
+            [member.digest for member in members if member.error is None]
+        )
+        first_by_digest: dict = {}
+
+        for member in members:
+            item = {
+                "index": member.index,
+                "filename": member.filename,
+                "source": member.source,
+                "hash": member.digest,
+                "size_bytes": member.size_bytes,
+                "documentid": None,
+                "deduplicated": False,
+                "status": "ingested",
+                "error": member.error,
+            }
+            items.append(item)
+
+            if member.error:
+                item["status"] = "rejected"
+                continue
+
+            known = existing.get(member.digest) or first_by_digest.get(member.digest)
+            if known:
+                item.update({"documentid": known, "deduplicated": True, "status": "deduplicated"})
+                member.path.unlink(missing_ok=True)
+                continue
+
+            target_path = promote(member, _upload_dir())
+            dm = _build_ingested_dm(
+                documentid=str(uuid4()),
+                digest=member.digest,
+                target_path=target_path,
+                filename=member.filename,
+                content_type=member.content_type,
+                size_bytes=member.size_bytes,
+                midia=_media_type_from_content_type(member.content_type),
+                origem=origem,
+                custody_details=custody_details,
+            )
+            item["documentid"] = dm.layer0.documentid
+            first_by_digest[member.digest] = dm.layer0.documentid
+            new_documents.append((item, dm, target_path))
+
+        limit = asyncio.Semaphore(_batch_concurrency())
+        blob_results = await asyncio.gather(
+            *(_finalize_batch_document(dm, target_path, limit) for _, dm, target_path in new_documents)
+        )
+        for (item, _, _), blob_metadata in zip(new_documents, blob_results):
+            item["blob_uri"] = (blob_metadata or {}).get("blob_uri")
+
+        await mongo_store.save_many([dm for _, dm, _ in new_documents])
+    except Exception:
+        await _discard_unsaved_batch_documents(new_documents)
+        raise
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    if process:
+        for item, _, _ in new_documents:
+            item["status"] = "queued"
+
+    record = {
+        "batch_id": batch_id,
+        "case_id": case_id,
+        "created_at": utcnow().isoformat(),
+        "process": process,
+        "items": items,
+    }
+    await ingest_batch_store.save(record)
+
+    if process:
+        for item, dm, _ in new_documents:
+            task = asyncio.create_task(_process_batch_member(batch_id, item["index"], dm.layer0.documentid, priority))
+            _BATCH_TASKS.add(task)
+            task.add_done_callback(_BATCH_TASKS.discard)
+
+    return {**record, "counts": _batch_counts(items)}
+
+
+@app.get("/ingest/batch/{batch_id}")
+async def get_ingest_batch(batch_id: str):
+    record = await ingest_batch_store.get(batch_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    return {**record, "counts": _batch_counts(record["items"])}
+
+
+class ExportRequest(BaseModel):
+    documentids: List[str] = []
+    case_id: Optional[str] = None
+    format: export_jobs.ExportFormat = "ndjson"
+
+
+_EXPORT_TASKS: set = set()
+
+
+async def _run_export_job(job_id: str) -> None:
+    async with get_pipeline_scheduler().slot("bulk"):
+        try:
+            await export_jobs.run_job(job_id)
+        except Exception:
+            # Status e erro já gravados no job.
+            pass
+
+
+@app.post("/exports", status_code=202)
+async def create_export(request: ExportRequest):
+    """
+    Dossiê do caso (documentos explícitos e/ou os lotes de `case_id`) gerado
+    em background; acompanhar em /exports/{job_id} e baixar em
+    /exports/{job_id}/download.
+    """
+    _admit("bulk")
+    documentids = list(request.documentids)
+    if request.case_id:
+        documentids += await ingest_batch_store.documentids_for_case(request.case_id)
+    if not documentids:
+        raise HTTPException(status_code=400, detail="Informe documentids ou um case_id com documentos")
+
+    record = await export_jobs.create_job(documentids, request.format, case_id=request.case_id)
+    task = asyncio.create_task(_run_export_job(record["job_id"]))
+    _EXPORT_TASKS.add(task)
+    task.add_done_callback(_EXPORT_TASKS.discard)
+    return record
+
+
+@app.get("/exports/{job_id}")
+async def get_export(job_id: str):
+    record = await export_job_store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Exportação não encontrada")
+    return record
+
+
+@app.get("/exports/{job_id}/download")
+async def download_export(job_id: str):
+    record = await export_job_store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Exportação não encontrada")
+    if record["status"] != "done":
+        raise HTTPException(status_code=409, detail={"error": "export_not_ready", "status": record["status"]})
+    path = export_jobs.export_path(record["content_hash"], record["format"])
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Arquivo da exportação não está mais disponível")
+
+    filename = f"dossie-{record.get('case_id') or job_id}.{record['format']}"
+    return StreamingResponse(
+        export_jobs.iter_file_chunks(path),
+        media_type=export_jobs.MIMETYPES[record["format"]],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "ETag": f'"{record["content_hash"]}"'},
+    )
+
+
 @app.post("/process")
 async def process_document(
     file: UploadFile = File(...),
     media_type: Optional[MediaType] = Form(None),
     origin: Optional[OriginType] = Form(None),
+    reuse_near_duplicate: bool = Form(False),
+    deadline_seconds: Optional[float] = Form(None, gt=0),
+    priority: PriorityClass = Form("standard"),
+    x_relluna_review_token: Optional[str] = Header(None),
 ):
-    ingest_result = await ingest(file=file, media_type=media_type, origin=origin)
+    priority = resolve_priority(priority, x_relluna_review_token)
+    ingest_result = await ingest(
+        file=file,
+        media_type=media_type,
+        origin=origin,
+        priority=priority,
+        x_relluna_review_token=x_relluna_review_token,
+    )
     documentid = ingest_result["documentid"]
 
     dm_dict = await mongo_store.get(documentid)
@@ -638,15 +1423,24 @@ async def process_document(
 
     dm = DocumentMemory.model_validate(dm_dict)
     try:
-        dm = await _run_extract_pipeline(dm)
-        dm = await _run_infer_pipeline(dm)
+        async with get_pipeline_scheduler().slot(priority):
+            dm = await _run_extract_pipeline(
+                dm,
+                reuse_near_duplicate=reuse_near_duplicate or None,
+                deadline_seconds=deadline_seconds,
+            )
+            dm = await _run_infer_pipeline(dm)
         await mongo_store.save(dm)
+        _maybe_schedule_deferred_fill(dm)
     except HTTPException:
         raise
     except Exception as exc:
         _record_stage_error(dm, "process_document", exc, "api.process")
         await mongo_store.save(dm)
         raise _http_stage_error(documentid, "process", "process_document", exc)
+    finally:
+        # Falha antes do save: os eventos de página pendentes não valem mais.
+        processing_event_store.pop_pending(documentid)
 
     return {
         "documentid": documentid,
@@ -657,15 +1451,24 @@ async def process_document(
 
 
 @app.post("/extract/{documentid}")
-async def extract(documentid: str):
+async def extract(
+    documentid: str,
+    deadline_seconds: Optional[float] = None,
+    priority: PriorityClass = "standard",
+    x_relluna_review_token: Optional[str] = Header(None),
+):
+    priority = resolve_priority(priority, x_relluna_review_token)
     dm_dict = await mongo_store.get(documentid)
     if dm_dict is None:
         raise HTTPException(status_code=404, detail="Documento não encontrado")
 
     dm = DocumentMemory.model_validate(dm_dict)
     try:
-        dm = await _run_extract_pipeline(dm)
+        async with get_pipeline_scheduler().slot(priority):
+            dm = await _run_extract_pipeline(dm, deadline_seconds=deadline_seconds)
         await mongo_store.save(dm)
+        await _index_pages(dm)
+        _maybe_schedule_deferred_fill(dm)
         return to_contract(dm)
     except HTTPException:
         raise
@@ -673,6 +1476,8 @@ async def extract(documentid: str):
         await mongo_store.save(dm)
         failed_stage = (dm.layer0.processingevents[-1].etapa if dm.layer0 and dm.layer0.processingevents else "extract")
         raise _http_stage_error(documentid, "extract", failed_stage, exc)
+    finally:
+        processing_event_store.pop_pending(documentid)
 
 
 @app.post("/infer_context/{documentid}")
@@ -692,6 +1497,8 @@ async def infer_context(documentid: str):
         await mongo_store.save(dm)
         failed_stage = (dm.layer0.processingevents[-1].etapa if dm.layer0 and dm.layer0.processingevents else "infer_context")
         raise _http_stage_error(documentid, "infer_context", failed_stage, exc)
+    finally:
+        processing_event_store.pop_pending(documentid)
 
 
 @app.get("/documents/{documentid}")
@@ -703,9 +1510,209 @@ async def get_document(documentid: str):
     if isinstance(dm, dict):
         return dm
 
+    decode_all_signals(dm)
     return dm.model_dump(mode="json", exclude_none=False)
 
 
+_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _content_etag(content: bytes) -> str:
+    return f'"{sha256(content).hexdigest()[:32]}"'
+
+
+async def _load_document_or_404(documentid: str) -> DocumentMemory:
+    dm_dict = await mongo_store.get(documentid)
+    if dm_dict is None:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    return DocumentMemory.model_validate(dm_dict) if isinstance(dm_dict, dict) else dm_dict
+
+
+_PAGE_FIELD_GROUPS = frozenset(page_store.DETAIL_FIELDS)
+
+
+def _page_fields(fields: Optional[str]) -> List[str]:
+    requested = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    unknown = sorted(set(requested) - _PAGE_FIELD_GROUPS)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail={"error": "unknown_fields", "fields": unknown, "allowed": sorted(_PAGE_FIELD_GROUPS)},
+        )
+    return list(dict.fromkeys(requested))
+
+
+@app.get("/documents/{documentid}/pages")
+async def list_document_pages(
+    documentid: str,
+    from_: int = Query(1, alias="from", ge=1),
+    to: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = Query(None, description="Blocos extras: evidence, ocr, unit (separados por vírgula)"),
+    limit: int = Query(50, ge=1, le=500),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    Fatia de páginas do documento a partir dos registros de página. Sem
+    `fields`, só o resumo de cada página; `format=ndjson` devolve uma
+    página por linha, em streaming.
+    """
+    selected = _page_fields(fields)
+    if to is not None and to < from_:
+        raise HTTPException(status_code=422, detail="'to' deve ser >= 'from'")
+    total = await page_store.count_pages(documentid)
+    if not total:
+        # Sem registros: documento inexistente (404) ou ainda não indexado.
+        total = await page_index.ensure_indexed(await _load_document_or_404(documentid))
+
+    pages = page_store.iter_pages(documentid, start=from_, end=to, fields=selected, limit=limit)
+    if format == "ndjson":
+
+        async def lines():
+            async for record in pages:
+                yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    items = [record async for record in pages]
+    last = items[-1]["page"] if items else None
+    has_more = last is not None and len(items) == limit and (to is None or last < to)
+    return {
+        "documentid": documentid,
+        "total_pages": total,
+        "from": from_,
+        "to": to,
+        "count": len(items),
+        "next_from": last + 1 if has_more else None,
+        "pages": items,
+    }
+
+
+@app.get("/documents/{documentid}/pages/{page}/preview")
+async def get_page_preview(
+    documentid: str,
+    page: int,
+    size: page_previews.PreviewSize = Query("medium"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    WebP da página na variante pedida. O arquivo é imutável para o
+    documento (mesmo conteúdo, mesmo caminho), daí o cache longo.
+    """
+    if page < 1:
+        raise HTTPException(status_code=404, detail="Página não encontrada")
+    dm = await _load_document_or_404(documentid)
+    content = await page_previews.get_or_render_preview(dm, page, size)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Página não encontrada")
+
+    etag = _content_etag(content)
+    headers = {"Cache-Control": _IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=page_previews.MIMETYPE, headers=headers)
+
+
+@app.get("/documents/{documentid}/evidence/crop")
+async def get_evidence_crop(
+    documentid: str,
+    page: int,
+    bbox: str,
+    dpi: int = Query(evidence_crops.DEFAULT_DPI, ge=evidence_crops.MIN_DPI, le=evidence_crops.MAX_DPI),
+    padding: float = Query(evidence_crops.DEFAULT_PADDING, ge=0, le=200),
+    highlight: bool = True,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    PNG da região `bbox` ("x0,y0,x1,y1", no espaço da âncora) da página,
+    opcionalmente destacada. Renderizado com clip, sem rasterizar a página.
+    """
+    parsed = evidence_crops.parse_bbox(bbox)
+    if parsed is None or page < 1:
+        raise HTTPException(status_code=422, detail="bbox deve ser 'x0,y0,x1,y1' com x1 > x0 e y1 > y0")
+    dm = await _load_document_or_404(documentid)
+
+    request = evidence_crops.CropRequest(page=page, bbox=parsed, dpi=dpi, padding=padding, highlight=highlight)
+    (content,) = await evidence_crops.get_or_render_crops(dm, [request])
+    if content is None:
+        raise HTTPException(status_code=404, detail="Região não encontrada no documento")
+
+    etag = _content_etag(content)
+    headers = {"Cache-Control": _IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=evidence_crops.MIMETYPE, headers=headers)
+
+
+@app.get("/documents/{documentid}/evidence/crops")
+async def get_timeline_evidence_crops(
+    documentid: str,
+    dpi: int = Query(evidence_crops.DEFAULT_DPI, ge=evidence_crops.MIN_DPI, le=evidence_crops.MAX_DPI),
+    highlight: bool = True,
+):
+    """
+    Todos os recortes citados pela timeline do documento numa resposta
+    (PNG em base64), para telas de revisão com dezenas de citações.
+    """
+    dm = await _load_document_or_404(documentid)
+    timeline = build_document_timeline_read_model(dm).get("timeline") or []
+    targets = evidence_crops.timeline_crop_targets(timeline)[: evidence_crops.MAX_BATCH_CROPS]
+
+    requests = [
+        evidence_crops.CropRequest(page=target["page"], bbox=tuple(target["bbox"]), dpi=dpi, highlight=highlight)
+        for target in targets
+    ]
+    contents = await evidence_crops.get_or_render_crops(dm, requests)
+    return {
+        "documentid": documentid,
+        "dpi": dpi,
+        "mimetype": evidence_crops.MIMETYPE,
+        "crops": [
+            {
+                **target,
+                "etag": _content_etag(content) if content is not None else None,
+                "data": base64.b64encode(content).decode("ascii") if content is not None else None,
+            }
+            for target, content in zip(targets, contents)
+        ],
+    }
+
+
+@app.get("/documents/{documentid}/processing_events")
+async def get_document_processing_events(
+    documentid: str,
+    etapa: Optional[str] = Query(None, description="Filtra por etapa (ex.: page_ocr)"),
+    page: Optional[int] = Query(None, ge=1, description="Filtra por página"),
+    status: Optional[str] = Query(None, description="success | warning | error"),
+    limit: int = Query(1000, ge=1, le=10000),
+    skip: int = Query(0, ge=0),
+):
+    dm_dict = await mongo_store.get(documentid)
+    if dm_dict is None:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+
+    dm = DocumentMemory.model_validate(dm_dict)
+    inline = [
+        event.model_dump(mode="json")
+        for event in dm.layer0.processingevents
+        if (not etapa or event.etapa == etapa)
+        and (not status or event.status == status)
+        and (page is None or event.detalhes.get("page_index") == page)
+    ]
+    page_events = await processing_event_store.list_events(
+        documentid,
+        etapa=etapa,
+        page_index=page,
+        status=status,
+        limit=limit,
+        skip=skip,
+    )
+    return {
+        "documentid": documentid,
+        "processingevents": inline,
+        "page_events": page_events,
+    }
+
+
 @app.get("/documents/{document_id}/narrative")
 async def get_document_narrative(document_id: str):
     dm_dict = await mongo_store.get(document_id)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import shutil
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, List, Optional
+
+# -----------------------------
+# Staging de lotes (/ingest/batch)
+# -----------------------------
+#
+# Arquivos avulsos e membros de ZIP são copiados em blocos para um diretório
+# de staging enquanto o sha256 é calculado; nada é extraído inteiro em
+# memória. O ZIP em si também é gravado em disco antes de ser aberto.
+
+CHUNK_SIZE = 1024 * 1024
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed", "application/x-zip"}
+
+
+def max_batch_files() -> int:
+    return int(os.getenv("RELLUNA_BATCH_MAX_FILES", "500"))
+
+
+def max_batch_bytes() -> int:
+    """Teto de bytes descomprimidos por lote (proteção contra zip bomb)."""
+    return int(os.getenv("RELLUNA_BATCH_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+
+@dataclass
+class StagedMember:
+    index: int
+    filename: str
+    content_type: Optional[str]
+    path: Optional[Path] = None
+    size_bytes: int = 0
+    digest: Optional[str] = None
+    source: str = "upload"
+    error: Optional[str] = None
+
+
+class BatchBudget:
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes = 0
+
+    def remaining_bytes(self) -> int:
+        return max(max_batch_bytes() - self.bytes, 0)
+
+
+def is_zip_upload(filename: Optional[str], content_type: Optional[str]) -> bool:
+    return (content_type or "").lower() in ZIP_CONTENT_TYPES or (filename or "").lower().endswith(".zip")
+
+
+def guess_content_type(filename: str) -> Optional[str]:
+    return mimetypes.guess_type(filename)[0]
+
+
+def _safe_name(filename: str) -> str:
+    # Só o nome-base: membros de ZIP com "../" não escapam do staging.
+    return PurePosixPath(filename.replace("\\", "/")).name
+
+
+def _rejection(filename: str, size_bytes: int) -> Optional[str]:
+    if not filename:
+        return "Arquivo sem nome"
+    if filename.lower().endswith(".heic"):
+        return "HEIC requires normalization"
+    if size_bytes == 0:
+        return "Arquivo vazio"
+    return None
+
+
+def copy_hashing(source: BinaryIO, target: Path, limit: int) -> tuple[int, str]:
+    """Copia em blocos calculando sha256; falha acima de `limit` bytes."""
+    hasher = hashlib.sha256()
+    size = 0
+    with target.open("wb") as out:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                raise ValueError("Lote excede o limite de bytes descomprimidos")
+            hasher.update(chunk)
+            out.write(chunk)
+    return size, hasher.hexdigest()
+
+
+def stage_stream(
+    source: BinaryIO,
+    *,
+    index: int,
+    filename: str,
+    content_type: Optional[str],
+    staging_dir: Path,
+    budget: BatchBudget,
+    origin: str = "upload",
+) -> StagedMember:
+    name = _safe_name(filename)
+    member = StagedMember(index=index, filename=name, content_type=content_type or guess_content_type(name), source=origin)
+    if budget.files >= max_batch_files():
+        member.error = "Lote excede o limite de arquivos"
+        return member
+    budget.files += 1
+
+    target = staging_dir / f"{index:05d}.part"
+    try:
+        member.size_bytes, member.digest = copy_hashing(source, target, budget.remaining_bytes())
+    except ValueError as exc:
+        target.unlink(missing_ok=True)
+        member.error = str(exc)
+        return member
+    budget.bytes += member.size_bytes
+
+    member.error = _rejection(name, member.size_bytes)
+    if member.error:
+        target.unlink(missing_ok=True)
+    else:
+        member.path = target
+    return member
+
+
+def _skip_zip_entry(info: zipfile.ZipInfo) -> bool:
+    parts = PurePosixPath(info.filename).parts
+    if info.is_dir() or not parts:
+        return True
+    return parts[0] == "__MACOSX" or parts[-1].startswith(".")
+
+
+def stage_zip(
+    zip_path: Path,
+    *,
+    archive_name: str,
+    start_index: int,
+    staging_dir: Path,
+    budget: BatchBudget,
+) -> List[StagedMember]:
+    """Membros do ZIP, um por vez, direto do arquivo em disco."""
+    members: List[StagedMember] = []
+    index = start_index
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            if _skip_zip_entry(info):
+                continue
+            with archive.open(info) as source:
+                members.append(
+                    stage_stream(
+                        source,
+                        index=index,
+                        filename=info.filename,
+                        content_type=None,
+                        staging_dir=staging_dir,
+                        budget=budget,
+                        origin=f"zip:{_safe_name(archive_name)}",
+                    )
+                )
+            index += 1
+    return members
+
+
+def promote(member: StagedMember, upload_dir: Path) -> Path:
+    """Move o arquivo do staging para o destino definitivo (mesmo padrão do /ingest)."""
+    target = upload_dir / f"{member.digest}_{member.filename}"
+    shutil.move(str(member.path), target)
+    member.path = target
+    return target
@@ -1,10 +1,14 @@
 from .processing_events import (
+    INLINE_PAGE_WARNING_LIMIT,
+    PageEventBatch,
     append_processing_event,
     elapsed_ms,
     sanitize_processing_details,
 )
 
 __all__ = [
+    "INLINE_PAGE_WARNING_LIMIT",
+    "PageEventBatch",
     "append_processing_event",
     "elapsed_ms",
     "sanitize_processing_details",
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from relluna.services.observability import metrics
+
+# -----------------------------
+# Probes de dependências em background
+# -----------------------------
+#
+# Mongo e Blob são verificados por uma tarefa de fundo a cada
+# RELLUNA_HEALTH_PROBE_INTERVAL segundos (timeout por probe em
+# RELLUNA_HEALTH_PROBE_TIMEOUT), em thread, com clientes reaproveitados
+# entre rodadas. /health devolve o último resultado e a idade dele sem
+# tocar nas dependências; a latência de cada probe vai para /metrics.
+
+ProbeFn = Callable[[], Tuple[str, Optional[str]]]
+
+_REQUIRED_FOR_READINESS = {"mongo"}
+
+metrics.describe("relluna_health_probe_latency_ms", "Latência do último probe de dependência")
+metrics.describe("relluna_health_probe_total", "Probes de dependência executados, por status")
+
+
+def probe_interval_seconds() -> float:
+    return max(1.0, float(os.getenv("RELLUNA_HEALTH_PROBE_INTERVAL", "15")))
+
+
+def probe_timeout_seconds() -> float:
+    return max(0.1, float(os.getenv("RELLUNA_HEALTH_PROBE_TIMEOUT", "5")))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class ProbeResult:
+    name: str
+    status: str
+    detail: Optional[str]
+    latency_ms: float
+    checked_at: datetime
+
+    def age_seconds(self, now: Optional[datetime] = None) -> float:
+        return round(((now or _utcnow()) - self.checked_at).total_seconds(), 3)
+
+
+class _MongoProbe:
+    """Um MongoClient por processo, em vez de um por chamada de /health."""
+
+    def __init__(self) -> None:
+        self._client = None
+        self._db_name: Optional[str] = None
+
+    def __call__(self) -> Tuple[str, Optional[str]]:
+        if self._client is None:
+            from pymongo import MongoClient
+
+            from relluna.infra.mongo.client import MongoSettings
+
+            settings = MongoSettings.from_env()
+            timeout_ms = int(probe_timeout_seconds() * 1000)
+            self._client = MongoClient(settings.uri, serverSelectionTimeoutMS=timeout_ms)
+            self._db_name = settings.db_name
+        self._client[self._db_name].command("ping")
+        return "ok", None
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class _BlobProbe:
+    def __init__(self) -> None:
+        self._backend = None
+
+    def __call__(self) -> Tuple[str, Optional[str]]:
+        if self._backend is None:
+            from relluna.infra.azureblobbackend import AzureBlobBackend
+
+            self._backend = AzureBlobBackend()
+        if not self._backend.is_configured:
+            return "degraded", (
+                "Blob backend not configured "
+                "(AZURE_STORAGE_CONNECTION_STRING or AZURE_BLOB_CONNECTION_STRING)"
+            )
+        if self._backend.ping():
+            return "ok", None
+        return "error", "Azure Blob unreachable"
+
+    def close(self) -> None:
+        self._backend = None
+
+
+class HealthMonitor:
+    def __init__(self, probes: Optional[Dict[str, ProbeFn]] = None) -> None:
+        self.probes: Dict[str, ProbeFn] = probes if probes is not None else {"mongo": _MongoProbe(), "blob": _BlobProbe()}
+        self.results: Dict[str, ProbeResult] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe(self, name: str, fn: ProbeFn) -> ProbeResult:
+        started = perf_counter()
+        try:
+            status, detail = await asyncio.wait_for(asyncio.to_thread(fn), timeout=probe_timeout_seconds())
+        except asyncio.TimeoutError:
+            status, detail = "error", f"probe excedeu {probe_timeout_seconds():g}s"
+        except Exception as exc:
+            status, detail = "error", str(exc)
+        latency_ms = round((perf_counter() - started) * 1000.0, 3)
+        metrics.set_gauge("relluna_health_probe_latency_ms", latency_ms, service=name)
+        metrics.inc_counter("relluna_health_probe_total", service=name, status=status)
+        return ProbeResult(name=name, status=status, detail=detail, latency_ms=latency_ms, checked_at=_utcnow())
+
+    async def run_once(self) -> Dict[str, ProbeResult]:
+        results = await asyncio.gather(*(self._probe(name, fn) for name, fn in self.probes.items()))
+        self.results.update({result.name: result for result in results})
+        return dict(self.results)
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(probe_interval_seconds())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if not self.running or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._loop())
+
+    async def ensure_fresh(self) -> None:
+        """
+        Sem a tarefa de fundo (app sem lifespan, scripts), roda uma rodada
+        quando não há resultado ou ele passou do intervalo.
+        """
+        if self.running:
+            return
+        ages = [result.age_seconds() for result in self.results.values()]
+        if len(ages) < len(self.probes) or max(ages) > probe_interval_seconds():
+            await self.run_once()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        for fn in self.probes.values():
+            close = getattr(fn, "close", None)
+            if close is not None:
+                close()
+
+    def snapshot(self) -> List[ProbeResult]:
+        return [
+            self.results.get(name)
+            or ProbeResult(name=name, status="unknown", detail="probe ainda não executado", latency_ms=0.0, checked_at=_utcnow())
+            for name in self.probes
+        ]
+
+    def ready(self) -> Tuple[bool, List[str]]:
+        """
+        Pronto quando as dependências obrigatórias responderam ok no último
+        probe e o resultado não está velho (3 intervalos); Blob configurado
+        e inacessível também tira o pod do balanceador.
+        """
+        reasons: List[str] = []
+        max_age = 3 * probe_interval_seconds()
+        for name in self.probes:
+            result = self.results.get(name)
+            if result is None:
+                reasons.append(f"{name}: sem probe")
+            elif result.age_seconds() > max_age:
+                reasons.append(f"{name}: probe desatualizado")
+            elif result.status == "error" or (name in _REQUIRED_FOR_READINESS and result.status != "ok"):
+                reasons.append(f"{name}: {result.status}")
+        return not reasons, reasons
+
+
+_MONITOR: Optional[HealthMonitor] = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    global _MONITOR
+    if _MONITOR is None:
+        _MONITOR = HealthMonitor()
+    return _MONITOR
+
+
+def set_health_monitor(monitor: Optional[HealthMonitor]) -> None:
+    global _MONITOR
+    _MONITOR = monitor
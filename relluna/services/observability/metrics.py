@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Tuple
+
+# -----------------------------
+# Métricas do processo (formato texto do Prometheus)
+# -----------------------------
+#
+# Registro mínimo em memória, sem dependência externa: contadores,
+# gauges e sumários (soma + contagem). `render_prometheus` é servido em
+# GET /metrics.
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+_LOCK = threading.Lock()
+_COUNTERS: Dict[str, Dict[_Labels, float]] = {}
+_GAUGES: Dict[str, Dict[_Labels, float]] = {}
+_SUMMARIES: Dict[str, Dict[_Labels, Tuple[float, int]]] = {}
+_HELP: Dict[str, str] = {}
+
+
+def _labels(labels: Dict[str, str]) -> _Labels:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def describe(name: str, help_text: str) -> None:
+    _HELP[name] = help_text
+
+
+def inc_counter(name: str, value: float = 1.0, **labels: str) -> None:
+    with _LOCK:
+        series = _COUNTERS.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    with _LOCK:
+        _GAUGES.setdefault(name, {})[_labels(labels)] = float(value)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    with _LOCK:
+        series = _SUMMARIES.setdefault(name, {})
+        key = _labels(labels)
+        total, count = series.get(key, (0.0, 0))
+        series[key] = (total + float(value), count + 1)
+
+
+def get_value(name: str, **labels: str) -> float:
+    """Valor atual de um contador ou gauge (0 quando não existe)."""
+    key = _labels(labels)
+    with _LOCK:
+        if name in _COUNTERS:
+            return _COUNTERS[name].get(key, 0.0)
+        return _GAUGES.get(name, {}).get(key, 0.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus() -> str:
+    lines = []
+    with _LOCK:
+        for kind, registry in (("counter", _COUNTERS), ("gauge", _GAUGES)):
+            for name in sorted(registry):
+                if name in _HELP:
+                    lines.append(f"# HELP {name} {_HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(registry[name].items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name in sorted(_SUMMARIES):
+            if name in _HELP:
+                lines.append(f"# HELP {name} {_HELP[name]}")
+            lines.append(f"# TYPE {name} summary")
+            for labels, (total, count) in sorted(_SUMMARIES[name].items()):
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def clear() -> None:
+    with _LOCK:
+        _COUNTERS.clear()
+        _GAUGES.clear()
+        _SUMMARIES.clear()
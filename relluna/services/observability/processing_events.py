@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from collections import Counter
 from time import perf_counter
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from relluna.core.document_memory import DocumentMemory
-from relluna.core.document_memory.layer0 import ProcessingEvent
+from relluna.core.document_memory.layer0 import ProcessingEvent, utcnow
+from relluna.infra import processing_event_store
+
+# Eventos de warning/erro por página mantidos inline (por etapa) além do resumo.
+INLINE_PAGE_WARNING_LIMIT = 20
+_SUMMARY_PAGE_LIST_LIMIT = 50
 
 
 def elapsed_ms(start: float) -> float:
@@ -23,6 +29,31 @@ def sanitize_processing_details(value: Any) -> Any:
     return value
 
 
+def _build_event_details(
+    detalhes: Optional[Dict[str, Any]],
+    *,
+    duration_ms: Optional[float],
+    page_index: Optional[int],
+    warning_code: Optional[str],
+    fallback: Optional[Dict[str, Any]],
+    degraded_mode: Optional[str],
+) -> Dict[str, Any]:
+    payload = dict(detalhes or {})
+    code = warning_code or payload.get("warning_code") or payload.get("code")
+    page = page_index if page_index is not None else payload.get("page_index") or payload.get("page")
+    if duration_ms is not None:
+        payload["duration_ms"] = duration_ms
+    if page is not None:
+        payload["page_index"] = page
+    if code is not None:
+        payload["warning_code"] = code
+    if fallback is not None:
+        payload["fallback"] = fallback
+    if degraded_mode is not None:
+        payload["degraded_mode"] = degraded_mode
+    return sanitize_processing_details(payload)
+
+
 def append_processing_event(
     dm: DocumentMemory,
     *,
@@ -39,25 +70,133 @@ def append_processing_event(
     if not getattr(dm, "layer0", None):
         return
 
-    payload = dict(detalhes or {})
-    code = warning_code or payload.get("warning_code") or payload.get("code")
-    page = page_index if page_index is not None else payload.get("page_index") or payload.get("page")
-    if duration_ms is not None:
-        payload["duration_ms"] = duration_ms
-    if page is not None:
-        payload["page_index"] = page
-    if code is not None:
-        payload["warning_code"] = code
-    if fallback is not None:
-        payload["fallback"] = fallback
-    if degraded_mode is not None:
-        payload["degraded_mode"] = degraded_mode
-
     dm.layer0.processingevents.append(
         ProcessingEvent(
             etapa=etapa,
             engine=engine,
             status=status,
-            detalhes=sanitize_processing_details(payload),
+            detalhes=_build_event_details(
+                detalhes,
+                duration_ms=duration_ms,
+                page_index=page_index,
+                warning_code=warning_code,
+                fallback=fallback,
+                degraded_mode=degraded_mode,
+            ),
         )
     )
+
+
+class PageEventBatch:
+    """
+    Acumula eventos por página de uma etapa e os grava no log append-only
+    (`processing_event_store`). Inline, no DocumentMemory, ficam apenas um
+    resumo da etapa e os primeiros warnings/erros (limitados).
+    """
+
+    def __init__(self, dm: DocumentMemory, *, etapa: str, engine: str) -> None:
+        self.dm = dm
+        self.etapa = etapa
+        self.engine = engine
+        self.records: List[Dict[str, Any]] = []
+        self._inline_warnings: List[ProcessingEvent] = []
+
+    def add(
+        self,
+        *,
+        status: str = "success",
+        detalhes: Optional[Dict[str, Any]] = None,
+        duration_ms: Optional[float] = None,
+        page_index: Optional[int] = None,
+        warning_code: Optional[str] = None,
+        fallback: Optional[Dict[str, Any]] = None,
+        degraded_mode: Optional[str] = None,
+    ) -> None:
+        payload = _build_event_details(
+            detalhes,
+            duration_ms=duration_ms,
+            page_index=page_index,
+            warning_code=warning_code,
+            fallback=fallback,
+            degraded_mode=degraded_mode,
+        )
+        timestamp = utcnow()
+        self.records.append(
+            {
+                "timestamp": timestamp.isoformat(),
+                "etapa": self.etapa,
+                "engine": self.engine,
+                "status": status,
+                "page_index": payload.get("page_index"),
+                "detalhes": payload,
+            }
+        )
+        if status != "success" and len(self._inline_warnings) < INLINE_PAGE_WARNING_LIMIT:
+            self._inline_warnings.append(
+                ProcessingEvent(
+                    timestamp=timestamp,
+                    etapa=self.etapa,
+                    engine=self.engine,
+                    status=status,
+                    detalhes=payload,
+                )
+            )
+
+    def summary(self, *, duration_ms: Optional[float] = None) -> Dict[str, Any]:
+        status_counts = Counter(record["status"] for record in self.records)
+        warning_codes = Counter(
+            record["detalhes"].get("warning_code")
+            for record in self.records
+            if record["detalhes"].get("warning_code")
+        )
+        pages = sorted({record["page_index"] for record in self.records if record["page_index"] is not None})
+        pages_with_warnings = sorted(
+            {
+                record["page_index"]
+                for record in self.records
+                if record["status"] != "success" and record["page_index"] is not None
+            }
+        )
+        if duration_ms is None:
+            duration_ms = round(
+                sum(float(record["detalhes"].get("duration_ms") or 0.0) for record in self.records),
+                3,
+            )
+        return sanitize_processing_details(
+            {
+                "scope": "page_summary",
+                "page_count": len(pages),
+                "event_count": len(self.records),
+                "status_counts": dict(status_counts),
+                "warning_codes": dict(warning_codes) or None,
+                "pages_with_warnings": pages_with_warnings[:_SUMMARY_PAGE_LIST_LIMIT] or None,
+                "pages_with_warnings_truncated": len(pages_with_warnings) > _SUMMARY_PAGE_LIST_LIMIT or None,
+                "inline_warning_count": len(self._inline_warnings),
+                "duration_ms": duration_ms,
+                "event_log": processing_event_store.COLLECTION_NAME,
+            }
+        )
+
+    def close(self, *, duration_ms: Optional[float] = None) -> None:
+        if not getattr(self.dm, "layer0", None) or not self.records:
+            return
+
+        processing_event_store.buffer_events(self.dm.layer0.documentid, self.records)
+        self.dm.layer0.processingevents.extend(self._inline_warnings)
+
+        status_counts = Counter(record["status"] for record in self.records)
+        status = "success"
+        if status_counts.get("error"):
+            status = "error"
+        elif status_counts.get("warning"):
+            status = "warning"
+        self.dm.layer0.processingevents.append(
+            ProcessingEvent(
+                etapa=self.etapa,
+                engine=self.engine,
+                status=status,
+                detalhes=self.summary(duration_ms=duration_ms),
+            )
+        )
+        self.records = []
+        self._inline_warnings = []
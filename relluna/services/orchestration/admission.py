@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import math
+import os
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from time import perf_counter
+from typing import AsyncIterator, Deque, Dict, Iterator, Literal, Optional
+
+from relluna.services.observability import metrics
+
+# -----------------------------
+# Classes de prioridade e controle de admissão
+# -----------------------------
+#
+# Todo job de pipeline (upload interativo da UI de revisão, /process,
+# membros de lote, preenchimento de páginas adiadas) pega um slot do
+# PipelineScheduler. Com os slots ocupados, a fila é ponderada por classe
+# (stride scheduling com RELLUNA_PRIORITY_WEIGHTS): um lote grande não
+# segura a vez de quem está na UI, e o bulk continua andando na sua fatia.
+#
+# Antes de aceitar trabalho novo, `admit` olha a profundidade da fila e as
+# páginas em OCR no nó; acima do limite (com folga menor para as classes
+# de menor prioridade) o pedido é recusado com `AdmissionRejected`, que a
+# API devolve como 429 + Retry-After.
+#
+# A classe pedida pelo cliente não é confiável: sem indicação, os
+# endpoints usam `standard`, e `interactive` só vale para a UI de revisão
+# autenticada (header X-Relluna-Review-Token igual a
+# RELLUNA_REVIEW_UI_TOKEN). Ver `resolve_priority`.
+
+PriorityClass = Literal["interactive", "standard", "bulk"]
+PRIORITY_CLASSES = ("interactive", "standard", "bulk")
+
+# Fração do limite de admissão que cada classe pode usar: o bulk é
+# recusado primeiro, o interativo só quando o nó está de fato cheio.
+_CLASS_HEADROOM = {"interactive": 1.0, "standard": 0.8, "bulk": 0.5}
+_DEFAULT_JOB_SECONDS = 5.0
+
+metrics.describe("relluna_pipeline_queue_latency_ms", "Espera na fila do pipeline até ganhar um slot, por classe")
+metrics.describe("relluna_pipeline_queue_depth", "Jobs aguardando slot do pipeline, por classe")
+metrics.describe("relluna_pipeline_running", "Jobs do pipeline em execução, por classe")
+metrics.describe("relluna_admission_rejected_total", "Pedidos recusados pelo controle de admissão")
+metrics.describe("relluna_ocr_pages_in_flight", "Páginas em OCR no processo")
+
+
+def pipeline_concurrency() -> int:
+    raw = os.getenv("RELLUNA_PIPELINE_CONCURRENCY") or os.getenv("RELLUNA_BATCH_CONCURRENCY") or "4"
+    return max(int(raw), 1)
+
+
+def priority_weights() -> Dict[str, float]:
+    weights = {"interactive": 8.0, "standard": 3.0, "bulk": 1.0}
+    for item in os.getenv("RELLUNA_PRIORITY_WEIGHTS", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() in weights and value.strip():
+            weights[name.strip()] = max(float(value), 0.01)
+    return weights
+
+
+def max_queue_depth() -> int:
+    return max(int(os.getenv("RELLUNA_ADMISSION_MAX_QUEUE", "64")), 1)
+
+
+def max_ocr_pages_in_flight() -> int:
+    return max(int(os.getenv("RELLUNA_ADMISSION_MAX_OCR_PAGES", "200")), 1)
+
+
+def review_ui_token() -> str:
+    return os.getenv("RELLUNA_REVIEW_UI_TOKEN", "").strip()
+
+
+def resolve_priority(requested: Optional[str], review_token: Optional[str] = None) -> PriorityClass:
+    """
+    Classe efetiva do pedido. `interactive` sem o token da UI de revisão
+    (ou sem token configurado) cai para `standard`.
+    """
+    priority = requested or "standard"
+    if priority != "interactive":
+        return priority  # type: ignore[return-value]
+    expected = review_ui_token()
+    if expected and isinstance(review_token, str) and hmac.compare_digest(review_token.encode("utf-8"), expected.encode("utf-8")):
+        return "interactive"
+    return "standard"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, priority: str, reason: str, retry_after_seconds: int) -> None:
+        super().__init__(f"Admissão recusada para {priority}: {reason}")
+        self.priority = priority
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class PipelineScheduler:
+    def __init__(self, concurrency: Optional[int] = None, weights: Optional[Dict[str, float]] = None) -> None:
+        self.concurrency = concurrency or pipeline_concurrency()
+        self.weights = weights or priority_weights()
+        self._queues: Dict[str, Deque[asyncio.Future]] = {name: deque() for name in PRIORITY_CLASSES}
+        self._pass: Dict[str, float] = {name: 0.0 for name in PRIORITY_CLASSES}
+        self._virtual_time = 0.0
+        self._running: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+        self._job_seconds = _DEFAULT_JOB_SECONDS
+        self._ocr_lock = threading.Lock()
+        self.ocr_pages_in_flight = 0
+
+    # ---- estado ----
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        if priority is not None:
+            return len(self._queues[priority])
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _publish(self, priority: str) -> None:
+        metrics.set_gauge("relluna_pipeline_queue_depth", self.queue_depth(priority), priority=priority)
+        metrics.set_gauge("relluna_pipeline_running", self._running[priority], priority=priority)
+
+    # ---- admissão ----
+
+    def retry_after_seconds(self) -> int:
+        """Estimativa de quando a fila atual escoa, pela duração média dos jobs."""
+        waves = (self.queue_depth() + 1) / self.concurrency
+        return int(min(300, max(1, math.ceil(waves * self._job_seconds))))
+
+    def admit(self, priority: str, *, pages: int = 0) -> None:
+        headroom = _CLASS_HEADROOM[priority]
+        reason = None
+        if self.queue_depth() >= max(1, int(max_queue_depth() * headroom)):
+            reason = "queue_depth"
+        elif self.ocr_pages_in_flight + pages >= max(1, int(max_ocr_pages_in_flight() * headroom)):
+            reason = "ocr_pages_in_flight"
+        if reason is not None:
+            metrics.inc_counter("relluna_admission_rejected_total", priority=priority, reason=reason)
+            raise AdmissionRejected(priority, reason, self.retry_after_seconds())
+
+    # ---- slots ----
+
+    def _next_class(self) -> Optional[str]:
+        waiting = [name for name in PRIORITY_CLASSES if self._queues[name]]
+        if not waiting:
+            return None
+        return min(waiting, key=lambda name: (self._pass[name], PRIORITY_CLASSES.index(name)))
+
+    def _grant_waiters(self) -> None:
+        while self.running < self.concurrency:
+            name = self._next_class()
+            if name is None:
+                return
+            future = self._queues[name].popleft()
+            if future.done():
+                continue
+            self._virtual_time = self._pass[name]
+            self._pass[name] += 1.0 / self.weights[name]
+            self._running[name] += 1
+            future.set_result(None)
+            self._publish(name)
+
+    def _enqueue(self, priority: str) -> asyncio.Future:
+        if not self._queues[priority]:
+            # Classe que estava ociosa entra no tempo virtual atual, sem
+            # acumular crédito pelo período parado.
+            self._pass[priority] = max(self._pass[priority], self._virtual_time)
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(future)
+        self._publish(priority)
+        return future
+
+    @asynccontextmanager
+    async def slot(self, priority: str) -> AsyncIterator[None]:
+        enqueued = perf_counter()
+        future = self._enqueue(priority)
+        self._grant_waiters()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(priority)
+            elif future in self._queues[priority]:
+                self._queues[priority].remove(future)
+                self._publish(priority)
+            raise
+        metrics.observe("relluna_pipeline_queue_latency_ms", (perf_counter() - enqueued) * 1000.0, priority=priority)
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self._job_seconds = 0.8 * self._job_seconds + 0.2 * (perf_counter() - started)
+            self._release(priority)
+
+    def _release(self, priority: str) -> None:
+        self._running[priority] -= 1
+        self._publish(priority)
+        self._grant_waiters()
+
+    # ---- páginas em OCR ----
+
+    @contextmanager
+    def track_ocr_pages(self, pages: int) -> Iterator[None]:
+        with self._ocr_lock:
+            self.ocr_pages_in_flight += pages
+            metrics.set_gauge("relluna_ocr_pages_in_flight", self.ocr_pages_in_flight)
+        try:
+            yield
+        finally:
+            with self._ocr_lock:
+                self.ocr_pages_in_flight -= pages
+                metrics.set_gauge("relluna_ocr_pages_in_flight", self.ocr_pages_in_flight)
+
+
+_SCHEDULER: Optional[PipelineScheduler] = None
+
+
+def get_pipeline_scheduler() -> PipelineScheduler:
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = PipelineScheduler()
+    return _SCHEDULER
+
+
+def track_ocr_pages(pages: int):
+    return get_pipeline_scheduler().track_ocr_pages(pages)
+
+
+def clear() -> None:
+    global _SCHEDULER
+    _SCHEDULER = None
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+# -----------------------------
+# Prazo por documento
+# -----------------------------
+#
+# Quem chama o pipeline passa um orçamento em segundos (ou usa
+# RELLUNA_DOCUMENT_DEADLINE_SECONDS). O prazo vale para o contexto atual
+# (ContextVar): os estágios síncronos e as threads de `asyncio.to_thread`
+# enxergam o mesmo prazo sem mudar a assinatura das etapas. Sem prazo,
+# tudo roda como antes.
+
+
+def default_deadline_seconds() -> Optional[float]:
+    raw = os.getenv("RELLUNA_DOCUMENT_DEADLINE_SECONDS", "").strip()
+    return float(raw) if raw else None
+
+
+def deferred_fill_enabled() -> bool:
+    """Páginas adiadas pelo prazo são completadas por um job posterior."""
+    return os.getenv("RELLUNA_DEFERRED_PAGE_FILL", "1").strip().lower() not in {"0", "false", "off", "no"}
+
+
+class DocumentDeadline:
+    def __init__(self, budget_seconds: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.budget_seconds = float(budget_seconds)
+        self._clock = clock
+        self._started = clock()
+
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    def remaining(self) -> float:
+        return max(0.0, self.budget_seconds - self.elapsed())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def cap(self, timeout_seconds: float) -> float:
+        """Timeout de uma chamada limitado ao que resta do prazo (mínimo 1s)."""
+        return max(1.0, min(float(timeout_seconds), self.remaining()))
+
+
+_CURRENT: ContextVar[Optional[DocumentDeadline]] = ContextVar("relluna_document_deadline", default=None)
+
+
+def current_deadline() -> Optional[DocumentDeadline]:
+    return _CURRENT.get()
+
+
+def capped_timeout(timeout_seconds: float) -> float:
+    deadline = _CURRENT.get()
+    return deadline.cap(timeout_seconds) if deadline is not None else timeout_seconds
+
+
+@contextmanager
+def deadline_scope(
+    budget_seconds: Optional[float], *, clock: Callable[[], float] = time.monotonic
+) -> Iterator[Optional[DocumentDeadline]]:
+    deadline = DocumentDeadline(budget_seconds, clock=clock) if budget_seconds and budget_seconds > 0 else None
+    token = _CURRENT.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _CURRENT.reset(token)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional
+
+from relluna.core.document_memory import DocumentMemory, MediaType
+from relluna.infra import near_duplicate_store
+from relluna.infra.blob.artefact_resolver import resolve_artefact_path
+
+# -----------------------------
+# Fingerprint de similaridade (quase-duplicatas)
+# -----------------------------
+#
+# Barato o bastante para rodar antes da extração:
+#   text_simhash  SimHash de 64 bits sobre shingles de 3 palavras do texto
+#                 nativo das primeiras páginas (re-exportação, outro produtor
+#                 de PDF, mesmo conteúdo);
+#   image_dhash   difference hash de 64 bits da primeira página renderizada
+#                 em baixa resolução (re-escaneamento) ou da própria imagem.
+
+ENGINE = "services.orchestration.near_duplicate_v1"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_MIN_TEXT_CHARS = 200
+_RENDER_DPI = 36
+
+
+def enabled() -> bool:
+    return os.getenv("RELLUNA_NEAR_DUPLICATE", "1").strip().lower() not in {"0", "false", "off", "no"}
+
+
+def reuse_enabled() -> bool:
+    """Reuso das saídas do documento anterior exige opt-in do operador."""
+    return os.getenv("RELLUNA_NEAR_DUPLICATE_REUSE", "0").strip().lower() in {"1", "true", "on", "yes"}
+
+
+def max_distance(kind: str) -> int:
+    """
+    Bits de diferença aceitos. Limitado a BANDS - 1 (7): acima disso a busca
+    por bandas do near_duplicate_store deixaria de achar vizinhos válidos.
+    """
+    if kind == "text_simhash":
+        bits = int(os.getenv("RELLUNA_NEAR_DUPLICATE_TEXT_BITS", "3"))
+    else:
+        bits = int(os.getenv("RELLUNA_NEAR_DUPLICATE_IMAGE_BITS", "6"))
+    return max(0, min(bits, near_duplicate_store.BANDS - 1))
+
+
+def fingerprint_pages() -> int:
+    return int(os.getenv("RELLUNA_NEAR_DUPLICATE_PAGES", "3"))
+
+
+@dataclass(frozen=True)
+class SimilarityFingerprint:
+    kind: str
+    value: int
+
+    @property
+    def hex(self) -> str:
+        return f"{self.value:016x}"
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _words(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _WORD_RE.findall(text)
+
+
+def text_simhash(text: str) -> Optional[int]:
+    words = _words(text)
+    if not words:
+        return None
+    shingles = [" ".join(words[i : i + 3]) for i in range(max(len(words) - 2, 1))]
+    weights = [0] * 64
+    for shingle in shingles:
+        h = _hash64(shingle)
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def image_dhash(image: Any) -> int:
+    """dHash 8x8: compara pixels vizinhos de uma miniatura 9x8 em cinza."""
+    from PIL import Image
+
+    small = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            if pixels[row * 9 + col] > pixels[row * 9 + col + 1]:
+                value |= 1 << (row * 8 + col)
+    return value
+
+
+def _artifact_path(dm: DocumentMemory) -> Optional[Path]:
+    artefatos = getattr(getattr(dm, "layer1", None), "artefatos", None) or []
+    return resolve_artefact_path(artefatos[0]) if artefatos else None
+
+
+def _pdf_native_text(path: Path, pages: int) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(str(path))
+    return "\n".join((page.extract_text() or "") for page in reader.pages[:pages])
+
+
+def _pdf_first_page_dhash(path: Path) -> Optional[int]:
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    with fitz.open(str(path)) as doc:
+        if doc.page_count == 0:
+            return None
+        pix = doc[0].get_pixmap(dpi=_RENDER_DPI, alpha=False)
+        return image_dhash(Image.open(io.BytesIO(pix.tobytes("png"))))
+
+
+def compute_fingerprint(dm: DocumentMemory) -> Optional[SimilarityFingerprint]:
+    path = _artifact_path(dm)
+    if path is None or not path.exists():
+        return None
+    midia = getattr(dm.layer1, "midia", None)
+
+    try:
+        if path.suffix.lower() == ".pdf":
+            text = _pdf_native_text(path, fingerprint_pages())
+            if len("".join(_words(text))) >= _MIN_TEXT_CHARS:
+                value = text_simhash(text)
+                return SimilarityFingerprint("text_simhash", value) if value is not None else None
+            value = _pdf_first_page_dhash(path)
+            return SimilarityFingerprint("image_dhash", value) if value is not None else None
+
+        if midia == MediaType.imagem:
+            from PIL import Image
+
+            with Image.open(path) as image:
+                return SimilarityFingerprint("image_dhash", image_dhash(image))
+    except Exception:
+        # Fingerprint é otimização: arquivo ilegível segue o pipeline normal.
+        return None
+    return None
+
+
+def _rebind_document_id(value: Any, old: str, new: str) -> Any:
+    if isinstance(value, dict):
+        return {k: (new if k in {"document_id", "documentid"} and v == old else _rebind_document_id(v, old, new)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rebind_document_id(item, old, new) for item in value]
+    return value
+
+
+def reusable_layer2(prior: DocumentMemory, dm: DocumentMemory):
+    """
+    Cópia da Layer2 do documento anterior com os ids reapontados para o
+    novo documento; None se o anterior ainda não foi extraído ou é de
+    outra mídia.
+    """
+    if prior.layer2 is None or not prior.layer2.sinais_documentais:
+        return None
+    if getattr(prior.layer1, "midia", None) != getattr(dm.layer1, "midia", None):
+        return None
+
+    old_id = prior.layer0.documentid
+    new_id = dm.layer0.documentid
+    layer2 = prior.layer2.model_copy(deep=True)
+    for key, signal in list(layer2.sinais_documentais.items()):
+        if not getattr(signal, "valor", None) or old_id not in signal.valor:
+            continue
+        try:
+            payload = json.loads(signal.valor)
+        except Exception:
+            continue
+        rebound = _rebind_document_id(payload, old_id, new_id)
+        layer2.sinais_documentais[key] = signal.model_copy(update={"valor": json.dumps(rebound, ensure_ascii=False)})
+    return layer2
+
@@ -4,7 +4,10 @@ from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Optional
 
-from pypdf import PdfReader
+from relluna.core.lazy import lazy_import
+from relluna.infra.blob.artefact_resolver import resolve_artefact_path
+
+pypdf = lazy_import("pypdf")
 
 
 @dataclass
@@ -22,10 +25,7 @@ def _get_primary_artifact_path(dm) -> Optional[Path]:
     artefatos = getattr(layer1, "artefatos", None) or []
     if not artefatos:
         return None
-    uri = getattr(artefatos[0], "uri", None)
-    if not uri:
-        return None
-    return Path(uri)
+    return resolve_artefact_path(artefatos[0])
 
 
 def _read_pdf_preflight(path: Path) -> tuple[int, bool, int]:
@@ -34,7 +34,7 @@ def _read_pdf_preflight(path: Path) -> tuple[int, bool, int]:
     native_rotation = 0
 
     try:
-        reader = PdfReader(str(path))
+        reader = pypdf.PdfReader(str(path))
         page_count = len(reader.pages)
         if page_count > 0:
             first_page = reader.pages[0]
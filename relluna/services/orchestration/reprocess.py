@@ -0,0 +1,514 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from relluna.infra import mongo_store, processing_event_store, stage_memo_store
+
+# -----------------------------
+# Reprocessamento em massa
+# -----------------------------
+#
+# Depois de um bump de versão (page_pipeline, entities_canonical, ...), os
+# documentos já gravados precisam ter sinais e read models re-derivados:
+#
+# - o processo principal faz stream dos ids (ordenados) a partir de um filtro
+#   Mongo, carrega lotes com `$in` e grava os resultados com `bulk_write`,
+#   respeitando um teto de escritas por segundo (compartilhado com as
+#   projeções de read model/páginas/índices que os workers gravam);
+# - documentos alterados por outro escritor durante a execução (conflito de
+#   token no bulk) são relidos e refeitos até `conflict_retries` vezes;
+# - um pool de processos executa a faixa de etapas escolhida em cada
+#   documento (via `_run_stage`, com eventos; sem memo de etapa, que só
+#   duplicaria as saídas de uma passada única);
+# - o checkpoint guarda o maior id cujo prefixo inteiro já foi concluído,
+#   então uma execução interrompida retoma do ponto em que parou.
+
+REPROCESS_STAGES: Tuple[str, ...] = (
+    "extract_basic",
+    "decompose_pdf_into_subdocuments",
+    "apply_page_analysis",
+    "apply_legal_extraction",
+    "apply_entities_canonical_v1",
+    "apply_transcription_contextual",
+    "timeline_seed_v2",
+    "infer_layer3",
+    "infer_layer3_llm",
+    "kausal_engine",
+    "apply_layer4",
+    "apply_layer5",
+    "persist_read_model",
+)
+
+CHECKPOINT_VERSION = 1
+
+
+def select_stages(from_stage: Optional[str] = None, to_stage: Optional[str] = None) -> Tuple[str, ...]:
+    start = REPROCESS_STAGES.index(from_stage) if from_stage else 0
+    end = REPROCESS_STAGES.index(to_stage) if to_stage else len(REPROCESS_STAGES) - 1
+    if start > end:
+        raise ValueError(f"Faixa de etapas vazia: {from_stage} -> {to_stage}")
+    return REPROCESS_STAGES[start : end + 1]
+
+
+# Sinal -> "módulo:CONSTANTE" com o `fonte` que o escritor real grava. O
+# sinal pode constar nas saídas de mais de uma etapa (ex.: layout_spans_v1
+# é declarado pela decomposição mas regravado pelo page_pipeline); vale
+# quem escreve por último.
+SIGNAL_WRITERS: Dict[str, str] = {
+    "causal_link_v1": "relluna.services.causal.engine:FONTE",
+    "deferred_pages_v1": "relluna.services.pdf_decomposition.decompose_pdf:FONTE",
+    "document_relation_graph_v1": "relluna.services.entities.entities_canonical_v1:FONTE",
+    "entities_canonical_v1": "relluna.services.entities.entities_canonical_v1:FONTE",
+    "extraction_strategy_v1": "relluna.services.pdf_decomposition.decompose_pdf:FONTE",
+    "layout_spans_v1": "relluna.services.page_extraction.page_pipeline:FONTE",
+    "legal_canonical_fields_v1": "relluna.services.legal.legal_canonical_fields_v1:FONTE",
+    "normalized_pages_v1": "relluna.services.pdf_decomposition.decompose_pdf:FONTE",
+    "ocr_pages_v1": "relluna.services.pdf_decomposition.decompose_pdf:FONTE",
+    "ocr_warnings_v1": "relluna.services.pdf_decomposition.decompose_pdf:FONTE",
+    "page_evidence_v1": "relluna.services.page_extraction.page_pipeline:FONTE",
+    "page_strategy_v1": "relluna.services.pdf_decomposition.decompose_pdf:FONTE",
+    "page_unit_v1": "relluna.services.entities.entities_canonical_v1:FONTE",
+    "subdocument_unit_v1": "relluna.services.entities.entities_canonical_v1:FONTE",
+    "subdocuments_v1": "relluna.services.pdf_decomposition.decompose_pdf:FONTE",
+    "timeline_seed_v2": "relluna.services.deterministic_extractors.timeline_seed_v2:FONTE",
+}
+
+
+def _current_fonte(signal: str) -> str:
+    target = SIGNAL_WRITERS.get(signal)
+    if target is None:
+        raise ValueError(f"Sinal sem escritor conhecido: {signal}")
+    module_name, attr = target.split(":", 1)
+    return str(getattr(importlib.import_module(module_name), attr))
+
+
+def build_query(
+    *,
+    outdated_signals: Sequence[str] = (),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    doc_types: Sequence[str] = (),
+    midia: Optional[str] = None,
+) -> Dict[str, Any]:
+    clauses: List[Dict[str, Any]] = []
+    if outdated_signals:
+        clauses.append(
+            {
+                "$or": [
+                    # Só documentos que têm o sinal: quem nunca o produziu (ex.:
+                    # ocr_pages_v1 em PDF nativo) não está desatualizado.
+                    {
+                        f"layer2.sinais_documentais.{signal}.fonte": {
+                            "$exists": True,
+                            "$ne": _current_fonte(signal),
+                        }
+                    }
+                    for signal in outdated_signals
+                ]
+            }
+        )
+    if since or until:
+        window: Dict[str, Any] = {}
+        if since:
+            window["$gte"] = since
+        if until:
+            window["$lt"] = until
+        clauses.append({"layer0.ingestiontimestamp": window})
+    if doc_types:
+        clauses.append({"layer3.tipo_documento.valor": {"$in": list(doc_types)}})
+    if midia:
+        clauses.append({"layer1.midia": midia})
+
+    if not clauses:
+        return {}
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+# ---------- checkpoint ----------
+
+
+@dataclass
+class ReprocessCheckpoint:
+    run_key: str
+    watermark: Optional[str] = None
+    processed: int = 0
+    failed: int = 0
+    conflicts: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+
+    @staticmethod
+    def run_key_for(query: Dict[str, Any], stages: Sequence[str]) -> str:
+        raw = json.dumps({"query": query, "stages": list(stages)}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, path: Optional[Path], run_key: str) -> "ReprocessCheckpoint":
+        if path is None or not path.exists():
+            return cls(run_key=run_key)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != CHECKPOINT_VERSION or data.get("run_key") != run_key:
+            # Outro filtro/faixa de etapas: começa do zero.
+            return cls(run_key=run_key)
+        return cls(
+            run_key=run_key,
+            watermark=data.get("watermark"),
+            processed=int(data.get("processed") or 0),
+            failed=int(data.get("failed") or 0),
+            conflicts=int(data.get("conflicts") or 0),
+            failed_ids=list(data.get("failed_ids") or []),
+        )
+
+    def save(self, path: Optional[Path]) -> None:
+        if path is None:
+            return
+        payload = {
+            "version": CHECKPOINT_VERSION,
+            "run_key": self.run_key,
+            "watermark": self.watermark,
+            "processed": self.processed,
+            "failed": self.failed,
+            "conflicts": self.conflicts,
+            "failed_ids": self.failed_ids[-1000:],
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# ---------- throttle e progresso ----------
+
+
+class WriteThrottle:
+    """
+    Limita escritas/s: cada lote reserva sua fatia de tempo. Com `shared`
+    (um multiprocessing.Value), o processo principal e os workers dividem o
+    mesmo orçamento.
+    """
+
+    def __init__(
+        self,
+        max_writes_per_sec: Optional[float],
+        clock: Callable[[], float] = time.monotonic,
+        shared=None,
+    ) -> None:
+        self.rate = max_writes_per_sec if max_writes_per_sec and max_writes_per_sec > 0 else None
+        self._clock = clock
+        self._next = 0.0
+        self.shared = shared
+
+    def reserve(self, writes: int) -> float:
+        """Segundos a aguardar antes de gravar `writes` documentos."""
+        if self.rate is None or writes <= 0:
+            return 0.0
+        if self.shared is None:
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + writes / self.rate
+            return start - now
+        # time.monotonic é o mesmo relógio em todos os processos da máquina.
+        with self.shared.get_lock():
+            now = self._clock()
+            start = max(now, self.shared.value)
+            self.shared.value = start + writes / self.rate
+        return start - now
+
+    async def wait(self, writes: int) -> None:
+        delay = self.reserve(writes)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class ReprocessProgress:
+    total: Optional[int]
+    started: float = field(default_factory=time.monotonic)
+    done: int = 0
+    written: int = 0
+
+    def rate(self) -> float:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return self.done / elapsed
+
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.rate()
+        if self.total is None or rate <= 0:
+            return None
+        return max(self.total - self.done, 0) / rate
+
+    def line(self) -> str:
+        eta = self.eta_seconds()
+        total = "?" if self.total is None else str(self.total)
+        eta_txt = "?" if eta is None else f"{eta / 60:.1f}min"
+        return f"done={self.done}/{total} written={self.written} rate={self.rate():.1f} docs/s eta={eta_txt}"
+
+
+# ---------- execução por documento (worker) ----------
+
+
+@dataclass
+class DocumentResult:
+    documentid: str
+    op: Optional[mongo_store.SaveOperation] = None
+    page_events: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _stage_table(api) -> Dict[str, Tuple[str, Callable[[Any], Any]]]:
+    def run_kausal(dm):
+        return api.persist_causal_links_to_layer2(dm, api.infer_causal_links(dm))
+
+    def run_layer4(dm):
+        dm = api.apply_layer4(dm)
+        if dm.layer4 is None:
+            dm.layer4 = api.Layer4SemanticNormalization()
+        return dm
+
+    return {
+        "extract_basic": ("deterministic_extractors.basic", api.extract_basic),
+        "decompose_pdf_into_subdocuments": ("services.pdf_decomposition.decompose_pdf_v1", api.decompose_pdf_into_subdocuments),
+        "apply_page_analysis": ("services.page_extraction.page_pipeline", api.apply_page_analysis),
+        "apply_legal_extraction": ("services.legal.legal_pipeline", api.apply_legal_extraction),
+        "apply_entities_canonical_v1": ("services.entities.entities_canonical_v1", api.apply_entities_canonical_v1),
+        "apply_transcription_contextual": ("services.transcription.asr", api.apply_transcription_to_layer2),
+        "timeline_seed_v2": ("deterministic_extractors.timeline_seed_v2", api.seed_timeline_v2),
+        "infer_layer3": ("taxonomy_rules", api.infer_layer3),
+        "infer_layer3_llm": ("azure_openai", api.llm_context.apply_llm_context),
+        "kausal_engine": ("services.causal.engine", run_kausal),
+        "apply_layer4": ("normalization", run_layer4),
+        "apply_layer5": ("services.derivatives.layer5", api.apply_layer5),
+        "persist_read_model": ("services.read_model.projector", api.persist_document_read_model),
+    }
+
+
+async def reprocess_document(
+    data: Dict[str, Any],
+    revision: int,
+    stages: Sequence[str],
+    throttle: Optional[WriteThrottle] = None,
+) -> DocumentResult:
+    # Import tardio: o módulo da API é pesado e só é necessário nos workers.
+    from relluna.services.ingestion import api
+
+    documentid = str((data.get("layer0") or {}).get("documentid"))
+    try:
+        dm = mongo_store.document_from_raw(data, revision)
+        table = _stage_table(api)
+        with stage_memo_store.suppressed():
+            for stage in stages:
+                if stage == "apply_transcription_contextual" and not api._should_run_transcription(dm):
+                    continue
+                if stage == "infer_layer3_llm" and not api.llm_context.enabled():
+                    continue
+                engine, fn = table[stage]
+                if stage == "persist_read_model":
+                    # Projeção externa: não substitui o DocumentMemory. Read model,
+                    # páginas e índices contam no teto de escritas da execução.
+                    charge = throttle.wait if throttle is not None else None
+                    await api._run_stage(dm, stage, engine, lambda: fn(dm, charge_writes=charge))
+                    continue
+                dm = await api._run_stage(dm, stage, engine, lambda fn=fn: fn(dm))
+        op = mongo_store.build_save_operation(dm)
+        return DocumentResult(documentid=documentid, op=op, page_events=processing_event_store.pop_pending(documentid))
+    except Exception as exc:
+        processing_event_store.pop_pending(documentid)
+        return DocumentResult(documentid=documentid, error=f"{type(exc).__name__}: {exc}")
+
+
+_WORKER_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_WORKER_THROTTLE: Optional[WriteThrottle] = None
+
+
+def _worker_init(max_writes_per_sec: Optional[float] = None, shared_next=None) -> None:
+    global _WORKER_LOOP, _WORKER_THROTTLE
+    # Um loop por processo: o cliente Motor fica preso ao loop em que nasceu.
+    # O pai já abriu o seu antes do fork (Reprocessor.run); o filho cria outro
+    # no primeiro acesso (read model, páginas, índice de pessoas).
+    mongo_store.reset_client()
+    _WORKER_LOOP = asyncio.new_event_loop()
+    asyncio.set_event_loop(_WORKER_LOOP)
+    _WORKER_THROTTLE = WriteThrottle(max_writes_per_sec, shared=shared_next)
+
+
+def _process_batch(payloads: List[Tuple[Dict[str, Any], int]], stages: Tuple[str, ...]) -> List[DocumentResult]:
+    loop = _WORKER_LOOP or asyncio.new_event_loop()
+
+    async def run() -> List[DocumentResult]:
+        return [
+            await reprocess_document(data, revision, stages, _WORKER_THROTTLE) for data, revision in payloads
+        ]
+
+    return loop.run_until_complete(run())
+
+
+# ---------- orquestração ----------
+
+
+@dataclass
+class ReprocessConfig:
+    stages: Tuple[str, ...]
+    query: Dict[str, Any] = field(default_factory=dict)
+    batch_size: int = 50
+    workers: int = max((os.cpu_count() or 2) - 1, 1)
+    max_writes_per_sec: Optional[float] = 200.0
+    checkpoint_path: Optional[Path] = None
+    limit: Optional[int] = None
+    report_every_sec: float = 10.0
+    # Releituras de documentos alterados por outro escritor durante a execução.
+    conflict_retries: int = 2
+
+
+class Reprocessor:
+    def __init__(
+        self,
+        config: ReprocessConfig,
+        *,
+        coll=None,
+        executor: Optional[Executor] = None,
+        inline: bool = False,
+        report: Callable[[str], None] = print,
+    ) -> None:
+        self.config = config
+        self.coll = coll
+        self.executor = executor
+        self.inline = inline
+        self.report = report
+        self.run_key = ReprocessCheckpoint.run_key_for(config.query, config.stages)
+        self.checkpoint = ReprocessCheckpoint.load(config.checkpoint_path, self.run_key)
+        self.throttle = WriteThrottle(config.max_writes_per_sec, shared=multiprocessing.Value("d", 0.0))
+
+    def _effective_query(self) -> Dict[str, Any]:
+        if self.checkpoint.watermark is None:
+            return dict(self.config.query)
+        resume = {"layer0.documentid": {"$gt": self.checkpoint.watermark}}
+        if not self.config.query:
+            return resume
+        return {"$and": [self.config.query, resume]}
+
+    async def _iter_id_batches(self):
+        cursor = self.coll.find(self._effective_query(), {"layer0.documentid": 1, "_id": 0}).sort("layer0.documentid", 1)
+        batch: List[str] = []
+        seen = 0
+        async for doc in cursor:
+            batch.append(doc["layer0"]["documentid"])
+            seen += 1
+            if len(batch) >= self.config.batch_size:
+                yield batch
+                batch = []
+            if self.config.limit is not None and seen >= self.config.limit:
+                break
+        if batch:
+            yield batch
+
+    async def _load_batch(self, ids: List[str]) -> List[Tuple[Dict[str, Any], int]]:
+        payloads = []
+        async for raw in self.coll.find({"layer0.documentid": {"$in": ids}}):
+            payloads.append(await mongo_store.hydrate_raw_document(self.coll, raw))
+        order = {docid: idx for idx, docid in enumerate(ids)}
+        return sorted(payloads, key=lambda item: order.get(item[0]["layer0"]["documentid"], len(order)))
+
+    async def _write_results(self, results: List[DocumentResult], progress: ReprocessProgress, attempt: int = 0) -> None:
+        ops = [result.op for result in results if result.op is not None and result.op.kind != "noop"]
+        await self.throttle.wait(len(ops))
+        conflicts = set(await mongo_store.bulk_save_operations(self.coll, ops))
+        self.checkpoint.conflicts += len(conflicts)
+
+        for result in results:
+            if result.documentid in conflicts:
+                # Resultado calculado sobre uma revisão superada: eventos descartados.
+                continue
+            if result.page_events:
+                processing_event_store.buffer_events(result.documentid, result.page_events)
+                await processing_event_store.flush(result.documentid)
+            if result.error:
+                self.checkpoint.failed += 1
+                self.checkpoint.failed_ids.append(result.documentid)
+            else:
+                self.checkpoint.processed += 1
+        progress.done += len(results) - len(conflicts)
+        progress.written += len(ops) - len(conflicts)
+
+        if not conflicts:
+            return
+        retry_ids = [result.documentid for result in results if result.documentid in conflicts]
+        if attempt >= self.config.conflict_retries:
+            self.checkpoint.failed += len(retry_ids)
+            self.checkpoint.failed_ids.extend(retry_ids)
+            progress.done += len(retry_ids)
+            return
+        # Relê a revisão atual e refaz as etapas só dos documentos em conflito.
+        payloads = await self._load_batch(retry_ids)
+        reloaded = {data["layer0"]["documentid"] for data, _ in payloads}
+        # Removidos nesse meio-tempo: nada a regravar.
+        progress.done += sum(1 for documentid in retry_ids if documentid not in reloaded)
+        retried = await self._run_batch(payloads, asyncio.get_running_loop())
+        await self._write_results(retried, progress, attempt + 1)
+
+    async def _run_batch(self, payloads, loop) -> List[DocumentResult]:
+        if self.inline:
+            return [
+                await reprocess_document(data, revision, self.config.stages, self.throttle)
+                for data, revision in payloads
+            ]
+        return await loop.run_in_executor(self.executor, _process_batch, payloads, self.config.stages)
+
+    async def run(self) -> ReprocessCheckpoint:
+        if self.coll is None:
+            self.coll = mongo_store.get_collection()
+        if self.coll is None:
+            raise RuntimeError("Reprocessamento exige MongoDB configurado (MONGO_URI).")
+
+        owns_executor = False
+        if self.executor is None and not self.inline:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.config.workers,
+                initializer=_worker_init,
+                initargs=(self.config.max_writes_per_sec, self.throttle.shared),
+            )
+            owns_executor = True
+
+        total = await self.coll.count_documents(self._effective_query())
+        if self.config.limit is not None:
+            total = min(total, self.config.limit)
+        progress = ReprocessProgress(total=total)
+        loop = asyncio.get_running_loop()
+        window = max(self.config.workers * 2, 1)
+        in_flight: List[Tuple[List[str], asyncio.Future]] = []
+        last_report = time.monotonic()
+
+        async def drain(min_pending: int) -> None:
+            nonlocal last_report
+            # Conclui em ordem de submissão: o watermark só avança sobre um
+            # prefixo de lotes inteiramente gravado.
+            while len(in_flight) > min_pending:
+                ids, future = in_flight.pop(0)
+                await self._write_results(await future, progress)
+                self.checkpoint.watermark = ids[-1]
+                self.checkpoint.save(self.config.checkpoint_path)
+                if time.monotonic() - last_report >= self.config.report_every_sec:
+                    self.report(progress.line())
+                    last_report = time.monotonic()
+
+        try:
+            async for ids in self._iter_id_batches():
+                payloads = await self._load_batch(ids)
+                in_flight.append((ids, asyncio.ensure_future(self._run_batch(payloads, loop))))
+                await drain(window - 1)
+            await drain(0)
+        finally:
+            if owns_executor:
+                self.executor.shutdown(wait=True)
+
+        self.report(progress.line())
+        return self.checkpoint
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.core.document_memory.dirty_tracking import signal_digest
+from relluna.core.document_memory.types_basic import ProvenancedString
+from relluna.infra.signal_codec import decode_signal
+
+# -----------------------------
+# Contratos de entrada/saída das etapas
+# -----------------------------
+#
+# Cada etapa do pipeline declara os caminhos do DocumentMemory que lê e os
+# que escreve:
+#
+#   "layer1", "layer2", "layer3"              camada inteira
+#   "layer0.contentfingerprint"               campo de camada
+#   "layer2.sinais_documentais.<chave>"       sinal documental
+#
+# e as constantes de versão dos motores que executa ("modulo:ATRIBUTO").
+#
+# Com isso:
+# - a escalada fast -> standard reaproveita etapas cujas entradas não mudaram
+#   (StageLedger). Em PDF, a decomposição grava `subdocuments_v1` e reescreve
+#   `layout_spans_v1`, então só `extract_basic` (e o hook jurídico) costuma
+#   ser reaproveitado; análise de página e entidades rodam de novo;
+# - `_run_stage` memoiza cada etapa por (digest das entradas, versão do
+#   motor) entre execuções de /extract e /infer_context (stage_memo_store).
+
+_SIGNALS_PREFIX = "layer2.sinais_documentais."
+
+# Incrementar quando mudar a forma dos digests ou do payload memoizado.
+STAGE_MEMO_SCHEMA = "stage_memo_v1"
+
+
+@dataclass(frozen=True)
+class StageSpec:
+    name: str
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    versions: Tuple[str, ...] = ()
+    # Sinais ignorados quando "layer2" inteira é entrada (saídas de etapas
+    # posteriores, que de outra forma invalidariam a etapa a cada execução).
+    exclude_signals: Tuple[str, ...] = ()
+    # A etapa aplicada sobre a própria saída produz a mesma saída: o estado
+    # logo após a execução anterior também vale como entrada conhecida.
+    idempotent: bool = False
+
+
+def _signals(*keys: str) -> Tuple[str, ...]:
+    return tuple(f"{_SIGNALS_PREFIX}{key}" for key in keys)
+
+
+_INFER_SIGNALS = ("timeline_seed_v2", "causal_link_v1")
+
+STAGE_SPECS: Dict[str, StageSpec] = {
+    spec.name: spec
+    for spec in (
+        StageSpec(
+            name="extract_basic",
+            inputs=("layer0.contentfingerprint", "layer1"),
+            outputs=("layer2",),
+            versions=(
+                "relluna.services.deterministic_extractors.basic:FONTE",
+                "relluna.services.deterministic_extractors.entities_hard_v2:FONTE",
+            ),
+        ),
+        StageSpec(
+            name="decompose_pdf_into_subdocuments",
+            inputs=("layer1", "layer2.texto_ocr_literal"),
+            outputs=(
+                "layer2.texto_ocr_literal",
+                *_signals(
+                    "extraction_strategy_v1",
+                    "page_strategy_v1",
+                    "subdocuments_v1",
+                    "normalized_pages_v1",
+                    "ocr_warnings_v1",
+                    "ocr_pages_v1",
+                    "layout_spans_v1",
+                    "deferred_pages_v1",
+                ),
+            ),
+            versions=("relluna.services.pdf_decomposition.decompose_pdf:FONTE",),
+        ),
+        StageSpec(
+            name="apply_page_analysis",
+            inputs=_signals("layout_spans_v1", "subdocuments_v1"),
+            outputs=_signals("layout_spans_v1", "page_evidence_v1"),
+            versions=("relluna.services.page_extraction.page_pipeline:FONTE",),
+        ),
+        # Hook de compatibilidade sem mutação (ver legal_pipeline).
+        StageSpec(
+            name="apply_legal_extraction",
+            inputs=(),
+            outputs=(),
+            versions=("relluna.services.legal.legal_pipeline:FONTE",),
+        ),
+        StageSpec(
+            name="apply_entities_canonical_v1",
+            inputs=(
+                "layer2.texto_ocr_literal",
+                "layer3.tipo_documento",
+                *_signals("page_evidence_v1", "layout_spans_v1", "subdocuments_v1"),
+            ),
+            outputs=_signals(
+                "page_unit_v1",
+                "subdocument_unit_v1",
+                "document_relation_graph_v1",
+                "entities_canonical_v1",
+                "legal_canonical_fields_v1",
+            ),
+            versions=(
+                "relluna.services.entities.entities_canonical_v1:FONTE",
+                "relluna.services.legal.legal_canonical_fields_v1:FONTE",
+            ),
+        ),
+        StageSpec(
+            name="apply_transcription_contextual",
+            inputs=("layer1",),
+            outputs=("layer3",),
+            versions=(
+                "relluna.services.transcription.asr:_SOURCE",
+                "relluna.services.transcription.asr:_METHOD",
+            ),
+        ),
+        StageSpec(
+            name="timeline_seed_v2",
+            inputs=("layer1", "layer2"),
+            outputs=_signals("timeline_seed_v2"),
+            versions=("relluna.services.deterministic_extractors.timeline_seed_v2:FONTE",),
+            exclude_signals=_INFER_SIGNALS,
+        ),
+        StageSpec(
+            name="infer_layer3",
+            inputs=("layer1", "layer2", "layer3"),
+            outputs=("layer3",),
+            versions=(
+                "relluna.services.context_inference.basic:_METHOD",
+                "relluna.services.context_inference.basic:_BUILDER_VERSION",
+            ),
+            exclude_signals=("causal_link_v1",),
+            idempotent=True,
+        ),
+        StageSpec(
+            name="infer_layer3_llm",
+            inputs=("layer1", "layer2", "layer3"),
+            outputs=("layer3",),
+            versions=(
+                "relluna.services.context_inference.llm_context:_METHOD",
+                "relluna.services.context_inference.evidence_packer:PACKER_VERSION",
+            ),
+            exclude_signals=("causal_link_v1",),
+            idempotent=True,
+        ),
+        StageSpec(
+            name="kausal_engine",
+            inputs=("layer2", "layer3"),
+            outputs=_signals("causal_link_v1"),
+            versions=("relluna.services.causal.engine:_ENGINE_VERSION",),
+            exclude_signals=("causal_link_v1",),
+        ),
+        StageSpec(
+            name="apply_layer4",
+            inputs=("layer1", "layer2", "layer3"),
+            outputs=("layer4",),
+            versions=("relluna.core.normalization:_NORMALIZER_VERSION",),
+        ),
+        StageSpec(
+            name="apply_layer5",
+            inputs=("layer0.documentid", "layer1", "layer2", "layer3", "layer4"),
+            outputs=("layer5",),
+            versions=("relluna.services.derivatives.layer5:_BUILDER_VERSION",),
+        ),
+    )
+}
+
+
+def _read_path(dm: DocumentMemory, path: str) -> Any:
+    if path.startswith(_SIGNALS_PREFIX):
+        if dm.layer2 is None:
+            return None
+        # dict.get: não decodifica sinais comprimidos (LazySignals).
+        return dict.get(dm.layer2.sinais_documentais or {}, path[len(_SIGNALS_PREFIX):])
+    head, _, attr = path.partition(".")
+    value = getattr(dm, head, None)
+    if attr and value is not None:
+        value = getattr(value, attr, None)
+    return value
+
+
+def _payload(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return value
+
+
+def _digest_payload(dm: DocumentMemory, path: str, exclude_signals: Tuple[str, ...]) -> Any:
+    value = _read_path(dm, path)
+    if value is None:
+        return None
+    if path.startswith(_SIGNALS_PREFIX):
+        return signal_digest(value.model_dump(mode="json"))
+    if path == "layer2":
+        # Sinais entram pelo digest lógico de `valor`: comprimido ou não, o
+        # mesmo conteúdo gera o mesmo digest.
+        return {
+            "fields": value.model_dump(mode="json", exclude={"sinais_documentais"}),
+            "signals": {
+                key: signal_digest(signal.model_dump(mode="json"))
+                for key, signal in dict.items(value.sinais_documentais or {})
+                if key not in exclude_signals
+            },
+        }
+    return _payload(value)
+
+
+def digest_paths(dm: DocumentMemory, paths: Tuple[str, ...], *, exclude_signals: Tuple[str, ...] = ()) -> str:
+    payload = {path: _digest_payload(dm, path, exclude_signals) for path in paths}
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def stage_input_digest(dm: DocumentMemory, stage: str) -> Optional[str]:
+    spec = STAGE_SPECS.get(stage)
+    if spec is None:
+        return None
+    return digest_paths(dm, spec.inputs, exclude_signals=spec.exclude_signals)
+
+
+@lru_cache(maxsize=None)
+def stage_version(stage: str) -> Optional[str]:
+    """Versão declarada dos motores da etapa; None se a etapa não declara."""
+    spec = STAGE_SPECS.get(stage)
+    if spec is None or not spec.versions:
+        return None
+    parts = []
+    for ref in spec.versions:
+        module_name, _, attr = ref.partition(":")
+        parts.append(str(getattr(importlib.import_module(module_name), attr)))
+    return "+".join(parts)
+
+
+def memo_key(stage: str, version: str, input_digest: str) -> str:
+    raw = f"{STAGE_MEMO_SCHEMA}|{stage}|{version}|{input_digest}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def snapshot_paths(dm: DocumentMemory, paths: Tuple[str, ...]) -> Dict[str, Any]:
+    snapshot: Dict[str, Any] = {}
+    for path in paths:
+        value = _read_path(dm, path)
+        snapshot[path] = value.model_copy(deep=True) if hasattr(value, "model_copy") else value
+    return snapshot
+
+
+def restore_paths(dm: DocumentMemory, snapshot: Dict[str, Any]) -> None:
+    for path, value in snapshot.items():
+        value = value.model_copy(deep=True) if hasattr(value, "model_copy") else value
+        if path.startswith(_SIGNALS_PREFIX):
+            if dm.layer2 is None:
+                continue
+            key = path[len(_SIGNALS_PREFIX):]
+            if value is None:
+                dm.layer2.sinais_documentais.pop(key, None)
+            else:
+                dm.layer2.sinais_documentais[key] = value
+            continue
+        head, _, attr = path.partition(".")
+        if not attr:
+            setattr(dm, head, value)
+        elif getattr(dm, head, None) is not None:
+            setattr(getattr(dm, head), attr, value)
+
+
+# ---------- payload memoizado (JSON) ----------
+
+
+def dump_outputs(dm: DocumentMemory, stage: str) -> Dict[str, Any]:
+    """Saídas declaradas da etapa em JSON, com sinais comprimidos decodificados."""
+    spec = STAGE_SPECS[stage]
+    dumped: Dict[str, Any] = {}
+    for path in spec.outputs:
+        value = _read_path(dm, path)
+        if path.startswith(_SIGNALS_PREFIX):
+            value = decode_signal(value) if value is not None else None
+        elif path == "layer2" and value is not None:
+            payload = value.model_dump(mode="json", exclude={"sinais_documentais"})
+            payload["sinais_documentais"] = {
+                key: decode_signal(signal).model_dump(mode="json")
+                for key, signal in dict.items(value.sinais_documentais or {})
+            }
+            dumped[path] = payload
+            continue
+        dumped[path] = _payload(value)
+    return dumped
+
+
+def output_digests(dm: DocumentMemory, stage: str) -> Dict[str, str]:
+    """Digest de cada saída declarada da etapa, no estado atual do documento."""
+    return {path: digest_paths(dm, (path,)) for path in STAGE_SPECS[stage].outputs}
+
+
+def _annotation_for(dm: DocumentMemory, path: str) -> Any:
+    head, _, attr = path.partition(".")
+    if not attr:
+        return type(dm).model_fields[head].annotation
+    layer = getattr(dm, head, None)
+    return type(layer).model_fields[attr].annotation
+
+
+def load_outputs(dm: DocumentMemory, dumped: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverso de `dump_outputs`: snapshot pronto para `restore_paths`."""
+    snapshot: Dict[str, Any] = {}
+    for path, payload in dumped.items():
+        if payload is None:
+            snapshot[path] = None
+        elif path.startswith(_SIGNALS_PREFIX):
+            snapshot[path] = ProvenancedString.model_validate(payload)
+        else:
+            snapshot[path] = TypeAdapter(_annotation_for(dm, path)).validate_python(payload)
+    return snapshot
+
+
+@dataclass
+class StageRecord:
+    input_digest: str
+    outputs: Dict[str, Any]
+
+
+@dataclass
+class StageLedger:
+    """
+    Registro das etapas executadas numa passada do pipeline: digest das
+    entradas no início da etapa e snapshot das saídas ao final.
+    """
+
+    mode: str
+    records: Dict[str, StageRecord] = field(default_factory=dict)
+    reused: List[str] = field(default_factory=list)
+    executed: List[str] = field(default_factory=list)
+
+    def record(self, dm: DocumentMemory, stage: str, input_digest: Optional[str]) -> None:
+        spec = STAGE_SPECS.get(stage)
+        self.executed.append(stage)
+        if spec is None or input_digest is None:
+            return
+        self.records[stage] = StageRecord(input_digest=input_digest, outputs=snapshot_paths(dm, spec.outputs))
+
+    def reusable(self, dm: DocumentMemory, stage: str) -> Optional[StageRecord]:
+        record = self.records.get(stage)
+        if record is None or stage not in STAGE_SPECS:
+            return None
+        if stage_input_digest(dm, stage) != record.input_digest:
+            return None
+        return record
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "reused_stages": list(self.reused),
+            "executed_stages": list(self.executed),
+        }
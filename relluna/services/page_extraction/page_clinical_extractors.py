@@ -3,7 +3,9 @@ from __future__ import annotations
 import re
 from typing import Any, Dict, List, Optional
 
-RE_CID = re.compile(r"\b([A-TV-Z][0-9]{2}(?:\.[0-9A-Z]{1,2})?)\b")
+from relluna.services.page_extraction.text_scanner import SCAN_PATTERNS, register_keywords, scan_text
+
+RE_CID = SCAN_PATTERNS["cid"]
 RE_MEDICATION = re.compile(
     r"(?:\d+\)\s*)?([A-ZÁÀÃÂÉÊÍÓÔÕÚÇa-zà-ÿ][A-ZÁÀÃÂÉÊÍÓÔÕÚÇa-zà-ÿ\s\-]{2,40}?)\s+(\d+(?:,\d+)?\s*(?:mg|mcg|g|ml))\b",
     re.IGNORECASE,
@@ -34,6 +36,7 @@ FALSE_CID_CONTEXT = [
     "sao paulo",
     "s30 paulo",
 ]
+register_keywords(FALSE_CID_CONTEXT)
 
 RE_CITY_DATE_LINE = re.compile(
     r"^[A-ZÁÀÃÂÉÊÍÓÔÕÚÇa-zà-ÿ\s]+,\s*\d{1,2}\s+de\s+[A-ZÁÀÃÂÉÊÍÓÔÕÚÇa-zà-ÿ]+\s+de\s+\d{4}",
@@ -159,7 +162,7 @@ def _infer_specialty_fallback(text: str) -> Optional[str]:
 
 
 def _infer_service_fallback(text: str) -> Optional[str]:
-    upper = (text or "").upper()
+    upper = scan_text(text).upper
     if "ENCAMINHAMENTO" in upper and "PSICOLOGIA" in upper:
         return "encaminhamento para psicologia"
     if "PSICOLOGIA" in upper:
@@ -171,11 +174,11 @@ def _infer_service_fallback(text: str) -> Optional[str]:
 
 def extract_clinical_page_entities(page_text: str) -> Dict[str, Any]:
     text = page_text or ""
-    lower = text.lower()
+    scan = scan_text(text)
 
     cids: List[str] = []
-    for cid in RE_CID.findall(text):
-        if cid.upper() == "S30" and any(ctx in lower for ctx in FALSE_CID_CONTEXT):
+    for cid in scan.findall("cid"):
+        if cid.upper() == "S30" and scan.any_keyword(FALSE_CID_CONTEXT):
             continue
         cids.append(cid)
 
@@ -3,6 +3,8 @@ from __future__ import annotations
 import re
 from typing import Any, Dict, List, Optional
 
+from relluna.services.page_extraction.text_scanner import SCAN_PATTERNS, scan_text
+
 RE_PATIENT = re.compile(
     r"(?:nome\s+paciente|nome\s+do\s+paciente|paciente|nome(?!\s+da\s+m[aã]e))[:;\s]+"
     r"(?:(?:sr(?:a)?|sr\.?\(a\)?|sra\.?)\.?\s+)?"
@@ -17,12 +19,12 @@ RE_MOTHER = re.compile(
 RE_BIRTH = re.compile(r"nascimento[:;\s]+(\d{2}/\d{2}/\d{4})", re.IGNORECASE)
 RE_SEX = re.compile(r"sexo[:;\s]+([A-Za-zÀ-ÿ]+)", re.IGNORECASE)
 RE_RGHC = re.compile(r"\bRGHC[:;\s]+([A-Z0-9]+)\b", re.IGNORECASE)
-RE_CPF_FORMATTED = re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b")
-RE_CPF_RAW = re.compile(r"(?<![A-Za-z])\d{11}(?![\d-]|[A-Za-z])")
-RE_CNPJ = re.compile(r"\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b")
-RE_CRM = re.compile(r"\bCRM(?:\s*[-:/]?\s*[A-Z]{0,2})?\s*[-:]?\s*(\d{4,8})\b", re.IGNORECASE)
+RE_CPF_FORMATTED = SCAN_PATTERNS["cpf_formatted"]
+RE_CPF_RAW = SCAN_PATTERNS["cpf_raw"]
+RE_CNPJ = SCAN_PATTERNS["cnpj"]
+RE_CRM = SCAN_PATTERNS["crm"]
 RE_DATE = re.compile(r"\b\d{2}/\d{2}/\d{4}\b")
-RE_PHONE = re.compile(r"(?<!\w)(?:\(?\d{2}\)?\s*)?(?:9?\d{4})-?\d{4}(?!\w)")
+RE_PHONE = SCAN_PATTERNS["phone"]
 RE_AGE = re.compile(r"\bidade[:;\s]+(\d{1,3})\b", re.IGNORECASE)
 
 ORG_PATTERNS = [
@@ -82,9 +84,10 @@ def _validate_cpf(cpf: str) -> bool:
 
 
 def _extract_valid_cpfs(text: str) -> List[str]:
+    scan = scan_text(text)
     candidates: List[str] = []
-    candidates.extend(RE_CPF_FORMATTED.findall(text or ""))
-    candidates.extend(RE_CPF_RAW.findall(text or ""))
+    candidates.extend(scan.findall("cpf_formatted"))
+    candidates.extend(scan.findall("cpf_raw"))
 
     out: List[str] = []
     for raw in candidates:
@@ -98,8 +101,8 @@ def _extract_valid_cpfs(text: str) -> List[str]:
 
 def _extract_clean_phones(text: str) -> List[str]:
     phones: List[str] = []
-    for m in RE_PHONE.finditer(text or ""):
-        raw = m.group(0)
+    for m in scan_text(text).matches("phone"):
+        raw = m.text
         digits = re.sub(r"\D", "", raw)
 
         if len(digits) in {8, 9}:
@@ -234,9 +237,10 @@ def extract_basic_page_entities(page_text: str) -> Dict[str, Any]:
         out["rghc"] = _clean(m.group(1))
 
     out["cpf"] = _extract_valid_cpfs(text)
-    out["cnpj"] = _dedup(RE_CNPJ.findall(text))
-    out["crm"] = _dedup(RE_CRM.findall(text))
-    out["dates"] = _dedup(RE_DATE.findall(text))
+    scan = scan_text(text)
+    out["cnpj"] = _dedup(scan.findall("cnpj"))
+    out["crm"] = _dedup(scan.findall("crm"))
+    out["dates"] = _dedup([m.text for m in scan.matches("date_numeric")])
     out["phones"] = _extract_clean_phones(text)
     out["organizations"] = _extract_organizations(text)
 
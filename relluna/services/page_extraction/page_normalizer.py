@@ -2,13 +2,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import tempfile
 import re
 
-import fitz  # PyMuPDF
-from PIL import Image, ImageOps
-import pytesseract
+from relluna.core.lazy import lazy_import
+from relluna.services.orchestration.deadline import capped_timeout
+
+fitz = lazy_import("fitz")  # PyMuPDF
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+pytesseract = lazy_import("pytesseract")
 
 ORIENTATION_OCR_TIMEOUT_SECONDS = 5
 AUTO_ORIENTATION_CANDIDATES = (0,)
@@ -61,7 +65,7 @@ def _ocr_orientation_score(
             thumb,
             lang=lang,
             config="--psm 6",
-            timeout=ORIENTATION_OCR_TIMEOUT_SECONDS,
+            timeout=capped_timeout(ORIENTATION_OCR_TIMEOUT_SECONDS),
         )
     except RuntimeError as exc:
         if "timeout" in str(exc).lower():
@@ -160,7 +164,9 @@ def normalize_pdf_pages(
     out_dir: Optional[str] = None,
     dpi: int = 100,
     lang: str = "por",
+    pages: Optional[Sequence[int]] = None,
 ) -> List[NormalizedPageImage]:
+    """`pages` (1-based) restringe o render a um subconjunto, p.ex. uma janela."""
     pdf_path = str(pdf_path)
     target_dir = Path(out_dir) if out_dir else Path(tempfile.mkdtemp(prefix="relluna_pages_"))
     target_dir.mkdir(parents=True, exist_ok=True)
@@ -168,7 +174,8 @@ def normalize_pdf_pages(
     doc = fitz.open(pdf_path)
     results: List[NormalizedPageImage] = []
 
-    for page_index in range(len(doc)):
+    page_indexes = range(len(doc)) if pages is None else [int(p) - 1 for p in pages if 0 < int(p) <= len(doc)]
+    for page_index in page_indexes:
         page = doc.load_page(page_index)
         pdf_rotation = int(page.rotation or 0)
 
@@ -4,8 +4,11 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Any
 import re
 
-from PIL import Image
-import pytesseract
+from relluna.core.lazy import lazy_import
+from relluna.services.orchestration.deadline import capped_timeout
+
+Image = lazy_import("PIL.Image")
+pytesseract = lazy_import("pytesseract")
 
 OCR_PAGE_TIMEOUT_SECONDS = 8
 
@@ -60,7 +63,7 @@ def ocr_image_page(image_path: str, page_number: int) -> OCRPage:
             img,
             lang="por+eng",
             config="--psm 6",
-            timeout=OCR_PAGE_TIMEOUT_SECONDS,
+            timeout=capped_timeout(OCR_PAGE_TIMEOUT_SECONDS),
         )
     except RuntimeError as exc:
         if _is_tesseract_timeout(exc):
@@ -81,7 +84,7 @@ def ocr_image_page(image_path: str, page_number: int) -> OCRPage:
             lang="por+eng",
             config="--psm 6",
             output_type=pytesseract.Output.DICT,
-            timeout=OCR_PAGE_TIMEOUT_SECONDS,
+            timeout=capped_timeout(OCR_PAGE_TIMEOUT_SECONDS),
         )
     except RuntimeError as exc:
         if _is_tesseract_timeout(exc):
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import re
 from time import perf_counter
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from relluna.core.document_memory import DocumentMemory
 from relluna.core.document_memory.types_basic import ProvenancedString
@@ -12,10 +12,13 @@ from relluna.services.page_extraction.page_clinical_extractors import (
 from relluna.services.page_extraction.page_entity_extractors import (
     extract_basic_page_entities,
 )
+from relluna.services.evidence.layout_span_store import LayoutSpanStore
 from relluna.services.evidence.signals import dump_critical_signal_json
-from relluna.services.observability import append_processing_event, elapsed_ms
+from relluna.services.observability import PageEventBatch, elapsed_ms
+from relluna.services.page_extraction.page_spool import PageSpool, use_windowed
 from relluna.services.page_extraction.page_taxonomy import classify_page_subtype
 from relluna.services.page_extraction.page_text_splitter import split_document_by_page
+from relluna.services.page_extraction.text_scanner import SCAN_PATTERNS, scan_text
 
 FONTE = "services.page_extraction.page_pipeline_v12"
 
@@ -35,14 +38,9 @@ _MONTHS_PT = {
     "dezembro": "12",
 }
 
-_RE_DATE_NUMERIC = re.compile(r"\b(\d{2})/(\d{2})/(\d{4})\b")
-_RE_DATE_TEXTUAL = re.compile(
-    r"\b(\d{1,2})\s+de\s+([A-Za-zçÇãÃáàâéêíóôõú]+)\s+de\s+(\d{4})\b",
-    re.IGNORECASE,
-)
-_RE_TIMESTAMP = re.compile(
-    r"\b(20\d{2})-(\d{2})-(\d{2})T\d{2}:\d{2}:\d{2}(?:[+-]\d{2}:\d{2}|Z)\b"
-)
+_RE_DATE_NUMERIC = SCAN_PATTERNS["date_numeric"]
+_RE_DATE_TEXTUAL = SCAN_PATTERNS["date_textual"]
+_RE_TIMESTAMP = SCAN_PATTERNS["timestamp"]
 
 # Captura com labels fortes e corte antes do próximo campo.
 _RE_PATIENT_LABEL = re.compile(
@@ -222,8 +220,9 @@ def _normalize_textual_date(day: str, month_name: str, year: str) -> Optional[st
 
 def _extract_date_candidates(page_text: str) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
+    scan = scan_text(page_text)
 
-    for d, m, y in _RE_DATE_NUMERIC.findall(page_text or ""):
+    for d, m, y in scan.findall("date_numeric"):
         out.append(
             {
                 "literal": f"{d}/{m}/{y}",
@@ -232,7 +231,7 @@ def _extract_date_candidates(page_text: str) -> List[Dict[str, Any]]:
             }
         )
 
-    for d, month_name, y in _RE_DATE_TEXTUAL.findall(page_text or ""):
+    for d, month_name, y in scan.findall("date_textual"):
         iso = _normalize_textual_date(d, month_name, y)
         if iso:
             out.append(
@@ -243,7 +242,7 @@ def _extract_date_candidates(page_text: str) -> List[Dict[str, Any]]:
                 }
             )
 
-    for y, m, d in _RE_TIMESTAMP.findall(page_text or ""):
+    for y, m, d in scan.findall("timestamp"):
         out.append(
             {
                 "literal": f"{y}-{m}-{d}",
@@ -681,34 +680,11 @@ def _normalize_spaces(value: Optional[str]) -> Optional[str]:
     return cleaned or None
 
 
-def _find_best_span_for_value(spans: List[Dict[str, Any]], value: Optional[str]) -> Optional[Dict[str, Any]]:
-    target = _normalize_spaces(value)
-    if not target:
-        return None
-
-    target_low = target.lower()
-    best: Optional[Dict[str, Any]] = None
-    best_score = -1.0
-
-    for sp in spans:
-        sp_text = _normalize_spaces(sp.get("text"))
-        if not sp_text:
-            continue
-
-        sp_low = sp_text.lower()
-        score = 0.0
-        if target_low == sp_low:
-            score += 20.0
-        if target_low in sp_low:
-            score += 10.0
-        overlap = _token_overlap(target_low, sp_low)
-        score += overlap * 10.0
-
-        if score > best_score:
-            best_score = score
-            best = sp
-
-    return best if best_score >= 8.0 else None
+def _find_best_span_for_value(
+    spans: Union[List[Dict[str, Any]], LayoutSpanStore],
+    value: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    return LayoutSpanStore.from_spans(spans).best_match(value)
 
 
 def _append_anchor(
@@ -716,7 +692,7 @@ def _append_anchor(
     page: int,
     label: str,
     value: Optional[str],
-    spans: List[Dict[str, Any]],
+    spans: LayoutSpanStore,
     source_path: str,
     snippet_prefix: Optional[str] = None,
 ) -> None:
@@ -739,7 +715,7 @@ def _append_anchor(
 def _build_anchors(
     page_no: int,
     page_text: str,
-    spans: List[Dict[str, Any]],
+    spans: LayoutSpanStore,
     basic: Dict[str, Any],
     clinical: Dict[str, Any],
     date_candidates: List[Dict[str, Any]],
@@ -902,6 +878,29 @@ def _resolve_signal_zones(anchors: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     return signal_zones
 
 
+def _make_signal_json(dm: DocumentMemory, key: str, valor: str, metodo: str) -> DocumentMemory:
+    """Sinal já serializado (e validado item a item) pelo PageSpool."""
+    dm.layer2.sinais_documentais[key] = ProvenancedString(
+        valor=valor,
+        fonte=FONTE,
+        metodo=metodo,
+        estado="confirmado",
+        confianca=1.0,
+    )
+    return dm
+
+
+def _drain(items: List[Dict[str, Any]]):
+    """Itera consumindo a lista: cada página sai de memória depois de analisada."""
+    items.reverse()
+    while items:
+        yield items.pop()
+
+
+_LAYOUT_SPANS_METODO = "ocr_real_spans_or_page_split_spans_v3"
+_PAGE_EVIDENCE_METODO = "page_split_real+entities_v7+clinical_v6+taxonomy_v2+anchors_v7+bbox_real_integration_v3"
+
+
 def apply_page_analysis(dm: DocumentMemory) -> DocumentMemory:
     if dm.layer2 is None:
         return dm
@@ -910,17 +909,34 @@ def apply_page_analysis(dm: DocumentMemory) -> DocumentMemory:
     if not split_pages:
         return dm
 
+    spool = PageSpool(dm=dm) if use_windowed(len(split_pages)) else None
+    try:
+        return _analyze_pages(dm, split_pages, spool)
+    finally:
+        if spool is not None:
+            spool.close()
+
+
+def _analyze_pages(dm: DocumentMemory, split_pages: List[Dict[str, Any]], spool: Optional[PageSpool]) -> DocumentMemory:
     pages: List[Dict[str, Any]] = []
     layout_spans_out: List[Dict[str, Any]] = []
+    page_events = PageEventBatch(
+        dm,
+        etapa="page_analysis",
+        engine="services.page_extraction.page_pipeline",
+    )
 
-    for item in split_pages:
+    for item in _drain(split_pages):
         page_started = perf_counter()
         page_no = item["page"]
         page_text = item["text"]
         raw_spans = item.get("spans") or []
         spans = _normalize_input_spans(page_no, page_text, raw_spans)
 
-        layout_spans_out.extend(spans)
+        if spool is not None:
+            spool.extend("layout_spans_v1", spans, page=page_no)
+        else:
+            layout_spans_out.extend(spans)
 
         basic = extract_basic_page_entities(page_text)
         clinical = extract_clinical_page_entities(page_text)
@@ -972,7 +988,14 @@ def apply_page_analysis(dm: DocumentMemory) -> DocumentMemory:
             resolved_people["provider_review_state"] = "needs_review"
 
         date_candidates = _extract_date_candidates(page_text)
-        anchors = _build_anchors(page_no, page_text, spans, basic, clinical, date_candidates)
+        anchors = _build_anchors(
+            page_no,
+            page_text,
+            LayoutSpanStore.from_spans(spans),
+            basic,
+            clinical,
+            date_candidates,
+        )
 
         for a in anchors:
             has_exact_bbox = bool(a.get("bbox"))
@@ -989,46 +1012,45 @@ def apply_page_analysis(dm: DocumentMemory) -> DocumentMemory:
 
         signal_zones = _resolve_signal_zones(anchors)
 
-        pages.append(
-            {
-                "page": page_no,
-                "subdoc_id": item.get("subdoc_id"),
-                "page_text": page_text,
-                "page_taxonomy": taxonomy,
-                "people": {
-                    "patient_name": basic.get("patient_name"),
-                    "patient_confidence": resolved_people.get("patient_confidence"),
-                    "patient_review_state": resolved_people.get("patient_review_state"),
-                    "mother_name": basic.get("mother_name"),
-                    "mother_confidence": resolved_people.get("mother_confidence"),
-                    "mother_review_state": resolved_people.get("mother_review_state"),
-                    "provider_name": clinical.get("provider_name"),
-                    "provider_confidence": resolved_people.get("provider_confidence"),
-                    "provider_review_state": resolved_people.get("provider_review_state"),
-                },
-                "administrative_entities": {
-                    "rghc": basic.get("rghc"),
-                    "cpf": basic.get("cpf", []),
-                    "cnpj": basic.get("cnpj", []),
-                    "crm": basic.get("crm", []),
-                    "phones": basic.get("phones", []),
-                    "organizations": basic.get("organizations", []),
-                    "address_line": basic.get("address_line"),
-                    "cep": basic.get("cep"),
-                    "city": basic.get("city"),
-                    "uf": basic.get("uf"),
-                },
-                "date_candidates": date_candidates,
-                "clinical_entities": clinical,
-                "signal_zones": signal_zones,
-                "anchors": anchors,
-            }
-        )
+        page_item = {
+            "page": page_no,
+            "subdoc_id": item.get("subdoc_id"),
+            "page_text": page_text,
+            "page_taxonomy": taxonomy,
+            "people": {
+                "patient_name": basic.get("patient_name"),
+                "patient_confidence": resolved_people.get("patient_confidence"),
+                "patient_review_state": resolved_people.get("patient_review_state"),
+                "mother_name": basic.get("mother_name"),
+                "mother_confidence": resolved_people.get("mother_confidence"),
+                "mother_review_state": resolved_people.get("mother_review_state"),
+                "provider_name": clinical.get("provider_name"),
+                "provider_confidence": resolved_people.get("provider_confidence"),
+                "provider_review_state": resolved_people.get("provider_review_state"),
+            },
+            "administrative_entities": {
+                "rghc": basic.get("rghc"),
+                "cpf": basic.get("cpf", []),
+                "cnpj": basic.get("cnpj", []),
+                "crm": basic.get("crm", []),
+                "phones": basic.get("phones", []),
+                "organizations": basic.get("organizations", []),
+                "address_line": basic.get("address_line"),
+                "cep": basic.get("cep"),
+                "city": basic.get("city"),
+                "uf": basic.get("uf"),
+            },
+            "date_candidates": date_candidates,
+            "clinical_entities": clinical,
+            "signal_zones": signal_zones,
+            "anchors": anchors,
+        }
+        if spool is not None:
+            spool.append("page_evidence_v1", page_item, page=page_no)
+        else:
+            pages.append(page_item)
         page_duration = elapsed_ms(page_started)
-        append_processing_event(
-            dm,
-            etapa="page_analysis",
-            engine="services.page_extraction.page_pipeline",
+        page_events.add(
             status="warning" if not anchors else "success",
             detalhes={
                 "duration_ms": page_duration,
@@ -1040,19 +1062,11 @@ def apply_page_analysis(dm: DocumentMemory) -> DocumentMemory:
             page_index=page_no,
             warning_code="page_analysis_no_anchors" if not anchors else None,
         )
+    page_events.close()
 
-    dm = _make_signal(
-        dm,
-        "layout_spans_v1",
-        layout_spans_out,
-        metodo="ocr_real_spans_or_page_split_spans_v3",
-    )
+    if spool is not None:
+        dm = _make_signal_json(dm, "layout_spans_v1", spool.dump("layout_spans_v1"), metodo=_LAYOUT_SPANS_METODO)
+        return _make_signal_json(dm, "page_evidence_v1", spool.dump("page_evidence_v1"), metodo=_PAGE_EVIDENCE_METODO)
 
-    dm = _make_signal(
-        dm,
-        "page_evidence_v1",
-        pages,
-        metodo="page_split_real+entities_v7+clinical_v6+taxonomy_v2+anchors_v7+bbox_real_integration_v3",
-    )
-
-    return dm
+    dm = _make_signal(dm, "layout_spans_v1", layout_spans_out, metodo=_LAYOUT_SPANS_METODO)
+    return _make_signal(dm, "page_evidence_v1", pages, metodo=_PAGE_EVIDENCE_METODO)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+from relluna.services.page_extraction.text_scanner import register_keywords, scan_text
+
+# -----------------------------
+# Ordem de páginas sob prazo
+# -----------------------------
+#
+# Com prazo por documento, render + OCR seguem a ordem de valor esperado
+# em vez da ordem física, e param quando o custo estimado da próxima
+# página não cabe no que resta:
+#   - primeiras páginas (capa, identificação, cabeçalho do processo);
+#   - páginas `ocr_heavy` cujo texto nativo, ainda que ruim, traz termos
+#     jurídicos/médicos;
+#   - fronteiras prováveis de subdocumento (mudança de estratégia da
+#     página em relação à anterior).
+# As demais vêm depois, em ordem física.
+
+_LEGAL_HINTS = (
+    "laudo",
+    "atestado",
+    "pericia",
+    "perícia",
+    "sentença",
+    "sentenca",
+    "processo",
+    "cid",
+    "crm",
+    "diagnostico",
+    "diagnóstico",
+    "inss",
+    "beneficio",
+    "benefício",
+)
+register_keywords(_LEGAL_HINTS)
+
+_LEADING_PAGES = 3
+_OCR_STRATEGIES = {"ocr_light", "ocr_heavy"}
+
+
+def initial_page_cost_seconds(needs_ocr: bool) -> float:
+    """Custo inicial estimado (render + orientação [+ OCR]) antes de medir."""
+    if needs_ocr:
+        return float(os.getenv("RELLUNA_PAGE_COST_OCR_SECONDS", "2.0"))
+    return float(os.getenv("RELLUNA_PAGE_COST_RENDER_SECONDS", "0.3"))
+
+
+def _has_legal_hint(text: str) -> bool:
+    if not text:
+        return False
+    scan = scan_text(text)
+    return any(scan.has(hint) for hint in _LEGAL_HINTS)
+
+
+def page_priority(
+    page_no: int,
+    strategy: Dict[str, Any],
+    *,
+    native_text: str = "",
+    boundary: bool = False,
+) -> float:
+    score = 0.0
+    if page_no <= _LEADING_PAGES:
+        score += 10.0 - page_no
+    if strategy.get("strategy") == "ocr_heavy" and _has_legal_hint(native_text):
+        score += 6.0
+    if boundary:
+        score += 4.0
+    if strategy.get("strategy") in _OCR_STRATEGIES:
+        score += 1.0
+    return score
+
+
+def boundary_pages(page_numbers: Sequence[int], page_strategy_by_page: Dict[int, Dict[str, Any]]) -> List[int]:
+    out: List[int] = []
+    previous: Optional[str] = None
+    for page_no in page_numbers:
+        current = page_strategy_by_page.get(page_no, {}).get("strategy")
+        if previous is not None and current != previous:
+            out.append(page_no)
+        previous = current
+    return out
+
+
+def prioritize_pages(
+    page_numbers: Sequence[int],
+    page_strategy_by_page: Dict[int, Dict[str, Any]],
+    native_by_page: Dict[int, Dict[str, Any]],
+) -> List[int]:
+    boundaries = set(boundary_pages(page_numbers, page_strategy_by_page))
+    scored = [
+        (
+            -page_priority(
+                page_no,
+                page_strategy_by_page.get(page_no, {}),
+                native_text=str(native_by_page.get(page_no, {}).get("text") or ""),
+                boundary=page_no in boundaries,
+            ),
+            page_no,
+        )
+        for page_no in page_numbers
+    ]
+    return [page_no for _, page_no in sorted(scored)]
+
+
+class PageCostEstimator:
+    """Média móvel do custo medido por página, separada por OCR / só render."""
+
+    def __init__(self) -> None:
+        self._totals = {True: 0.0, False: 0.0}
+        self._counts = {True: 0, False: 0}
+
+    def expected(self, needs_ocr: bool) -> float:
+        if self._counts[needs_ocr]:
+            return self._totals[needs_ocr] / self._counts[needs_ocr]
+        return initial_page_cost_seconds(needs_ocr)
+
+    def observe(self, needs_ocr: bool, seconds: float) -> None:
+        self._totals[needs_ocr] += max(0.0, seconds)
+        self._counts[needs_ocr] += 1
+
+
+def needs_ocr(strategy: Dict[str, Any]) -> bool:
+    return strategy.get("strategy", "ocr_heavy") in _OCR_STRATEGIES
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.services.evidence.signals import report_critical_signal_errors, validate_critical_signal_item
+
+# -----------------------------
+# Processamento em janelas de páginas
+# -----------------------------
+#
+# Documentos acima de RELLUNA_PAGE_WINDOW_THRESHOLD páginas passam por
+# render -> OCR -> análise de página em janelas de RELLUNA_PAGE_WINDOW
+# páginas. O resultado de cada página é serializado na hora para um spool
+# em disco (um arquivo temporário por sinal) e os objetos da janela são
+# descartados; o JSON final do sinal é montado a partir do spool e é
+# idêntico ao json.dumps da lista inteira.
+
+
+def window_size() -> int:
+    return max(1, int(os.getenv("RELLUNA_PAGE_WINDOW", "32")))
+
+
+def window_threshold() -> int:
+    return int(os.getenv("RELLUNA_PAGE_WINDOW_THRESHOLD", "200"))
+
+
+def use_windowed(page_count: int) -> bool:
+    return page_count > window_threshold()
+
+
+def windows(items: Sequence[Any], size: Optional[int] = None) -> Iterator[Sequence[Any]]:
+    size = size or window_size()
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class PageSpool:
+    """
+    Spool de resultados por página. Cada `key` é um sinal-lista; os itens
+    são gravados como fragmentos JSON em ordem de chegada, com um índice
+    página -> offsets para leitura pontual.
+    """
+
+    def __init__(self, *, dm: Optional[DocumentMemory] = None) -> None:
+        self.dm = dm
+        self._files: Dict[str, Any] = {}
+        self._offsets: Dict[str, Dict[int, List[int]]] = {}
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, List[Dict[str, Any]]] = {}
+
+    def __enter__(self) -> "PageSpool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _file(self, key: str):
+        handle = self._files.get(key)
+        if handle is None:
+            handle = tempfile.TemporaryFile(mode="w+", encoding="utf-8", prefix=f"relluna_{key}_")
+            self._files[key] = handle
+            self._offsets[key] = {}
+            self._counts[key] = 0
+            self._errors[key] = []
+        return handle
+
+    def append(self, key: str, item: Any, *, page: Optional[int] = None) -> None:
+        handle = self._file(key)
+        self._errors[key].extend(validate_critical_signal_item(key, self._counts[key], item))
+        handle.seek(0, os.SEEK_END)
+        offset = handle.tell()
+        handle.write(json.dumps(item, ensure_ascii=False, default=str))
+        handle.write("\n")
+        if page is not None:
+            self._offsets[key].setdefault(int(page), []).append(offset)
+        self._counts[key] += 1
+
+    def extend(self, key: str, items: Iterable[Any], *, page: Optional[int] = None) -> None:
+        for item in items:
+            self.append(key, item, page=page)
+
+    def count(self, key: str) -> int:
+        return self._counts.get(key, 0)
+
+    def pages(self, key: str) -> List[int]:
+        return sorted(self._offsets.get(key, {}))
+
+    def read_page(self, key: str, page: int) -> List[Any]:
+        handle = self._files.get(key)
+        if handle is None:
+            return []
+        out = []
+        for offset in self._offsets[key].get(int(page), []):
+            handle.seek(offset)
+            out.append(json.loads(handle.readline()))
+        return out
+
+    def dump(self, key: str, *, by_page: bool = False) -> str:
+        """
+        JSON da lista completa, igual a json.dumps(lista, ensure_ascii=False).
+        Com `by_page`, ordenada por página (itens gravados fora de ordem, p.ex.
+        por prioridade sob prazo; só entram os gravados com `page`).
+        """
+        handle = self._files.get(key)
+        if handle is None:
+            return "[]"
+        report_critical_signal_errors(key, self._errors[key], dm=self.dm)
+        self._errors[key] = []
+        if by_page:
+            lines = []
+            for page in self.pages(key):
+                for offset in self._offsets[key][page]:
+                    handle.seek(offset)
+                    lines.append(handle.readline().rstrip("\n"))
+            return "[" + ", ".join(lines) + "]"
+        handle.seek(0)
+        return "[" + ", ".join(line.rstrip("\n") for line in handle) + "]"
+
+    def close(self) -> None:
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+        self._offsets.clear()
@@ -2,8 +2,26 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Literal
 
+from relluna.services.page_extraction.text_scanner import register_keywords, scan_text
+
 PageStrategy = Literal["native_text", "ocr_light", "ocr_heavy", "image_only"]
 
+_QUALITY_HINTS = [
+    "nome",
+    "data",
+    "cpf",
+    "cnpj",
+    "crm",
+    "paciente",
+    "hospital",
+    "beneficio",
+    "benefício",
+    "receituario",
+    "receituário",
+    "assinatura",
+]
+register_keywords(_QUALITY_HINTS)
+
 
 def _safe_text(value: Any) -> str:
     return (value or "").strip()
@@ -14,9 +32,8 @@ def _text_quality_score(text: str) -> float:
     if not text:
         return 0.0
 
-    alpha_chars = sum(1 for c in text if c.isalpha())
-    digit_chars = sum(1 for c in text if c.isdigit())
-    spaces = sum(1 for c in text if c.isspace())
+    scan = scan_text(text)
+    alpha_chars, digit_chars, spaces = scan.char_counts()
     weird_chars = len(text) - alpha_chars - digit_chars - spaces
 
     score = 0.0
@@ -25,22 +42,8 @@ def _text_quality_score(text: str) -> float:
     score += min(digit_chars / max(len(text), 1), 1.0) * 0.5
     score -= min(weird_chars / max(len(text), 1), 1.0) * 2.0
 
-    lowered = text.lower()
-    for hint in [
-        "nome",
-        "data",
-        "cpf",
-        "cnpj",
-        "crm",
-        "paciente",
-        "hospital",
-        "beneficio",
-        "benefício",
-        "receituario",
-        "receituário",
-        "assinatura",
-    ]:
-        if hint in lowered:
+    for hint in _QUALITY_HINTS:
+        if scan.has(hint):
             score += 0.5
 
     return score
@@ -2,85 +2,92 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Tuple
 
+from relluna.services.page_extraction.text_scanner import register_keywords, scan_text
+
+
+_RULE_MAP: Dict[str, List[str]] = {
+    "atestado_medico": [
+        "atestado",
+        "declaro para devidos fins",
+        "afastado(a)",
+        "afastado",
+        "internado(a)",
+        "internado",
+        "diagnostico",
+        "diagnóstico",
+        "cid",
+    ],
+    "notificacao_receita": [
+        "notificacao de receita",
+        "medicamentos ou substancias",
+        "identificacao do emitente",
+    ],
+    "receituario": [
+        "receituario",
+        "receituário",
+        "orientacao ao paciente",
+        "orientação ao paciente",
+        "retencao da farmacia",
+        "retenção da farmácia",
+        "comprimido",
+        "posologia",
+    ],
+    "registro_atendimento": [
+        "data/hora atendimento",
+        "prestador",
+        "servico",
+        "serviço",
+        "convenio",
+        "convênio",
+        "internacao",
+        "internação",
+    ],
+    "cabecalho_hospitalar": [
+        "hospital das clinicas",
+        "hospital das clínicas",
+        "faculdade de medicina",
+        "fmusp",
+        "hospital santa isabel",
+    ],
+    "formulario_administrativo": [
+        "identificacao do comprador",
+        "identificação do comprador",
+        "carimbo do fornecedor",
+        "nome do vendedor",
+    ],
+    "laudo_medico": [
+        "laudo",
+        "impressao diagnostica",
+        "impressão diagnóstica",
+        "exame",
+        "ressonancia",
+        "ressonância",
+        "tomografia",
+        "radiografia",
+    ],
+    "documento_previdenciario": [
+        "beneficio",
+        "benefício",
+        "nb",
+        "dib",
+        "indeferimento",
+        "carta de concessao",
+        "carta de concessão",
+    ],
+}
+_MEDICAL_HINTS = ["crm", "paciente", "hospital", "receituario", "receituário", "atestado"]
+
+register_keywords(k for keys in _RULE_MAP.values() for k in keys)
+register_keywords(_MEDICAL_HINTS)
+
 
 def classify_page_subtype(page_text: str) -> Dict[str, Any]:
-    t = (page_text or "").lower()
+    scan = scan_text(page_text)
 
     scores: List[Tuple[str, int]] = []
 
-    rule_map = {
-        "atestado_medico": [
-            "atestado",
-            "declaro para devidos fins",
-            "afastado(a)",
-            "afastado",
-            "internado(a)",
-            "internado",
-            "diagnostico",
-            "diagnóstico",
-            "cid",
-        ],
-        "notificacao_receita": [
-            "notificacao de receita",
-            "medicamentos ou substancias",
-            "identificacao do emitente",
-        ],
-        "receituario": [
-            "receituario",
-            "receituário",
-            "orientacao ao paciente",
-            "orientação ao paciente",
-            "retencao da farmacia",
-            "retenção da farmácia",
-            "comprimido",
-            "posologia",
-        ],
-        "registro_atendimento": [
-            "data/hora atendimento",
-            "prestador",
-            "servico",
-            "serviço",
-            "convenio",
-            "convênio",
-            "internacao",
-            "internação",
-        ],
-        "cabecalho_hospitalar": [
-            "hospital das clinicas",
-            "hospital das clínicas",
-            "faculdade de medicina",
-            "fmusp",
-            "hospital santa isabel",
-        ],
-        "formulario_administrativo": [
-            "identificacao do comprador",
-            "identificação do comprador",
-            "carimbo do fornecedor",
-            "nome do vendedor",
-        ],
-        "laudo_medico": [
-            "laudo",
-            "impressao diagnostica",
-            "impressão diagnóstica",
-            "exame",
-            "ressonancia",
-            "ressonância",
-            "tomografia",
-            "radiografia",
-        ],
-        "documento_previdenciario": [
-            "beneficio",
-            "benefício",
-            "nb",
-            "dib",
-            "indeferimento",
-            "carta de concessao",
-            "carta de concessão",
-        ],
-    }
-
-    for subtype, keys in rule_map.items():
-        score = sum(1 for k in keys if k in t)
+    for subtype, keys in _RULE_MAP.items():
+        score = scan.count_keywords(keys)
         scores.append((subtype, score))
 
     scores.sort(key=lambda x: x[1], reverse=True)
@@ -96,7 +103,7 @@ def classify_page_subtype(page_text: str) -> Dict[str, Any]:
         value = best_subtype
         confidence = min(0.70 + 0.08 * best_score, 0.95)
         components = [best_subtype]
-    elif any(k in t for k in ["crm", "paciente", "hospital", "receituario", "receituário", "atestado"]):
+    elif scan.any_keyword(_MEDICAL_HINTS):
         value = "documento_medico"
         confidence = 0.55
         components = ["documento_medico"]
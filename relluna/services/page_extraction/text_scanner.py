@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter, OrderedDict
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    # Opcional: pip install ".[scan]"
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None  # type: ignore[assignment]
+
+# -----------------------------
+# Scanner compartilhado de texto de página
+# -----------------------------
+#
+# Extratores de página, taxonomia, heurísticas de qualidade e entities_hard
+# consultam o mesmo texto. O scan de um texto é memoizado pelo hash do
+# conteúdo e guarda, sob demanda:
+#
+# - presença de palavras-chave (uma passada do autômato Aho-Corasick sobre o
+#   texto minúsculo);
+# - matches tipados (kind, start, end, groups) de cada padrão registrado,
+#   executado no máximo uma vez por texto;
+# - contagem de caracteres por classe (alfa, dígito, espaço).
+#
+# Os padrões continuam compilados individualmente: uma alternância única
+# mudaria a semântica de matches sobrepostos entre tipos (ex.: CPF cru vs
+# telefone). A alternância combinada é usada só como porta: texto sem
+# dígito nem "R$" não executa nenhum padrão numérico.
+
+SCAN_CACHE_SIZE = 512
+
+SCAN_PATTERNS: Dict[str, "re.Pattern[str]"] = {
+    "cpf_formatted": re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b"),
+    "cpf_raw": re.compile(r"(?<![A-Za-z])\d{11}(?![\d-]|[A-Za-z])"),
+    "cpf_any": re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b|\b\d{11}\b"),
+    "cnpj": re.compile(r"\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b"),
+    "crm": re.compile(r"\bCRM(?:\s*[-:/]?\s*[A-Z]{0,2})?\s*[-:]?\s*(\d{4,8})\b", re.IGNORECASE),
+    "cid": re.compile(r"\b([A-TV-Z][0-9]{2}(?:\.[0-9A-Z]{1,2})?)\b"),
+    "date_numeric": re.compile(r"\b(\d{2})/(\d{2})/(\d{4})\b"),
+    "date_textual": re.compile(
+        r"\b(\d{1,2})\s+de\s+([A-Za-zçÇãÃáàâéêíóôõú]+)\s+de\s+(\d{4})\b",
+        re.IGNORECASE,
+    ),
+    "timestamp": re.compile(r"\b(20\d{2})-(\d{2})-(\d{2})T\d{2}:\d{2}:\d{2}(?:[+-]\d{2}:\d{2}|Z)\b"),
+    "money": re.compile(r"R\$\s*([\d\.\,]+)"),
+    "phone": re.compile(r"(?<!\w)(?:\(?\d{2}\)?\s*)?(?:9?\d{4})-?\d{4}(?!\w)"),
+}
+
+# Padrões que só casam com dígito no texto (porta da alternância combinada).
+_NUMERIC_KINDS = frozenset(
+    {"cpf_formatted", "cpf_raw", "cpf_any", "cnpj", "crm", "date_numeric", "date_textual", "timestamp", "money", "phone"}
+)
+_RE_NUMERIC_GATE = re.compile(r"\d|R\$")
+
+_KEYWORDS: set = set()
+_AUTOMATON = None
+_CACHE: "OrderedDict[Tuple[int, bytes], PageTextScan]" = OrderedDict()
+_LOCK = Lock()
+
+
+class ScanMatch(NamedTuple):
+    kind: str
+    start: int
+    end: int
+    text: str
+    groups: Tuple[str, ...]
+
+
+def register_keywords(words: Iterable[str]) -> None:
+    """Inclui palavras-chave (já minúsculas) no autômato compartilhado."""
+    global _AUTOMATON
+    new = {w for w in words if w} - _KEYWORDS
+    if not new:
+        return
+    with _LOCK:
+        _KEYWORDS.update(new)
+        _AUTOMATON = None
+        _CACHE.clear()
+
+
+def _automaton():
+    global _AUTOMATON
+    if _AUTOMATON is None and ahocorasick is not None and _KEYWORDS:
+        automaton = ahocorasick.Automaton()
+        for word in _KEYWORDS:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+        _AUTOMATON = automaton
+    return _AUTOMATON
+
+
+def _keywords_in(lowered: str) -> FrozenSet[str]:
+    automaton = _automaton()
+    if automaton is None:
+        return frozenset(word for word in _KEYWORDS if word in lowered)
+    return frozenset(word for _, word in automaton.iter(lowered))
+
+
+class PageTextScan:
+    """Resultado memoizado do scan de um texto; use `scan_text()`."""
+
+    __slots__ = ("text", "_lower", "_upper", "_keywords", "_matches", "_char_counts", "_has_numeric")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._lower: Optional[str] = None
+        self._upper: Optional[str] = None
+        self._keywords: Optional[FrozenSet[str]] = None
+        self._matches: Dict[str, Tuple[ScanMatch, ...]] = {}
+        self._char_counts: Optional[Tuple[int, int, int]] = None
+        self._has_numeric: Optional[bool] = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def upper(self) -> str:
+        if self._upper is None:
+            self._upper = self.text.upper()
+        return self._upper
+
+    # ---------- palavras-chave ----------
+
+    @property
+    def keywords(self) -> FrozenSet[str]:
+        if self._keywords is None:
+            self._keywords = _keywords_in(self.lower)
+        return self._keywords
+
+    def has(self, keyword: str) -> bool:
+        """Equivale a `keyword in text.lower()`."""
+        if keyword in _KEYWORDS:
+            return keyword in self.keywords
+        return keyword in self.lower
+
+    def count_keywords(self, keywords: Iterable[str]) -> int:
+        return sum(1 for keyword in keywords if self.has(keyword))
+
+    def any_keyword(self, keywords: Iterable[str]) -> bool:
+        return any(self.has(keyword) for keyword in keywords)
+
+    # ---------- padrões ----------
+
+    def matches(self, kind: str) -> Tuple[ScanMatch, ...]:
+        found = self._matches.get(kind)
+        if found is None:
+            pattern = SCAN_PATTERNS[kind]
+            if kind in _NUMERIC_KINDS and not self._numeric_gate():
+                found = ()
+            else:
+                found = tuple(
+                    ScanMatch(kind, m.start(), m.end(), m.group(0), m.groups(default=""))
+                    for m in pattern.finditer(self.text)
+                )
+            self._matches[kind] = found
+        return found
+
+    def findall(self, kind: str) -> List[object]:
+        """Mesma forma de `re.findall` para o padrão `kind`."""
+        out: List[object] = []
+        for match in self.matches(kind):
+            if not match.groups:
+                out.append(match.text)
+            elif len(match.groups) == 1:
+                out.append(match.groups[0])
+            else:
+                out.append(match.groups)
+        return out
+
+    def _numeric_gate(self) -> bool:
+        if self._has_numeric is None:
+            self._has_numeric = _RE_NUMERIC_GATE.search(self.text) is not None
+        return self._has_numeric
+
+    # ---------- perfil de caracteres ----------
+
+    def char_counts(self) -> Tuple[int, int, int]:
+        """(alfa, dígito, espaço) com `str.isalpha/isdigit/isspace`."""
+        if self._char_counts is None:
+            alpha = digit = space = 0
+            for char, n in Counter(self.text).items():
+                if char.isalpha():
+                    alpha += n
+                if char.isdigit():
+                    digit += n
+                if char.isspace():
+                    space += n
+            self._char_counts = (alpha, digit, space)
+        return self._char_counts
+
+
+def _cache_key(text: str) -> Tuple[int, bytes]:
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return len(text), digest
+
+
+def scan_text(text: Optional[str]) -> PageTextScan:
+    text = text or ""
+    key = _cache_key(text)
+    with _LOCK:
+        scan = _CACHE.get(key)
+        if scan is not None:
+            _CACHE.move_to_end(key)
+            return scan
+    scan = PageTextScan(text)
+    with _LOCK:
+        _CACHE[key] = scan
+        while len(_CACHE) > SCAN_CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return scan
+
+
+def clear_scan_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
+
+
+def keyword_backend() -> str:
+    return "aho-corasick" if ahocorasick is not None else "substring"
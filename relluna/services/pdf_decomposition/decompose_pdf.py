@@ -1,20 +1,28 @@
 from __future__ import annotations
 
 import json
+import tempfile
 from dataclasses import asdict, is_dataclass
 from pathlib import Path
 from time import perf_counter
-from typing import List, Dict, Any, Literal
-
-from pypdf import PdfReader
+from typing import List, Dict, Any, Literal, Optional, Sequence, Tuple
 
 from relluna.core.document_memory import DocumentMemory
 from relluna.core.document_memory.types_basic import ProvenancedString
-from relluna.services.observability import append_processing_event, elapsed_ms
+from relluna.core.lazy import lazy_import
+from relluna.services.observability import PageEventBatch, append_processing_event, elapsed_ms
+from relluna.services.orchestration.admission import track_ocr_pages
+from relluna.services.orchestration.deadline import DocumentDeadline, current_deadline
 from relluna.services.page_extraction.page_normalizer import normalize_pdf_pages
 from relluna.services.page_extraction.page_ocr import OCRPage, ocr_pages, OCR_PAGE_TIMEOUT_SECONDS
+from relluna.services.page_extraction.page_scheduler import PageCostEstimator, needs_ocr, prioritize_pages
+from relluna.services.page_extraction.page_spool import PageSpool, use_windowed, window_size, windows
 from relluna.services.page_extraction.page_strategy import classify_pdf_page_strategies
 from relluna.services.page_extraction.page_taxonomy import classify_page_subtype
+from relluna.services.page_extraction.text_scanner import register_keywords, scan_text
+from relluna.infra.blob.artefact_resolver import primary_artefact, resolve_artefact_path
+
+pypdf = lazy_import("pypdf")
 
 FONTE = "services.pdf_decomposition.decompose_pdf_v5"
 
@@ -22,11 +30,15 @@ ExtractionStrategy = Literal["native", "hybrid", "ocr"]
 
 
 def _make_signal(dm: DocumentMemory, key: str, value: Any) -> DocumentMemory:
+    return _make_signal_json(dm, key, json.dumps(value, ensure_ascii=False))
+
+
+def _make_signal_json(dm: DocumentMemory, key: str, valor: str) -> DocumentMemory:
     if dm.layer2 is None:
         return dm
 
     dm.layer2.sinais_documentais[key] = ProvenancedString(
-        valor=json.dumps(value, ensure_ascii=False),
+        valor=valor,
         fonte=FONTE,
         metodo=key,
         estado="confirmado",
@@ -35,6 +47,18 @@ def _make_signal(dm: DocumentMemory, key: str, value: Any) -> DocumentMemory:
     return dm
 
 
+def _read_signal(dm: DocumentMemory, key: str) -> Any:
+    if dm.layer2 is None:
+        return None
+    sig = dm.layer2.sinais_documentais.get(key)
+    if not sig or not getattr(sig, "valor", None):
+        return None
+    try:
+        return json.loads(sig.valor)
+    except Exception:
+        return None
+
+
 def _safe_text(value: Any) -> str:
     return (value or "").strip()
 
@@ -43,7 +67,7 @@ def _extract_native_pdf_pages(path: Path) -> List[Dict[str, Any]]:
     pages: List[Dict[str, Any]] = []
 
     try:
-        reader = PdfReader(str(path))
+        reader = pypdf.PdfReader(str(path))
         for i, page in enumerate(reader.pages):
             text = _safe_text(page.extract_text())
             image_count = _count_pdf_page_images(page)
@@ -83,14 +107,21 @@ def _count_pdf_page_images(page: Any) -> int:
         return 0
 
 
+_PAGE_QUALITY_HINTS = (
+    "nome", "data", "cpf", "cnpj", "crm", "paciente", "hospital",
+    "benefício", "beneficio", "receituario", "receituário",
+    "assinatura", "endereço", "endereco",
+)
+register_keywords(_PAGE_QUALITY_HINTS)
+
+
 def _page_quality_score(text: str) -> float:
     text = _safe_text(text)
     if not text:
         return 0.0
 
-    alpha_chars = sum(1 for c in text if c.isalpha())
-    digit_chars = sum(1 for c in text if c.isdigit())
-    spaces = sum(1 for c in text if c.isspace())
+    scan = scan_text(text)
+    alpha_chars, digit_chars, spaces = scan.char_counts()
     weird_chars = len(text) - alpha_chars - digit_chars - spaces
 
     score = 0.0
@@ -99,13 +130,8 @@ def _page_quality_score(text: str) -> float:
     score += min(digit_chars / max(len(text), 1), 1.0) * 0.5
     score -= min(weird_chars / max(len(text), 1), 1.0) * 2.0
 
-    lowered = text.lower()
-    for hint in [
-        "nome", "data", "cpf", "cnpj", "crm", "paciente", "hospital",
-        "benefício", "beneficio", "receituario", "receituário",
-        "assinatura", "endereço", "endereco",
-    ]:
-        if hint in lowered:
+    for hint in _PAGE_QUALITY_HINTS:
+        if scan.has(hint):
             score += 0.5
 
     return score
@@ -199,14 +225,16 @@ def _append_normalization_events(
     *,
     duration_ms: float,
 ) -> None:
+    batch = PageEventBatch(
+        dm,
+        etapa="page_normalization",
+        engine="services.page_extraction.page_normalizer",
+    )
     for item in normalized_pages_out:
         page_no = int(item.get("page") or 0)
         warnings = [w for w in item.get("warnings") or [] if isinstance(w, dict)]
         if not warnings:
-            append_processing_event(
-                dm,
-                etapa="page_normalization",
-                engine="services.page_extraction.page_normalizer",
+            batch.add(
                 detalhes={
                     "duration_ms": duration_ms,
                     "page_index": page_no,
@@ -218,16 +246,14 @@ def _append_normalization_events(
             continue
 
         for warning in warnings:
-            append_processing_event(
-                dm,
-                etapa="page_normalization",
-                engine="services.page_extraction.page_normalizer",
+            batch.add(
                 status="warning",
                 detalhes={**warning, "duration_ms": duration_ms},
                 page_index=page_no,
                 warning_code=warning.get("code"),
                 degraded_mode=_degraded_mode_for_warning(warning),
             )
+    batch.close(duration_ms=duration_ms)
 
 
 def _append_ocr_events(
@@ -237,16 +263,18 @@ def _append_ocr_events(
     *,
     duration_ms: float,
 ) -> None:
+    batch = PageEventBatch(
+        dm,
+        etapa="page_ocr",
+        engine="services.page_extraction.page_ocr",
+    )
     for page in ocr_result:
         page_no = int(page.page)
         strategy = page_strategy_by_page.get(page_no, {}).get("strategy", "ocr_heavy")
         warnings = [w for w in getattr(page, "warnings", []) or [] if isinstance(w, dict)]
 
         if strategy in {"native_text", "image_only"}:
-            append_processing_event(
-                dm,
-                etapa="page_ocr",
-                engine="services.page_extraction.page_ocr",
+            batch.add(
                 status="warning" if strategy == "image_only" else "success",
                 detalhes={
                     "duration_ms": duration_ms,
@@ -266,10 +294,7 @@ def _append_ocr_events(
             continue
 
         if not warnings:
-            append_processing_event(
-                dm,
-                etapa="page_ocr",
-                engine="services.page_extraction.page_ocr",
+            batch.add(
                 detalhes={
                     "duration_ms": duration_ms,
                     "page_index": page_no,
@@ -282,16 +307,14 @@ def _append_ocr_events(
             continue
 
         for warning in warnings:
-            append_processing_event(
-                dm,
-                etapa="page_ocr",
-                engine="services.page_extraction.page_ocr",
+            batch.add(
                 status="warning",
                 detalhes={**warning, "duration_ms": duration_ms, "strategy": strategy},
                 page_index=page_no,
                 warning_code=warning.get("code"),
                 degraded_mode=_degraded_mode_for_warning(warning),
             )
+    batch.close(duration_ms=duration_ms)
 
 
 def _is_ocr_timeout_exception(exc: Exception) -> bool:
@@ -538,6 +561,163 @@ def _build_subdocuments(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return subdocs
 
 
+def _run_ocr(
+    normalized_pages_out: List[Dict[str, Any]],
+    native_by_page: Dict[int, Dict[str, Any]],
+    page_strategy_by_page: Dict[int, Dict[str, Any]],
+) -> List[OCRPage]:
+    ocr_candidates = _select_pages_for_ocr(normalized_pages_out, page_strategy_by_page)
+    try:
+        with track_ocr_pages(len(ocr_candidates)):
+            ocr_result = ocr_pages(ocr_candidates)
+    except RuntimeError as exc:
+        if not _is_ocr_timeout_exception(exc):
+            raise
+        ocr_result = _build_degraded_ocr_result(ocr_candidates, exc)
+    ocr_result.extend(_build_skipped_ocr_results(normalized_pages_out, native_by_page, page_strategy_by_page))
+    return sorted(ocr_result, key=lambda page: int(page.page))
+
+
+def _ocr_normalized_pages(
+    dm: DocumentMemory,
+    normalized_pages_out: List[Dict[str, Any]],
+    native_by_page: Dict[int, Dict[str, Any]],
+    page_strategy_by_page: Dict[int, Dict[str, Any]],
+) -> List[OCRPage]:
+    ocr_started = perf_counter()
+    ocr_result = _run_ocr(normalized_pages_out, native_by_page, page_strategy_by_page)
+    ocr_duration = elapsed_ms(ocr_started)
+    _append_ocr_events(
+        dm,
+        ocr_result,
+        page_strategy_by_page,
+        duration_ms=ocr_duration,
+    )
+    return ocr_result
+
+
+def _decompose_windowed(
+    dm: DocumentMemory,
+    path: Path,
+    strategy: ExtractionStrategy,
+    native_pages: List[Dict[str, Any]],
+    native_by_page: Dict[int, Dict[str, Any]],
+    page_strategy_by_page: Dict[int, Dict[str, Any]],
+    deadline: Optional[DocumentDeadline] = None,
+) -> DocumentMemory:
+    """
+    Mesmo resultado do caminho completo, mas render -> OCR de uma janela
+    de páginas por vez: imagens, OCRPage e spans da janela vão para o spool
+    e saem de memória; só texto por página segue para os subdocumentos.
+    Com `deadline`, as janelas seguem a ordem de prioridade e páginas que
+    não cabem no prazo são adiadas (ver "Prazo por documento").
+    """
+    page_numbers: Sequence[int] = [int(item["page"]) for item in native_pages]
+    order = prioritize_pages(page_numbers, page_strategy_by_page, native_by_page) if deadline else list(page_numbers)
+    estimator = PageCostEstimator()
+    deferred: List[int] = []
+    ocr_warnings: List[Dict[str, Any]] = []
+    page_warnings: List[Dict[str, Any]] = []
+    final_by_page: Dict[int, Dict[str, Any]] = {}
+    has_layout_spans = False
+    window_count = 0
+    started = perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="relluna_pages_") as image_dir, PageSpool(dm=dm) as spool:
+        for window in windows(order):
+            if deadline is not None:
+                window, late = _fit_window(window, deadline, estimator, page_strategy_by_page)
+                deferred.extend(late)
+                if not window:
+                    continue
+            window_count += 1
+            window_started = perf_counter()
+            window_deadline_started = deadline.elapsed() if deadline is not None else 0.0
+            normalized_pages_out = _normalize_page_images_to_dicts(
+                normalize_pdf_pages(str(path), out_dir=image_dir, lang="por+eng", pages=window)
+            )
+            _append_normalization_events(dm, normalized_pages_out, duration_ms=elapsed_ms(window_started))
+            for item in normalized_pages_out:
+                spool.append("normalized_pages_v1", item, page=item.get("page"))
+            page_warnings.extend(_collect_page_warnings(normalized_pages_out))
+
+            ocr_result = _ocr_normalized_pages(dm, normalized_pages_out, native_by_page, page_strategy_by_page)
+            ocr_warnings.extend(_collect_ocr_warnings(ocr_result))
+            ocr_pages_payload = _ocr_pages_to_payloads(ocr_result, page_strategy_by_page)
+            for payload in ocr_pages_payload:
+                spool.append("ocr_pages_v1", payload, page=payload["page"])
+            for span in _ocr_pages_to_layout_spans(ocr_result):
+                spool.append("layout_spans_v1", span, page=span["page"])
+                has_layout_spans = True
+            del ocr_result, normalized_pages_out
+            if deadline is not None:
+                _observe_window(
+                    estimator, window, deadline.elapsed() - window_deadline_started, page_strategy_by_page
+                )
+            _collect_final_pages(final_by_page, strategy, window, native_by_page, ocr_pages_payload)
+            # Imagens da janela já passaram pelo OCR.
+            for image in Path(image_dir).glob("*.png"):
+                image.unlink(missing_ok=True)
+
+        for page_no in deferred:
+            page_strategy = page_strategy_by_page.get(page_no, {}).get("strategy") or "ocr_heavy"
+            payload = _deferred_payload(page_no, native_by_page, page_strategy)
+            spool.append("ocr_pages_v1", payload, page=page_no)
+            _collect_final_pages(final_by_page, strategy, [page_no], native_by_page, [payload])
+
+        dm = _make_signal_json(dm, "normalized_pages_v1", spool.dump("normalized_pages_v1", by_page=True))
+        all_warnings = page_warnings + ocr_warnings
+        if all_warnings:
+            dm = _make_signal(dm, "ocr_warnings_v1", all_warnings)
+        dm = _make_signal_json(dm, "ocr_pages_v1", spool.dump("ocr_pages_v1", by_page=True))
+        dm = _make_signal_json(dm, "layout_spans_v1", spool.dump("layout_spans_v1", by_page=True))
+
+    append_processing_event(
+        dm,
+        etapa="page_windowing",
+        engine=FONTE,
+        detalhes={"page_count": len(page_numbers), "window_size": window_size(), "windows": window_count},
+    )
+    if deadline is not None:
+        _record_deadline(dm, deadline, page_numbers, order, deferred, duration_ms=elapsed_ms(started))
+
+    if strategy == "hybrid":
+        metodo = "hybrid_native_plus_ocr"
+        confianca = 0.93
+    else:
+        metodo = "normalized_pdf_pages_plus_tesseract_per_page_with_spans"
+        confianca = 0.92 if has_layout_spans else 0.90
+
+    final_pages = [final_by_page[page] for page in sorted(final_by_page)]
+    dm = _make_signal(dm, "subdocuments_v1", _build_subdocuments(final_pages))
+
+    if dm.layer2 and dm.layer2.texto_ocr_literal is None:
+        dm = _set_text_literal(
+            dm,
+            text=_reconstruct_full_text(final_pages),
+            metodo=metodo,
+            confianca=confianca,
+        )
+
+    return dm
+
+
+def _collect_final_pages(
+    final_by_page: Dict[int, Dict[str, Any]],
+    strategy: ExtractionStrategy,
+    window: Sequence[int],
+    native_by_page: Dict[int, Dict[str, Any]],
+    ocr_pages_payload: List[Dict[str, Any]],
+) -> None:
+    if strategy == "hybrid":
+        window_native = [native_by_page[page] for page in window if page in native_by_page]
+        merged = _merge_native_and_ocr_pages(window_native, ocr_pages_payload)
+    else:
+        merged = [{"page": item["page"], "text": item.get("text", "")} for item in ocr_pages_payload]
+    for item in merged:
+        final_by_page[int(item["page"])] = item
+
+
 def _set_text_literal(dm: DocumentMemory, text: str, metodo: str, confianca: float) -> DocumentMemory:
     if dm.layer2 is None:
         return dm
@@ -552,12 +732,217 @@ def _set_text_literal(dm: DocumentMemory, text: str, metodo: str, confianca: flo
     return dm
 
 
+def _finish_ocr_pages(
+    dm: DocumentMemory,
+    strategy: ExtractionStrategy,
+    native_pages: List[Dict[str, Any]],
+    ocr_pages_payload: List[Dict[str, Any]],
+    layout_spans: List[Dict[str, Any]],
+    *,
+    replace_text: bool = False,
+) -> DocumentMemory:
+    dm = _make_signal(dm, "ocr_pages_v1", ocr_pages_payload)
+    dm = _make_signal(dm, "layout_spans_v1", layout_spans)
+
+    if strategy == "hybrid":
+        final_pages = _merge_native_and_ocr_pages(native_pages, ocr_pages_payload)
+        metodo = "hybrid_native_plus_ocr"
+        confianca = 0.93
+    else:
+        final_pages = ocr_pages_payload
+        metodo = "normalized_pdf_pages_plus_tesseract_per_page_with_spans"
+        confianca = 0.92 if layout_spans else 0.90
+
+    subdocs = _build_subdocuments(final_pages)
+    dm = _make_signal(dm, "subdocuments_v1", subdocs)
+
+    literal = dm.layer2.texto_ocr_literal if dm.layer2 else None
+    if dm.layer2 and (literal is None or (replace_text and literal.fonte == FONTE)):
+        dm = _set_text_literal(
+            dm,
+            text=_reconstruct_full_text(final_pages),
+            metodo=metodo,
+            confianca=confianca,
+        )
+
+    return dm
+
+
+# -----------------------------
+# Prazo por documento
+# -----------------------------
+#
+# Com um prazo ativo (orchestration.deadline), `_decompose_windowed`
+# processa janelas de páginas na ordem de `prioritize_pages` (um open do PDF
+# por janela); a página cujo custo estimado não cabe no que resta é adiada:
+# fica com o texto nativo, status "deferred" em ocr_pages_v1, evento
+# `page_deadline` em modo degradado e entra em `deferred_pages_v1`.
+# `fill_deferred_pages` completa essas páginas depois, fora do prazo.
+
+
+def _deferred_payload(page_no: int, native_by_page: Dict[int, Dict[str, Any]], strategy: str) -> Dict[str, Any]:
+    native_text = _safe_text(native_by_page.get(page_no, {}).get("text"))
+    return {
+        "page": page_no,
+        "text": native_text,
+        "source": "native_pdf" if native_text else "deferred",
+        "status": "deferred",
+        "strategy": strategy,
+    }
+
+
+def has_deferred_pages(dm: DocumentMemory) -> bool:
+    deferred = _read_signal(dm, "deferred_pages_v1")
+    return bool(isinstance(deferred, dict) and deferred.get("pages"))
+
+
+def _fit_window(
+    window: Sequence[int],
+    deadline: DocumentDeadline,
+    estimator: PageCostEstimator,
+    page_strategy_by_page: Dict[int, Dict[str, Any]],
+) -> Tuple[List[int], List[int]]:
+    """Páginas da janela cujo custo estimado acumulado cabe no prazo; o resto é adiado."""
+    fits: List[int] = []
+    late: List[int] = []
+    planned = 0.0
+    for page_no in window:
+        cost = estimator.expected(needs_ocr(page_strategy_by_page.get(page_no, {})))
+        if deadline.remaining() < planned + cost:
+            late.append(page_no)
+            continue
+        fits.append(page_no)
+        planned += cost
+    return fits, late
+
+
+def _observe_window(
+    estimator: PageCostEstimator,
+    window: Sequence[int],
+    seconds: float,
+    page_strategy_by_page: Dict[int, Dict[str, Any]],
+) -> None:
+    # Tempo da janela dividido entre as páginas na proporção do custo esperado.
+    kinds = [needs_ocr(page_strategy_by_page.get(page_no, {})) for page_no in window]
+    weights = [estimator.expected(kind) for kind in kinds]
+    total = sum(weights) or 1.0
+    for kind, weight in zip(kinds, weights):
+        estimator.observe(kind, seconds * weight / total)
+
+
+def _record_deadline(
+    dm: DocumentMemory,
+    deadline: DocumentDeadline,
+    page_numbers: Sequence[int],
+    order: List[int],
+    deferred: List[int],
+    *,
+    duration_ms: float,
+) -> None:
+    if deferred:
+        deferred.sort()
+        _make_signal(
+            dm,
+            "deferred_pages_v1",
+            {
+                "version": 1,
+                "reason": "document_deadline",
+                "pages": deferred,
+                "budget_seconds": deadline.budget_seconds,
+            },
+        )
+        batch = PageEventBatch(dm, etapa="page_deadline", engine=FONTE)
+        for page_no in deferred:
+            batch.add(
+                status="warning",
+                detalhes={"page_index": page_no, "budget_seconds": deadline.budget_seconds},
+                page_index=page_no,
+                warning_code="deadline_page_deferred",
+                degraded_mode="deadline_deferred",
+            )
+        batch.close(duration_ms=duration_ms)
+
+    append_processing_event(
+        dm,
+        etapa="document_deadline",
+        engine=FONTE,
+        status="warning" if deferred else "success",
+        detalhes={
+            "budget_seconds": deadline.budget_seconds,
+            "elapsed_seconds": round(deadline.elapsed(), 3),
+            "page_count": len(page_numbers),
+            "processed_pages": len(page_numbers) - len(deferred),
+            "deferred_pages": len(deferred),
+            "order": order,
+        },
+    )
+
+
+def fill_deferred_pages(dm: DocumentMemory) -> DocumentMemory:
+    """
+    Job posterior ao prazo: render + OCR das páginas em `deferred_pages_v1`,
+    mescla nos sinais por página e refaz subdocumentos e texto literal.
+    """
+    deferred = _read_signal(dm, "deferred_pages_v1")
+    if not isinstance(deferred, dict) or not deferred.get("pages"):
+        return dm
+
+    artefato = primary_artefact(dm)
+    if artefato is None:
+        return dm
+    path = resolve_artefact_path(artefato)
+    if not path.exists():
+        return dm
+
+    pages = sorted(int(page) for page in deferred["pages"])
+    native_pages = _extract_native_pdf_pages(path)
+    native_by_page = _native_pages_by_page(native_pages)
+    page_strategy_by_page = _page_strategy_by_page(classify_pdf_page_strategies(native_pages))
+    strategy = (_read_signal(dm, "extraction_strategy_v1") or {}).get("strategy") or _decide_extraction_strategy(native_pages)
+
+    normalization_started = perf_counter()
+    with tempfile.TemporaryDirectory(prefix="relluna_pages_") as image_dir:
+        normalized_new = _normalize_page_images_to_dicts(
+            normalize_pdf_pages(str(path), out_dir=image_dir, lang="por+eng", pages=pages)
+        )
+        _append_normalization_events(dm, normalized_new, duration_ms=elapsed_ms(normalization_started))
+        ocr_result = _ocr_normalized_pages(dm, normalized_new, native_by_page, page_strategy_by_page)
+
+    filled = set(pages)
+    normalized_pages_out = [
+        item for item in _read_signal(dm, "normalized_pages_v1") or [] if int(item.get("page") or 0) not in filled
+    ] + normalized_new
+    normalized_pages_out.sort(key=lambda item: int(item.get("page") or 0))
+    dm = _make_signal(dm, "normalized_pages_v1", normalized_pages_out)
+
+    new_warnings = _collect_page_warnings(normalized_new) + _collect_ocr_warnings(ocr_result)
+    if new_warnings:
+        dm = _make_signal(dm, "ocr_warnings_v1", (_read_signal(dm, "ocr_warnings_v1") or []) + new_warnings)
+
+    ocr_pages_payload = [
+        item for item in _read_signal(dm, "ocr_pages_v1") or [] if int(item.get("page") or 0) not in filled
+    ] + _ocr_pages_to_payloads(ocr_result, page_strategy_by_page)
+    ocr_pages_payload.sort(key=lambda item: int(item["page"]))
+    layout_spans = (_read_signal(dm, "layout_spans_v1") or []) + _ocr_pages_to_layout_spans(ocr_result)
+
+    if dm.layer2 is not None:
+        dm.layer2.sinais_documentais.pop("deferred_pages_v1", None)
+    append_processing_event(
+        dm,
+        etapa="page_deadline_fill",
+        engine=FONTE,
+        detalhes={"pages": pages, "budget_seconds": deferred.get("budget_seconds")},
+    )
+
+    return _finish_ocr_pages(dm, strategy, native_pages, ocr_pages_payload, layout_spans, replace_text=True)
+
+
 def decompose_pdf_into_subdocuments(dm: DocumentMemory) -> DocumentMemory:
     if dm.layer1 is None or not dm.layer1.artefatos:
         return dm
 
     artefato = dm.layer1.artefatos[0]
-    path = Path(artefato.uri)
+    path = resolve_artefact_path(artefato)
 
     if not path.exists() or path.suffix.lower() != ".pdf":
         return dm
@@ -571,6 +956,12 @@ def decompose_pdf_into_subdocuments(dm: DocumentMemory) -> DocumentMemory:
     dm = _make_signal(dm, "extraction_strategy_v1", {"strategy": strategy})
     dm = _make_signal(dm, "page_strategy_v1", {"version": 1, "pages": page_strategies})
 
+    deadline = current_deadline()
+    if strategy != "native" and native_pages and (deadline is not None or use_windowed(len(native_pages))):
+        return _decompose_windowed(
+            dm, path, strategy, native_pages, native_by_page, page_strategy_by_page, deadline=deadline
+        )
+
     if strategy == "native":
         subdocs = _build_subdocuments(native_pages)
         dm = _make_signal(dm, "subdocuments_v1", subdocs)
@@ -599,23 +990,7 @@ def decompose_pdf_into_subdocuments(dm: DocumentMemory) -> DocumentMemory:
     if ocr_warnings:
         dm = _make_signal(dm, "ocr_warnings_v1", ocr_warnings)
 
-    ocr_candidates = _select_pages_for_ocr(normalized_pages_out, page_strategy_by_page)
-    ocr_started = perf_counter()
-    try:
-        ocr_result = ocr_pages(ocr_candidates)
-    except RuntimeError as exc:
-        if not _is_ocr_timeout_exception(exc):
-            raise
-        ocr_result = _build_degraded_ocr_result(ocr_candidates, exc)
-    ocr_duration = elapsed_ms(ocr_started)
-    ocr_result.extend(_build_skipped_ocr_results(normalized_pages_out, native_by_page, page_strategy_by_page))
-    ocr_result = sorted(ocr_result, key=lambda page: int(page.page))
-    _append_ocr_events(
-        dm,
-        ocr_result,
-        page_strategy_by_page,
-        duration_ms=ocr_duration,
-    )
+    ocr_result = _ocr_normalized_pages(dm, normalized_pages_out, native_by_page, page_strategy_by_page)
 
     ocr_warnings.extend(_collect_ocr_warnings(ocr_result))
     if ocr_warnings:
@@ -624,27 +999,4 @@ def decompose_pdf_into_subdocuments(dm: DocumentMemory) -> DocumentMemory:
     ocr_pages_payload = _ocr_pages_to_payloads(ocr_result, page_strategy_by_page)
     layout_spans = _ocr_pages_to_layout_spans(ocr_result)
 
-    dm = _make_signal(dm, "ocr_pages_v1", ocr_pages_payload)
-    dm = _make_signal(dm, "layout_spans_v1", layout_spans)
-
-    if strategy == "hybrid":
-        final_pages = _merge_native_and_ocr_pages(native_pages, ocr_pages_payload)
-        metodo = "hybrid_native_plus_ocr"
-        confianca = 0.93
-    else:
-        final_pages = ocr_pages_payload
-        metodo = "normalized_pdf_pages_plus_tesseract_per_page_with_spans"
-        confianca = 0.92 if layout_spans else 0.90
-
-    subdocs = _build_subdocuments(final_pages)
-    dm = _make_signal(dm, "subdocuments_v1", subdocs)
-
-    if dm.layer2 and dm.layer2.texto_ocr_literal is None:
-        dm = _set_text_literal(
-            dm,
-            text=_reconstruct_full_text(final_pages),
-            metodo=metodo,
-            confianca=confianca,
-        )
-
-    return dm
+    return _finish_ocr_pages(dm, strategy, native_pages, ocr_pages_payload, layout_spans)
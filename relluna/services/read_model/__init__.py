@@ -1,3 +1,11 @@
-from .endpoints import router as documents_router
-
 __all__ = ["documents_router"]
+
+
+def __getattr__(name: str):
+    # O router (FastAPI + store Mongo) só é importado por quem registra as
+    # rotas; builders e CLIs que usam os submódulos não pagam esse custo.
+    if name == "documents_router":
+        from .endpoints import router
+
+        return router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
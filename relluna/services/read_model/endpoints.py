@@ -6,6 +6,9 @@ from pydantic import ValidationError
 from .store import ReadModelStore
 from .causal_timeline_model import build_causal_timeline_from_dm, CausalTimeline
 from relluna.services.read_model.text_search import search_read_models_text
+from relluna.services.read_model.semantic_search import semantic_search as run_semantic_search
+from relluna.infra.embeddings import get_embedder
+from relluna.services.entities import person_index
 from relluna.services.read_model import store as read_model_store
 from relluna.infra import mongo_store
 from relluna.core.document_memory import DocumentMemory
@@ -113,6 +116,60 @@ def search_text(
     }
 
 
+@router.get("/semantic_search")
+async def semantic_search(
+    q: str = Query(..., min_length=1, description="Consulta em linguagem natural"),
+    limit: int = Query(20, ge=1, le=100),
+    alpha: float = Query(0.6, ge=0.0, le=1.0, description="Peso do cosseno (1 - alpha vai para o BM25)"),
+):
+    """
+    Busca híbrida sobre o READ MODEL e as páginas indexadas:
+    similaridade de embeddings + BM25 sobre os candidatos do índice vetorial.
+    """
+    hits = await run_semantic_search(ReadModelStore().get_documents, q, limit=limit, alpha=alpha)
+
+    return {
+        "query": q,
+        "embedder": get_embedder().name,
+        "count": len(hits),
+        "hits": [
+            {
+                "documentid": h.documentid,
+                "score": h.score,
+                "semantic_score": h.semantic_score,
+                "bm25_score": h.bm25_score,
+                "page": h.page,
+                "snippet": h.snippet,
+            }
+            for h in hits
+        ],
+    }
+
+
+@router.get("/people/documents")
+async def find_person_documents(
+    name: Optional[str] = Query(None, description="Nome da pessoa"),
+    cpf: Optional[str] = Query(None, description="CPF (com ou sem máscara)"),
+    birth_date: Optional[str] = Query(None, description="Nascimento ISO ou dd/mm/aaaa"),
+    role: Optional[str] = Query("patient", description="patient, mother ou provider"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Documentos em que a pessoa aparece, via índice de chaves de bloqueio
+    (sobrenome, fonético, CPF, nascimento) em vez de varrer a base.
+    """
+    if not (name or cpf):
+        raise HTTPException(status_code=400, detail="Informe name ou cpf")
+    hits = await person_index.find_person_documents(name, cpf=cpf, birth_date=birth_date, role=role, limit=limit)
+    return {"count": len(hits), "hits": hits}
+
+
+@router.get("/documents/{document_id}/same_patient")
+async def get_same_patient_documents(document_id: str, limit: int = Query(50, ge=1, le=500)):
+    hits = await person_index.same_patient_documents(document_id, limit=limit)
+    return {"document_id": document_id, "count": len(hits), "hits": hits}
+
+
 @router.get("/documents/{document_id}/causal_timeline", response_model=CausalTimeline)
 async def get_causal_timeline(document_id: str) -> CausalTimeline:
     """
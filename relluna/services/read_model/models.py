@@ -19,6 +19,14 @@ class TimelinePanelRef(BaseModel):
     timeline_consistency_score: Optional[float] = None
 
 
+class PagesPanelRef(BaseModel):
+    endpoint: str
+    total_pages: int = 0
+    anchored_pages: int = 0
+    taxonomy_counts: Dict[str, int] = Field(default_factory=dict)
+    subdoc_ids: List[str] = Field(default_factory=list)
+
+
 class DocumentReadModel(BaseModel):
     """
     Read Model do painel (materialized view).
@@ -52,6 +60,8 @@ class DocumentReadModel(BaseModel):
     # links rápidos p/ artefatos (raw, thumb, derived etc)
     artefacts: Dict[str, str] = Field(default_factory=dict)
     timeline: Optional[TimelinePanelRef] = None
+    # resumo das páginas; o conteúdo fica nos registros de página
+    pages: Optional[PagesPanelRef] = None
 
     # indicadores operacionais/semânticos
     confidence_indicators: Dict[str, Any] = Field(default_factory=dict)
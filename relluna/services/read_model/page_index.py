@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.infra import page_store
+
+# -----------------------------
+# Páginas como registros próprios
+# -----------------------------
+#
+# `page_evidence_v1`, `ocr_pages_v1` e `page_unit_v1` ficam no
+# DocumentMemory como um JSON por sinal (comprimido no Mongo pelo
+# signal_codec, ligado por padrão). A projeção do read model também
+# grava cada página em `page_store` (documento, página), com os campos de
+# consulta (taxonomia, subdocumento, rótulos de âncora) e os três blocos
+# daquela página; `/documents/{id}/pages` serve fatias sem decodificar os
+# sinais inteiros. O read model guarda só o resumo (`pages`).
+
+
+def enabled() -> bool:
+    return os.getenv("RELLUNA_PAGE_STORE", "1").strip().lower() not in {"0", "false", "off", "no"}
+
+
+def _signal_json(dm: DocumentMemory, key: str) -> List[Dict[str, Any]]:
+    if dm.layer2 is None:
+        return []
+    sig = dm.layer2.sinais_documentais.get(key)
+    if not sig or not getattr(sig, "valor", None):
+        return []
+    try:
+        data = json.loads(sig.valor)
+    except Exception:
+        return []
+    return [item for item in data if isinstance(item, dict)] if isinstance(data, list) else []
+
+
+def _by_page(items: List[Dict[str, Any]], key: str) -> Dict[int, Dict[str, Any]]:
+    out: Dict[int, Dict[str, Any]] = {}
+    for item in items:
+        try:
+            page = int(item.get(key) or 0)
+        except (TypeError, ValueError):
+            continue
+        if page > 0:
+            out.setdefault(page, item)
+    return out
+
+
+def page_records(dm: DocumentMemory) -> List[Dict[str, Any]]:
+    evidence = _by_page(_signal_json(dm, "page_evidence_v1"), "page")
+    ocr = _by_page(_signal_json(dm, "ocr_pages_v1"), "page")
+    units = _by_page(_signal_json(dm, "page_unit_v1"), "page_index")
+
+    records: List[Dict[str, Any]] = []
+    for page in sorted(set(evidence) | set(ocr) | set(units)):
+        ev = evidence.get(page) or {}
+        oc = ocr.get(page) or {}
+        unit = units.get(page) or {}
+        taxonomy = ev.get("page_taxonomy") or {}
+        anchors = [anchor for anchor in ev.get("anchors") or [] if isinstance(anchor, dict)]
+        text = ev.get("page_text") or oc.get("text") or ""
+        records.append(
+            {
+                "page": page,
+                "subdoc_id": ev.get("subdoc_id") or unit.get("subdoc_id"),
+                "taxonomy": taxonomy.get("value") if isinstance(taxonomy, dict) else None,
+                "taxonomy_confidence": taxonomy.get("confidence") if isinstance(taxonomy, dict) else None,
+                "strategy": oc.get("strategy"),
+                "ocr_status": oc.get("status"),
+                "anchor_labels": sorted({str(anchor["label"]) for anchor in anchors if anchor.get("label")}),
+                "anchor_count": len(anchors),
+                "text_chars": len(text),
+                "evidence": ev or None,
+                "ocr": oc or None,
+                "unit": unit or None,
+            }
+        )
+    return records
+
+
+def pages_summary(documentid: str, records: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not records:
+        return None
+    taxonomy_counts = Counter(record["taxonomy"] for record in records if record.get("taxonomy"))
+    return {
+        "endpoint": f"/documents/{documentid}/pages",
+        "total_pages": len(records),
+        "anchored_pages": sum(1 for record in records if record.get("anchor_count")),
+        "taxonomy_counts": dict(sorted(taxonomy_counts.items())),
+        "subdoc_ids": list(dict.fromkeys(record["subdoc_id"] for record in records if record.get("subdoc_id"))),
+    }
+
+
+async def index_document(dm: DocumentMemory, records: Optional[List[Dict[str, Any]]] = None) -> int:
+    if records is None:
+        records = page_records(dm)
+    return await page_store.replace_document(dm.layer0.documentid, records)
+
+
+async def ensure_indexed(dm: DocumentMemory) -> int:
+    """Documentos só extraídos (ou anteriores ao índice) são indexados na primeira leitura."""
+    count = await page_store.count_pages(dm.layer0.documentid)
+    if count:
+        return count
+    return await index_document(dm)
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 from datetime import datetime, UTC
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from relluna.core.document_memory import (
     DocumentMemory,
     Layer4SemanticNormalization,
 )
 from relluna.services.derivatives.layer5 import apply_layer5
+from relluna.services.entities import person_index
+from relluna.services.read_model import page_index, semantic_search
 from relluna.services.read_model.models import DocumentReadModel
 from relluna.services.read_model.store import ReadModelStore
 from relluna.services.read_model.timeline_builder import build_document_timeline_read_model
@@ -97,7 +99,9 @@ def _short_executive_summary(
     return "; ".join(parts) if parts else "Documento processado"
 
 
-def project_dm_to_read_model(dm: DocumentMemory) -> DocumentReadModel:
+def project_dm_to_read_model(
+    dm: DocumentMemory, page_records: Optional[List[Dict[str, Any]]] = None
+) -> DocumentReadModel:
     document_id = dm.layer0.documentid
     media_type = dm.layer1.midia.value if dm.layer1 else None
 
@@ -255,6 +259,9 @@ def project_dm_to_read_model(dm: DocumentMemory) -> DocumentReadModel:
             "total_review_items": int(_get(review_items, "total_items", 0) or 0),
             "anchored_events": int(_get(timeline_public, "summary.anchored_events", 0) or 0),
         },
+        pages=page_index.pages_summary(
+            document_id, page_records if page_records is not None else page_index.page_records(dm)
+        ),
         needs_review_count=needs_review_count,
         doc_type=doc_type,
         search_text=search_text,
@@ -263,8 +270,41 @@ def project_dm_to_read_model(dm: DocumentMemory) -> DocumentReadModel:
     )
 
 
-async def persist_document_read_model(dm: DocumentMemory) -> DocumentReadModel:
-    read_model = project_dm_to_read_model(dm)
+async def persist_document_read_model(
+    dm: DocumentMemory,
+    *,
+    charge_writes: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> DocumentReadModel:
+    """
+    Grava o read model e as projeções derivadas (índice semântico, pessoas,
+    páginas). `charge_writes(n)` é aguardado depois de cada escrita com o
+    número de registros gravados (teto de escritas do reprocessamento).
+    """
+
+    async def charge(writes: int) -> None:
+        if charge_writes is not None and writes:
+            await charge_writes(writes)
+
+    records = page_index.page_records(dm)
+    read_model = project_dm_to_read_model(dm, records)
     store = ReadModelStore()
     await store.upsert(read_model)
+    await charge(1)
+    if semantic_search.indexing_enabled():
+        try:
+            await charge(await semantic_search.index_document(read_model.model_dump(mode="python"), dm))
+        except Exception:
+            # Índice semântico é derivado e reconstruível; não bloqueia a projeção.
+            pass
+    if person_index.enabled():
+        try:
+            await charge(await person_index.index_document(dm))
+        except Exception:
+            pass
+    if page_index.enabled():
+        try:
+            await charge(await page_index.index_document(dm, records))
+        except Exception:
+            # Registros de página são reconstruíveis (`ensure_indexed`).
+            pass
     return read_model
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from relluna.core.document_memory import DocumentMemory
+from relluna.infra.embeddings import get_embedder
+from relluna.infra.vector_index import VectorIndex
+from relluna.services.evidence.signals import load_critical_signal_json
+from relluna.services.read_model.text_search import (
+    _make_snippet,
+    _safe_get,
+    _tokens,
+    build_search_corpus,
+)
+
+# -----------------------------
+# Busca semântica híbrida (embeddings + BM25)
+# -----------------------------
+#
+# Unidades indexadas por documento:
+#   doc:{document_id}          corpus do read model (título, entidades, resumo...)
+#   page:{document_id}:{page}  texto da página (page_evidence_v1)
+#
+# A projeção do read model reindexa o documento. A consulta busca as
+# unidades mais próximas no índice vetorial, carrega só os read models
+# desses documentos e reordena: alpha * cos + (1 - alpha) * bm25
+# normalizado, com o BM25 calculado sobre os candidatos (nunca sobre a base
+# inteira).
+#
+# O índice vetorial faz I/O de disco (log de deltas, snapshots): aqui ele é
+# sempre chamado via asyncio.to_thread. `rebuild_index` (CLI
+# `relluna reindex-vectors`) reconstrói tudo a partir dos read models.
+
+
+def unit_max_chars() -> int:
+    return int(os.getenv("RELLUNA_EMBED_MAX_CHARS", "4000"))
+
+
+def indexing_enabled() -> bool:
+    return os.getenv("RELLUNA_SEMANTIC_INDEX", "1").strip().lower() not in {"0", "false", "off", "no"}
+
+
+_INDEX: Optional[VectorIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> VectorIndex:
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            directory = os.getenv("RELLUNA_VECTOR_INDEX_DIR", "").strip()
+            _INDEX = VectorIndex(Path(directory) if directory else None)
+    return _INDEX
+
+
+def reset_index() -> None:
+    global _INDEX
+    _INDEX = None
+
+
+def _document_id(read_model: Any) -> str:
+    return str(
+        _safe_get(read_model, "document_id", "")
+        or _safe_get(read_model, "documentid", "")
+        or _safe_get(read_model, "layer0.documentid", "")
+    )
+
+
+def _page_texts(dm: Optional[DocumentMemory]) -> List[Tuple[int, str]]:
+    if dm is None or dm.layer2 is None:
+        return []
+    pages = load_critical_signal_json(dm, "page_evidence_v1") or []
+    out: List[Tuple[int, str]] = []
+    for page in pages if isinstance(pages, list) else []:
+        if isinstance(page, dict) and page.get("page") is not None and (page.get("page_text") or "").strip():
+            out.append((int(page["page"]), page["page_text"].strip()))
+    return out
+
+
+def document_units(read_model: Any, dm: Optional[DocumentMemory] = None) -> List[Tuple[str, str]]:
+    document_id = _document_id(read_model)
+    limit = unit_max_chars()
+    units: List[Tuple[str, str]] = []
+    corpus, _ = build_search_corpus(read_model)
+    if corpus:
+        units.append((f"doc:{document_id}", corpus[:limit]))
+    for page, text in _page_texts(dm):
+        units.append((f"page:{document_id}:{page}", text[:limit]))
+    return units
+
+
+async def index_document(read_model: Any, dm: Optional[DocumentMemory] = None) -> int:
+    """(Re)indexa as unidades do documento; páginas que sumiram saem do índice."""
+    document_id = _document_id(read_model)
+    if not document_id:
+        return 0
+    index = await asyncio.to_thread(get_index)
+    await asyncio.to_thread(index.delete_prefix, f"page:{document_id}:")
+    units = document_units(read_model, dm)
+    if not units:
+        return 0
+    embedder = get_embedder()
+    vectors = await embedder.embed([text for _, text in units])
+    await asyncio.to_thread(index.add, [unit_id for unit_id, _ in units], vectors, embedder=embedder.name)
+    return len(units)
+
+
+async def remove_document(document_id: str) -> int:
+    index = await asyncio.to_thread(get_index)
+    removed = await asyncio.to_thread(index.delete, [f"doc:{document_id}"])
+    return removed + await asyncio.to_thread(index.delete_prefix, f"page:{document_id}:")
+
+
+async def rebuild_index(
+    read_models: AsyncIterable[Any],
+    load_dm: Callable[[str], Awaitable[Optional[DocumentMemory]]],
+) -> Tuple[int, int]:
+    """
+    Esvazia o índice e reindexa cada read model (páginas vindas da
+    DocumentMemory de `load_dm`). Devolve (documentos, unidades).
+    """
+    index = await asyncio.to_thread(get_index)
+    await asyncio.to_thread(index.reset)
+    documents = units = 0
+    async for read_model in read_models:
+        document_id = _document_id(read_model)
+        if not document_id:
+            continue
+        units += await index_document(read_model, await load_dm(document_id))
+        documents += 1
+    await asyncio.to_thread(index.save)
+    return documents, units
+
+
+class BM25:
+    """Okapi BM25 sobre os tokens normalizados de text_search."""
+
+    def __init__(self, corpus: Dict[str, List[str]], *, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.docs = {doc_id: Counter(tokens) for doc_id, tokens in corpus.items()}
+        self.lengths = {doc_id: len(tokens) for doc_id, tokens in corpus.items()}
+        self.avg_length = (sum(self.lengths.values()) / len(self.lengths)) if self.lengths else 0.0
+        df: Counter = Counter()
+        for counts in self.docs.values():
+            df.update(counts.keys())
+        n = len(self.docs)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def scores(self, query_tokens: Iterable[str]) -> Dict[str, float]:
+        terms = [term for term in set(query_tokens) if term in self.idf]
+        out: Dict[str, float] = {}
+        if not terms:
+            return out
+        for doc_id, counts in self.docs.items():
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / (self.avg_length or 1.0))
+            score = sum(
+                self.idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                for term in terms
+                if counts.get(term)
+            )
+            if score > 0:
+                out[doc_id] = score
+        return out
+
+
+@dataclass(frozen=True)
+class SemanticHit:
+    documentid: str
+    score: float
+    semantic_score: float
+    bm25_score: float
+    page: Optional[int]
+    snippet: str
+
+
+def _semantic_by_document(unit_hits: List[Tuple[str, float]]) -> Dict[str, Tuple[float, Optional[int]]]:
+    best: Dict[str, Tuple[float, Optional[int]]] = {}
+    for unit_id, score in unit_hits:
+        kind, _, rest = unit_id.partition(":")
+        if kind == "page":
+            document_id, _, page = rest.rpartition(":")
+            page_no: Optional[int] = int(page)
+        else:
+            document_id, page_no = rest, None
+        if document_id not in best or score > best[document_id][0]:
+            best[document_id] = (score, page_no)
+    return best
+
+
+async def semantic_search(
+    load: Callable[[List[str]], Awaitable[List[Any]]],
+    query: str,
+    *,
+    limit: int = 20,
+    alpha: float = 0.6,
+) -> List[SemanticHit]:
+    """`load(document_ids)` devolve os read models dos candidatos do índice vetorial."""
+    q = (query or "").strip()
+    if not q:
+        return []
+
+    embedder = get_embedder()
+    query_vector = (await embedder.embed([q]))[0]
+    index = await asyncio.to_thread(get_index)
+    unit_hits = await asyncio.to_thread(index.search, query_vector, max(limit * 5, 50), embedder=embedder.name)
+    candidates = _semantic_by_document(unit_hits)
+    if not candidates:
+        return []
+
+    by_id: Dict[str, Any] = {}
+    corpora: Dict[str, Tuple[str, str]] = {}
+    for rm in await load(sorted(candidates)):
+        document_id = _document_id(rm)
+        if document_id in candidates:
+            by_id[document_id] = rm
+            corpora[document_id] = build_search_corpus(rm)
+    # Candidato sem read model (removido depois da indexação) fica de fora.
+    semantic = {doc_id: hit for doc_id, hit in candidates.items() if doc_id in by_id}
+
+    bm25 = BM25({doc_id: _tokens(corpus) for doc_id, (corpus, _) in corpora.items()}).scores(_tokens(q))
+    bm25_max = max(bm25.values(), default=0.0)
+
+    hits: List[SemanticHit] = []
+    for document_id in set(semantic) | set(bm25):
+        sem_score, page = semantic.get(document_id, (0.0, None))
+        lexical = bm25.get(document_id, 0.0)
+        lexical_norm = lexical / bm25_max if bm25_max else 0.0
+        combined = alpha * max(sem_score, 0.0) + (1 - alpha) * lexical_norm
+        if combined <= 0:
+            continue
+        hits.append(
+            SemanticHit(
+                documentid=document_id,
+                score=round(combined, 6),
+                semantic_score=round(sem_score, 6),
+                bm25_score=round(lexical, 6),
+                page=page,
+                snippet=_make_snippet(corpora[document_id][1], q),
+            )
+        )
+
+    hits.sort(key=lambda hit: (-hit.score, hit.documentid))
+    return hits[: max(1, int(limit))]
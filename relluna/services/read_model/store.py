@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from relluna.infra.mongo import get_db
 from .schema import ReadModelDocument
@@ -203,6 +203,32 @@ class ReadModelStore:
         return results[:limit]
 
 
+    async def get_documents(self, document_ids: List[str]) -> List[dict]:
+        if not document_ids:
+            return []
+        if self.col is None:
+            return [_MEMORY_READ_MODEL_STORE[doc_id] for doc_id in document_ids if doc_id in _MEMORY_READ_MODEL_STORE]
+        cursor = self.col.find({"document_id": {"$in": list(document_ids)}}, {"_id": 0})
+        if hasattr(cursor, "__aiter__"):
+            return [doc async for doc in cursor]
+        return list(cursor)
+
+
+    async def iter_documents(self) -> AsyncIterator[dict]:
+        """Todos os read models, em streaming (reconstrução de índices derivados)."""
+        if self.col is None:
+            for doc in list(_MEMORY_READ_MODEL_STORE.values()):
+                yield doc
+            return
+        cursor = self.col.find({}, {"_id": 0})
+        if hasattr(cursor, "__aiter__"):
+            async for doc in cursor:
+                yield doc
+        else:
+            for doc in cursor:
+                yield doc
+
+
 def list_all() -> List[dict]:
     return list(_MEMORY_READ_MODEL_STORE.values())
 
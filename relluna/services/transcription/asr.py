@@ -15,6 +15,7 @@ from relluna.core.document_memory.types_basic import (
     EvidenceRef,
     InferenceMeta,
 )
+from relluna.infra.blob.artefact_resolver import resolve_artefact_path
 
 _SOURCE = "asr.whisper"
 _METHOD = "whisper.transcribe"
@@ -134,12 +135,7 @@ def _pick_primary_artifact_path(dm: DocumentMemory) -> Optional[Path]:
             original = a
             break
 
-    target = original or arts[0]
-    uri = getattr(target, "uri", None)
-    if not uri:
-        return None
-
-    return Path(uri)
+    return resolve_artefact_path(original or arts[0])
 
 
 def apply_transcription_to_layer2(dm: DocumentMemory, opts: Optional[ASROptions] = None) -> DocumentMemory:
@@ -0,0 +1,195 @@
+"""
+Mede o custo de documentos escalados fast -> standard com reprocessamento
+completo vs. escalada incremental (reuso das etapas cujas entradas não mudaram).
+
+Usa o mesmo cenário dos goldens de `tests/test_fast_path_escalation.py`:
+preflight forçado para fast, `extract_basic` sintético com spans sem bbox
+(âncoras sem bbox forçam a escalada) e as etapas reais de página/entidades.
+
+Usage:
+    python scripts/benchmark_escalation.py --docs 20 --pages 30
+    python scripts/benchmark_escalation.py --json out.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+    ProvenancedString,
+)
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.services.ingestion import api
+from relluna.services.page_extraction import text_scanner
+
+_LINES = [
+    "Paciente: MARIA DA SILVA SOUZA",
+    "Prestador: DR JOAO PEREIRA SANTOS",
+    "CRM-SP 123456",
+    "Data: 05/03/2024",
+    "CID F32.1",
+    "Deverá permanecer afastado por 15 dias.",
+    "Atesto para os devidos fins.",
+    "São Paulo, 12 de março de 2024",
+]
+
+
+def _synthetic_spans(pages: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {"page": page, "text": rng.choice(_LINES), "bbox": None}
+        for page in range(1, pages + 1)
+        for _ in range(rng.randint(6, 14))
+    ]
+
+
+def _build_dm(pdf_path: Path, idx: int) -> DocumentMemory:
+    return DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid=f"escalation-bench-{idx}",
+            contentfingerprint=f"{idx:064x}",
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="benchmark",
+            original_filename=pdf_path.name,
+            mimetype="application/pdf",
+            processingevents=[],
+        ),
+        layer1=Layer1Artefatos(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[
+                ArtefatoBruto(
+                    id=f"escalation-bench-{idx}",
+                    tipo=ArtefatoTipo.original,
+                    uri=str(pdf_path),
+                    nome=pdf_path.name,
+                    mimetype="application/pdf",
+                    tamanho_bytes=pdf_path.stat().st_size,
+                )
+            ],
+        ),
+        layer2=Layer2Evidence(),
+    )
+
+
+def _patch_pipeline(spans_by_doc: Dict[str, str], *, incremental: bool) -> None:
+    def fake_extract_basic(dm: DocumentMemory) -> DocumentMemory:
+        dm.layer2 = Layer2Evidence()
+        dm.layer2.sinais_documentais["layout_spans_v1"] = ProvenancedString(
+            valor=spans_by_doc[dm.layer0.documentid],
+            fonte="benchmark",
+            metodo="fixture",
+            estado="confirmado",
+            confianca=1.0,
+        )
+        return dm
+
+    api._collect_preflight_signals = lambda dm: api.PreflightSignals(
+        media_type=MediaType.documento.value,
+        page_count=1,
+        has_native_text=True,
+        native_rotation=0,
+        is_pdf=True,
+        original_filename=dm.layer0.original_filename,
+    )
+    api.extract_basic = fake_extract_basic
+    api.decompose_pdf_into_subdocuments = lambda dm: dm
+    if not incremental:
+        # Reprocessamento completo: descarta o ledger do fast path.
+        original = _ORIGINALS["_run_standard_pipeline"]
+        api._run_standard_pipeline = lambda dm, reuse_from=None: original(dm)
+    else:
+        api._run_standard_pipeline = _ORIGINALS["_run_standard_pipeline"]
+
+
+_ORIGINALS = {
+    name: getattr(api, name)
+    for name in ("_collect_preflight_signals", "extract_basic", "decompose_pdf_into_subdocuments", "_run_standard_pipeline")
+}
+
+
+async def _run(pdf_path: Path, spans_by_doc: Dict[str, str], *, incremental: bool) -> Dict[str, Any]:
+    _patch_pipeline(spans_by_doc, incremental=incremental)
+    text_scanner.clear_scan_cache()
+    escalated = 0
+    reused = 0
+    started = time.perf_counter()
+    for idx in range(len(spans_by_doc)):
+        dm = await api._run_extract_pipeline(_build_dm(pdf_path, idx))
+        stages = [event.etapa for event in dm.layer0.processingevents]
+        escalated += int("processing_escalation" in stages)
+        reused += sum(1 for event in dm.layer0.processingevents if (event.detalhes or {}).get("reused"))
+    elapsed = (time.perf_counter() - started) * 1000.0
+    return {
+        "ms_per_doc": round(elapsed / max(len(spans_by_doc), 1), 3),
+        "escalated": escalated,
+        "reused_stage_runs": reused,
+    }
+
+
+async def run(docs: int, pages: int, seed: int) -> Dict[str, Any]:
+    # Mede só o reuso da escalada, sem o memo entre execuções.
+    os.environ["RELLUNA_STAGE_MEMO"] = "0"
+    rng = random.Random(seed)
+    spans_by_doc = {
+        f"escalation-bench-{idx}": json.dumps(_synthetic_spans(pages, rng), ensure_ascii=False)
+        for idx in range(docs)
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / "escalated.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4\n")
+        try:
+            full = await _run(pdf_path, spans_by_doc, incremental=False)
+            incremental = await _run(pdf_path, spans_by_doc, incremental=True)
+        finally:
+            for name, value in _ORIGINALS.items():
+                setattr(api, name, value)
+    return {
+        "docs": docs,
+        "pages": pages,
+        "full_rerun": full,
+        "incremental": incremental,
+        "speedup": round(full["ms_per_doc"] / incremental["ms_per_doc"], 3) if incremental["ms_per_doc"] else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fast -> standard escalation with and without stage reuse.")
+    parser.add_argument("--docs", type=int, default=20, help="Documentos escalados.")
+    parser.add_argument("--pages", type=int, default=30, help="Páginas por documento.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", default=None, help="Optional JSON summary output path.")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args.docs, args.pages, args.seed))
+    print(
+        f"docs={summary['docs']} pages={summary['pages']}\n"
+        f"full_rerun={summary['full_rerun']['ms_per_doc']:.2f} ms/doc "
+        f"(escalated={summary['full_rerun']['escalated']})\n"
+        f"incremental={summary['incremental']['ms_per_doc']:.2f} ms/doc "
+        f"(escalated={summary['incremental']['escalated']} reused_stage_runs={summary['incremental']['reused_stage_runs']})\n"
+        f"speedup={summary['speedup']}x"
+    )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+"""
+Mede bytes gravados no Mongo por execução do pipeline: save completo
+(`replace_one` do DocumentMemory inteiro) vs save incremental (`$set` só nos
+caminhos alterados).
+
+Usage:
+    python scripts/benchmark_persistence.py --pages 40
+    python scripts/benchmark_persistence.py --pdf caminho/dossie.pdf --json out.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+from datetime import datetime, timezone
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, List
+
+import bson
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0,
+    Layer1,
+    MediaType,
+    OriginType,
+)
+from relluna.core.document_memory.dirty_tracking import mark_persisted
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.infra.mongo_store import build_save_operation
+from relluna.services.ingestion import api
+
+
+def _synthetic_pdf(path: Path, pages: int) -> None:
+    import fitz
+
+    doc = fitz.open()
+    for page_no in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text(
+            (72, 72),
+            (
+                f"ATESTADO MEDICO - pagina {page_no}\n"
+                "Paciente: MARIA DA SILVA SOUZA\n"
+                "Prestador: DRA ANA LIMA CRM 12345\n"
+                f"Data: {page_no % 28 + 1:02d}/03/2024\n"
+                "CID S83.2 - afastamento de 15 dias\n"
+            ),
+        )
+    doc.save(str(path))
+    doc.close()
+
+
+def _build_dm(pdf_path: Path) -> DocumentMemory:
+    content = pdf_path.read_bytes()
+    digest = sha256(content).hexdigest()
+    return DocumentMemory(
+        version=api.DOCUMENT_MEMORY_VERSION,
+        layer0=Layer0(
+            documentid="benchmark-persistence",
+            contentfingerprint=digest,
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="benchmark",
+            original_filename=pdf_path.name,
+            mimetype="application/pdf",
+            size_bytes=len(content),
+        ),
+        layer1=Layer1(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[
+                ArtefatoBruto(
+                    id="benchmark-persistence",
+                    tipo=ArtefatoTipo.original,
+                    uri=str(pdf_path),
+                    nome=pdf_path.name,
+                    mimetype="application/pdf",
+                    tamanho_bytes=len(content),
+                    hash_sha256=digest,
+                )
+            ],
+        ),
+    )
+
+
+def _measure(dm: DocumentMemory, label: str) -> Dict[str, Any]:
+    op = build_save_operation(dm)
+    full_bytes = len(bson.encode(dm.model_dump(mode="json")))
+    mark_persisted(dm, revision=op.new_revision, digests=op.digests)
+    return {
+        "save_point": label,
+        "kind": op.kind,
+        "full_bytes": full_bytes,
+        "delta_bytes": op.bytes_written,
+        "paths": op.paths,
+    }
+
+
+async def run(pdf_path: Path) -> Dict[str, Any]:
+    dm = _build_dm(pdf_path)
+    rows: List[Dict[str, Any]] = [_measure(dm, "ingest")]
+
+    dm = await api._run_extract_pipeline(dm)
+    rows.append(_measure(dm, "extract"))
+
+    dm = await api._run_infer_pipeline(dm)
+    rows.append(_measure(dm, "infer_context"))
+
+    # Reprocessamento sem mudanças (ex.: retry após erro).
+    rows.append(_measure(dm, "resave_unchanged"))
+
+    full_total = sum(row["full_bytes"] for row in rows)
+    delta_total = sum(row["delta_bytes"] for row in rows)
+    return {
+        "pdf": str(pdf_path),
+        "save_points": rows,
+        "full_bytes_total": full_total,
+        "delta_bytes_total": delta_total,
+        "reduction_ratio": round(1.0 - delta_total / full_total, 4) if full_total else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark bytes written per pipeline run.")
+    parser.add_argument("--pdf", default=None, help="PDF de entrada. Sem ele, gera um PDF sintético.")
+    parser.add_argument("--pages", type=int, default=20, help="Páginas do PDF sintético.")
+    parser.add_argument("--json", default=None, help="Optional JSON summary output path.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(args.pdf) if args.pdf else Path(tmp) / "synthetic.pdf"
+        if not args.pdf:
+            _synthetic_pdf(pdf_path, args.pages)
+        summary = asyncio.run(run(pdf_path))
+
+    for row in summary["save_points"]:
+        print(
+            f"{row['save_point']:<18} {row['kind']:<6} "
+            f"full={row['full_bytes']:>10} delta={row['delta_bytes']:>10} paths={len(row['paths'])}"
+        )
+    print(
+        f"Total: full={summary['full_bytes_total']} delta={summary['delta_bytes_total']} "
+        f"reduction={summary['reduction_ratio']:.1%}"
+    )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
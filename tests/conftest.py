@@ -18,6 +18,8 @@ load_dotenv()
 TEST_UPLOAD_DIR = Path(__file__).resolve().parent / ".uploads"
 TEST_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 os.environ["RELLUNA_UPLOAD_DIR"] = str(TEST_UPLOAD_DIR)
+os.environ.setdefault("RELLUNA_DERIVATIVES_DIR", str(TEST_UPLOAD_DIR / ".derivatives"))
+os.environ.setdefault("RELLUNA_EXPORT_DIR", str(TEST_UPLOAD_DIR / ".exports"))
 
 # garante que a raiz do projeto esteja no PYTHONPATH
 ROOT = Path(__file__).resolve().parents[1]
@@ -51,6 +53,62 @@ def _clear_secrets_cache():
     get_secret.cache_clear()
 
 
+@pytest.fixture(autouse=True)
+def _clear_stage_memo():
+    from relluna.infra import stage_memo_store
+    stage_memo_store.clear()
+    yield
+    stage_memo_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_near_duplicate_index():
+    from relluna.infra import near_duplicate_store
+    near_duplicate_store.clear()
+    yield
+    near_duplicate_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_person_index():
+    from relluna.infra import person_index_store
+    person_index_store.clear()
+    yield
+    person_index_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_export_jobs():
+    from relluna.infra import export_job_store
+    export_job_store.clear()
+    yield
+    export_job_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_page_store():
+    from relluna.infra import page_store
+    page_store.clear()
+    yield
+    page_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_pipeline_scheduler():
+    from relluna.services.orchestration import admission
+    admission.clear()
+    yield
+    admission.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_evidence_crop_cache():
+    from relluna.services.derivatives import evidence_crops
+    evidence_crops.clear()
+    yield
+    evidence_crops.clear()
+
+
 @pytest.fixture(scope="session")
 def client():
     with TestClient(app) as client:
@@ -0,0 +1,151 @@
+# tests/fakes/fake_motor_collection.py
+from __future__ import annotations
+
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from relluna.infra import mongo_store
+
+_MISSING = object()
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    current: Any = doc
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return _MISSING
+        current = current[part]
+    return current
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict) or not any(key.startswith("$") for key in condition):
+        return value is not _MISSING and value == condition
+    for op, expected in condition.items():
+        if op == "$ne" and value is not _MISSING and value == expected:
+            return False
+        if op == "$exists" and (value is not _MISSING) != bool(expected):
+            return False
+        if op == "$in" and (value is _MISSING or value not in expected):
+            return False
+        if op in {"$gt", "$gte", "$lt", "$lte"}:
+            if value is _MISSING or value is None:
+                return False
+            if op == "$gt" and not value > expected:
+                return False
+            if op == "$gte" and not value >= expected:
+                return False
+            if op == "$lt" and not value < expected:
+                return False
+            if op == "$lte" and not value <= expected:
+                return False
+    return True
+
+
+def match_query(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Subconjunto de operadores Mongo usado pelo reprocessamento."""
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(match_query(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(match_query(doc, sub) for sub in condition):
+                return False
+        elif not _match_value(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+class InMemoryCursor:
+    def __init__(self, docs: List[Dict[str, Any]]) -> None:
+        self._docs = docs
+
+    def sort(self, key: str, direction: int = 1) -> "InMemoryCursor":
+        self._docs.sort(key=lambda doc: _get_path(doc, key), reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class InMemoryCollection:
+    """Subconjunto da API Motor usado pelo mongo_store e pelo reprocessamento."""
+
+    def __init__(self) -> None:
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.calls: list = []
+        self.database = SimpleNamespace(name="fake-db")
+
+    @staticmethod
+    def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+        if doc["layer0"]["documentid"] != query["layer0.documentid"]:
+            return False
+        if mongo_store.REVISION_FIELD not in query:
+            return True
+        expected = query[mongo_store.REVISION_FIELD]
+        current = doc.get(mongo_store.REVISION_FIELD)
+        if isinstance(expected, dict):
+            return current in expected["$in"]
+        return current == expected
+
+    def find(self, query=None, projection=None) -> InMemoryCursor:
+        self.calls.append(("find", query))
+        return InMemoryCursor([copy.deepcopy(doc) for doc in self.docs.values() if match_query(doc, query or {})])
+
+    async def count_documents(self, query, limit=None) -> int:
+        count = sum(1 for doc in self.docs.values() if match_query(doc, query or {}))
+        return min(count, limit) if limit else count
+
+    async def bulk_write(self, requests, ordered=True):
+        self.calls.append(("bulk_write", len(requests)))
+        matched = 0
+        for request in requests:
+            if type(request).__name__ == "ReplaceOne":
+                result = await self.replace_one(request._filter, request._doc, upsert=request._upsert)
+            else:
+                result = await self.update_one(request._filter, request._doc)
+            matched += result.matched_count
+        return SimpleNamespace(matched_count=matched, upserted_count=0)
+
+    async def find_one(self, query):
+        doc = self.docs.get(query["layer0.documentid"])
+        return copy.deepcopy(doc) if doc else None
+
+    async def replace_one(self, query, document, upsert=False):
+        self.calls.append(("replace_one", document))
+        docid = query["layer0.documentid"]
+        current = self.docs.get(docid)
+        if current is None and upsert:
+            self.docs[docid] = copy.deepcopy(document)
+            return SimpleNamespace(matched_count=0)
+        if current is None or not self._matches(current, query):
+            return SimpleNamespace(matched_count=0)
+        self.docs[docid] = copy.deepcopy(document)
+        return SimpleNamespace(matched_count=1)
+
+    async def update_one(self, query, update):
+        self.calls.append(("update_one", update))
+        current = self.docs.get(query["layer0.documentid"])
+        if current is None or not self._matches(current, query):
+            return SimpleNamespace(matched_count=0)
+        for path, value in update.get("$set", {}).items():
+            target = current
+            *parents, leaf = path.split(".")
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = copy.deepcopy(value)
+        for path in update.get("$unset", {}):
+            target = current
+            *parents, leaf = path.split(".")
+            for part in parents:
+                target = target[part]
+            target.pop(leaf, None)
+        return SimpleNamespace(matched_count=1)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from relluna.services.observability import metrics
+from relluna.services.orchestration import admission
+
+
+@pytest.mark.asyncio
+async def test_busy_pool_serves_classes_by_weight():
+    scheduler = admission.PipelineScheduler(concurrency=1, weights={"interactive": 3.0, "standard": 2.0, "bulk": 1.0})
+    order = []
+    gate = asyncio.Event()
+
+    async def job(priority: str, tag: str) -> None:
+        async with scheduler.slot(priority):
+            order.append(tag)
+            await gate.wait()
+
+    holder = asyncio.create_task(job("bulk", "holder"))
+    await asyncio.sleep(0)
+    waiting = [asyncio.create_task(job("bulk", f"b{n}")) for n in range(4)]
+    waiting += [asyncio.create_task(job("interactive", f"i{n}")) for n in range(6)]
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth("bulk") == 4 and scheduler.queue_depth("interactive") == 6
+
+    gate.set()
+    await asyncio.gather(holder, *waiting)
+
+    # Interativo ganha 3 vezes a vez do bulk, mas o bulk não fica parado.
+    assert order[0] == "holder"
+    assert order[1:] == ["i0", "i1", "i2", "i3", "b0", "i4", "i5", "b1", "b2", "b3"]
+    assert metrics.get_value("relluna_pipeline_queue_depth", priority="bulk") == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_lower_classes_first(monkeypatch):
+    monkeypatch.setenv("RELLUNA_ADMISSION_MAX_QUEUE", "4")
+    monkeypatch.setenv("RELLUNA_ADMISSION_MAX_OCR_PAGES", "10")
+    scheduler = admission.PipelineScheduler(concurrency=1)
+
+    async with scheduler.slot("bulk"):
+        waiters = [asyncio.create_task(scheduler.slot("bulk").__aenter__()) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(admission.AdmissionRejected) as rejected:
+            scheduler.admit("bulk")
+        assert rejected.value.reason == "queue_depth"
+        assert rejected.value.retry_after_seconds >= 1
+        scheduler.admit("interactive")
+
+        with scheduler.track_ocr_pages(10):
+            with pytest.raises(admission.AdmissionRejected) as rejected:
+                scheduler.admit("interactive")
+            assert rejected.value.reason == "ocr_pages_in_flight"
+        scheduler.admit("interactive")
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert scheduler.queue_depth() == 0
+
+    assert metrics.get_value("relluna_admission_rejected_total", priority="bulk", reason="queue_depth") >= 1
+
+
+def test_ingest_returns_429_with_retry_after_when_node_is_saturated(client, monkeypatch):
+    monkeypatch.setenv("RELLUNA_ADMISSION_MAX_OCR_PAGES", "4")
+
+    with admission.track_ocr_pages(4):
+        res = client.post("/ingest", files={"file": ("a.txt", b"conteudo", "text/plain")})
+
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    assert res.json()["detail"] == {
+        "error": "admission_rejected",
+        "priority": "standard",
+        "reason": "ocr_pages_in_flight",
+    }
+    assert "relluna_admission_rejected_total" in client.get("/metrics").text
+
+
+def test_interactive_priority_requires_the_review_ui_token(client, monkeypatch):
+    monkeypatch.setenv("RELLUNA_ADMISSION_MAX_OCR_PAGES", "4")
+    form = {"priority": "interactive"}
+
+    def rejected_priority(headers=None):
+        with admission.track_ocr_pages(4):
+            res = client.post("/ingest", files={"file": ("a.txt", b"conteudo", "text/plain")}, data=form, headers=headers)
+        assert res.status_code == 429
+        return res.json()["detail"]["priority"]
+
+    # Sem token configurado ninguém ganha a classe interativa.
+    assert rejected_priority({"X-Relluna-Review-Token": "qualquer"}) == "standard"
+
+    monkeypatch.setenv("RELLUNA_REVIEW_UI_TOKEN", "segredo-ui")
+    assert rejected_priority() == "standard"
+    assert rejected_priority({"X-Relluna-Review-Token": "errado"}) == "standard"
+    assert rejected_priority({"X-Relluna-Review-Token": "segredo-ui"}) == "interactive"
+
+    assert admission.resolve_priority(None) == "standard"
+    assert admission.resolve_priority("bulk") == "bulk"
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from relluna.infra.blob import artefact_resolver, async_store
+
+
+@pytest.fixture
+def blob_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("RELLUNA_BLOB_BACKEND", "local")
+    monkeypatch.setenv("RELLUNA_BLOB_LOCAL_ROOT", str(tmp_path / "blobs"))
+    monkeypatch.setenv("RELLUNA_BLOB_BLOCK_SIZE", str(64 * 1024))
+    monkeypatch.setenv("RELLUNA_ARTEFACT_CACHE_DIR", str(tmp_path / "cache"))
+    asyncio.run(async_store.close_async_blob_store())
+    artefact_resolver.clear()
+    yield tmp_path
+    artefact_resolver.clear()
+    asyncio.run(async_store.close_async_blob_store())
+
+
+def _remote_artefact(tmp_path, name: str, payload: bytes, *, sha256: str | None = None):
+    """Artefato cujo upload ficou em outro pod: só o blob existe."""
+    blob_path = f"artefacts/2026/01/{name}"
+    blob_file = tmp_path / "blobs" / "memories" / blob_path
+    blob_file.parent.mkdir(parents=True, exist_ok=True)
+    blob_file.write_bytes(payload)
+    return SimpleNamespace(
+        uri=str(tmp_path / "outro_pod" / f"{name}.pdf"),
+        hash_sha256=sha256 or hashlib.sha256(payload).hexdigest(),
+        metadados_nativos={"blob_storage": {"blob_path": blob_path}},
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_one_verified_download(blob_env):
+    payload = os.urandom(300 * 1024)
+    artefato = _remote_artefact(blob_env, "a", payload)
+
+    paths = await asyncio.gather(*(artefact_resolver.ensure_local(artefato) for _ in range(5)))
+
+    assert len(set(paths)) == 1
+    assert paths[0].suffix == ".pdf"
+    assert paths[0].read_bytes() == payload
+    cache = artefact_resolver.get_artefact_cache()
+    assert cache.stats.downloads == 1
+    # A partir daqui os estágios resolvem o caminho sem rede.
+    assert artefact_resolver.resolve_artefact_path(artefato) == paths[0]
+
+
+@pytest.mark.asyncio
+async def test_hash_mismatch_is_rejected_and_not_cached(blob_env):
+    artefato = _remote_artefact(blob_env, "b", b"conteudo adulterado", sha256="0" * 64)
+
+    with pytest.raises(artefact_resolver.ArtefactIntegrityError):
+        await artefact_resolver.ensure_local(artefato)
+
+    assert artefact_resolver.cached_path(artefato) is None
+    assert not [p for p in (blob_env / "cache").rglob("*") if p.is_file()]
+
+
+def test_sync_resolution_outside_event_loop_fetches_from_blob(blob_env):
+    artefato = _remote_artefact(blob_env, "c", b"%PDF-1.4 teste")
+
+    path = artefact_resolver.resolve_artefact_path(artefato)
+
+    assert path is not None and path.read_bytes() == b"%PDF-1.4 teste"
+    assert path.parent.parent == blob_env / "cache"
+
+
+def test_cache_evicts_least_recently_used(blob_env, monkeypatch):
+    monkeypatch.setenv("RELLUNA_ARTEFACT_CACHE_MAX_BYTES", str(250 * 1024))
+    first = _remote_artefact(blob_env, "d1", os.urandom(100 * 1024))
+    second = _remote_artefact(blob_env, "d2", os.urandom(100 * 1024))
+    third = _remote_artefact(blob_env, "d3", os.urandom(100 * 1024))
+
+    first_path = artefact_resolver.resolve_artefact_path(first)
+    second_path = artefact_resolver.resolve_artefact_path(second)
+    past = time.time() - 60
+    os.utime(first_path, (past, past))
+    os.utime(second_path, (past + 1, past + 1))
+    # Acerto no primeiro o torna o mais recente; o segundo sai.
+    assert artefact_resolver.cached_path(first) == first_path
+    artefact_resolver.resolve_artefact_path(third)
+
+    assert first_path.exists()
+    assert not second_path.exists()
+    assert artefact_resolver.get_artefact_cache().stats.evictions == 1
+
+
+def test_pinned_artefacts_survive_eviction(blob_env, monkeypatch):
+    monkeypatch.setenv("RELLUNA_ARTEFACT_CACHE_MAX_BYTES", str(150 * 1024))
+    first = _remote_artefact(blob_env, "e1", os.urandom(100 * 1024))
+    second = _remote_artefact(blob_env, "e2", os.urandom(100 * 1024))
+
+    with artefact_resolver.pinned([first]):
+        first_path = artefact_resolver.resolve_artefact_path(first)
+        past = time.time() - 60
+        os.utime(first_path, (past, past))
+        second_path = artefact_resolver.resolve_artefact_path(second)
+        # O mais antigo está fixado: fica, mesmo acima do limite.
+        assert first_path.exists() and second_path.exists()
+
+    assert artefact_resolver.get_artefact_cache().evict() == 1
+    assert not first_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_thread_miss_downloads_on_the_pipeline_loop(blob_env, monkeypatch):
+    artefato = _remote_artefact(blob_env, "f", b"%PDF-1.4 thread")
+    loop = asyncio.get_running_loop()
+    download_loops = []
+    original = artefact_resolver._download
+
+    async def spy(store, blob_path, partial):
+        download_loops.append(asyncio.get_running_loop())
+        await original(store, blob_path, partial)
+
+    monkeypatch.setattr(artefact_resolver, "_download", spy)
+    with artefact_resolver.pinned([artefato]):
+        path = await asyncio.to_thread(artefact_resolver.resolve_artefact_path, artefato)
+
+    assert path.read_bytes() == b"%PDF-1.4 thread"
+    assert download_loops == [loop]
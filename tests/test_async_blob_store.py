@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from relluna.infra.blob import async_store
+from relluna.infra.blob.async_store import LocalAsyncBlobStore
+
+
+@pytest.fixture
+def local_blob_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("RELLUNA_BLOB_BACKEND", "local")
+    monkeypatch.setenv("RELLUNA_BLOB_LOCAL_ROOT", str(tmp_path / "blobs"))
+    monkeypatch.setenv("RELLUNA_BLOB_BLOCK_SIZE", str(64 * 1024))
+    asyncio.run(async_store.close_async_blob_store())
+    yield tmp_path / "blobs"
+    asyncio.run(async_store.close_async_blob_store())
+
+
+@pytest.mark.asyncio
+async def test_local_store_transfers_in_parallel_blocks(local_blob_env, tmp_path):
+    source = tmp_path / "dossie.bin"
+    payload = os.urandom(1024 * 1024 + 123)
+    source.write_bytes(payload)
+
+    store = async_store.get_async_blob_store()
+    assert isinstance(store, LocalAsyncBlobStore)
+    assert async_store.get_async_blob_store() is store
+
+    url = await store.upload_file(source, "artefacts/2026/01/a")
+    await store.upload_file(source, "artefacts/2026/01/b")
+    assert url.startswith("file://")
+    assert (local_blob_env / "memories" / "artefacts/2026/01/a").read_bytes() == payload
+    # 17 blocos de 64 KiB por upload; o container só é verificado uma vez.
+    assert store.stats.blocks == 34
+    assert store.stats.container_checks == 1
+
+    dest = tmp_path / "back.bin"
+    assert await store.download_to_file("artefacts/2026/01/a", dest) == len(payload)
+    assert dest.read_bytes() == payload
+    assert await store.download_bytes("artefacts/2026/01/b") == payload
+
+
+def test_ingest_uploads_original_through_shared_async_store(client, local_blob_env, monkeypatch):
+    monkeypatch.setenv("RELLUNA_ENABLE_REMOTE_BLOB_INGEST", "1")
+
+    first = client.post("/ingest", files={"file": ("a.txt", b"conteudo a", "text/plain")})
+    second = client.post("/ingest", files={"file": ("b.txt", b"conteudo b", "text/plain")})
+
+    assert first.status_code == 200 and second.status_code == 200
+    body = first.json()
+    assert body["is_remote_blob"] is True
+    assert body["blob_uri"].startswith("file://")
+    assert Path(body["blob_uri"][len("file://"):]).read_bytes() == b"conteudo a"
+    assert async_store.get_async_blob_store().stats.container_checks == 1
+
+
+def test_azure_backend_requires_async_transport(monkeypatch):
+    pytest.importorskip("azure.storage.blob.aio")
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError, match="blob-async"):
+            async_store.AzureAsyncBlobStore("UseDevelopmentStorage=true", "memories")
+    else:
+        store = async_store.AzureAsyncBlobStore("UseDevelopmentStorage=true", "memories")
+        assert store.url_for("x").endswith("/memories/x")
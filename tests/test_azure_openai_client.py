@@ -0,0 +1,201 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from relluna.infra import llm_cache_store
+from relluna.infra.azure_openai.client import AzureOpenAIClient
+
+
+class _StubAzure:
+    """Servidor local que imita /chat/completions e /embeddings."""
+
+    def __init__(self, *, throttle_first: int = 0, delay: float = 0.0):
+        self.throttle_first = throttle_first
+        self.delay = delay
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                with stub._lock:
+                    stub.requests += 1
+                    throttled = stub.requests <= stub.throttle_first
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.active -= 1
+
+                if throttled:
+                    self._reply(429, {"error": "rate limited"}, {"Retry-After": "0"})
+                elif "/embeddings" in self.path:
+                    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                    data = [{"index": i, "embedding": [0.1, 0.2, len(text)]} for i, text in enumerate(inputs)]
+                    self._reply(200, {"data": data[::-1]})
+                else:
+                    user = json.loads(body["messages"][1]["content"])
+                    content = json.dumps({"echo": user, "tipo_documento": "laudo"})
+                    self._reply(200, {"choices": [{"message": {"content": content}}]})
+
+            def _reply(self, status, payload, headers=None):
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(raw)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _azure_env(monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("AZURE_OPENAI_CHAT_DEPLOYMENT", "chat")
+    monkeypatch.setenv("AZURE_OPENAI_EMBED_DEPLOYMENT", "embed")
+    llm_cache_store.clear()
+    yield
+    llm_cache_store.clear()
+
+
+def _client(stub, **kwargs):
+    return AzureOpenAIClient(endpoint=stub.url, backoff_base=0.0, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_chat_json_retries_429_honoring_retry_after_and_caches():
+    schema = {"required": ["tipo_documento"]}
+    with _StubAzure(throttle_first=2) as stub:
+        async with _client(stub) as client:
+            first = await client.chat_json(system="s", user_json={"layer2": {"a": 1}}, json_schema=schema)
+            again = await client.chat_json(system="s", user_json={"layer2": {"a": 1}}, json_schema=schema)
+            changed = await client.chat_json(system="s", user_json={"layer2": {"a": 2}}, json_schema=schema)
+
+    assert first == again == {"echo": {"layer2": {"a": 1}}, "tipo_documento": "laudo"}
+    assert changed["echo"] == {"layer2": {"a": 2}}
+    # 2 respostas 429 + 1 sucesso para a primeira chamada; a repetida vem do cache.
+    assert stub.requests == 4
+    assert client.cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_by_semaphore():
+    with _StubAzure(delay=0.05) as stub:
+        async with _client(stub, max_concurrency=2, use_cache=False) as client:
+            vectors = await asyncio.gather(*(client.embed_text(f"texto {n}") for n in range(6)))
+
+    assert len(vectors) == 6
+    assert stub.requests == 6
+    assert stub.max_active <= 2
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    import httpx
+
+    with _StubAzure(throttle_first=10) as stub:
+        async with _client(stub, max_retries=1, use_cache=False) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.embed_text("x")
+
+    assert stub.requests == 2
+
+
+def test_sync_wrapper_shares_persistent_cache(monkeypatch):
+    from relluna.infra.azure_openai import client as client_module
+
+    with _StubAzure() as stub:
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", stub.url)
+        assert client_module.embed_text("abc") == [0.1, 0.2, 3]
+        assert client_module.embed_text("abc") == [0.1, 0.2, 3]
+
+    assert stub.requests == 1
+
+
+class _LoopBoundCache:
+    """Coleção llm_cache que registra em qual loop cada operação rodou."""
+
+    def __init__(self):
+        self.docs = {}
+        self.loops = []
+
+    def __getitem__(self, name):
+        return self
+
+    async def find_one(self, query):
+        self.loops.append(asyncio.get_running_loop())
+        return self.docs.get(query["_id"])
+
+    async def replace_one(self, query, document, upsert=False):
+        self.loops.append(asyncio.get_running_loop())
+        self.docs[query["_id"]] = document
+
+
+def test_sync_wrapper_uses_its_own_mongo_client_on_its_loop(monkeypatch):
+    from relluna.infra import mongo_store
+    from relluna.infra.azure_openai import client as client_module
+
+    shared = _LoopBoundCache()
+    own = _LoopBoundCache()
+    monkeypatch.setattr(mongo_store, "get_database", lambda: shared)
+    monkeypatch.setattr(mongo_store, "open_database", lambda: own)
+    monkeypatch.setattr(client_module, "_SYNC_CLIENT", None)
+
+    with _StubAzure() as stub:
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", stub.url)
+        assert client_module.embed_text("motor") == [0.1, 0.2, 5]
+        assert client_module.embed_text("motor") == [0.1, 0.2, 5]
+
+    assert stub.requests == 1
+    assert shared.loops == []
+    assert own.loops and set(own.loops) == {client_module._sync_loop()}
+
+
+@pytest.mark.asyncio
+async def test_sync_wrapper_is_safe_inside_a_running_loop(monkeypatch):
+    from relluna.infra.azure_openai import client as client_module
+
+    with _StubAzure() as stub:
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", stub.url)
+        # Chamado direto de código async: sem asyncio.run aninhado.
+        assert client_module.embed_text("dentro do loop") == [0.1, 0.2, 14]
+        out = client_module.chat_json(system="s", user_json={"loop": True}, json_schema={"type": "object"})
+
+    assert out["tipo_documento"] == "laudo"
+    assert stub.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_embed_texts_batches_misses_and_reuses_cache():
+    with _StubAzure() as stub:
+        async with _client(stub) as client:
+            await client.embed_text("a")
+            vectors = await client.embed_texts(["a", "bb", "ccc", "bb", "dddd"], batch_size=2)
+
+    assert [v[2] for v in vectors] == [1, 2, 3, 2, 4]
+    # 1 chamada avulsa + 2 lotes ("bb","ccc") e ("dddd",); "a" veio do cache.
+    assert stub.requests == 3
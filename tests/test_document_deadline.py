@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import fitz
+import pytest
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+)
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.services.orchestration.deadline import deadline_scope
+from relluna.services.page_extraction.page_normalizer import NormalizedPageImage
+from relluna.services.page_extraction.page_ocr import OCRPage, OCRSpan
+from relluna.services.page_extraction.page_scheduler import prioritize_pages
+from relluna.services.pdf_decomposition import decompose_pdf
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _pdf(path: Path, pages: int) -> Path:
+    doc = fitz.open()
+    for _ in range(pages):
+        # Texto nativo mínimo: a página vira `ocr_heavy`.
+        doc.new_page().insert_text((40, 40), "x")
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def _dm(path: Path) -> DocumentMemory:
+    return DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid="deadline-doc",
+            contentfingerprint="d" * 64,
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="test",
+            processingevents=[],
+        ),
+        layer1=Layer1Artefatos(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[
+                ArtefatoBruto(
+                    id="deadline-doc",
+                    tipo=ArtefatoTipo.original,
+                    uri=str(path),
+                    nome=path.name,
+                    mimetype="application/pdf",
+                    tamanho_bytes=path.stat().st_size,
+                )
+            ],
+        ),
+        layer2=Layer2Evidence(),
+    )
+
+
+@pytest.fixture
+def clocked_engines(monkeypatch):
+    """OCR falso que custa 2s no relógio do prazo por página."""
+    clock = _Clock()
+    rendered = []
+
+    def fake_normalize(pdf_path, out_dir=None, dpi=100, lang="por", pages=None):
+        rendered.extend(pages or [])
+        return [
+            NormalizedPageImage(
+                page=n,
+                image_path=f"/render/page_{n:03d}.png",
+                width=600,
+                height=800,
+                rotation_applied=0,
+                source_pdf_rotation=0,
+                orientation_score=1.0,
+                warnings=[],
+            )
+            for n in pages
+        ]
+
+    def fake_ocr(page_images):
+        clock.now += 2.0 * len(page_images)
+        return [
+            OCRPage(
+                page=item["page"],
+                text=f"LAUDO MÉDICO Paciente: JOAO PEREIRA página {item['page']}",
+                spans=[OCRSpan(page=item["page"], text="Paciente: JOAO PEREIRA", bbox=[10.0, 10.0, 200.0, 30.0])],
+                width=600,
+                height=800,
+            )
+            for item in page_images
+        ]
+
+    monkeypatch.setattr(decompose_pdf, "normalize_pdf_pages", fake_normalize)
+    monkeypatch.setattr(decompose_pdf, "ocr_pages", fake_ocr)
+    monkeypatch.setenv("RELLUNA_PAGE_COST_OCR_SECONDS", "2")
+    return clock, rendered
+
+
+def _signal(dm: DocumentMemory, key: str):
+    sig = dm.layer2.sinais_documentais.get(key)
+    return json.loads(sig.valor) if sig is not None else None
+
+
+def test_prioritize_pages_puts_leading_legal_and_boundary_pages_first():
+    strategies = {n: {"strategy": "ocr_light"} for n in range(1, 9)}
+    strategies[6] = {"strategy": "ocr_heavy"}
+    strategies[8] = {"strategy": "ocr_heavy"}
+    native = {6: {"text": "laudo pericial cid m54"}, 8: {"text": "rodapé"}}
+
+    order = prioritize_pages(list(range(1, 9)), strategies, native)
+
+    # 6 (ocr_heavy + termo jurídico + fronteira) supera até a capa; depois
+    # 1-3, as fronteiras 7 e 8 (sem termo) e o resto em ordem física.
+    assert order == [6, 1, 2, 3, 7, 8, 4, 5]
+
+
+def test_deadline_defers_pages_with_degraded_events(tmp_path, clocked_engines):
+    clock, rendered = clocked_engines
+    dm = _dm(_pdf(tmp_path / "longo.pdf", 6))
+
+    with deadline_scope(7.0, clock=clock):
+        dm = decompose_pdf.decompose_pdf_into_subdocuments(dm)
+
+    assert rendered == [1, 2, 3]
+    deferred = _signal(dm, "deferred_pages_v1")
+    assert deferred["pages"] == [4, 5, 6] and deferred["budget_seconds"] == 7.0
+    statuses = {item["page"]: item["status"] for item in _signal(dm, "ocr_pages_v1")}
+    assert statuses == {1: "success", 2: "success", 3: "success", 4: "deferred", 5: "deferred", 6: "deferred"}
+    assert decompose_pdf.has_deferred_pages(dm)
+
+    page_events = [e.detalhes for e in dm.layer0.processingevents if e.etapa == "page_deadline" and e.detalhes.get("page_index")]
+    assert [e["page_index"] for e in page_events] == [4, 5, 6]
+    assert {(e["warning_code"], e["degraded_mode"]) for e in page_events} == {("deadline_page_deferred", "deadline_deferred")}
+    summary = [e for e in dm.layer0.processingevents if e.etapa == "document_deadline"][0]
+    assert summary.status == "warning"
+    assert summary.detalhes["processed_pages"] == 3 and summary.detalhes["deferred_pages"] == 3
+
+
+def test_deadline_renders_in_windows_and_removes_render_dir(tmp_path, clocked_engines, monkeypatch):
+    clock, rendered = clocked_engines
+    calls = []
+    fake_normalize = decompose_pdf.normalize_pdf_pages
+
+    def spy(pdf_path, out_dir=None, **kwargs):
+        calls.append((out_dir, list(kwargs.get("pages") or [])))
+        return fake_normalize(pdf_path, out_dir=out_dir, **kwargs)
+
+    monkeypatch.setattr(decompose_pdf, "normalize_pdf_pages", spy)
+    monkeypatch.setenv("RELLUNA_PAGE_WINDOW", "2")
+    dm = _dm(_pdf(tmp_path / "janelas.pdf", 6))
+
+    with deadline_scope(9.0, clock=clock):
+        dm = decompose_pdf.decompose_pdf_into_subdocuments(dm)
+
+    # Um open do PDF por janela; com 2s por página cabem 4 das 6.
+    assert [pages for _, pages in calls] == [[1, 2], [3, 4]]
+    assert _signal(dm, "deferred_pages_v1")["pages"] == [5, 6]
+    assert [item["page"] for item in _signal(dm, "ocr_pages_v1")] == [1, 2, 3, 4, 5, 6]
+    assert not Path(calls[0][0]).exists()
+
+
+def test_fill_deferred_pages_completes_the_document(tmp_path, clocked_engines):
+    clock, rendered = clocked_engines
+    dm = _dm(_pdf(tmp_path / "longo.pdf", 6))
+    with deadline_scope(7.0, clock=clock):
+        dm = decompose_pdf.decompose_pdf_into_subdocuments(dm)
+    partial_text = dm.layer2.texto_ocr_literal.valor
+
+    dm = decompose_pdf.fill_deferred_pages(dm)
+
+    assert rendered == [1, 2, 3, 4, 5, 6]
+    assert not decompose_pdf.has_deferred_pages(dm)
+    assert {item["status"] for item in _signal(dm, "ocr_pages_v1")} == {"success"}
+    assert sorted({span["page"] for span in _signal(dm, "layout_spans_v1")}) == [1, 2, 3, 4, 5, 6]
+    assert [item["page"] for item in _signal(dm, "normalized_pages_v1")] == [1, 2, 3, 4, 5, 6]
+    assert "página 6" in dm.layer2.texto_ocr_literal.valor and "página 6" not in partial_text
+    assert sum(len(sub["pages"]) for sub in _signal(dm, "subdocuments_v1")) == 6
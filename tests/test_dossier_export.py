@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from relluna.infra import export_job_store, ingest_batch_store, mongo_store
+from relluna.services.export import export_jobs
+from relluna.services.ingestion.api import app
+from tests.test_dossier_builder import _build_dm
+
+
+def _dm(documentid: str):
+    dm = _build_dm()
+    dm.layer0.documentid = documentid
+    return dm
+
+
+@pytest.fixture(autouse=True)
+def _export_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELLUNA_EXPORT_DIR", str(tmp_path / "exports"))
+
+
+def test_write_export_streams_one_document_at_a_time(tmp_path):
+    docs = {"exp-a": _dm("exp-a"), "exp-b": _dm("exp-b")}
+    loaded = []
+
+    async def load(documentid):
+        loaded.append(documentid)
+        return docs.get(documentid)
+
+    target = tmp_path / "case.ndjson"
+    stats = asyncio.run(export_jobs.write_export(["exp-a", "missing", "exp-b"], "ndjson", target, load=load))
+
+    assert loaded == ["exp-a", "missing", "exp-b"]
+    assert stats["documents"] == 2 and stats["missing_documents"] == ["missing"]
+    records = [json.loads(line) for line in target.read_text(encoding="utf-8").splitlines()]
+    assert len(records) == stats["records"] + 1
+    assert [record["document_id"] for record in records if record["type"] == "document"] == ["exp-a", "exp-b"]
+    assert {"type": "missing_document", "document_id": "missing"} in records
+    assert any(record["type"] == "event" for record in records)
+    assert not list(tmp_path.glob("*.part"))
+
+    as_json = tmp_path / "case.json"
+    asyncio.run(export_jobs.write_export(["exp-a", "missing"], "json", as_json, case_id="caso-1", load=load))
+    payload = json.loads(as_json.read_text(encoding="utf-8"))
+    assert payload["case_id"] == "caso-1" and payload["missing_documents"] == ["missing"]
+    assert [doc["document"]["document_id"] for doc in payload["documents"]] == ["exp-a"]
+
+
+def test_unchanged_case_reuses_the_export_by_content_hash():
+    docs = {"hash-a": _dm("hash-a")}
+
+    async def load(documentid):
+        # Cópia por leitura, como o Mongo: o dossiê aplica a Layer5 no dm carregado.
+        return docs[documentid].model_copy(deep=True)
+
+    async def export():
+        record = await export_jobs.create_job(["hash-a"], "ndjson")
+        return await export_jobs.run_job(record["job_id"], load=load)
+
+    first = asyncio.run(export())
+    second = asyncio.run(export())
+    assert first["status"] == second["status"] == "done"
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert first["content_hash"] == second["content_hash"]
+
+    docs["hash-a"].layer0.original_filename = "renomeado.pdf"
+    third = asyncio.run(export())
+    assert third["cached"] is False and third["content_hash"] != first["content_hash"]
+
+
+def test_export_hash_uses_stored_revisions_and_the_case_id():
+    docs = {"rev-a": _dm("rev-a"), "rev-b": _dm("rev-b")}
+    stored = {"rev-a": 3, "rev-b": 1}
+    loaded = []
+
+    async def load(documentid):
+        loaded.append(documentid)
+        return docs[documentid].model_copy(deep=True)
+
+    async def revisions(documentids):
+        return {documentid: stored[documentid] for documentid in documentids if documentid in stored}
+
+    async def export(case_id=None):
+        record = await export_jobs.create_job(["rev-a", "rev-b"], "json", case_id=case_id)
+        return await export_jobs.run_job(record["job_id"], load=load, revisions=revisions)
+
+    first = asyncio.run(export("caso-1"))
+    assert first["cached"] is False and loaded == ["rev-a", "rev-b"]
+
+    # Acerto de cache sem carregar nenhum documento.
+    assert asyncio.run(export("caso-1"))["cached"] is True and loaded == ["rev-a", "rev-b"]
+
+    other_case = asyncio.run(export("caso-2"))
+    assert other_case["cached"] is False and other_case["content_hash"] != first["content_hash"]
+
+    stored["rev-b"] = 2
+    assert asyncio.run(export("caso-1"))["content_hash"] != first["content_hash"]
+
+
+def test_stale_exports_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELLUNA_EXPORT_TTL_HOURS", "1")
+    root = export_jobs.export_dir()
+    root.mkdir(parents=True)
+    old, fresh, orphan = root / "old.ndjson", root / "fresh.json", root / "x.json.abc.part"
+    for path in (old, fresh, orphan):
+        path.write_text("{}", encoding="utf-8")
+    stale = time.time() - 2 * 3600
+    os.utime(old, (stale, stale))
+    os.utime(orphan, (stale, stale))
+
+    assert export_jobs.evict_stale_exports() == 2
+    assert sorted(path.name for path in root.iterdir()) == ["fresh.json"]
+
+
+def _wait_for(client: TestClient, job_id: str) -> dict:
+    deadline = time.monotonic() + 10
+    while True:
+        body = client.get(f"/exports/{job_id}").json()
+        if body["status"] in {"done", "failed"} or time.monotonic() > deadline:
+            return body
+        time.sleep(0.02)
+
+
+def test_export_api_runs_in_background_and_streams_the_download(monkeypatch):
+    asyncio.run(mongo_store.save(_dm("api-exp-a")))
+    asyncio.run(mongo_store.save(_dm("api-exp-b")))
+    asyncio.run(
+        ingest_batch_store.save(
+            {"batch_id": "b-exp", "case_id": "caso-42", "items": [{"index": 0, "documentid": "api-exp-b"}]}
+        )
+    )
+    monkeypatch.setenv("RELLUNA_EXPORT_CHUNK_BYTES", "4096")
+
+    with TestClient(app) as client:
+        created = client.post("/exports", json={"documentids": ["api-exp-a"], "case_id": "caso-42"})
+        assert created.status_code == 202
+        assert created.json()["documentids"] == ["api-exp-a", "api-exp-b"]
+        job = _wait_for(client, created.json()["job_id"])
+        assert job["status"] == "done" and job["documents"] == 2
+
+        download = client.get(f"/exports/{job['job_id']}/download")
+        assert download.status_code == 200
+        assert download.headers["content-type"].startswith("application/x-ndjson")
+        assert 'filename="dossie-caso-42.ndjson"' in download.headers["content-disposition"]
+        assert download.headers["etag"] == f'"{job["content_hash"]}"'
+        documents = [json.loads(line) for line in download.text.splitlines() if '"type": "document"' in line]
+        assert [record["document_id"] for record in documents] == ["api-exp-a", "api-exp-b"]
+
+        queued = asyncio.run(export_jobs.create_job(["api-exp-a"], "json"))
+        assert client.get(f"/exports/{queued['job_id']}/download").status_code == 409
+        assert client.get("/exports/nope").status_code == 404
+        assert client.post("/exports", json={"case_id": "sem-lotes"}).status_code == 400
+
+        try:
+            import reportlab  # noqa: F401
+        except ImportError:
+            pdf = client.post("/exports", json={"documentids": ["api-exp-a"], "format": "pdf"}).json()
+            failed = _wait_for(client, pdf["job_id"])
+            assert failed["status"] == "failed" and "reportlab" in failed["error"]
+            assert asyncio.run(export_job_store.get(pdf["job_id"]))["status"] == "failed"
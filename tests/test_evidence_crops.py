@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import json
+from pathlib import Path
+
+import fitz
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from relluna.core.document_memory import ProvenancedString
+from relluna.infra import mongo_store
+from relluna.services.derivatives import evidence_crops
+from relluna.services.ingestion import api
+from relluna.services.page_extraction.page_normalizer import _apply_pdf_rotation, _render_page_to_pil
+from tests.test_page_previews import _dm
+
+_BLACK = fitz.Rect(120, 200, 260, 240)
+
+
+@pytest.fixture(autouse=True)
+def _derivatives_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELLUNA_DERIVATIVES_DIR", str(tmp_path / "derivatives"))
+    monkeypatch.delenv("RELLUNA_BLOB_BACKEND", raising=False)
+
+
+def _pdf(path: Path, rotation: int = 0) -> Path:
+    doc = fitz.open()
+    page = doc.new_page(width=600, height=800)
+    page.draw_rect(_BLACK, color=(0, 0, 0), fill=(0, 0, 0))
+    page.set_rotation(rotation)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def _dark_ratio(content: bytes) -> float:
+    with Image.open(io.BytesIO(content)) as image:
+        return float((np.asarray(image.convert("L")) < 60).mean())
+
+
+def _request(bbox, **kwargs) -> evidence_crops.CropRequest:
+    return evidence_crops.CropRequest(page=1, bbox=tuple(float(v) for v in bbox), **kwargs)
+
+
+def test_native_bbox_is_cropped_with_clip_at_requested_dpi(tmp_path):
+    dm = _dm(_pdf(tmp_path / "nativo.pdf"), "crop-native")
+
+    (content,) = asyncio.run(evidence_crops.get_or_render_crops(dm, [_request(_BLACK, dpi=144, padding=0, highlight=False)]))
+
+    with Image.open(io.BytesIO(content)) as image:
+        assert image.size == (280, 80)
+    assert _dark_ratio(content) > 0.95
+
+    rotated = _dm(_pdf(tmp_path / "girado.pdf", rotation=90), "crop-rotated")
+    (content,) = asyncio.run(evidence_crops.get_or_render_crops(rotated, [_request(_BLACK, padding=0, highlight=False)]))
+    assert _dark_ratio(content) > 0.95
+
+
+def test_ocr_bbox_follows_normalized_image_space(tmp_path):
+    path = _pdf(tmp_path / "scan.pdf", rotation=90)
+    with fitz.open(str(path)) as doc:
+        image = _apply_pdf_rotation(_render_page_to_pil(doc, 0, dpi=100), 90).rotate(90, expand=True)
+    ys, xs = np.where(np.asarray(image.convert("L")) < 60)
+    bbox = [xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]
+    dm = _dm(path, "crop-ocr")
+    dm.layer2.sinais_documentais["normalized_pages_v1"] = ProvenancedString(
+        valor=json.dumps(
+            [{"page": 1, "width": image.width, "height": image.height, "rotation_applied": 90, "source_pdf_rotation": 90}]
+        ),
+        fonte="test",
+        metodo="normalized_pages_v1",
+        estado="confirmado",
+        confianca=1.0,
+    )
+
+    (content,) = asyncio.run(evidence_crops.get_or_render_crops(dm, [_request(bbox, dpi=100, padding=0, highlight=False)]))
+
+    assert _dark_ratio(content) > 0.9
+    with Image.open(io.BytesIO(content)) as crop:
+        # Mesma orientação da imagem normalizada.
+        assert crop.size[0] == pytest.approx(bbox[2] - bbox[0], abs=3)
+        assert crop.size[1] == pytest.approx(bbox[3] - bbox[1], abs=3)
+
+
+def test_crop_endpoints_cache_and_batch_timeline_citations(tmp_path, monkeypatch):
+    dm = _dm(_pdf(tmp_path / "api.pdf"), "crop-api")
+    asyncio.run(mongo_store.save(dm))
+    renders = []
+    render_crops = evidence_crops.render_crops
+
+    def counting(path, requests, spaces):
+        renders.append(len(requests))
+        return render_crops(path, requests, spaces)
+
+    monkeypatch.setattr(evidence_crops, "render_crops", counting)
+    client = TestClient(api.app)
+    url = "/documents/crop-api/evidence/crop"
+
+    res = client.get(url, params={"page": 1, "bbox": "120,200,260,240"})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "image/png"
+    assert "immutable" in res.headers["cache-control"]
+    again = client.get(url, params={"page": 1, "bbox": "120,200,260,240"}, headers={"If-None-Match": res.headers["etag"]})
+    assert again.status_code == 304
+    assert renders == [1]
+    assert client.get(url, params={"page": 1, "bbox": "260,200,120,240"}).status_code == 422
+    assert client.get(url, params={"page": 4, "bbox": "120,200,260,240"}).status_code == 404
+
+    timeline = [
+        {"event_id": "e1", "citations": [{"page": 1, "bbox": [120.0, 200.0, 260.0, 240.0], "snippet": "a"}]},
+        {"event_id": "e2", "citations": [{"page": 1, "bbox": [120.0, 200.0, 260.0, 240.0]}, {"page": 1, "bbox": [10.0, 10.0, 60.0, 30.0]}]},
+        {"event_id": "e3", "citations": [], "evidence_navigation": {"page": 1, "bbox": None}},
+    ]
+    monkeypatch.setattr(api, "build_document_timeline_read_model", lambda _dm: {"timeline": timeline})
+    body = client.get("/documents/crop-api/evidence/crops").json()
+
+    assert [(c["bbox"], c["event_ids"]) for c in body["crops"]] == [
+        ([120.0, 200.0, 260.0, 240.0], ["e1", "e2"]),
+        ([10.0, 10.0, 60.0, 30.0], ["e2"]),
+    ]
+    assert base64.b64decode(body["crops"][0]["data"]) == res.content
+    # Página 4 tentou render (nada a cachear); no lote, o recorte já servido
+    # vem do cache e só o novo é renderizado.
+    assert renders == [1, 1, 1]
@@ -101,3 +101,153 @@ async def test_fast_path_does_not_escalate_for_simple_native_pdf_with_layout_spa
 
     stages = [event.etapa for event in out.layer0.processingevents]
     assert "processing_escalation" not in stages
+
+
+def _force_fast_preflight(monkeypatch):
+    monkeypatch.setattr(
+        api,
+        "_collect_preflight_signals",
+        lambda current: api.PreflightSignals(
+            media_type=MediaType.documento.value,
+            page_count=1,
+            has_native_text=True,
+            native_rotation=0,
+            is_pdf=True,
+            original_filename=current.layer0.original_filename,
+        ),
+    )
+
+
+def _stage_events(out: DocumentMemory, stage: str):
+    return [event for event in out.layer0.processingevents if event.etapa == stage and event.status == "success"]
+
+
+@pytest.mark.asyncio
+async def test_escalation_reuses_fast_stages_with_unchanged_inputs(monkeypatch, tmp_path):
+    pdf_path = tmp_path / "escalated.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+    dm = _build_pdf_dm(pdf_path)
+    calls = {"extract_basic": 0, "decompose": 0}
+
+    def fake_extract_basic(current: DocumentMemory) -> DocumentMemory:
+        calls["extract_basic"] += 1
+        current.layer2 = Layer2Evidence()
+        return current
+
+    def fake_decompose(current: DocumentMemory) -> DocumentMemory:
+        calls["decompose"] += 1
+        return current
+
+    _force_fast_preflight(monkeypatch)
+    monkeypatch.setattr(api, "extract_basic", fake_extract_basic)
+    monkeypatch.setattr(api, "decompose_pdf_into_subdocuments", fake_decompose)
+
+    out = await api._run_extract_pipeline(dm)
+
+    assert calls == {"extract_basic": 1, "decompose": 1}
+    extract_events = _stage_events(out, "extract_basic")
+    assert [bool((event.detalhes or {}).get("reused")) for event in extract_events] == [False, True]
+    assert extract_events[1].detalhes["reused_from"] == "fast"
+
+    summary = _stage_events(out, "processing_escalation_reuse")[0].detalhes
+    assert summary["reused_stages"] == [
+        "extract_basic",
+        "apply_page_analysis",
+        "apply_legal_extraction",
+        "apply_entities_canonical_v1",
+    ]
+    assert summary["executed_stages"] == ["decompose_pdf_into_subdocuments"]
+
+
+@pytest.mark.asyncio
+async def test_escalation_reruns_stages_whose_inputs_changed(monkeypatch, tmp_path):
+    pdf_path = tmp_path / "escalated-split.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+    dm = _build_pdf_dm(pdf_path)
+    page_analysis_runs = []
+
+    def fake_extract_basic(current: DocumentMemory) -> DocumentMemory:
+        current.layer2 = Layer2Evidence()
+        return current
+
+    def fake_decompose(current: DocumentMemory) -> DocumentMemory:
+        current.layer2.sinais_documentais["subdocuments_v1"] = ProvenancedString(
+            valor=json.dumps(
+                [
+                    {
+                        "subdoc_id": "subdoc_001",
+                        "doc_type": "laudo_medico",
+                        "page_map": [{"page": 1, "text": "Paciente: MARIA SILVA"}],
+                    }
+                ]
+            ),
+            fonte="pytest",
+            metodo="fixture",
+            estado="confirmado",
+            confianca=1.0,
+        )
+        return current
+
+    real_page_analysis = api.apply_page_analysis
+
+    def tracking_page_analysis(current: DocumentMemory) -> DocumentMemory:
+        page_analysis_runs.append("subdocuments_v1" in current.layer2.sinais_documentais)
+        return real_page_analysis(current)
+
+    _force_fast_preflight(monkeypatch)
+    monkeypatch.setattr(api, "extract_basic", fake_extract_basic)
+    monkeypatch.setattr(api, "decompose_pdf_into_subdocuments", fake_decompose)
+    monkeypatch.setattr(api, "apply_page_analysis", tracking_page_analysis)
+
+    out = await api._run_extract_pipeline(dm)
+
+    assert page_analysis_runs == [False, True]
+    summary = _stage_events(out, "processing_escalation_reuse")[0].detalhes
+    assert summary["reused_stages"] == ["extract_basic", "apply_legal_extraction"]
+    assert "apply_page_analysis" in summary["executed_stages"]
+    assert "subdocuments_v1" in out.layer2.sinais_documentais
+
+
+@pytest.mark.asyncio
+async def test_native_pdf_escalation_reuses_extraction_and_reruns_page_stages(monkeypatch, tmp_path):
+    import fitz
+
+    pdf_path = tmp_path / "native-escalated.pdf"
+    doc = fitz.open()
+    for _ in range(2):
+        page = doc.new_page()
+        for offset, line in enumerate(["Paciente: MARIA DA SILVA SOUZA", "Data: 05/03/2024", "CID F32.1"]):
+            page.insert_text((72, 72 + 20 * offset), line)
+    doc.save(str(pdf_path))
+    doc.close()
+
+    calls = {"extract_basic": 0, "apply_page_analysis": 0}
+    real_extract_basic = api.extract_basic
+    real_page_analysis = api.apply_page_analysis
+
+    def counting_extract_basic(current: DocumentMemory) -> DocumentMemory:
+        calls["extract_basic"] += 1
+        return real_extract_basic(current)
+
+    def counting_page_analysis(current: DocumentMemory) -> DocumentMemory:
+        calls["apply_page_analysis"] += 1
+        return real_page_analysis(current)
+
+    _force_fast_preflight(monkeypatch)
+    monkeypatch.setattr(api, "_needs_escalation_after_extract", lambda current: True)
+    monkeypatch.setattr(api, "extract_basic", counting_extract_basic)
+    monkeypatch.setattr(api, "apply_page_analysis", counting_page_analysis)
+
+    out = await api._run_extract_pipeline(_build_pdf_dm(pdf_path))
+
+    # A extração nativa não roda de novo; a decomposição grava
+    # `subdocuments_v1`, que muda as entradas da análise de página.
+    assert calls == {"extract_basic": 1, "apply_page_analysis": 2}
+    summary = _stage_events(out, "processing_escalation_reuse")[0].detalhes
+    assert summary["reused_stages"] == ["extract_basic", "apply_legal_extraction"]
+    assert summary["executed_stages"] == [
+        "decompose_pdf_into_subdocuments",
+        "apply_page_analysis",
+        "apply_entities_canonical_v1",
+    ]
+    assert "subdocuments_v1" in out.layer2.sinais_documentais
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from relluna.services.ingestion.api import app
+from relluna.services.observability import health
+
+
+class _CountingProbe:
+    def __init__(self, status="ok", detail=None):
+        self.calls = 0
+        self.status = status
+        self.detail = detail
+
+    def __call__(self):
+        self.calls += 1
+        return self.status, self.detail
+
+
+@pytest.fixture
+def fake_monitor():
+    previous = health._MONITOR
+    monitor = health.HealthMonitor({"mongo": _CountingProbe(), "blob": _CountingProbe("degraded", "not configured")})
+    health.set_health_monitor(monitor)
+    yield monitor
+    health.set_health_monitor(previous)
+
+
+def test_health_serves_cached_probe_results(fake_monitor):
+    client = TestClient(app)
+
+    first = client.get("/health").json()
+    second = client.get("/health").json()
+
+    # Uma rodada de probes atende as duas chamadas.
+    assert fake_monitor.probes["mongo"].calls == 1
+    assert first["status"] == "degraded"
+    services = {item["name"]: item for item in second["services"]}
+    assert services["mongo"]["status"] == "ok"
+    assert services["mongo"]["age_seconds"] >= 0
+    assert services["mongo"]["latency_ms"] is not None
+    assert services["blob"]["detail"] == "not configured"
+
+
+def test_liveness_and_readiness_are_split(fake_monitor):
+    client = TestClient(app)
+    fake_monitor.probes["mongo"].status = "error"
+    fake_monitor.probes["mongo"].detail = "connection refused"
+
+    assert client.get("/health/live").status_code == 200
+    not_ready = client.get("/health/ready")
+    assert not_ready.status_code == 503
+    assert not_ready.json()["reasons"] == ["mongo: error"]
+
+    fake_monitor.probes["mongo"].status = "ok"
+    asyncio.run(fake_monitor.run_once())
+    # Blob não configurado não tira o pod do balanceador.
+    assert client.get("/health/ready").status_code == 200
+
+
+def test_probe_latency_is_exported_and_slow_probe_times_out(fake_monitor, monkeypatch):
+    monkeypatch.setenv("RELLUNA_HEALTH_PROBE_TIMEOUT", "0.1")
+    fake_monitor.probes["blob"] = lambda: (time.sleep(0.5), ("ok", None))[1]
+
+    results = asyncio.run(fake_monitor.run_once())
+
+    assert results["blob"].status == "error"
+    assert "excedeu" in results["blob"].detail
+    body = TestClient(app).get("/metrics").text
+    assert 'relluna_health_probe_latency_ms{service="blob"}' in body
+    assert 'relluna_health_probe_total{service="blob",status="error"}' in body
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Engines que só podem ser importadas no primeiro uso.
+_HEAVY_ENGINES = {"fitz", "pymupdf", "pytesseract", "PIL.Image", "pypdf", "numpy", "cv2", "azure.storage.blob", "jsonschema"}
+
+
+def _importtime(statement: str) -> Dict[str, Tuple[int, int]]:
+    """{módulo: (self_us, cumulative_us)} de `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONWARNINGS": "ignore"},
+    )
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def _top(modules: Dict[str, Tuple[int, int]], n: int = 15) -> List[str]:
+    ranked = sorted(modules.items(), key=lambda item: -item[1][1])[:n]
+    return [f"{cumulative / 1000:8.1f} ms  {name}" for name, (_, cumulative) in ranked]
+
+
+def _assert_budget(modules: Dict[str, Tuple[int, int]], root: str, budget_ms: float, forbidden: set) -> None:
+    report = "\n".join(_top(modules))
+    loaded = sorted(forbidden & set(modules))
+    assert not loaded, f"imports pesados na inicialização: {loaded}\n{report}"
+    total_ms = modules[root][1] / 1000
+    assert total_ms <= budget_ms, f"{root} levou {total_ms:.0f} ms (orçamento {budget_ms:.0f} ms)\n{report}"
+
+
+def test_api_import_stays_within_startup_budget():
+    budget_ms = float(os.getenv("RELLUNA_API_IMPORT_BUDGET_MS", "4000"))
+    modules = _importtime("import relluna.services.ingestion.api")
+    _assert_budget(modules, "relluna.services.ingestion.api", budget_ms, _HEAVY_ENGINES)
+
+
+def test_benchmark_cli_import_skips_api_stack():
+    budget_ms = float(os.getenv("RELLUNA_BENCHMARK_IMPORT_BUDGET_MS", "1500"))
+    modules = _importtime("import scripts.benchmark_runner")
+    _assert_budget(
+        modules,
+        "scripts.benchmark_runner",
+        budget_ms,
+        _HEAVY_ENGINES | {"fastapi", "motor", "pymongo", "relluna.services.ingestion.api"},
+    )
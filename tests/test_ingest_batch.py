@@ -0,0 +1,179 @@
+import io
+import time
+import zipfile
+from uuid import uuid4
+
+import pytest
+
+from relluna.infra import ingest_batch_store, mongo_store
+from relluna.services.ingestion import api
+
+
+@pytest.fixture(autouse=True)
+def _clear_batches():
+    ingest_batch_store.clear()
+    yield
+    ingest_batch_store.clear()
+
+
+def _zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_ingest_batch_stages_files_and_zip_members_with_in_batch_dedup(client):
+    token = uuid4().hex
+    a = f"laudo A {token}".encode()
+    b = f"laudo B {token}".encode()
+    archive = _zip_bytes(
+        {
+            "docs/b.txt": b,
+            "docs/a_copia.txt": a,
+            "docs/vazio.txt": b"",
+            "__MACOSX/docs/._b.txt": b"x",
+            "../fora.txt": f"fora {token}".encode(),
+        }
+    )
+
+    res = client.post(
+        "/ingest/batch",
+        files=[
+            ("files", ("a.txt", a, "text/plain")),
+            ("files", ("pacote.zip", archive, "application/zip")),
+        ],
+        data={"case_id": f"caso-{token}"},
+    )
+
+    assert res.status_code == 200
+    body = res.json()
+    items = {item["filename"]: item for item in body["items"]}
+    assert set(items) == {"a.txt", "b.txt", "a_copia.txt", "vazio.txt", "fora.txt"}
+    assert body["counts"] == {"ingested": 3, "deduplicated": 1, "rejected": 1}
+
+    assert items["a_copia.txt"]["deduplicated"] is True
+    assert items["a_copia.txt"]["documentid"] == items["a.txt"]["documentid"]
+    assert items["b.txt"]["source"] == "zip:pacote.zip"
+    assert items["vazio.txt"]["error"] == "Arquivo vazio"
+
+    status = client.get(f"/ingest/batch/{body['batch_id']}").json()
+    assert status["case_id"] == f"caso-{token}"
+    assert status["counts"] == body["counts"]
+
+
+def test_ingest_batch_stamps_case_in_custody_chain(client):
+    token = uuid4().hex
+    res = client.post(
+        "/ingest/batch",
+        files=[("files", ("nota.txt", f"nota {token}".encode(), "text/plain"))],
+        data={"case_id": "caso-42"},
+    )
+    item = res.json()["items"][0]
+
+    doc = client.get(f"/documents/{item['documentid']}")
+    assert doc.status_code == 200
+    custody = doc.json()["layer0"]["custodychain"]
+    assert custody[0]["detalhes"]["case_id"] == "caso-42"
+    assert custody[0]["detalhes"]["batch_id"] == res.json()["batch_id"]
+
+
+def test_ingest_batch_dedups_against_existing_documents_in_one_query(client, monkeypatch):
+    token = uuid4().hex
+    content = f"já ingerido {token}".encode()
+    calls = []
+
+    async def fake_lookup(digests):
+        calls.append(list(digests))
+        return {digest: "doc-existente" for digest in digests}
+
+    monkeypatch.setattr(mongo_store, "find_documentids_by_fingerprints", fake_lookup)
+
+    res = client.post(
+        "/ingest/batch",
+        files=[
+            ("files", ("x.txt", content, "text/plain")),
+            ("files", ("y.txt", content + b"!", "text/plain")),
+        ],
+    )
+
+    assert len(calls) == 1 and len(calls[0]) == 2
+    assert all(item["documentid"] == "doc-existente" for item in res.json()["items"])
+    assert res.json()["counts"] == {"deduplicated": 2}
+
+
+def test_ingest_batch_processes_members_in_background(client, monkeypatch):
+    seen = []
+
+    async def fake_extract(dm, *args, **kwargs):
+        seen.append(dm.layer0.documentid)
+        return dm
+
+    async def fake_infer(dm, *args, **kwargs):
+        if dm.layer0.documentid == seen[0]:
+            raise RuntimeError("falha simulada")
+        return dm
+
+    monkeypatch.setattr(api, "_run_extract_pipeline", fake_extract)
+    monkeypatch.setattr(api, "_run_infer_pipeline", fake_infer)
+
+    token = uuid4().hex
+    res = client.post(
+        "/ingest/batch",
+        files=[("files", (f"{n}.txt", f"{n} {token}".encode(), "text/plain")) for n in range(3)],
+        data={"process": "true"},
+    )
+    assert res.json()["counts"] == {"queued": 3}
+
+    batch_id = res.json()["batch_id"]
+    for _ in range(100):
+        status = client.get(f"/ingest/batch/{batch_id}").json()
+        if "queued" not in status["counts"] and "processing" not in status["counts"]:
+            break
+        time.sleep(0.02)
+
+    assert status["counts"] == {"processed": 2, "failed": 1}
+    failed = [item for item in status["items"] if item["status"] == "failed"]
+    assert failed[0]["documentid"] == seen[0]
+
+
+def test_ingest_batch_removes_promoted_files_of_documents_not_saved(client, monkeypatch):
+    saved = {}
+
+    async def failing_save_many(dms):
+        # Primeiro documento gravado, o resto do bulk falha.
+        saved[dms[0].layer0.contentfingerprint] = dms[0].layer0.documentid
+        raise RuntimeError("bulk_write falhou")
+
+    async def lookup(digests):
+        return {digest: saved[digest] for digest in digests if digest in saved}
+
+    monkeypatch.setattr(mongo_store, "save_many", failing_save_many)
+    monkeypatch.setattr(mongo_store, "find_documentids_by_fingerprints", lookup)
+    token = uuid4().hex
+
+    with pytest.raises(RuntimeError):
+        client.post(
+            "/ingest/batch",
+            files=[("files", (f"falha-{n}.txt", f"{n} {token}".encode(), "text/plain")) for n in range(2)],
+        )
+
+    promoted = sorted(path.name for path in api._upload_dir().glob("*_falha-*.txt") if token in path.read_text())
+    assert [name.split("_", 1)[1] for name in promoted] == ["falha-0.txt"]
+
+
+def test_ingest_batch_requires_files(client):
+    assert client.post("/ingest/batch", data={"case_id": "x"}).status_code in {400, 422}
+    assert client.get(f"/ingest/batch/{uuid4()}").status_code == 404
+
+
+def test_uploads_honor_relluna_upload_dir(client, tmp_path, monkeypatch):
+    upload_dir = tmp_path / "uploads"
+    monkeypatch.setenv("RELLUNA_UPLOAD_DIR", str(upload_dir))
+
+    res = client.post("/ingest", files={"file": ("dir.txt", f"upload {uuid4().hex}".encode(), "text/plain")})
+
+    assert res.status_code == 200
+    assert res.json()["local_file_uri"].startswith(str(upload_dir))
+    assert len(list(upload_dir.glob("*_dir.txt"))) == 1
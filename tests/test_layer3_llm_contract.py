@@ -119,3 +119,44 @@ def test_layer3_llm_requires_lastro_and_meta(monkeypatch):
     assert tmp.lastro and tmp.lastro[0].path == "layer2.data_exif"
     assert tmp.meta is not None
     assert tmp.meta.engine == "azure_openai"
+
+
+# ---------------------------------------------------------------------
+# Etapa assíncrona do pipeline: complementa a Layer3 das regras
+# ---------------------------------------------------------------------
+def test_infer_pipeline_runs_llm_stage_through_async_client(monkeypatch):
+    import asyncio
+
+    from relluna.services.context_inference import llm_context
+    from relluna.services.ingestion import api
+
+    calls = []
+
+    class _FakeClient:
+        async def chat_json(self, *, system, user_json, json_schema):
+            calls.append(user_json)
+            return {
+                "tipo_documento": "laudo",
+                "temporalidades": [],
+                "entidades": [
+                    {"tipo": "pessoa", "valor": "MARIA", "score": 0.7, "lastro_paths": ["layer2.nao_empacotado"]}
+                ],
+                "regras_aplicadas": ["llm_context"],
+            }
+
+    monkeypatch.setattr(llm_context, "get_client", lambda: _FakeClient())
+    monkeypatch.setattr(llm_context, "chat_json", None)  # o caminho síncrono não pode ser usado
+    dm = _dm_com_layer2()
+
+    out = asyncio.run(api._run_infer_pipeline(dm.model_copy(deep=True)))
+    assert calls == []
+    assert not any(event.etapa == "infer_layer3_llm" for event in out.layer0.processingevents)
+
+    monkeypatch.setenv("RELLUNA_LLM_CONTEXT", "1")
+    out = asyncio.run(api._run_infer_pipeline(dm))
+
+    assert len(calls) == 1
+    assert any(event.etapa == "infer_layer3_llm" and event.status == "success" for event in out.layer0.processingevents)
+    assert [entity.valor for entity in out.layer3.entidades_semanticas] == ["MARIA"]
+    assert out.layer3.entidades_semanticas[0].lastro == []
+    assert "llm_context" in out.layer3.regras_aplicadas
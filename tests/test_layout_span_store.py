@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import random
+import re
+
+from relluna.services.entities.entities_canonical_v1 import _find_span_by_snippet
+from relluna.services.evidence.layout_span_store import LayoutSpanStore
+from relluna.services.page_extraction.page_pipeline import _find_best_span_for_value
+
+_WORDS = ["Paciente", "MARIA", "da", "SILVA", "CRM", "12345", "CID", "S83.2", "01/03/2024", "Dra.", "Ana", "LIMA", "x"]
+
+
+def _spans(seed: int, count: int):
+    rng = random.Random(seed)
+    spans = []
+    for idx in range(count):
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 4)))
+        if idx % 17 == 0:
+            text = f"  {text.lower()}\t "
+        x0, y0 = rng.uniform(0, 500), rng.uniform(0, 800)
+        spans.append(
+            {
+                "page": 1 + idx % 3,
+                "text": text,
+                "bbox": [x0, y0, x0 + rng.uniform(5, 120), y0 + rng.uniform(5, 14)],
+            }
+        )
+    return spans
+
+
+def _norm(value):
+    cleaned = re.sub(r"\s+", " ", str(value)).strip() if value is not None else ""
+    return cleaned or None
+
+
+def _legacy_best(spans, value):
+    target = _norm(value)
+    if not target:
+        return None
+    target_low = target.lower()
+    best, best_score = None, -1.0
+    for sp in spans:
+        sp_text = _norm(sp.get("text"))
+        if not sp_text:
+            continue
+        sp_low = sp_text.lower()
+        score = (20.0 if target_low == sp_low else 0.0) + (10.0 if target_low in sp_low else 0.0)
+        sa = {t for t in target_low.split() if len(t) >= 2}
+        sb = {t for t in sp_low.split() if len(t) >= 2}
+        if sa and sb:
+            score += len(sa & sb) / max(1, min(len(sa), len(sb))) * 10.0
+        if score > best_score:
+            best, best_score = sp, score
+    return best if best_score >= 8.0 else None
+
+
+def _legacy_snippet(spans, needle):
+    needle_norm = _norm(needle) or ""
+    for span in spans:
+        text = _norm(span.get("text"))
+        if text and needle_norm in text:
+            return span
+    return None
+
+
+def test_indexed_lookups_match_linear_scan():
+    spans = _spans(seed=7, count=600)
+    store = LayoutSpanStore.from_spans(spans)
+    queries = ["MARIA da SILVA", "crm 12345", "S83", "01/03/2024", "Dra. Ana LIMA", "x", "inexistente", "  silva  "]
+
+    for query in queries:
+        assert _find_best_span_for_value(store, query) == _legacy_best(spans, query)
+        assert _find_best_span_for_value(spans, query) == _legacy_best(spans, query)
+        assert _find_span_by_snippet(store, query) == _legacy_snippet(spans, query)
+
+
+def test_store_round_trips_json_export_and_filters_pages():
+    spans = _spans(seed=3, count=90)
+    spans[5]["confidence"] = 0.8
+    spans[6]["bbox"] = None
+    store = LayoutSpanStore.from_spans(spans)
+
+    assert store.to_records() == spans
+    assert store.page_numbers == [1, 2, 3]
+    assert store.for_pages([2]).to_records() == [span for span in spans if span["page"] == 2]
+
+
+def test_spans_in_bbox_uses_grid_and_exact_intersection():
+    spans = [
+        {"page": 1, "text": "a", "bbox": [10.0, 10.0, 40.0, 20.0]},
+        {"page": 1, "text": "b", "bbox": [300.0, 300.0, 340.0, 310.0]},
+        {"page": 1, "text": "c", "bbox": [60.0, 15.0, 200.0, 25.0]},
+        {"page": 2, "text": "d", "bbox": [10.0, 10.0, 40.0, 20.0]},
+    ]
+    store = LayoutSpanStore.from_spans(spans)
+
+    assert [span["text"] for span in store.spans_in_bbox(1, [0.0, 0.0, 100.0, 30.0])] == ["a", "c"]
+    assert [span["text"] for span in store.spans_in_bbox(1, [41.0, 0.0, 59.0, 9.0])] == []
+    assert [span["text"] for span in store.spans_in_bbox(2, [0.0, 0.0, 20.0, 20.0])] == ["d"]
+
+
+def test_spans_in_bbox_matches_linear_scan_and_reads_only_nearby_cells():
+    rng = random.Random(11)
+    spans = []
+    for idx in range(3000):
+        x0, y0 = rng.uniform(0, 1200), rng.uniform(0, 1600)
+        spans.append({"page": 1, "text": f"t{idx}", "bbox": [x0, y0, x0 + rng.uniform(5, 60), y0 + 12.0]})
+    store = LayoutSpanStore.from_spans(spans)
+
+    def overlaps(box, query):
+        return box[0] <= query[2] and box[2] >= query[0] and box[1] <= query[3] and box[3] >= query[1]
+
+    for _ in range(20):
+        qx, qy = rng.uniform(0, 1200), rng.uniform(0, 1600)
+        query = [qx, qy, qx + 80.0, qy + 40.0]
+        expected = [span["text"] for span in spans if overlaps(span["bbox"], query)]
+        assert [span["text"] for span in store.spans_in_bbox(1, query)] == expected
+
+    # Uma consulta pequena toca poucas células da grade, não a página inteira.
+    grid = store._grid(1)
+    touched = {row for cell in [(1, 1), (1, 2), (2, 1), (2, 2)] for row in grid.get(cell, ())}
+    assert 0 < len(touched) < len(spans) // 20
+
+
+def test_string_page_numbers_are_coerced_for_page_filters():
+    spans = [
+        {"page": "2", "text": "texto", "bbox": [10.0, 10.0, 40.0, 20.0]},
+        {"page": 1, "text": "outra", "bbox": [10.0, 10.0, 40.0, 20.0]},
+        {"page": "sem", "text": "nada", "bbox": [10.0, 10.0, 40.0, 20.0]},
+    ]
+    store = LayoutSpanStore.from_spans(spans)
+
+    assert store.to_records() == spans
+    assert store.page_numbers == [1, 2]
+    assert store.for_pages([2]).to_records() == [spans[0]]
+    assert [span["text"] for span in store.spans_in_bbox(2, [0.0, 0.0, 50.0, 50.0])] == ["texto"]
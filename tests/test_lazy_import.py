@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sys
+import threading
+
+from relluna.core.lazy import lazy_import
+
+
+def _slow_module(tmp_path, name: str) -> None:
+    (tmp_path / f"{name}.py").write_text(
+        "import time\n"
+        "time.sleep(0.2)\n"
+        "def open(value):\n"
+        "    return value * 2\n",
+        encoding="utf-8",
+    )
+
+
+def test_concurrent_first_access_waits_for_the_import(tmp_path, monkeypatch):
+    name = "relluna_lazy_engine_fixture"
+    _slow_module(tmp_path, name)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, name, raising=False)
+
+    engine = lazy_import(name)
+    start = threading.Barrier(8)
+    results, errors = [], []
+
+    def use() -> None:
+        start.wait()
+        try:
+            results.append(engine.open(21))
+        except Exception as exc:  # AttributeError no módulo meio executado
+            errors.append(exc)
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results == [42] * 8
+    assert sys.modules[name] is engine
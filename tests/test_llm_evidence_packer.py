@@ -0,0 +1,144 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, UTC
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+    ProvenancedString,
+)
+from relluna.infra import mongo_store
+from relluna.services.context_inference import llm_context
+from relluna.services.context_inference.evidence_packer import original_tokens, pack_layer2_evidence
+from tests.fakes.fake_motor_collection import InMemoryCollection
+
+
+def _signal(payload) -> ProvenancedString:
+    return ProvenancedString(valor=json.dumps(payload, ensure_ascii=False), fonte="test", metodo="fixture", estado="confirmado", confianca=1.0)
+
+
+def _large_dm(pages: int = 40) -> DocumentMemory:
+    dm = DocumentMemory(
+        layer0=Layer0Custodia(
+            documentid=str(uuid.uuid4()),
+            contentfingerprint="b" * 64,
+            ingestiontimestamp=datetime.now(UTC),
+            ingestionagent="test",
+        ),
+        layer1=Layer1Artefatos(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[ArtefatoBruto(id="original", tipo="original", uri="/tmp/x.pdf")],
+        ),
+    )
+    dm.layer2 = Layer2Evidence()
+    spans = [
+        {"page": page, "text": f"linha {n} da página {page} " * 4, "bbox": [0, n, 100, n + 10]}
+        for page in range(1, pages + 1)
+        for n in range(60)
+    ]
+    page_evidence = [
+        {
+            "page": page,
+            "page_text": "Atesto para os devidos fins. " * 200,
+            "anchors": [
+                {"field": "patient_name", "value": "MARIA DA SILVA", "confidence": 0.6},
+                {"field": "document_date", "value": "2024-03-05", "confidence": 0.95},
+            ],
+            "signal_zones": ["identificacao"],
+            "date_candidates": [{"date_iso": "2024-03-05", "label": "data_documento"}],
+        }
+        for page in range(1, pages + 1)
+    ]
+    dm.layer2.sinais_documentais["layout_spans_v1"] = _signal({"spans": spans})
+    dm.layer2.sinais_documentais["page_evidence_v1"] = _signal(page_evidence)
+    dm.layer2.sinais_documentais["entities_canonical_v1"] = _signal({"document_type": "atestado_medico", "patient": {"name": "MARIA DA SILVA"}})
+    return dm
+
+
+def test_packer_fills_budget_by_relevance_and_skips_raw_spans():
+    dm = _large_dm()
+    packed = pack_layer2_evidence(dm, budget=3000)
+
+    assert packed.packed_tokens <= 3000
+    assert packed.ratio < 0.05
+    assert "layer2.sinais_documentais.layout_spans_v1" not in packed.paths
+    assert packed.paths == [
+        "layer2.sinais_documentais.entities_canonical_v1",
+        "layer2.sinais_documentais.page_evidence_v1",
+    ]
+
+    kinds = [item["tipo"] for item in packed.evidencias]
+    assert kinds[0] == "entities_canonical_v1"
+    # Âncoras de todas as páginas entram antes de qualquer trecho de texto.
+    assert kinds.count("anchors") == 40
+    assert "page_text" not in kinds
+    first_anchors = next(item for item in packed.evidencias if item["tipo"] == "anchors")
+    assert first_anchors["page"] == 1
+    assert first_anchors["conteudo"][0]["field"] == "document_date"
+
+
+def test_llm_inference_sends_packed_evidence_and_drops_unknown_lastro(monkeypatch):
+    dm = _large_dm(pages=3)
+    sent = {}
+
+    def fake_chat_json(*, system, user_json, json_schema):
+        sent["user"] = user_json
+        return {
+            "tipo_documento": "atestado_medico",
+            "temporalidades": [],
+            "entidades": [
+                {
+                    "tipo": "pessoa",
+                    "valor": "MARIA DA SILVA",
+                    "score": 0.9,
+                    "lastro_paths": [
+                        "layer2.sinais_documentais.page_evidence_v1[0].anchors",
+                        "layer2.sinais_documentais.layout_spans_v1",
+                    ],
+                }
+            ],
+            "regras_aplicadas": [],
+        }
+
+    monkeypatch.setattr(llm_context, "chat_json", fake_chat_json)
+    l3 = llm_context.infer_layer3_from_layer2(dm)
+
+    evidence = sent["user"]["evidence"]
+    assert "layout_spans_v1" not in json.dumps(evidence["layer2"])
+    assert evidence["lastro_paths_validos"] == [
+        "layer2.sinais_documentais.entities_canonical_v1",
+        "layer2.sinais_documentais.page_evidence_v1",
+    ]
+    assert [ref.path for ref in l3.entidades_semanticas[0].lastro] == [
+        "layer2.sinais_documentais.page_evidence_v1[0].anchors"
+    ]
+
+    event = next(e for e in dm.layer0.processingevents if e.etapa == "llm_evidence_packing")
+    assert event.status == "warning"
+    assert event.detalhes["invalid_lastro_paths"] == 1
+    assert 0 < event.detalhes["packed_ratio"] < 1
+    assert event.detalhes["packed_tokens"] <= event.detalhes["budget_tokens"]
+
+
+def test_original_tokens_use_compressed_sizes_without_decoding(monkeypatch):
+    monkeypatch.setenv("RELLUNA_SIGNAL_CODEC", "gzip")
+    dm = _large_dm(pages=5)
+    plain = original_tokens(dm)
+    assert plain >= sum(len(sig.valor) for sig in dm.layer2.sinais_documentais.values()) // 4
+
+    coll = InMemoryCollection()
+    asyncio.run(mongo_store.save_document(coll, dm))
+    loaded = asyncio.run(mongo_store.load_document(coll, dm.layer0.documentid))
+    assert dict.__getitem__(loaded.layer2.sinais_documentais, "layout_spans_v1").valor is None
+
+    packed = pack_layer2_evidence(loaded, budget=3000)
+    # raw_bytes conta bytes UTF-8; o texto puro conta caracteres.
+    assert abs(packed.original_tokens - plain) <= plain * 0.05
+    assert dict.__getitem__(loaded.layer2.sinais_documentais, "layout_spans_v1").valor is None
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import pytest
+
+from relluna.core.document_memory import (
+    DocumentMemory,
+    Layer0Custodia,
+    Layer2Evidence,
+    ProvenancedString,
+)
+from relluna.core.document_memory import dirty_tracking
+from relluna.core.document_memory.layer0 import ProcessingEvent
+from relluna.core.document_memory.layer3 import Layer3Evidence
+from relluna.infra import mongo_store
+from tests.fakes.fake_motor_collection import InMemoryCollection
+
+
+def _signal(value: str) -> ProvenancedString:
+    return ProvenancedString(valor=value, fonte="pytest", metodo="fixture", estado="confirmado", confianca=1.0)
+
+
+def _build_dm() -> DocumentMemory:
+    dm = DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid="delta-doc",
+            contentfingerprint="e" * 64,
+            ingestionagent="pytest",
+        ),
+        layer2=Layer2Evidence(),
+    )
+    dm.layer2.sinais_documentais["layout_spans_v1"] = _signal("[" + ",".join(["1"] * 5000) + "]")
+    dm.layer2.sinais_documentais["page_evidence_v1"] = _signal("[]")
+    return dm
+
+
+@pytest.mark.asyncio
+async def test_save_after_load_sends_only_changed_paths():
+    coll = InMemoryCollection()
+    first = await mongo_store.save_document(coll, _build_dm())
+    assert first.kind == "full"
+
+    dm = await mongo_store.load_document(coll, "delta-doc")
+    dm.layer3 = Layer3Evidence()
+    dm.layer2.sinais_documentais["timeline_seed_v2"] = _signal("[]")
+    del dm.layer2.sinais_documentais["page_evidence_v1"]
+
+    op = await mongo_store.save_document(coll, dm)
+
+    assert op.kind == "delta"
+    assert op.paths == [
+        "layer2.sinais_documentais.page_evidence_v1",
+        "layer2.sinais_documentais.timeline_seed_v2",
+        "layer3",
+    ]
+    assert op.bytes_written < first.bytes_written / 5
+
+    reloaded = await mongo_store.load_document(coll, "delta-doc")
+    assert reloaded.model_dump(mode="json") == dm.model_dump(mode="json")
+    assert coll.docs["delta-doc"][mongo_store.REVISION_FIELD] == 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_document_is_not_rewritten():
+    coll = InMemoryCollection()
+    await mongo_store.save_document(coll, _build_dm())
+    dm = await mongo_store.load_document(coll, "delta-doc")
+
+    op = await mongo_store.save_document(coll, dm)
+
+    assert op.kind == "noop"
+    assert op.bytes_written == 0
+    assert [name for name, _ in coll.calls] == ["replace_one"]
+
+
+@pytest.mark.asyncio
+async def test_load_takes_digests_from_the_stored_document(monkeypatch):
+    coll = InMemoryCollection()
+    dm = _build_dm()
+    dm.layer0.processingevents.append(ProcessingEvent(etapa="ocr", engine="pytest", detalhes={"pages": [1]}))
+    await mongo_store.save_document(coll, dm)
+
+    def no_model_dump(dm):
+        raise AssertionError("load serializou o modelo")
+
+    monkeypatch.setattr(dirty_tracking, "persistable_payloads", no_model_dump)
+    loaded = await mongo_store.load_document(coll, "delta-doc")
+    monkeypatch.undo()
+
+    # Contêiner aninhado compartilhado com o documento cru: a mudança in-place
+    # ainda aparece no delta.
+    loaded.layer0.processingevents[0].detalhes["pages"].append(2)
+    op = await mongo_store.save_document(coll, loaded)
+    assert op.kind == "delta" and op.paths == ["layer0"]
+    assert coll.docs["delta-doc"]["layer0"]["processingevents"][0]["detalhes"]["pages"] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_cannot_clobber_each_other():
+    coll = InMemoryCollection()
+    await mongo_store.save_document(coll, _build_dm())
+    worker_a = await mongo_store.load_document(coll, "delta-doc")
+    worker_b = await mongo_store.load_document(coll, "delta-doc")
+
+    worker_a.layer3 = Layer3Evidence()
+    await mongo_store.save_document(coll, worker_a)
+
+    worker_b.layer2.sinais_documentais["page_evidence_v1"] = _signal('[{"page": 1}]')
+    with pytest.raises(mongo_store.ConcurrentModificationError):
+        await mongo_store.save_document(coll, worker_b)
+
+
+@pytest.mark.asyncio
+async def test_legacy_document_without_revision_accepts_delta():
+    coll = InMemoryCollection()
+    legacy = _build_dm().model_dump(mode="json")
+    coll.docs["delta-doc"] = legacy
+
+    dm = await mongo_store.load_document(coll, "delta-doc")
+    dm.layer3 = Layer3Evidence()
+    op = await mongo_store.save_document(coll, dm)
+
+    assert op.kind == "delta"
+    assert coll.docs["delta-doc"][mongo_store.REVISION_FIELD] == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_save_reports_stale_revisions_instead_of_persisting_them():
+    coll = InMemoryCollection()
+    await mongo_store.save_document(coll, _build_dm())
+    stale = await mongo_store.load_document(coll, "delta-doc")
+    fresh = await mongo_store.load_document(coll, "delta-doc")
+    fresh.layer3 = Layer3Evidence()
+    await mongo_store.save_document(coll, fresh)
+
+    other = _build_dm()
+    other.layer0.documentid = "delta-other"
+    stale.layer2.sinais_documentais["page_evidence_v1"] = _signal('[{"page": 1}]')
+    mongo_store.reset_save_stats()
+
+    ops = [mongo_store.build_save_operation(dm) for dm in (stale, other)]
+    conflicts = await mongo_store.bulk_save_operations(coll, ops)
+
+    assert conflicts == ["delta-doc"]
+    assert [item["documentid"] for item in mongo_store.get_save_stats()] == ["delta-other"]
+    assert coll.docs["delta-doc"][mongo_store.REVISION_FIELD] == 2
+
+
+@pytest.mark.asyncio
+async def test_document_revisions_tracks_saves_without_loading_layers():
+    coll = InMemoryCollection()
+    await mongo_store.save_document(coll, _build_dm())
+    assert await mongo_store.document_revisions(coll, ["delta-doc", "nope"]) == {"delta-doc": 1}
+
+    dm = await mongo_store.load_document(coll, "delta-doc")
+    dm.layer3 = Layer3Evidence()
+    await mongo_store.save_document(coll, dm)
+    assert await mongo_store.document_revisions(coll, ["delta-doc"]) == {"delta-doc": 2}
+    assert coll.calls[-1][0] == "find"
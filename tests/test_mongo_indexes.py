@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from relluna import cli
+from relluna.infra import mongo_store
+from relluna.infra.mongo import indexes
+from relluna.services.ingestion import api
+from relluna.services.observability import metrics
+from relluna.services.orchestration import reprocess
+
+
+class _Collection:
+    def __init__(self, name: str, created: list, fail: bool = False) -> None:
+        self.name = name
+        self.created = created
+        self.fail = fail
+
+    async def create_index(self, keys, **kwargs):
+        if self.fail:
+            raise RuntimeError("índice recusado")
+        self.created.append((self.name, kwargs.get("name"), kwargs))
+        return kwargs.get("name")
+
+
+class _Database:
+    def __init__(self, failing=()) -> None:
+        self.created: list = []
+        self.failing = set(failing)
+
+    def __getitem__(self, name: str) -> _Collection:
+        return _Collection(name, self.created, fail=name in self.failing)
+
+
+def _names(db: _Database):
+    return {(collection, name) for collection, name, _ in db.created}
+
+
+def test_all_index_builders_run_and_the_memo_gets_its_ttl():
+    db = _Database()
+    assert asyncio.run(indexes.ensure_all_indexes(db)) == []
+
+    assert {
+        ("document_memory", "uniq_documentid"),
+        ("processing_event_log", "idx_documentid_seq"),
+        ("read_model_documents", "idx_document_id"),
+        ("person_index", "idx_blocks_role"),
+        ("stage_memo", "ttl_expires_at"),
+    } <= _names(db)
+    ttl = next(kwargs for collection, name, kwargs in db.created if name == "ttl_expires_at")
+    assert ttl["expireAfterSeconds"] == 0
+
+
+def test_document_pages_get_the_unique_page_and_lookup_indexes():
+    db = _Database()
+    asyncio.run(indexes.ensure_all_indexes(db))
+
+    assert {
+        ("document_pages", "uniq_documentid_page"),
+        ("document_pages", "idx_taxonomy"),
+        ("document_pages", "idx_subdoc_id"),
+        ("document_pages", "idx_anchor_labels"),
+    } <= _names(db)
+    unique = next(kwargs for collection, name, kwargs in db.created if name == "uniq_documentid_page")
+    assert unique["unique"] is True
+
+
+def test_a_failing_builder_does_not_stop_the_others():
+    db = _Database(failing={"person_index"})
+    assert asyncio.run(indexes.ensure_all_indexes(db)) == ["ensure_person_index_indexes"]
+    assert ("stage_memo", "ttl_expires_at") in _names(db)
+
+
+def test_api_startup_builds_the_indexes(monkeypatch):
+    db = _Database(failing={"person_index"})
+    monkeypatch.setattr(mongo_store, "get_database", lambda: db)
+    asyncio.run(api._ensure_mongo_indexes())
+    assert ("stage_memo", "ttl_expires_at") in _names(db)
+    assert metrics.get_value("relluna_mongo_index_failures_total", builder="ensure_person_index_indexes") >= 1
+
+    calls = []
+
+    async def spy():
+        calls.append("startup")
+
+    monkeypatch.setattr(api, "_ensure_mongo_indexes", spy)
+    with TestClient(api.app):
+        pass
+    assert calls == ["startup"]
+
+
+def test_reprocess_cli_builds_the_indexes_before_running(tmp_path, monkeypatch, capsys):
+    db = _Database()
+    monkeypatch.setattr(mongo_store, "get_database", lambda: db)
+    ran = []
+
+    async def run(self):
+        ran.append(sorted(_names(db)))
+        return reprocess.ReprocessCheckpoint(run_key="teste")
+
+    monkeypatch.setattr(reprocess.Reprocessor, "run", run)
+    assert cli.main(["reprocess", "--checkpoint", str(tmp_path / "cp.json"), "--workers", "1"]) == 0
+    assert ("stage_memo", "ttl_expires_at") in ran[0]
+    assert "processed=0" in capsys.readouterr().out
+
+
+def test_lookup_collections_get_their_indexes(monkeypatch):
+    monkeypatch.setenv("RELLUNA_LLM_CACHE_TTL_HOURS", "2")
+    db = _Database()
+    asyncio.run(indexes.ensure_all_indexes(db))
+
+    assert {
+        ("near_duplicate_index", "idx_bands_kind"),
+        ("llm_cache", "ttl_created_at"),
+        ("export_jobs", "uniq_job_id"),
+        ("ingest_batches", "uniq_batch_id"),
+        ("ingest_batches", "idx_case_id_created_at"),
+    } <= _names(db)
+    ttl = next(kwargs for collection, name, kwargs in db.created if name == "ttl_created_at")
+    assert ttl["expireAfterSeconds"] == 7200
+
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+from hashlib import sha256
+from datetime import datetime, timezone
+from pathlib import Path
+
+import fitz
+import pytest
+from PIL import Image, ImageDraw
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+    ProvenancedString,
+)
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.infra import mongo_store, near_duplicate_store
+from relluna.services.ingestion import api
+from relluna.services.orchestration import near_duplicate
+
+_LAUDO = (
+    "Laudo médico pericial. Paciente MARIA SILVA, 42 anos, atendida em 05/03/2024 "
+    "no Hospital Central. Queixa de dor lombar crônica com irradiação para membro "
+    "inferior esquerdo. Exame físico com Lasègue positivo. Ressonância magnética "
+    "evidencia hérnia discal L4-L5. Conclusão: incapacidade temporária para o "
+    "trabalho por noventa dias, CID M51.1. Responsável: DRA ANA LIMA, CRM 12345."
+)
+_LAUDO = "\n".join(f"{n}. {_LAUDO}" for n in range(1, 5))
+
+
+def _write_pdf(path: Path, text: str) -> Path:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(40, 40, 560, 800), text, fontsize=10)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def _build_dm(documentid: str, path: Path) -> DocumentMemory:
+    return DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid=documentid,
+            contentfingerprint=sha256(documentid.encode()).hexdigest(),
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="test",
+            original_filename=path.name,
+            mimetype="application/pdf",
+            processingevents=[],
+        ),
+        layer1=Layer1Artefatos(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[
+                ArtefatoBruto(
+                    id=documentid,
+                    tipo=ArtefatoTipo.original,
+                    uri=str(path),
+                    nome=path.name,
+                    mimetype="application/pdf",
+                    tamanho_bytes=path.stat().st_size,
+                )
+            ],
+        ),
+        layer2=Layer2Evidence(),
+    )
+
+
+def test_simhash_is_close_for_variants_and_far_for_other_text():
+    base = near_duplicate.text_simhash(_LAUDO)
+    variant = near_duplicate.text_simhash(_LAUDO.replace("05/03/2024", "05/03/2024.") + " Página 1 de 1")
+    other = near_duplicate.text_simhash("Recibo de pagamento de aluguel referente ao mês de março, apartamento 302, locador JOAO PEREIRA.")
+
+    assert near_duplicate_store.hamming(base, variant) <= near_duplicate.max_distance("text_simhash")
+    assert near_duplicate_store.hamming(base, other) > 16
+
+
+def test_dhash_survives_rescan_noise_and_resize():
+    image = Image.new("RGB", (600, 800), "white")
+    draw = ImageDraw.Draw(image)
+    for row in range(0, 800, 60):
+        draw.rectangle([40, row + 10, 40 + (row * 7) % 500, row + 30], fill="black")
+    rescanned = image.resize((450, 600)).rotate(0.5, fillcolor="white")
+
+    distance = near_duplicate_store.hamming(near_duplicate.image_dhash(image), near_duplicate.image_dhash(rescanned))
+    assert distance <= near_duplicate.max_distance("image_dhash")
+
+
+@pytest.mark.asyncio
+async def test_index_finds_candidates_through_bands():
+    await near_duplicate_store.put("a", kind="text_simhash", value=0xFFFF_0000_FFFF_0000)
+    await near_duplicate_store.put("b", kind="text_simhash", value=0x0000_FFFF_0000_FFFF)
+    await near_duplicate_store.put("c", kind="image_dhash", value=0xFFFF_0000_FFFF_0000)
+
+    # 7 bits espalhados por bandas diferentes ainda deixam uma banda intacta.
+    probe = 0xFFFF_0000_FFFF_0000 ^ 0x0101_0101_0101_0100
+    assert await near_duplicate_store.find_similar(kind="text_simhash", value=probe, max_distance=7) == [("a", 7)]
+    assert await near_duplicate_store.find_similar(kind="text_simhash", value=probe, max_distance=6) == []
+    assert await near_duplicate_store.find_similar(
+        kind="text_simhash", value=0xFFFF_0000_FFFF_0000, max_distance=0, exclude="a"
+    ) == []
+
+
+@pytest.mark.asyncio
+async def test_pipeline_flags_and_links_near_duplicate(tmp_path):
+    first = await api._run_extract_pipeline(_build_dm("nd-first", _write_pdf(tmp_path / "a.pdf", _LAUDO)))
+    assert not [e for e in first.layer0.processingevents if e.etapa == "processing_near_duplicate"]
+
+    second = await api._run_extract_pipeline(
+        _build_dm("nd-second", _write_pdf(tmp_path / "b.pdf", _LAUDO + " Cópia reexportada."))
+    )
+    events = [e for e in second.layer0.processingevents if e.etapa == "processing_near_duplicate"]
+    assert len(events) == 1
+    assert events[0].detalhes["similar_to"] == "nd-first"
+    assert events[0].detalhes["kind"] == "text_simhash"
+
+    edge = second.layer0.versiongraph[-1]
+    assert (edge.from_artifact_id, edge.to_artifact_id, edge.relation) == ("nd-first", "nd-second", "near_duplicate_of")
+    # Sem opt-in, a extração roda normalmente.
+    assert second.layer2.sinais_documentais
+
+    # Reprocessar o mesmo documento não repete o aviso nem a aresta.
+    again = await api._run_extract_pipeline(second)
+    assert len([e for e in again.layer0.processingevents if e.etapa == "processing_near_duplicate"]) == 1
+    assert len([edge for edge in again.layer0.versiongraph if edge.relation == "near_duplicate_of"]) == 1
+
+
+def test_max_distance_is_capped_by_the_band_guarantee(monkeypatch):
+    monkeypatch.setenv("RELLUNA_NEAR_DUPLICATE_TEXT_BITS", "12")
+    monkeypatch.setenv("RELLUNA_NEAR_DUPLICATE_IMAGE_BITS", "-1")
+    assert near_duplicate.max_distance("text_simhash") == near_duplicate_store.BANDS - 1 == 7
+    assert near_duplicate.max_distance("image_dhash") == 0
+
+
+@pytest.mark.asyncio
+async def test_reuse_copies_prior_signals_and_skips_extraction(tmp_path, monkeypatch):
+    prior = _build_dm("nd-prior", _write_pdf(tmp_path / "a.pdf", _LAUDO))
+    prior.layer2.sinais_documentais["page_evidence_v1"] = ProvenancedString(
+        valor=json.dumps([{"page": 1, "document_id": "nd-prior", "page_text": "laudo"}]),
+        fonte="test",
+        metodo="test",
+        estado="confirmado",
+        confianca=1.0,
+    )
+    await mongo_store.save(prior)
+    await near_duplicate_store.put("nd-prior", **_fingerprint_kwargs(prior))
+
+    calls = []
+
+    async def _fake_extract(dm):
+        calls.append(dm.layer0.documentid)
+        return dm
+
+    monkeypatch.setattr(api, "_run_extract_by_mode", _fake_extract)
+    monkeypatch.setenv("RELLUNA_NEAR_DUPLICATE_REUSE", "1")
+
+    dm = await api._run_extract_pipeline(_build_dm("nd-copy", _write_pdf(tmp_path / "b.pdf", _LAUDO)))
+
+    assert calls == []
+    pages = json.loads(dm.layer2.sinais_documentais["page_evidence_v1"].valor)
+    assert pages[0]["document_id"] == "nd-copy"
+    reuse = [e for e in dm.layer0.processingevents if e.etapa == "processing_near_duplicate_reuse"]
+    assert reuse and reuse[0].detalhes["reused_from"] == "nd-prior"
+    assert await near_duplicate_store.find_similar(max_distance=0, exclude="nd-prior", **_fingerprint_kwargs(dm))
+
+
+def _fingerprint_kwargs(dm: DocumentMemory) -> dict:
+    fingerprint = near_duplicate.compute_fingerprint(dm)
+    return {"kind": fingerprint.kind, "value": fingerprint.value}
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from relluna.core.contracts.document_memory_contract import Layer5Derivatives
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+    ProvenancedString,
+)
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.infra import mongo_store
+from relluna.services.derivatives import page_previews
+from relluna.services.ingestion.api import app
+
+
+@pytest.fixture(autouse=True)
+def _derivatives_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELLUNA_DERIVATIVES_DIR", str(tmp_path / "derivatives"))
+    monkeypatch.delenv("RELLUNA_BLOB_BACKEND", raising=False)
+
+
+def _pdf(path: Path, pages: int = 2) -> Path:
+    doc = fitz.open()
+    for index in range(pages):
+        doc.new_page().insert_text((72, 72), f"Página {index + 1}")
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def _dm(path: Path, documentid: str, normalized=None) -> DocumentMemory:
+    dm = DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid=documentid,
+            contentfingerprint="e" * 64,
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="test",
+            processingevents=[],
+        ),
+        layer1=Layer1Artefatos(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[
+                ArtefatoBruto(
+                    id=documentid,
+                    tipo=ArtefatoTipo.original,
+                    uri=str(path),
+                    nome=path.name,
+                    mimetype="application/pdf",
+                    tamanho_bytes=path.stat().st_size,
+                )
+            ],
+        ),
+        layer2=Layer2Evidence(),
+    )
+    if normalized is not None:
+        dm.layer2.sinais_documentais["normalized_pages_v1"] = ProvenancedString(
+            valor=json.dumps(normalized),
+            fonte="test",
+            metodo="normalized_pages_v1",
+            estado="confirmado",
+            confianca=1.0,
+        )
+    dm.layer5 = Layer5Derivatives()
+    return dm
+
+
+def _webp_size(content: bytes):
+    with Image.open(io.BytesIO(content)) as image:
+        assert image.format == "WEBP"
+        return image.size
+
+
+def test_previews_reuse_normalizer_renders(tmp_path):
+    render = tmp_path / "page_001.png"
+    Image.new("RGB", (850, 1100), "white").save(render)
+    dm = _dm(_pdf(tmp_path / "doc.pdf"), "preview-doc", [{"page": 1, "image_path": str(render), "rotation_applied": 0}])
+
+    dm = asyncio.run(page_previews.apply_page_previews(dm))
+
+    thumbs = dm.layer5.imagens_derivadas
+    previews = dm.layer5.documentos_derivados
+    assert [(d.tipo, d.pagina, d.variante, d.largura) for d in thumbs] == [("page_thumbnail_webp", 1, "thumb", 200)]
+    # O render tem 850px: "large" (1600px) fica para o render sob demanda.
+    assert [(d.variante, d.largura) for d in previews] == [("small", 480), ("medium", 800)]
+    assert all(Path(d.uri.removeprefix("file://")).exists() for d in thumbs + previews)
+    assert {uri.kind for uri in dm.layer5.storage_uris} == {"filesystem"}
+    stored = asyncio.run(page_previews.load_preview("preview-doc", 1, "thumb"))
+    assert _webp_size(stored) == (200, 259)
+
+
+def test_native_pages_are_rendered_on_demand_and_cached(tmp_path):
+    dm = _dm(_pdf(tmp_path / "nativo.pdf"), "native-doc")
+
+    content = asyncio.run(page_previews.get_or_render_preview(dm, 2, "large"))
+
+    assert _webp_size(content)[0] == 1600
+    assert asyncio.run(page_previews.load_preview("native-doc", 2, "large")) == content
+    assert asyncio.run(page_previews.get_or_render_preview(dm, 5, "thumb")) is None
+
+
+def test_preview_endpoint_serves_webp_with_long_lived_cache(tmp_path):
+    dm = _dm(_pdf(tmp_path / "api.pdf"), "preview-api-doc")
+    asyncio.run(mongo_store.save(dm))
+    client = TestClient(app)
+
+    res = client.get("/documents/preview-api-doc/pages/1/preview", params={"size": "small"})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "image/webp"
+    assert "immutable" in res.headers["cache-control"]
+    assert _webp_size(res.content)[0] == 480
+
+    again = client.get(
+        "/documents/preview-api-doc/pages/1/preview",
+        params={"size": "small"},
+        headers={"If-None-Match": res.headers["etag"]},
+    )
+    assert again.status_code == 304
+    assert client.get("/documents/preview-api-doc/pages/9/preview").status_code == 404
+    assert client.get("/documents/preview-api-doc/pages/1/preview", params={"size": "huge"}).status_code == 422
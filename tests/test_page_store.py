@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from hashlib import sha256
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+    ProvenancedString,
+)
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.infra import mongo_store, page_store
+from relluna.services.ingestion.api import app
+from relluna.services.read_model import page_index
+from relluna.services.read_model.projector import project_dm_to_read_model
+
+
+def _signal(payload) -> ProvenancedString:
+    return ProvenancedString(
+        valor=json.dumps(payload, ensure_ascii=False),
+        fonte="test",
+        metodo="test",
+        estado="confirmado",
+        confianca=1.0,
+    )
+
+
+def _dm(documentid: str, pages: int = 5) -> DocumentMemory:
+    dm = DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid=documentid,
+            contentfingerprint=sha256(documentid.encode()).hexdigest(),
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="test",
+            processingevents=[],
+        ),
+        layer2=Layer2Evidence(),
+    )
+    evidence = [
+        {
+            "page": page,
+            "subdoc_id": "sd1" if page <= 2 else "sd2",
+            "page_text": f"texto da página {page}",
+            "page_taxonomy": {"value": "laudo_medico" if page % 2 else "receituario", "confidence": 0.9},
+            "anchors": [{"label": "cid", "value": "M54"}] if page == 3 else [],
+        }
+        for page in range(1, pages + 1)
+    ]
+    ocr = [{"page": page, "text": "", "strategy": "ocr_heavy", "status": "success"} for page in range(1, pages + 1)]
+    units = [{"page_index": page, "subdoc_id": "sd1" if page <= 2 else "sd2"} for page in range(1, pages + 1)]
+    dm.layer2.sinais_documentais["page_evidence_v1"] = _signal(evidence)
+    dm.layer2.sinais_documentais["ocr_pages_v1"] = _signal(ocr)
+    dm.layer2.sinais_documentais["page_unit_v1"] = _signal(units)
+    return dm
+
+
+def test_page_records_are_queryable_by_indexed_fields():
+    dm = _dm("pages-doc")
+    assert asyncio.run(page_index.index_document(dm)) == 5
+
+    by_anchor = asyncio.run(page_store.find_pages(anchor_label="cid"))
+    assert [(item["documentid"], item["page"]) for item in by_anchor] == [("pages-doc", 3)]
+    assert "evidence" not in by_anchor[0]
+    assert [item["page"] for item in asyncio.run(page_store.find_pages(taxonomy="receituario"))] == [2, 4]
+    assert [item["page"] for item in asyncio.run(page_store.find_pages(subdoc_id="sd1"))] == [1, 2]
+
+    # Reindexar troca os registros do documento.
+    asyncio.run(page_index.index_document(_dm("pages-doc", pages=2)))
+    assert asyncio.run(page_store.count_pages("pages-doc")) == 2
+
+
+class _PagesCollection:
+    def __init__(self) -> None:
+        self.docs = {}
+        self.ops = []
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            assert request._upsert and request._filter == {"_id": request._doc["_id"]}
+            self.docs[request._doc["_id"]] = dict(request._doc)
+        self.ops.append(("bulk_write", len(requests), len(self.docs)))
+        return SimpleNamespace(upserted_count=len(requests))
+
+    async def delete_many(self, query):
+        keep = set(query["page"]["$nin"])
+        stale = [key for key, doc in self.docs.items() if doc["documentid"] == query["documentid"] and doc["page"] not in keep]
+        for key in stale:
+            del self.docs[key]
+        self.ops.append(("delete_many", len(stale), len(self.docs)))
+        return SimpleNamespace(deleted_count=len(stale))
+
+
+def test_reindex_upserts_pages_before_removing_stale_ones(monkeypatch):
+    coll = _PagesCollection()
+    monkeypatch.setattr(page_store, "get_collection", lambda: coll)
+
+    assert asyncio.run(page_index.index_document(_dm("mongo-pages", pages=5))) == 5
+    assert asyncio.run(page_index.index_document(_dm("mongo-pages", pages=3))) == 3
+
+    # O documento nunca fica sem páginas entre a escrita e a limpeza.
+    assert coll.ops == [("bulk_write", 5, 5), ("delete_many", 0, 5), ("bulk_write", 3, 5), ("delete_many", 2, 3)]
+    assert sorted(doc["page"] for doc in coll.docs.values()) == [1, 2, 3]
+
+
+def test_read_model_keeps_only_the_page_summary():
+    dm = _dm("pages-summary")
+    dm.layer1 = Layer1Artefatos(
+        midia=MediaType.documento,
+        origem=OriginType.digital_nativo,
+        artefatos=[ArtefatoBruto(id="a1", tipo=ArtefatoTipo.original, uri="/tmp/a1.pdf")],
+    )
+    rm = project_dm_to_read_model(dm)
+
+    assert rm.pages.model_dump() == {
+        "endpoint": "/documents/pages-summary/pages",
+        "total_pages": 5,
+        "anchored_pages": 1,
+        "taxonomy_counts": {"laudo_medico": 3, "receituario": 2},
+        "subdoc_ids": ["sd1", "sd2"],
+    }
+
+
+def test_pages_endpoint_serves_slices_and_indexes_on_first_read():
+    asyncio.run(mongo_store.save(_dm("pages-api", pages=7)))
+    client = TestClient(app)
+
+    body = client.get("/documents/pages-api/pages", params={"from": 2, "limit": 3}).json()
+    assert body["total_pages"] == 7
+    assert [page["page"] for page in body["pages"]] == [2, 3, 4]
+    assert body["next_from"] == 5
+    assert "evidence" not in body["pages"][0]
+
+    detail = client.get("/documents/pages-api/pages", params={"from": 6, "to": 7, "fields": "evidence,unit"}).json()
+    assert [page["evidence"]["page_text"] for page in detail["pages"]] == ["texto da página 6", "texto da página 7"]
+    assert detail["pages"][0]["unit"]["subdoc_id"] == "sd2" and "ocr" not in detail["pages"][0]
+    assert detail["next_from"] is None
+
+    streamed = client.get("/documents/pages-api/pages", params={"from": 5, "format": "ndjson"})
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["page"] for line in streamed.text.splitlines()] == [5, 6, 7]
+
+    assert client.get("/documents/pages-api/pages", params={"fields": "layout"}).status_code == 422
+    assert client.get("/documents/nope/pages").status_code == 404
+
+
+def test_pages_endpoint_skips_the_document_load_once_indexed(monkeypatch):
+    asyncio.run(mongo_store.save(_dm("pages-indexed", pages=3)))
+    client = TestClient(app)
+    assert client.get("/documents/pages-indexed/pages").json()["total_pages"] == 3
+
+    async def no_load(documentid):
+        raise AssertionError("carregou o DocumentMemory")
+
+    monkeypatch.setattr(mongo_store, "get", no_load)
+    body = client.get("/documents/pages-indexed/pages", params={"from": 3}).json()
+    assert body["total_pages"] == 3 and [page["page"] for page in body["pages"]] == [3]
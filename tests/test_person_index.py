@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from hashlib import sha256
+
+import pytest
+
+from relluna.core.document_memory import (
+    DocumentMemory,
+    Layer0Custodia,
+    Layer2Evidence,
+    ProvenancedString,
+)
+from relluna.infra import person_index_store
+from relluna.services.entities import person_index
+from relluna.services.entities.entities_canonical_v1 import _build_document_relation_graph_v1
+from relluna.services.entities.person_blocking import (
+    candidate_pairs,
+    person_blocking_keys,
+    person_match_score,
+    phonetic_code,
+)
+
+
+def _signal(payload) -> ProvenancedString:
+    return ProvenancedString(
+        valor=json.dumps(payload, ensure_ascii=False),
+        fonte="test",
+        metodo="test",
+        estado="confirmado",
+        confianca=1.0,
+    )
+
+
+def _dm(documentid: str, patient: str, *, cpf: str | None = None, page_text: str = "") -> DocumentMemory:
+    dm = DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid=documentid,
+            contentfingerprint=sha256(documentid.encode()).hexdigest(),
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="test",
+            processingevents=[],
+        ),
+        layer2=Layer2Evidence(),
+    )
+    dm.layer2.sinais_documentais["page_evidence_v1"] = _signal(
+        [{"page": 1, "page_text": page_text, "administrative_entities": {"cpf": [cpf] if cpf else []}}]
+    )
+    dm.layer2.sinais_documentais["entities_canonical_v1"] = _signal(
+        {"patient": {"name": patient}, "provider": {"name": "DRA ANA LIMA"}}
+    )
+    return dm
+
+
+def test_blocking_keys_fold_accents_and_spelling_variants():
+    left = set(person_blocking_keys("José Antônio Conceição"))
+    right = set(person_blocking_keys("JOSE ANTONIO CONCEICAO"))
+    assert left == right
+    assert phonetic_code("Thereza") == phonetic_code("Tereza")
+    assert set(person_blocking_keys("Luiz Souza")) & set(person_blocking_keys("Luis Sousa"))
+    assert "cpf:12345678909" in person_blocking_keys("Maria Silva", cpf="123.456.789-09")
+
+    assert person_match_score("Maria da Silva", "MARIA SILVA")[0] >= 0.9
+    assert person_match_score("Maria Silva", "Maria Silva", left_cpf="12345678909", right_cpf="98765432100")[0] == 0.0
+
+
+def test_candidate_pairs_only_compare_shared_blocks():
+    letters = "bcdfgjklmnprstvxz"
+    names = [
+        f"{a}{b}ana {c}{d}ares"
+        for a in letters for b in "aeiou" for c in letters for d in "aeiou"
+        if (a, c) != ("m", "s")
+    ][:3000] + ["Maria Silva", "Maria da Silva"]
+    pairs = candidate_pairs([person_blocking_keys(name) for name in names])
+    # 3000 nomes distintos: ~4,5 milhões de pares possíveis, só os que colidem são comparados.
+    assert (3000, 3001) in pairs
+    assert len(pairs) < 60_000
+    # Blocos acima do limite (sobrenome muito comum) não geram pares.
+    assert candidate_pairs([["sn:silva:m"]] * 5, max_block=3) == set()
+
+
+def test_relation_graph_matches_pairwise_semantics():
+    def unit(subdoc_id, patient, provider, date):
+        return {
+            "subdoc_id": subdoc_id,
+            "document_type": "atestado_medico",
+            "patient": {"name": patient} if patient else None,
+            "provider": {"name": provider},
+            "document_date": {"date_iso": date} if date else None,
+            "evidence_refs": [],
+        }
+
+    units = [
+        unit("s1", "MARIA SILVA", "DR JOAO", "2024-03-05"),
+        unit("s2", "MARIA SILVA", "DR PEDRO", "2024-09-01"),
+        unit("s3", "ANA COSTA", "DR JOAO", "2023-01-01"),
+        unit("s4", "CARLOS LIMA", "DR PEDRO", "2022-01-01"),
+        unit("s5", None, "DR X", None),
+    ]
+    graph = _build_document_relation_graph_v1(units)
+    edges = {(e["source_subdoc_id"], e["target_subdoc_id"], e["relation_type"]) for e in graph["edges"]}
+
+    assert ("s1", "s2", "same_patient") in edges
+    assert ("s1", "s3", "conflict") in edges
+    assert ("s2", "s4", "conflict") in edges
+    assert {(a, b) for a, b, r in edges if r == "unknown"} == {("s1", "s5"), ("s2", "s5"), ("s3", "s5"), ("s4", "s5")}
+    # s1-s4 e s3-s4 não compartilham nada: nenhuma aresta.
+    assert not {(a, b) for a, b, _ in edges} & {("s1", "s4"), ("s3", "s4")}
+
+
+@pytest.mark.asyncio
+async def test_index_finds_documents_for_same_patient_across_documents():
+    await person_index.index_document(_dm("p-1", "Maria da Conceição Silva", cpf="123.456.789-09"))
+    await person_index.index_document(_dm("p-2", "MARIA DA CONCEICAO SILVA", page_text="Nascimento: 01/02/1980"))
+    await person_index.index_document(_dm("p-3", "Maria Silva", cpf="987.654.321-00"))
+    await person_index.index_document(_dm("p-4", "Joana Pereira"))
+
+    hits = await person_index.find_person_documents(cpf="12345678909")
+    assert [hit["documentid"] for hit in hits] == ["p-1"]
+
+    related = await person_index.same_patient_documents("p-1")
+    assert [hit["documentid"] for hit in related] == ["p-2"]
+
+    # Reindexar troca as entradas do documento.
+    await person_index.index_document(_dm("p-2", "Joana Pereira"))
+    assert await person_index.same_patient_documents("p-1") == []
+
+
+@pytest.mark.asyncio
+async def test_common_blocks_are_skipped_and_identifiers_ranked_first(monkeypatch):
+    monkeypatch.setenv("RELLUNA_PERSON_BLOCK_MAX", "3")
+    for n in range(5):
+        await person_index.index_document(_dm(f"comum-{n}", "Marcos Silva"))
+    await person_index.index_document(_dm("p-alvo", "Maria Silva", cpf="123.456.789-09"))
+
+    # sn:silva:m tem 6 entradas: acima do teto, não gera candidatos.
+    assert await person_index_store.find_by_blocks(["sn:silva:m"], role="patient", max_block=3) == []
+
+    blocks = person_blocking_keys("Maria Silva", cpf="12345678909")
+    top = await person_index_store.find_by_blocks(blocks, role="patient", max_block=10, limit=1)
+    assert [record["documentid"] for record in top] == ["p-alvo"]
+
+    hits = await person_index.find_person_documents("Maria Silva", cpf="12345678909")
+    assert [hit["documentid"] for hit in hits] == ["p-alvo"]
+
+
+def test_people_endpoint(client):
+    import asyncio
+
+    asyncio.run(person_index.index_document(_dm("p-endpoint", "Roberto Carlos Nunes")))
+    res = client.get("/read-model/people/documents", params={"name": "ROBERTO CARLOS NUNES"})
+    assert res.status_code == 200
+    assert res.json()["hits"][0]["documentid"] == "p-endpoint"
+    assert client.get("/read-model/people/documents").status_code == 400
@@ -1,4 +1,5 @@
 import json
+import threading
 from pathlib import Path
 
 import pytest
@@ -13,7 +14,9 @@ from relluna.core.document_memory import (
     ProvenancedString,
 )
 from relluna.core.document_memory.layer1 import ArtefatoTipo, MediaType
+from relluna.infra import processing_event_store
 from relluna.services.ingestion import api
+from relluna.services.observability import INLINE_PAGE_WARNING_LIMIT, PageEventBatch
 from relluna.services.page_extraction.page_pipeline import apply_page_analysis
 from relluna.services.pdf_decomposition import decompose_pdf
 from relluna.services.page_extraction.page_normalizer import NormalizedPageImage
@@ -43,6 +46,28 @@ def _build_pdf_dm(pdf_path: Path) -> DocumentMemory:
     )
 
 
+@pytest.mark.asyncio
+async def test_sync_stage_runs_off_the_event_loop_thread(tmp_path):
+    dm = _build_pdf_dm(tmp_path / "doc.pdf")
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def blocking_stage():
+        threads.append(threading.get_ident())
+        return dm
+
+    async def async_stage():
+        threads.append(threading.get_ident())
+        return dm
+
+    dm = await api._run_stage(dm, "extract_basic", "pytest.engine", blocking_stage)
+    dm = await api._run_stage(dm, "apply_page_analysis", "pytest.engine", async_stage)
+
+    # A etapa síncrona sai do loop; a corrotina continua nele.
+    assert threads[0] != loop_thread
+    assert threads[1] == loop_thread
+
+
 @pytest.mark.asyncio
 async def test_api_stage_processing_events_include_duration_for_critical_stages(tmp_path):
     dm = _build_pdf_dm(tmp_path / "doc.pdf")
@@ -160,7 +185,9 @@ def test_decompose_pdf_records_page_observability(monkeypatch, tmp_path):
     assert isinstance(ocr.detalhes["duration_ms"], float)
 
 
-def test_page_analysis_records_page_index_and_warning_code(tmp_path):
+@pytest.mark.asyncio
+async def test_page_analysis_records_page_index_and_warning_code(tmp_path):
+    processing_event_store.clear()
     dm = _build_pdf_dm(tmp_path / "native.pdf")
     dm.layer2.texto_ocr_literal = ProvenancedString(
         valor="PAGINA 1\ntexto sem marcador clinico\n\nPAGINA 2\nPaciente: MARCOS ANTONIO REIS\nData: 05/03/2024",
@@ -193,12 +220,76 @@ def test_page_analysis_records_page_index_and_warning_code(tmp_path):
 
     apply_page_analysis(dm)
 
-    page_events = [
+    page_events = await processing_event_store.list_events(
+        dm.layer0.documentid,
+        etapa="page_analysis",
+    )
+    assert [event["page_index"] for event in page_events] == [1, 2]
+    assert all(isinstance(event["detalhes"]["duration_ms"], float) for event in page_events)
+    assert page_events[0]["status"] == "warning"
+    assert page_events[0]["detalhes"]["warning_code"] == "page_analysis_no_anchors"
+
+    inline = [
         event
         for event in dm.layer0.processingevents
         if event.etapa == "page_analysis"
     ]
-    assert [event.detalhes["page_index"] for event in page_events] == [1, 2]
-    assert all(isinstance(event.detalhes["duration_ms"], float) for event in page_events)
-    assert page_events[0].status == "warning"
-    assert page_events[0].detalhes["warning_code"] == "page_analysis_no_anchors"
+    summary = inline[-1]
+    assert summary.detalhes["scope"] == "page_summary"
+    assert summary.detalhes["page_count"] == 2
+    assert summary.detalhes["warning_codes"] == {"page_analysis_no_anchors": 1}
+    assert summary.detalhes["pages_with_warnings"] == [1]
+    assert [event.detalhes.get("page_index") for event in inline[:-1]] == [1]
+
+
+@pytest.mark.asyncio
+async def test_page_event_batch_keeps_only_summary_and_capped_warnings_inline(tmp_path):
+    processing_event_store.clear()
+    dm = _build_pdf_dm(tmp_path / "big.pdf")
+
+    batch = PageEventBatch(dm, etapa="page_ocr", engine="pytest.engine")
+    for page_no in range(1, 501):
+        if page_no % 5 == 0:
+            batch.add(status="warning", page_index=page_no, warning_code="ocr_page_timeout")
+        else:
+            batch.add(page_index=page_no, duration_ms=1.0)
+    batch.close(duration_ms=42.0)
+
+    inline = dm.layer0.processingevents
+    assert len(inline) == INLINE_PAGE_WARNING_LIMIT + 1
+    summary = inline[-1]
+    assert summary.status == "warning"
+    assert summary.detalhes["page_count"] == 500
+    assert summary.detalhes["status_counts"] == {"success": 400, "warning": 100}
+    assert summary.detalhes["duration_ms"] == 42.0
+    assert summary.detalhes["pages_with_warnings_truncated"] is True
+
+    pending = await processing_event_store.list_events(dm.layer0.documentid)
+    assert len(pending) == 500
+
+    flushed = await processing_event_store.flush(dm.layer0.documentid)
+    assert flushed == 500
+    assert processing_event_store.pending_events(dm.layer0.documentid) == []
+
+    page_137 = await processing_event_store.list_events(dm.layer0.documentid, page_index=137)
+    assert [event["page_index"] for event in page_137] == [137]
+
+
+@pytest.mark.asyncio
+async def test_list_events_slices_the_log_and_appends_pending_at_the_tail():
+    processing_event_store.clear()
+    processing_event_store.buffer_events("doc-slice", [{"page_index": page, "etapa": "page_ocr"} for page in range(1, 6)])
+    assert await processing_event_store.flush("doc-slice") == 5
+    processing_event_store.buffer_events("doc-slice", [{"page_index": page, "etapa": "page_ocr"} for page in range(6, 9)])
+
+    window = await processing_event_store.list_events("doc-slice", skip=3, limit=4)
+    assert [event["page_index"] for event in window] == [4, 5, 6, 7]
+    assert [event.get("seq") for event in window] == [3, 4, None, None]
+
+    tail = await processing_event_store.list_events("doc-slice", skip=6)
+    assert [event["page_index"] for event in tail] == [7, 8]
+
+    # Falha antes do save: os pendentes são descartados, o log gravado fica.
+    processing_event_store.pop_pending("doc-slice")
+    assert await processing_event_store.flush("doc-slice") == 0
+    assert len(await processing_event_store.list_events("doc-slice")) == 5
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from relluna.core.document_memory import (
+    DocumentMemory,
+    Layer0Custodia,
+    Layer2Evidence,
+    ProvenancedString,
+)
+from relluna.infra import mongo_store
+from relluna.services.orchestration import reprocess
+from relluna.services.page_extraction.page_pipeline import FONTE as PAGE_PIPELINE_FONTE
+from tests.fakes.fake_motor_collection import InMemoryCollection, match_query
+
+
+def _build_dm(documentid: str, page_evidence_fonte: str) -> DocumentMemory:
+    dm = DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid=documentid,
+            contentfingerprint="a" * 64,
+            ingestionagent="pytest",
+        ),
+        layer2=Layer2Evidence(),
+    )
+    dm.layer2.sinais_documentais["page_evidence_v1"] = ProvenancedString(
+        valor="[]",
+        fonte=page_evidence_fonte,
+        metodo="fixture",
+        estado="confirmado",
+        confianca=1.0,
+    )
+    return dm
+
+
+async def _seed(coll: InMemoryCollection, fontes: dict) -> None:
+    for documentid, fonte in fontes.items():
+        await mongo_store.save_document(coll, _build_dm(documentid, fonte))
+
+
+def _config(tmp_path, **overrides) -> reprocess.ReprocessConfig:
+    values = {
+        "stages": ("apply_layer5",),
+        "batch_size": 2,
+        "max_writes_per_sec": None,
+        "checkpoint_path": tmp_path / "checkpoint.json",
+    }
+    values.update(overrides)
+    return reprocess.ReprocessConfig(**values)
+
+
+@pytest.mark.asyncio
+async def test_reprocess_selects_outdated_documents_and_bulk_writes(tmp_path):
+    coll = InMemoryCollection()
+    await _seed(
+        coll,
+        {
+            "doc-1": "services.page_extraction.page_pipeline_v11",
+            "doc-2": PAGE_PIPELINE_FONTE,
+            "doc-3": "services.page_extraction.page_pipeline_v10",
+        },
+    )
+    query = reprocess.build_query(outdated_signals=["page_evidence_v1"])
+    lines = []
+
+    checkpoint = await reprocess.Reprocessor(
+        _config(tmp_path, query=query), coll=coll, inline=True, report=lines.append
+    ).run()
+
+    assert checkpoint.processed == 2
+    assert checkpoint.failed == 0 and checkpoint.conflicts == 0
+    assert checkpoint.watermark == "doc-3"
+    assert coll.docs["doc-1"]["layer5"]["read_models"]
+    assert coll.docs["doc-2"].get("layer5") is None
+    assert coll.docs["doc-1"][mongo_store.REVISION_FIELD] == 2
+    assert [name for name, _ in coll.calls].count("bulk_write") == 1
+    assert lines and lines[-1].startswith("done=2/2")
+
+    saved = json.loads((tmp_path / "checkpoint.json").read_text(encoding="utf-8"))
+    assert saved["watermark"] == "doc-3"
+    assert saved["run_key"] == checkpoint.run_key
+
+
+def _inherited_mongo_client():
+    return mongo_store._client, mongo_store._db
+
+
+def test_workers_drop_the_mongo_client_inherited_from_the_parent(monkeypatch):
+    monkeypatch.setattr(mongo_store, "_client", "cliente-do-pai")
+    monkeypatch.setattr(mongo_store, "_db", "db-do-pai")
+    fork = multiprocessing.get_context("fork")
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=fork, initializer=reprocess._worker_init) as pool:
+        assert pool.submit(_inherited_mongo_client).result() == (None, None)
+    assert mongo_store._client == "cliente-do-pai"
+
+
+@pytest.mark.asyncio
+async def test_reprocess_resumes_after_checkpoint_watermark(tmp_path):
+    coll = InMemoryCollection()
+    await _seed(coll, {f"doc-{idx}": "old" for idx in range(1, 5)})
+    config = _config(tmp_path)
+    reprocess.ReprocessCheckpoint(
+        run_key=reprocess.ReprocessCheckpoint.run_key_for(config.query, config.stages),
+        watermark="doc-2",
+        processed=2,
+    ).save(config.checkpoint_path)
+
+    with ProcessPoolExecutor(max_workers=1, initializer=reprocess._worker_init) as pool:
+        checkpoint = await reprocess.Reprocessor(config, coll=coll, executor=pool, report=lambda _: None).run()
+
+    assert checkpoint.processed == 4
+    assert coll.docs["doc-1"][mongo_store.REVISION_FIELD] == 1
+    assert coll.docs["doc-3"][mongo_store.REVISION_FIELD] == 2
+    assert coll.docs["doc-4"][mongo_store.REVISION_FIELD] == 2
+
+
+@pytest.mark.asyncio
+async def test_outdated_query_skips_a_freshly_processed_document(tmp_path):
+    import fitz
+
+    from relluna.services.ingestion import api
+    from tests.test_fast_path_escalation import _build_pdf_dm
+
+    pdf_path = tmp_path / "fresh.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    for offset, line in enumerate(["Paciente: MARIA DA SILVA SOUZA", "Data: 05/03/2024", "CID F32.1"]):
+        page.insert_text((72, 72 + 20 * offset), line)
+    doc.save(str(pdf_path))
+    doc.close()
+
+    dm = await api._run_infer_pipeline(await api._run_extract_pipeline(_build_pdf_dm(pdf_path)))
+    raw = dm.model_dump(mode="json")
+    produced = [signal for signal in reprocess.SIGNAL_WRITERS if signal in dm.layer2.sinais_documentais]
+    assert {"layout_spans_v1", "page_evidence_v1", "entities_canonical_v1"} <= set(produced)
+
+    assert not match_query(raw, reprocess.build_query(outdated_signals=list(reprocess.SIGNAL_WRITERS)))
+    for signal in produced:
+        raw["layer2"]["sinais_documentais"][signal]["fonte"] = "versao-antiga"
+        assert match_query(raw, reprocess.build_query(outdated_signals=[signal])), signal
+    with pytest.raises(ValueError):
+        reprocess.build_query(outdated_signals=["sinal_inexistente"])
+
+
+@pytest.mark.asyncio
+async def test_reprocess_retries_documents_changed_by_a_concurrent_writer(tmp_path, monkeypatch):
+    coll = InMemoryCollection()
+    await _seed(coll, {"doc-1": "old", "doc-2": "old"})
+    real_bulk = mongo_store.bulk_save_operations
+    bumped = []
+
+    async def racing_bulk(target, ops):
+        if not bumped:
+            # Outro escritor grava doc-1 entre a leitura do lote e o bulk.
+            bumped.append(True)
+            dm = await mongo_store.load_document(coll, "doc-1")
+            dm.layer0.original_filename = "concorrente.pdf"
+            await mongo_store.save_document(coll, dm)
+        return await real_bulk(target, ops)
+
+    monkeypatch.setattr(mongo_store, "bulk_save_operations", racing_bulk)
+    checkpoint = await reprocess.Reprocessor(_config(tmp_path), coll=coll, inline=True, report=lambda _: None).run()
+
+    assert checkpoint.conflicts == 1
+    assert checkpoint.processed == 2 and checkpoint.failed == 0
+    assert coll.docs["doc-1"]["layer0"]["original_filename"] == "concorrente.pdf"
+    assert coll.docs["doc-1"]["layer5"]["read_models"]
+    assert coll.docs["doc-1"][mongo_store.REVISION_FIELD] == 3
+
+
+@pytest.mark.asyncio
+async def test_reprocess_gives_up_after_conflict_retries(tmp_path, monkeypatch):
+    coll = InMemoryCollection()
+    await _seed(coll, {"doc-1": "old"})
+
+    async def always_conflicting(target, ops):
+        return [op.documentid for op in ops]
+
+    monkeypatch.setattr(mongo_store, "bulk_save_operations", always_conflicting)
+    checkpoint = await reprocess.Reprocessor(
+        _config(tmp_path, conflict_retries=1), coll=coll, inline=True, report=lambda _: None
+    ).run()
+
+    assert checkpoint.conflicts == 2
+    assert checkpoint.processed == 0
+    assert checkpoint.failed_ids == ["doc-1"]
+
+
+def test_write_throttle_spaces_batches_to_target_rate():
+    now = [0.0]
+    throttle = reprocess.WriteThrottle(100, clock=lambda: now[0])
+
+    assert throttle.reserve(50) == 0.0
+    assert throttle.reserve(50) == pytest.approx(0.5)
+    now[0] = 2.0
+    assert throttle.reserve(10) == 0.0
+
+    # Orçamento compartilhado: o worker espera pelas escritas do processo principal.
+    shared = multiprocessing.Value("d", 0.0)
+    main = reprocess.WriteThrottle(100, clock=lambda: now[0], shared=shared)
+    worker = reprocess.WriteThrottle(100, clock=lambda: now[0], shared=shared)
+    assert main.reserve(50) == 0.0
+    assert worker.reserve(50) == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_projection_writes_count_against_the_write_budget(tmp_path, monkeypatch):
+    coll = InMemoryCollection()
+    from tests.test_fast_path_escalation import _build_pdf_dm
+
+    pdf_path = tmp_path / "budget.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+    dm = _build_pdf_dm(pdf_path)
+    await mongo_store.save_document(coll, dm)
+    charged = []
+
+    async def spy_wait(self, writes):
+        charged.append(writes)
+
+    monkeypatch.setattr(reprocess.WriteThrottle, "wait", spy_wait)
+    await reprocess.Reprocessor(
+        _config(tmp_path, stages=("apply_layer5", "persist_read_model")), coll=coll, inline=True, report=lambda _: None
+    ).run()
+
+    # Read model (1) antes do bulk do DocumentMemory (1).
+    assert charged[0] == 1 and charged[-1] == 1 and len(charged) >= 2
+
+
+def test_select_stages_range():
+    assert reprocess.select_stages("apply_page_analysis", "apply_entities_canonical_v1") == (
+        "apply_page_analysis",
+        "apply_legal_extraction",
+        "apply_entities_canonical_v1",
+    )
+    with pytest.raises(ValueError):
+        reprocess.select_stages("apply_layer5", "extract_basic")
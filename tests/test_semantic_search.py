@@ -0,0 +1,175 @@
+import numpy as np
+import pytest
+
+from relluna import cli
+from relluna.infra.embeddings import HashingEmbedder, set_embedder
+from relluna.infra.vector_index import BruteForceIndex, IVFIndex, VectorIndex
+from relluna.services.read_model import semantic_search
+from relluna.services.read_model import store as read_model_store
+
+
+@pytest.fixture(autouse=True)
+def _local_embedder():
+    set_embedder(HashingEmbedder())
+    semantic_search.reset_index()
+    yield
+    set_embedder(None)
+    semantic_search.reset_index()
+
+
+def _clustered(n: int, dim: int = 32, clusters: int = 20, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(0, clusters, n)] + 0.1 * rng.normal(size=(n, dim))
+    return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_ivf_recall_and_incremental_updates_survive_reload(tmp_path):
+    vectors = _clustered(2000)
+    ids = [f"v{i}" for i in range(len(vectors))]
+    exact = BruteForceIndex(vectors.shape[1])
+    exact.add(ids, vectors)
+    ivf = IVFIndex.build(tmp_path / "ivf", ids, vectors)
+
+    queries = _clustered(20, seed=11)
+    recall = np.mean(
+        [
+            len({h[0] for h in ivf.search(q, 10)} & {h[0] for h in exact.search(q, 10)}) / 10
+            for q in queries
+        ]
+    )
+    assert recall >= 0.9
+
+    ivf.add(["novo"], queries[:1])
+    ivf.delete(["v0"])
+    ivf.save()
+
+    reloaded = IVFIndex(tmp_path / "ivf", vectors.shape[1])
+    assert len(reloaded) == 2000
+    assert reloaded.search(queries[0], 1)[0][0] == "novo"
+    assert "v0" not in reloaded.ids()
+
+
+def test_vector_index_promotes_to_ann_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELLUNA_VECTOR_ANN_THRESHOLD", "100")
+    vectors = _clustered(150)
+    index = VectorIndex(tmp_path)
+    index.add([f"a{i}" for i in range(60)], vectors[:60], embedder="fake")
+    assert index.kind == "brute_force"
+    index.add([f"a{i}" for i in range(60, 150)], vectors[60:], embedder="fake")
+    assert index.kind == "ivf"
+
+    assert index.delete_prefix("a1") == 61  # a1, a10..a19, a100..a149
+    reopened = VectorIndex(tmp_path)
+    assert reopened.kind == "ivf" and len(reopened) == 89
+    assert reopened.search(vectors[5], 1, embedder="fake")[0][0] == "a5"
+    # Embedder diferente: espaço vetorial incompatível, nada é devolvido.
+    assert reopened.search(vectors[5], 1, embedder="outro") == []
+
+
+def test_mutations_append_to_the_log_and_compact_into_a_new_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELLUNA_VECTOR_LOG_MAX_OPS", "3")
+    vectors = _clustered(30)
+    index = VectorIndex(tmp_path)
+    index.add([f"page:d1:{i}" for i in range(10)], vectors[:10], embedder="fake")
+    index.add([f"page:d2:{i}" for i in range(10)], vectors[10:20], embedder="fake")
+
+    # Só o log cresce: nenhum snapshot gravado ainda.
+    assert not (tmp_path / "index.json").exists()
+    assert len((tmp_path / "deltas.0.log").read_text().splitlines()) == 2
+    assert VectorIndex(tmp_path).search(vectors[12], 1, embedder="fake")[0][0] == "page:d2:2"
+
+    assert index.delete_prefix("page:d1:") == 10
+    assert index.generation == 1
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith(".")) == ["brute_force.1", "index.json"]
+    reopened = VectorIndex(tmp_path)
+    assert len(reopened) == 10
+    assert reopened.search(vectors[3], 1, embedder="fake")[0][0].startswith("page:d2:")
+
+
+def test_writers_in_separate_instances_see_each_other(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELLUNA_VECTOR_LOG_MAX_OPS", "4")
+    vectors = _clustered(40)
+    first = VectorIndex(tmp_path)
+    second = VectorIndex(tmp_path)  # outro processo abrindo o mesmo diretório
+
+    for n in range(4):
+        writer = first if n % 2 == 0 else second
+        writer.add([f"doc:{n}"], vectors[n : n + 1], embedder="fake")
+    # A quarta escrita compactou (geração 1); o outro recarrega o snapshot.
+    second.add(["doc:4"], vectors[4:5], embedder="fake")
+    assert first.search(vectors[4], 1, embedder="fake")[0][0] == "doc:4"
+    assert len(first) == len(second) == len(VectorIndex(tmp_path)) == 5
+
+
+def test_reindex_vectors_rebuilds_from_read_models(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("RELLUNA_VECTOR_INDEX_DIR", str(tmp_path))
+    semantic_search.reset_index()
+    stale = VectorIndex(tmp_path)
+    stale.add(["doc:sumiu"], _clustered(1, dim=256), embedder=HashingEmbedder().name)
+
+    docs = {
+        "rb-1": {"document_id": "rb-1", "title": "Atestado médico", "summary": "Afastamento por lombalgia"},
+        "rb-2": {"document_id": "rb-2", "title": "Recibo", "summary": "Pagamento de aluguel"},
+    }
+    monkeypatch.setattr(read_model_store, "_MEMORY_READ_MODEL_STORE", dict(docs))
+    assert cli.main(["reindex-vectors"]) == 0
+    assert "documents=2 units=2" in capsys.readouterr().out
+
+    reopened = VectorIndex(tmp_path)
+    assert sorted(reopened.backend.ids()) == ["doc:rb-1", "doc:rb-2"]
+
+
+def _loader(docs, loaded=None):
+    by_id = {doc["document_id"]: doc for doc in docs}
+
+    async def load(document_ids):
+        if loaded is not None:
+            loaded.append(list(document_ids))
+        return [by_id[doc_id] for doc_id in document_ids if doc_id in by_id]
+
+    return load
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_ranks_semantic_and_lexical_matches():
+    docs = [
+        {"document_id": "sem-1", "title": "Atestado médico", "summary": "Afastamento por lombalgia crônica", "patient": "ANA"},
+        {"document_id": "sem-2", "title": "Recibo", "summary": "Pagamento de aluguel do apartamento", "patient": "JOAO"},
+        {"document_id": "sem-3", "title": "Laudo", "summary": "Exame de imagem da coluna lombar", "patient": "ANA"},
+    ]
+    for doc in docs:
+        await semantic_search.index_document(doc)
+
+    loaded = []
+    hits = await semantic_search.semantic_search(_loader(docs, loaded), "lombalgia afastamento", limit=3)
+    assert hits[0].documentid == "sem-1"
+    assert hits[0].semantic_score > 0 and hits[0].bm25_score > 0
+    # Só os candidatos do índice vetorial são carregados, numa única leitura.
+    assert loaded == [["sem-1", "sem-2", "sem-3"]]
+
+    assert await semantic_search.remove_document("sem-1") == 1
+    hits = await semantic_search.semantic_search(_loader(docs[1:]), "lombalgia afastamento", limit=3)
+    assert "sem-1" not in {hit.documentid for hit in hits}
+
+
+def test_semantic_search_endpoint(client):
+    doc = {
+        "document_id": "sem-endpoint",
+        "title": "Parecer psiquiátrico",
+        "summary": "Episódio depressivo moderado, CID F32.1",
+        "search_text": "parecer psiquiatrico episodio depressivo",
+    }
+    read_model_store._MEMORY_READ_MODEL_STORE["sem-endpoint"] = doc
+    try:
+        import asyncio
+
+        asyncio.run(semantic_search.index_document(doc))
+        res = client.get("/read-model/semantic_search", params={"q": "depressão episódio depressivo", "limit": 5})
+    finally:
+        read_model_store._MEMORY_READ_MODEL_STORE.pop("sem-endpoint", None)
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["embedder"] == "hashing-256"
+    assert body["hits"][0]["documentid"] == "sem-endpoint"
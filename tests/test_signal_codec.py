@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from bson import ObjectId
+
+from relluna.core.document_memory import (
+    DocumentMemory,
+    Layer0Custodia,
+    Layer2Evidence,
+    ProvenancedString,
+)
+from relluna.infra import mongo_store, signal_codec
+from relluna.services.evidence.signals import load_critical_signal_json
+from tests.fakes.fake_motor_collection import InMemoryCollection
+
+
+def _spans(count: int):
+    return [
+        {"page": 1 + idx // 50, "text": f"token{idx % 37}", "bbox": [10.0, 20.0 + idx, 80.0, 30.0 + idx]}
+        for idx in range(count)
+    ]
+
+
+def _build_dm() -> DocumentMemory:
+    dm = DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(documentid="codec-doc", contentfingerprint="f" * 64, ingestionagent="pytest"),
+        layer2=Layer2Evidence(),
+    )
+    dm.layer2.sinais_documentais["layout_spans_v1"] = ProvenancedString(
+        valor=json.dumps(_spans(2000)),
+        fonte="pytest",
+        metodo="fixture",
+        estado="confirmado",
+        confianca=1.0,
+    )
+    dm.layer2.sinais_documentais["extraction_strategy_v1"] = ProvenancedString(
+        valor=json.dumps({"strategy": "native"}),
+        fonte="pytest",
+        metodo="fixture",
+        estado="confirmado",
+        confianca=1.0,
+    )
+    return dm
+
+
+@pytest.fixture(autouse=True)
+def _gzip_codec(monkeypatch):
+    monkeypatch.setenv("RELLUNA_SIGNAL_CODEC", "gzip")
+    monkeypatch.setenv("RELLUNA_SIGNAL_CODEC_MIN_BYTES", "1024")
+
+
+@pytest.mark.asyncio
+async def test_large_signals_are_stored_compressed_and_decoded_lazily():
+    coll = InMemoryCollection()
+    original = _build_dm()
+    expected_spans = json.loads(original.layer2.sinais_documentais["layout_spans_v1"].valor)
+    await mongo_store.save_document(coll, original)
+
+    stored = coll.docs["codec-doc"]["layer2"]["sinais_documentais"]
+    meta = stored["layout_spans_v1"]["valor_codec"]
+    assert stored["layout_spans_v1"]["valor"] is None
+    assert meta["codec"] == "gzip"
+    assert isinstance(meta["data"], bytes)
+    assert meta["encoded_bytes"] < meta["raw_bytes"] / 4
+    assert stored["extraction_strategy_v1"]["valor"] == json.dumps({"strategy": "native"})
+
+    dm = await mongo_store.load_document(coll, "codec-doc")
+    raw_entry = dict.__getitem__(dm.layer2.sinais_documentais, "layout_spans_v1")
+    assert raw_entry.valor is None
+
+    assert load_critical_signal_json(dm, "layout_spans_v1") == expected_spans
+    assert dict.__getitem__(dm.layer2.sinais_documentais, "layout_spans_v1").valor is not None
+
+    # Decodificar para leitura não suja o documento.
+    op = await mongo_store.save_document(coll, dm)
+    assert op.kind == "noop"
+
+
+@pytest.mark.asyncio
+async def test_copies_and_dumps_of_lazy_signals_see_decoded_payloads():
+    coll = InMemoryCollection()
+    original = _build_dm()
+    expected = original.layer2.sinais_documentais["layout_spans_v1"].valor
+    await mongo_store.save_document(coll, original)
+
+    for read in (
+        lambda dm: dict(dm.layer2.sinais_documentais)["layout_spans_v1"].valor,
+        lambda dm: {**dm.layer2.sinais_documentais}["layout_spans_v1"].valor,
+        lambda dm: dm.layer2.model_dump(mode="json")["sinais_documentais"]["layout_spans_v1"]["valor"],
+        lambda dm: json.loads(dm.model_dump_json())["layer2"]["sinais_documentais"]["layout_spans_v1"]["valor"],
+    ):
+        dm = await mongo_store.load_document(coll, "codec-doc")
+        assert dict.__getitem__(dm.layer2.sinais_documentais, "layout_spans_v1").valor is None
+        assert read(dm) == expected
+
+    # O dirty-tracking continua lendo a forma comprimida: nada a regravar.
+    op = await mongo_store.save_document(coll, dm)
+    assert op.kind == "noop"
+
+
+@pytest.mark.asyncio
+async def test_corrupted_payload_fails_integrity_check():
+    coll = InMemoryCollection()
+    await mongo_store.save_document(coll, _build_dm())
+    meta = coll.docs["codec-doc"]["layer2"]["sinais_documentais"]["layout_spans_v1"]["valor_codec"]
+    meta["sha256"] = "0" * 64
+
+    dm = await mongo_store.load_document(coll, "codec-doc")
+    with pytest.raises(signal_codec.SignalIntegrityError):
+        dm.layer2.sinais_documentais["layout_spans_v1"]
+
+
+@pytest.mark.asyncio
+async def test_payloads_above_threshold_are_offloaded_to_gridfs(monkeypatch):
+    files = {}
+
+    class _Stream:
+        def __init__(self, data):
+            self._data = data
+
+        async def read(self):
+            return self._data
+
+    class _Bucket:
+        async def upload_from_stream(self, filename, data, metadata=None):
+            file_id = ObjectId()
+            files[file_id] = data
+            return file_id
+
+        async def open_download_stream(self, file_id):
+            return _Stream(files[file_id])
+
+    monkeypatch.setenv("RELLUNA_SIGNAL_OFFLOAD_MIN_BYTES", "512")
+    monkeypatch.setattr(signal_codec, "_gridfs_bucket", lambda db: _Bucket())
+
+    coll = InMemoryCollection()
+    original = _build_dm()
+    expected = original.layer2.sinais_documentais["layout_spans_v1"].valor
+    await mongo_store.save_document(coll, original)
+
+    meta = coll.docs["codec-doc"]["layer2"]["sinais_documentais"]["layout_spans_v1"]["valor_codec"]
+    assert "data" not in meta
+    assert ObjectId(meta["gridfs_id"]) in files
+
+    dm = await mongo_store.load_document(coll, "codec-doc")
+    assert dm.layer2.sinais_documentais["layout_spans_v1"].valor == expected
+
+
+@pytest.mark.asyncio
+async def test_page_signals_are_compressed_with_the_default_settings(monkeypatch):
+    for name in ("RELLUNA_SIGNAL_CODEC", "RELLUNA_SIGNAL_CODEC_MIN_BYTES", "RELLUNA_SIGNAL_OFFLOAD_MIN_BYTES"):
+        monkeypatch.delenv(name, raising=False)
+    assert signal_codec.configured_codec() in {"zstd", "gzip"}
+    assert signal_codec.offload_min_bytes() > 0
+
+    dm = _build_dm()
+    pages = [{"page": page, "page_text": "Atesto para os devidos fins. " * 40} for page in range(1, 30)]
+    dm.layer2.sinais_documentais["page_evidence_v1"] = ProvenancedString(
+        valor=json.dumps(pages), fonte="pytest", metodo="fixture", estado="confirmado", confianca=1.0
+    )
+    coll = InMemoryCollection()
+    await mongo_store.save_document(coll, dm)
+
+    stored = coll.docs["codec-doc"]["layer2"]["sinais_documentais"]["page_evidence_v1"]
+    assert stored["valor"] is None
+    assert stored["valor_codec"]["encoded_bytes"] < stored["valor_codec"]["raw_bytes"] / 4
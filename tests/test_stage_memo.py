@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+    ProvenancedString,
+)
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.infra import stage_memo_store
+from relluna.services.ingestion import api
+from relluna.services.orchestration import stages
+from relluna.services.page_extraction import page_pipeline
+
+_SPANS = [
+    {"page": 1, "text": "Paciente: MARIA SILVA", "bbox": [10, 10, 150, 20]},
+    {"page": 1, "text": "Prestador: DRA ANA LIMA", "bbox": [10, 30, 170, 40]},
+    {"page": 1, "text": "CRM 12345", "bbox": [10, 50, 90, 60]},
+    {"page": 1, "text": "Data: 05/03/2024", "bbox": [10, 70, 120, 80]},
+    {"page": 1, "text": "CID S83.2", "bbox": [10, 90, 80, 100]},
+]
+
+
+def _build_dm(pdf_path: Path) -> DocumentMemory:
+    return DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid="memo-doc",
+            contentfingerprint="f" * 64,
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="test",
+            original_filename=pdf_path.name,
+            mimetype="application/pdf",
+            processingevents=[],
+        ),
+        layer1=Layer1Artefatos(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[
+                ArtefatoBruto(
+                    id="memo-doc",
+                    tipo=ArtefatoTipo.original,
+                    uri=str(pdf_path),
+                    nome=pdf_path.name,
+                    mimetype="application/pdf",
+                    tamanho_bytes=pdf_path.stat().st_size,
+                )
+            ],
+        ),
+        layer2=Layer2Evidence(),
+    )
+
+
+def _reload(dm: DocumentMemory) -> DocumentMemory:
+    return DocumentMemory.model_validate(dm.model_dump(mode="json"))
+
+
+def _last_run(dm: DocumentMemory, stage: str):
+    return [event for event in dm.layer0.processingevents if event.etapa == stage and event.status == "success"][-1]
+
+
+@pytest.fixture
+def memo_pipeline(monkeypatch, tmp_path):
+    pdf_path = tmp_path / "memo.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4\n")
+    calls = {"extract_basic": 0, "decompose": 0}
+
+    def fake_extract_basic(current: DocumentMemory) -> DocumentMemory:
+        calls["extract_basic"] += 1
+        current.layer2.sinais_documentais["layout_spans_v1"] = ProvenancedString(
+            valor=json.dumps(_SPANS, ensure_ascii=False),
+            fonte="pytest",
+            metodo="fixture",
+            estado="confirmado",
+            confianca=1.0,
+        )
+        return current
+
+    def fake_decompose(current: DocumentMemory) -> DocumentMemory:
+        calls["decompose"] += 1
+        return current
+
+    monkeypatch.setattr(api, "USE_ADAPTIVE_PIPELINE", False)
+    monkeypatch.setattr(api, "extract_basic", fake_extract_basic)
+    monkeypatch.setattr(api, "decompose_pdf_into_subdocuments", fake_decompose)
+    return _build_dm(pdf_path), calls
+
+
+@pytest.mark.asyncio
+async def test_rerun_with_same_inputs_and_versions_restores_outputs(memo_pipeline):
+    dm, calls = memo_pipeline
+    first = await api._run_extract_pipeline(dm)
+    expected = first.layer2.model_dump(mode="json")["sinais_documentais"]
+
+    second = await api._run_extract_pipeline(_reload(first))
+
+    assert calls == {"extract_basic": 1, "decompose": 1}
+    for stage in ("extract_basic", "apply_page_analysis", "apply_entities_canonical_v1"):
+        detalhes = _last_run(second, stage).detalhes
+        assert detalhes["memoized"] is True
+        assert detalhes["engine_version"] == stages.stage_version(stage)
+    assert second.layer2.model_dump(mode="json")["sinais_documentais"] == expected
+
+
+@pytest.mark.asyncio
+async def test_engine_version_bump_recomputes_that_stage_and_keeps_upstream(memo_pipeline, monkeypatch):
+    dm, calls = memo_pipeline
+    first = await api._run_extract_pipeline(dm)
+
+    runs = []
+    real_page_analysis = api.apply_page_analysis
+
+    def tracking_page_analysis(current: DocumentMemory) -> DocumentMemory:
+        runs.append(current.layer0.documentid)
+        return real_page_analysis(current)
+
+    monkeypatch.setattr(api, "apply_page_analysis", tracking_page_analysis)
+    monkeypatch.setattr(page_pipeline, "FONTE", page_pipeline.FONTE + "-next")
+    stages.stage_version.cache_clear()
+    try:
+        second = await api._run_extract_pipeline(_reload(first))
+    finally:
+        stages.stage_version.cache_clear()
+
+    assert runs == ["memo-doc"]
+    assert calls == {"extract_basic": 1, "decompose": 1}
+    assert "memoized" not in _last_run(second, "apply_page_analysis").detalhes
+    for stage in ("extract_basic", "decompose_pdf_into_subdocuments", "apply_legal_extraction"):
+        assert _last_run(second, stage).detalhes["memoized"] is True
+
+
+@pytest.mark.asyncio
+async def test_infer_rerun_is_memoized_including_layer3(memo_pipeline):
+    dm, _ = memo_pipeline
+    dm = await api._run_extract_pipeline(dm)
+    first = await api._run_infer_pipeline(dm)
+    expected_layer3 = first.layer3.model_dump(mode="json")
+
+    second = await api._run_infer_pipeline(_reload(first))
+
+    for stage in ("timeline_seed_v2", "infer_layer3", "kausal_engine", "apply_layer4", "apply_layer5"):
+        assert _last_run(second, stage).detalhes.get("memoized") is True, stage
+    assert second.layer3.model_dump(mode="json") == expected_layer3
+
+
+@pytest.mark.asyncio
+async def test_memo_can_be_disabled(memo_pipeline, monkeypatch):
+    dm, calls = memo_pipeline
+    monkeypatch.setenv("RELLUNA_STAGE_MEMO", "0")
+    first = await api._run_extract_pipeline(dm)
+    await api._run_extract_pipeline(_reload(first))
+
+    assert calls == {"extract_basic": 2, "decompose": 2}
+
+
+@pytest.mark.asyncio
+async def test_decompose_cut_by_deadline_is_not_memoized(memo_pipeline, monkeypatch):
+    dm, calls = memo_pipeline
+
+    def partial_decompose(current: DocumentMemory) -> DocumentMemory:
+        calls["decompose"] += 1
+        current.layer2.sinais_documentais["deferred_pages_v1"] = ProvenancedString(
+            valor=json.dumps({"version": 1, "reason": "document_deadline", "pages": [3]}),
+            fonte="test",
+            metodo="deferred_pages_v1",
+            estado="confirmado",
+            confianca=1.0,
+        )
+        return current
+
+    monkeypatch.setattr(api, "decompose_pdf_into_subdocuments", partial_decompose)
+    first = await api._run_extract_pipeline(dm)
+    second = await api._run_extract_pipeline(_reload(first))
+
+    assert calls["decompose"] == 2
+    assert "memoized" not in _last_run(second, "decompose_pdf_into_subdocuments").detalhes
+
+
+@pytest.mark.asyncio
+async def test_memo_stores_compressed_outputs_with_digests_and_expires(memo_pipeline, monkeypatch):
+    dm, calls = memo_pipeline
+    first = await api._run_extract_pipeline(dm)
+
+    record = await stage_memo_store.get("memo-doc", "apply_page_analysis")
+    assert "outputs" not in record
+    assert record["outputs_codec"]["codec"] in {"gzip", "zstd"}
+    assert record["output_digests"] == stages.output_digests(first, "apply_page_analysis")
+    assert "page_evidence_v1" in json.dumps(stage_memo_store.load_outputs_payload(record))
+
+    # Expirado (TTL) vale como ausente: a etapa roda de novo.
+    stage_memo_store.clear()
+    monkeypatch.setenv("RELLUNA_STAGE_MEMO_TTL_HOURS", "0")
+    second = await api._run_extract_pipeline(_reload(first))
+    await api._run_extract_pipeline(_reload(second))
+    assert calls["extract_basic"] == 3
+
+
+@pytest.mark.asyncio
+async def test_suppressed_scope_neither_reads_nor_writes_the_memo(memo_pipeline):
+    dm, calls = memo_pipeline
+    with stage_memo_store.suppressed():
+        first = await api._run_extract_pipeline(dm)
+    assert await stage_memo_store.get("memo-doc", "extract_basic") is None
+
+    await api._run_extract_pipeline(_reload(first))
+    with stage_memo_store.suppressed():
+        await api._run_extract_pipeline(_reload(first))
+    assert calls == {"extract_basic": 3, "decompose": 3}
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+
+from relluna.services.page_extraction import text_scanner
+from relluna.services.page_extraction.page_taxonomy import classify_page_subtype
+from relluna.services.page_extraction.text_scanner import SCAN_PATTERNS, scan_text
+
+_PAGE = (
+    "HOSPITAL DAS CLÍNICAS - Receituário\n"
+    "Paciente: MARIA DA SILVA SOUZA  CPF 529.982.247-25 / 52998224725\n"
+    "CRM-SP 123456  CID F32.1  Data: 01/03/2024  2024-03-01T10:00:00Z\n"
+    "Valor R$ 1.234,56  Telefone (11) 98765-4321\n"
+    "São Paulo, 12 de março de 2024. Afastado(a) por 15 dias.\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    text_scanner.clear_scan_cache()
+    yield
+    text_scanner.clear_scan_cache()
+
+
+def test_typed_matches_equal_individual_regex_scans():
+    scan = scan_text(_PAGE)
+    for kind, pattern in SCAN_PATTERNS.items():
+        assert scan.findall(kind) == pattern.findall(_PAGE), kind
+        assert [(m.start, m.end) for m in scan.matches(kind)] == [m.span() for m in pattern.finditer(_PAGE)]
+
+
+def test_scan_is_memoized_per_text_content():
+    first = scan_text(_PAGE)
+    assert scan_text("".join(list(_PAGE))) is first
+    assert first.matches("crm") is first.matches("crm")
+    assert scan_text(_PAGE + " ") is not first
+
+
+def test_keyword_presence_matches_substring_checks(monkeypatch):
+    text_scanner.register_keywords(["afastado(a)", "receituário", "nb", "sao paulo"])
+    lowered = _PAGE.lower()
+    expected = {word for word in text_scanner._KEYWORDS if word in lowered}
+
+    assert set(scan_text(_PAGE).keywords) == expected
+
+    monkeypatch.setattr(text_scanner, "ahocorasick", None)
+    monkeypatch.setattr(text_scanner, "_AUTOMATON", None)
+    text_scanner.clear_scan_cache()
+    assert set(scan_text(_PAGE).keywords) == expected
+    assert scan_text(_PAGE).has("não registrada") is False
+
+
+def test_char_counts_follow_str_predicates():
+    text = "Ab1 ²½\tç_!"
+    assert scan_text(text).char_counts() == (
+        sum(c.isalpha() for c in text),
+        sum(c.isdigit() for c in text),
+        sum(c.isspace() for c in text),
+    )
+
+
+def test_taxonomy_uses_shared_scan():
+    result = classify_page_subtype(_PAGE)
+    assert result["value"] in {"atestado_medico", "receituario", "documento_composto"}
+    assert scan_text(_PAGE)._keywords is not None
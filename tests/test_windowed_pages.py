@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import fitz
+import pytest
+
+from relluna.core.document_memory import (
+    ArtefatoBruto,
+    DocumentMemory,
+    Layer0Custodia,
+    Layer1Artefatos,
+    Layer2Evidence,
+    MediaType,
+    OriginType,
+)
+from relluna.core.document_memory.layer1 import ArtefatoTipo
+from relluna.services.page_extraction.page_normalizer import NormalizedPageImage
+from relluna.services.page_extraction.page_ocr import OCRPage, OCRSpan
+from relluna.services.page_extraction.page_pipeline import apply_page_analysis
+from relluna.services.page_extraction.page_spool import PageSpool
+from relluna.services.pdf_decomposition import decompose_pdf
+
+_NATIVE = (
+    "ATESTADO MÉDICO. Atesto para os devidos fins que o paciente MARIA SILVA, CPF 123.456.789-09, "
+    "esteve sob meus cuidados em 05/03/2024, necessitando de afastamento por 10 dias. CID M54.5. "
+    "Hospital Central, DRA ANA LIMA, CRM 12345 SP."
+)
+
+
+def _pdf(path: Path, pages: int, *, native_every: int) -> Path:
+    doc = fitz.open()
+    for index in range(pages):
+        page = doc.new_page()
+        if native_every and index % native_every == 0:
+            page.insert_textbox(fitz.Rect(40, 40, 560, 400), f"{_NATIVE} Página {index + 1}.", fontsize=10)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def _dm(path: Path) -> DocumentMemory:
+    return DocumentMemory(
+        version="v0.2.0",
+        layer0=Layer0Custodia(
+            documentid="window-doc",
+            contentfingerprint="b" * 64,
+            ingestiontimestamp=datetime.now(timezone.utc),
+            ingestionagent="test",
+            processingevents=[],
+        ),
+        layer1=Layer1Artefatos(
+            midia=MediaType.documento,
+            origem=OriginType.digital_nativo,
+            artefatos=[
+                ArtefatoBruto(
+                    id="window-doc",
+                    tipo=ArtefatoTipo.original,
+                    uri=str(path),
+                    nome=path.name,
+                    mimetype="application/pdf",
+                    tamanho_bytes=path.stat().st_size,
+                )
+            ],
+        ),
+        layer2=Layer2Evidence(),
+    )
+
+
+@pytest.fixture
+def fake_engines(monkeypatch):
+    calls = []
+
+    def fake_normalize(pdf_path, out_dir=None, dpi=100, lang="por", pages=None):
+        with fitz.open(pdf_path) as doc:
+            numbers = list(pages) if pages is not None else list(range(1, doc.page_count + 1))
+        calls.append(numbers)
+        return [
+            NormalizedPageImage(
+                page=n,
+                image_path=f"/render/page_{n:03d}.png",
+                width=600,
+                height=800,
+                rotation_applied=0,
+                source_pdf_rotation=0,
+                orientation_score=1.0,
+                warnings=[{"code": "ocr_orientation_timeout", "page": n}] if n == 2 else [],
+            )
+            for n in numbers
+        ]
+
+    def fake_ocr(page_images):
+        return [
+            OCRPage(
+                page=item["page"],
+                text=f"Paciente: JOAO PEREIRA Data: 0{item['page']}/01/2024 página {item['page']}",
+                spans=[OCRSpan(page=item["page"], text="Paciente: JOAO PEREIRA", bbox=[10.0, 10.0, 200.0, 30.0])],
+                width=600,
+                height=800,
+            )
+            for item in page_images
+        ]
+
+    monkeypatch.setattr(decompose_pdf, "normalize_pdf_pages", fake_normalize)
+    monkeypatch.setattr(decompose_pdf, "ocr_pages", fake_ocr)
+    return calls
+
+
+def _signals(dm: DocumentMemory) -> dict:
+    return {key: signal.valor for key, signal in dm.layer2.sinais_documentais.items()}
+
+
+@pytest.mark.parametrize("native_every", [0, 2])
+def test_windowed_decomposition_matches_full_run(tmp_path, monkeypatch, fake_engines, native_every):
+    path = _pdf(tmp_path / "dossie.pdf", 7, native_every=native_every)
+
+    monkeypatch.setenv("RELLUNA_PAGE_WINDOW_THRESHOLD", "1000")
+    full = apply_page_analysis(decompose_pdf.decompose_pdf_into_subdocuments(_dm(path)))
+    assert fake_engines == [list(range(1, 8))]
+
+    fake_engines.clear()
+    monkeypatch.setenv("RELLUNA_PAGE_WINDOW_THRESHOLD", "3")
+    monkeypatch.setenv("RELLUNA_PAGE_WINDOW", "3")
+    windowed = apply_page_analysis(decompose_pdf.decompose_pdf_into_subdocuments(_dm(path)))
+    assert fake_engines == [[1, 2, 3], [4, 5, 6], [7]]
+
+    assert _signals(windowed) == _signals(full)
+    assert windowed.layer2.texto_ocr_literal.valor == full.layer2.texto_ocr_literal.valor
+    windowing = [e for e in windowed.layer0.processingevents if e.etapa == "page_windowing"]
+    assert windowing[0].detalhes == {"page_count": 7, "window_size": 3, "windows": 3}
+
+
+def test_windowed_decomposition_removes_its_render_dir(tmp_path, monkeypatch, fake_engines):
+    out_dirs = []
+    fake_normalize = decompose_pdf.normalize_pdf_pages
+
+    def spy(pdf_path, out_dir=None, **kwargs):
+        out_dirs.append(out_dir)
+        return fake_normalize(pdf_path, out_dir=out_dir, **kwargs)
+
+    monkeypatch.setattr(decompose_pdf, "normalize_pdf_pages", spy)
+    monkeypatch.setenv("RELLUNA_PAGE_WINDOW_THRESHOLD", "3")
+    monkeypatch.setenv("RELLUNA_PAGE_WINDOW", "3")
+    decompose_pdf.decompose_pdf_into_subdocuments(_dm(_pdf(tmp_path / "dossie.pdf", 7, native_every=0)))
+
+    assert len(set(out_dirs)) == 1 and not Path(out_dirs[0]).exists()
+
+
+def test_page_spool_reads_pages_and_reports_schema_errors():
+    dm = _dm(Path(__file__))
+    with PageSpool(dm=dm) as spool:
+        spool.append("page_evidence_v1", {"page": 1, "page_text": "a"}, page=1)
+        spool.append("page_evidence_v1", {"page": "x"}, page=2)
+        spool.append("layout_spans_v1", {"page": 2, "text": "b"}, page=2)
+        spool.append("layout_spans_v1", {"page": 2, "text": "c"}, page=2)
+
+        assert spool.read_page("layout_spans_v1", 2) == [{"page": 2, "text": "b"}, {"page": 2, "text": "c"}]
+        assert spool.pages("page_evidence_v1") == [1, 2]
+        assert json.loads(spool.dump("page_evidence_v1")) == [{"page": 1, "page_text": "a"}, {"page": "x"}]
+
+    warnings = json.loads(dm.layer2.sinais_documentais["signal_validation_warnings_v1"].valor)
+    assert warnings[0]["details"]["first_error"]["loc"] == [1, "page"]